@@ -9,13 +9,33 @@ from golem.environments.environment import SupportStatus
 
 
 class App(object):
-    """ Basic Golem App Representation """
-    def __init__(self):
-        self.env = None  # inherit from Environment
-        self.builder = None  # inherit from TaskBuilder
-        self.task_type_info = None  # inherit from TaskTypeInfo
-        self.benchmark = None  # inherit from Benchmark
-        self.benchmark_builder = None  # inherit from TaskBuilder
+    """ Basic Golem App Representation. The classes are given by their dotted
+    paths and imported on first access, so that registering apps doesn't
+    load all of their modules. """
+    FIELDS = (
+        'env',  # inherit from Environment
+        'builder',  # inherit from TaskBuilder
+        'task_type_info',  # inherit from TaskTypeInfo
+        'benchmark',  # inherit from Benchmark
+        'benchmark_builder',  # inherit from TaskBuilder
+    )
+
+    def __init__(self, **paths: str) -> None:
+        self._paths = paths
+
+    def __getattr__(self, name):
+        # Called only for attributes which haven't been loaded yet
+        if name.startswith('_') or name not in self.FIELDS:
+            raise AttributeError(name)
+        path = self._paths.get(name)
+        value = _import_class(path) if path else None
+        setattr(self, name, value)
+        return value
+
+
+def _import_class(full_name: str):
+    package, name = full_name.rsplit('.', 1)
+    return getattr(import_module(package), name)
 
 
 class AppsManager(object):
@@ -36,16 +56,9 @@ class AppsManager(object):
             parser.read_file(config_file)
 
         for section in parser.sections():
-            app = App()
-            for opt in vars(app):
-
-                full_name = parser.get(section, opt)
-                package, name = full_name.rsplit('.', 1)
-                module = import_module(package)
-
-                setattr(app, opt, getattr(module, name))
-
-            self.apps[section] = app
+            self.apps[section] = App(**{
+                field: parser.get(section, field) for field in App.FIELDS
+            })
 
     def get_env_list(self):
         return [app.env() for app in self.apps.values()]
@@ -14,15 +14,25 @@ class MetricEdgeFactor:
     ## ======================= ##
     ##
     @staticmethod
-    def compute_metrics( image1, image2 ):
-
+    def prepare_reference( image1 ):
+        """ Edge map of the reference image, shared by many comparisons. """
         image1 = image1.convert("RGB")
+        edged_image1 = image1.filter( ImageFilter.FIND_EDGES )
+        return numpy.array( edged_image1 )
+
+    ## ======================= ##
+    ##
+    @staticmethod
+    def compute_metrics( image1, image2, reference=None ):
+
+        if reference is None:
+            reference = MetricEdgeFactor.prepare_reference( image1 )
+
         image2 = image2.convert("RGB")
 
-        edged_image1 = image1.filter( ImageFilter.FIND_EDGES )
         edged_image2 = image2.filter( ImageFilter.FIND_EDGES )
 
-        np_image1 = numpy.array( edged_image1 )
+        np_image1 = reference
         np_image2 = numpy.array( edged_image2 )
 
         ref_edge_factor = numpy.mean( np_image1 )
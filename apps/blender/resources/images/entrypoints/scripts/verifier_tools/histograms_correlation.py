@@ -7,12 +7,22 @@ import sys
 class MetricHistogramsCorrelation:
 
     @staticmethod
-    def compute_metrics( image1, image2):
+    def prepare_reference(image1):
+        """ Normalized histogram of the reference image, shared by many
+        comparisons. """
+        opencv_image_1 = cv2.cvtColor(numpy.array(image1), cv2.COLOR_RGB2BGR)
+        return MetricHistogramsCorrelation.calculate_normalized_histogram(
+            opencv_image_1)
+
+    @staticmethod
+    def compute_metrics( image1, image2, reference=None):
         if image1.size != image2.size:
             raise Exception("Image sizes differ")
-        opencv_image_1 = cv2.cvtColor(numpy.array(image1), cv2.COLOR_RGB2BGR)
+        if reference is None:
+            reference = MetricHistogramsCorrelation.prepare_reference(image1)
         opencv_image_2 = cv2.cvtColor(numpy.array(image2), cv2.COLOR_RGB2BGR)
-        return {"histograms_correlation": MetricHistogramsCorrelation.compare_histograms(opencv_image_1, opencv_image_2)}
+        histogram_b = MetricHistogramsCorrelation.calculate_normalized_histogram(opencv_image_2)
+        return {"histograms_correlation": cv2.compareHist(reference, histogram_b, cv2.HISTCMP_CORREL)}
 
     @staticmethod
     def get_labels():
@@ -1,6 +1,7 @@
 import itertools
 import os
 import sys
+from multiprocessing import Pool, cpu_count
 from pathlib import Path
 from typing import Dict
 
@@ -22,7 +23,8 @@ def calculate_metrics(reference_img_path,
                       result_img_path,
                       xres,
                       yres,
-                      metrics_output_filename='metrics.txt'):
+                      metrics_output_filename='metrics.txt',
+                      processes=None):
     """
     This is the entry point for calculation of metrics between the
     rendered_scene and the sample(cropped_img) generated for comparison.
@@ -31,6 +33,8 @@ def calculate_metrics(reference_img_path,
     :param xres: x position of crop (left, top)
     :param yres: y position of crop (left, top)
     :param metrics_output_filename:
+    :param processes: number of processes comparing the crops, defaults to
+    the number of cores; crops are compared in this process if it is 1
     :return:
     """
 
@@ -40,53 +44,150 @@ def calculate_metrics(reference_img_path,
                                                 xres,
                                                 yres)
 
-    best_crop = None
-    best_img_metrics = None
-    img_metrics = dict()
-    img_metrics['Label'] = VERIFICATION_FAIL
-
     effective_metrics, classifier, labels, available_metrics = get_metrics()
+    reference = prepare_reference(cropped_img, available_metrics)
+
+    if processes is None:
+        processes = min(cpu_count(), len(scene_crops))
 
-    # First try not offset crop
+    # The default, not offset crop is the first one
     # TODO this shouldn't depend on the crops' ordering
-    default_crop = scene_crops[0]
-    default_metrics = compare_images(cropped_img, default_crop, available_metrics)
+    if processes > 1:
+        best_index, crops_metrics = _evaluate_crops_in_parallel(
+            cropped_img, scene_crops, reference, processes)
+    else:
+        best_index, crops_metrics = _evaluate_crops_serially(
+            cropped_img, scene_crops, reference, available_metrics,
+            classifier, labels)
+
+    if best_index is None:
+        # We didnt find any better match in offset crops, return the default one
+        best_index = 0
+    scene_crops[best_index].save(CROP_NAME)
+    return ImgMetrics(crops_metrics[best_index]).write_to_file(
+        metrics_output_filename)
+
+
+def evaluate_crop(cropped_img, crop, metrics, classifier, labels,
+                  reference=None):
+    """
+    Compare the crop with the reference image and classify the result.
+    :return: metrics with the 'Label' set
+    """
+    img_metrics = compare_images(cropped_img, crop, metrics, reference)
     try:
-        label = classify_with_tree(default_metrics, classifier, labels)
-        default_metrics['Label'] = label
+        img_metrics['Label'] = classify_with_tree(img_metrics, classifier,
+                                                  labels)
     except Exception as e:
         print("There were errors %r" % e, file=sys.stderr)
-        default_metrics['Label'] = VERIFICATION_FAIL
-    if default_metrics['Label'] == VERIFICATION_SUCCESS:
-        default_crop.save(CROP_NAME)
-        return ImgMetrics(default_metrics).write_to_file(metrics_output_filename)
-    else:
-        # Try offset crops
-        for crop in scene_crops[1:]:
-            try:
-                img_metrics = compare_images(cropped_img, crop, available_metrics)
-                img_metrics['Label'] = classify_with_tree(img_metrics, classifier, labels)
-            except Exception as e:
-                print("There were error %r" % e, file=sys.stderr)
-                img_metrics['Label'] = VERIFICATION_FAIL
-            if img_metrics['Label'] == VERIFICATION_SUCCESS:
-                best_img_metrics = img_metrics
-                best_crop = crop
-                break
-        if best_crop and best_img_metrics:
-            best_crop.save(CROP_NAME)
-            return ImgMetrics(best_img_metrics).write_to_file(metrics_output_filename)
-        else:
-            # We didnt find any better match in offset crops, return the default one
-            default_crop.save(CROP_NAME)
-            path_to_metrics = ImgMetrics(default_metrics).write_to_file(metrics_output_filename)
-            return path_to_metrics
+        img_metrics['Label'] = VERIFICATION_FAIL
+    return img_metrics
 
-    # This is unexpected but handle in case of errors
-    stub_data = {element:-1 for element in get_labels_from_metrics(available_metrics)}
-    stub_data['Label'] = VERIFICATION_FAIL
-    path_to_metrics = ImgMetrics(stub_data).write_to_file(metrics_output_filename)
-    return path_to_metrics
+
+def _evaluate_offset_crop(cropped_img, crop, metrics, classifier, labels,
+                          reference):
+    try:
+        return evaluate_crop(cropped_img, crop, metrics, classifier, labels,
+                             reference)
+    except Exception as e:
+        print("There were error %r" % e, file=sys.stderr)
+        return None
+
+
+def _is_success(img_metrics):
+    return img_metrics is not None \
+        and img_metrics['Label'] == VERIFICATION_SUCCESS
+
+
+def _evaluate_crops_serially(cropped_img, scene_crops, reference, metrics,
+                             classifier, labels):
+    """
+    Evaluate crops in order, stopping at the first one classified as a
+    success.
+    :return: index of the successful crop or None, metrics by crop index
+    """
+    crops_metrics = {0: evaluate_crop(cropped_img, scene_crops[0], metrics,
+                                      classifier, labels, reference)}
+    if _is_success(crops_metrics[0]):
+        return 0, crops_metrics
+    for index in range(1, len(scene_crops)):
+        crops_metrics[index] = _evaluate_offset_crop(
+            cropped_img, scene_crops[index], metrics, classifier, labels,
+            reference)
+        if _is_success(crops_metrics[index]):
+            return index, crops_metrics
+    return None, crops_metrics
+
+
+# State shared with the worker processes, set by _init_worker
+_worker_state = dict()
+
+
+def _init_worker(cropped_img, scene_crops, reference):
+    _, classifier, labels, available_metrics = get_metrics()
+    _worker_state.update(cropped_img=cropped_img,
+                         scene_crops=scene_crops,
+                         reference=reference,
+                         classifier=classifier,
+                         labels=labels,
+                         metrics=available_metrics)
+
+
+def _evaluate_crop_in_worker(index):
+    args = (_worker_state['cropped_img'],
+            _worker_state['scene_crops'][index],
+            _worker_state['metrics'],
+            _worker_state['classifier'],
+            _worker_state['labels'],
+            _worker_state['reference'])
+    if index == 0:
+        return index, evaluate_crop(*args)
+    return index, _evaluate_offset_crop(*args)
+
+
+def _evaluate_crops_in_parallel(cropped_img, scene_crops, reference,
+                                processes):
+    """
+    Evaluate crops on a process pool. The pool is terminated as soon as
+    the outcome is known, i.e. once some crop is classified as a success
+    and all crops preceding it are not. The result is the same as of
+    _evaluate_crops_serially.
+    :return: index of the successful crop or None, metrics by crop index
+    """
+    crops_metrics = dict()
+    pool = Pool(processes, _init_worker,
+                (cropped_img, scene_crops, reference))
+    try:
+        results = pool.imap_unordered(_evaluate_crop_in_worker,
+                                      range(len(scene_crops)))
+        for index, img_metrics in results:
+            crops_metrics[index] = img_metrics
+            best_index = _first_success(crops_metrics, len(scene_crops))
+            if best_index is not None:
+                return best_index, crops_metrics
+        return None, crops_metrics
+    finally:
+        pool.terminate()
+
+
+def _first_success(crops_metrics, crops_count):
+    for index in range(crops_count):
+        if index not in crops_metrics:
+            return None
+        if _is_success(crops_metrics[index]):
+            return index
+    return None
+
+
+def prepare_reference(image, metrics) -> Dict:
+    """
+    Precompute the reference image features for all metrics which support
+    that, so they are not recomputed for every compared crop.
+    :return: features by metric class name
+    """
+    return {metric_class.__name__: metric_class.prepare_reference(image)
+            for metric_class in metrics
+            if hasattr(metric_class, 'prepare_reference')}
 
 
 def load_classifier():
@@ -172,12 +273,13 @@ def get_labels_from_metrics(metrics):
     return labels
 
 
-def compare_images(image_a, image_b, metrics) -> Dict:
+def compare_images(image_a, image_b, metrics, reference=None) -> Dict:
     """
     This the entry point for calculating metrics between image_a, image_b
     once they are cropped to the same size.
     :param image_a:
     :param image_b:
+    :param reference: image_a features from prepare_reference
     :return: ImgMetrics
     """
 
@@ -188,7 +290,11 @@ def compare_images(image_a, image_b, metrics) -> Dict:
     data = {"crop_resolution": crop_resolution}
 
     for metric_class in metrics:
-        result = metric_class.compute_metrics(image_a, image_b)
+        if reference and metric_class.__name__ in reference:
+            result = metric_class.compute_metrics(
+                image_a, image_b, reference[metric_class.__name__])
+        else:
+            result = metric_class.compute_metrics(image_a, image_b)
         for key, value in result.items():
             data[key] = value
 
@@ -5,10 +5,19 @@ import sys
 class MetricMassCenterDistance:
 
     @staticmethod
-    def compute_metrics(image1, image2):
+    def prepare_reference(image1):
+        """ Mass centers of the reference image, shared by many
+        comparisons. """
+        return MetricMassCenterDistance.compute_mass_centers(image1)
+
+    @staticmethod
+    def compute_metrics(image1, image2, reference=None):
         if image1.size != image2.size:
             raise Exception("Image sizes differ")
-        mass_centers_1 = MetricMassCenterDistance.compute_mass_centers(image1)
+        mass_centers_1 = reference
+        if mass_centers_1 is None:
+            mass_centers_1 = \
+                MetricMassCenterDistance.compute_mass_centers(image1)
         mass_centers_2 = MetricMassCenterDistance.compute_mass_centers(image2)
         max_x_distance = 0
         max_y_distance = 0
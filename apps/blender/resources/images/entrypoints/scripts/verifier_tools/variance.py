@@ -9,18 +9,27 @@ class ImageVariance:
     ## ======================= ##
     ##
     @staticmethod
-    def compute_metrics( image1, image2 ):
+    def prepare_reference( image1 ):
+        """ Variance of the reference image, shared by many comparisons. """
+        np_image1 = numpy.array( image1.convert("RGB") )
+        reference_variance = numpy.var( np_image1, axis=( 0, 1 ) )
+        return reference_variance[ 0 ] + reference_variance[ 1 ] + reference_variance[ 2 ]
+
+    ## ======================= ##
+    ##
+    @staticmethod
+    def compute_metrics( image1, image2, reference=None ):
+
+        if reference is None:
+            reference = ImageVariance.prepare_reference( image1 )
 
-        image1 = image1.convert("RGB")
         image2 = image2.convert("RGB")
         
-        np_image1 = numpy.array( image1 )
         np_image2 = numpy.array( image2 )
         
-        reference_variance = numpy.var( np_image1, axis=( 0, 1 ) )
         image_variance = numpy.var( np_image2, axis=( 0, 1 ) )
         
-        reference_variance = reference_variance[ 0 ] + reference_variance[ 1 ] + reference_variance[ 2 ]
+        reference_variance = reference
         image_variance = image_variance[ 0 ] + image_variance[ 1 ] + image_variance[ 2 ]
         
         result = dict()
@@ -4,6 +4,8 @@ from PIL import Image
 
 import sys
 
+WAVELET_FAMILIES = [ "db4", "sym2", "haar" ]
+
 def calculate_sum( coeff ):
     return sum( sum( coeff ** 2 ) )
 
@@ -65,12 +67,24 @@ class MetricWavelet:
     ## ======================= ##
     ##
     @staticmethod
-    def compute_metrics( image1, image2):
+    def prepare_reference( image1 ):
+        """ Wavelet decompositions of the reference image, per family and
+        channel, so they can be shared by many comparisons. """
+        np_image1 = numpy.array( image1.convert("RGB") )
+        return { family: [ pywt.wavedec2( np_image1[...,i], family )
+                           for i in range(0,3) ]
+                 for family in WAVELET_FAMILIES }
+
+    ## ======================= ##
+    ##
+    @staticmethod
+    def compute_metrics( image1, image2, reference=None ):
+
+        if reference is None:
+            reference = MetricWavelet.prepare_reference( image1 )
 
-        image1 = image1.convert("RGB")
         image2 = image2.convert("RGB")
 
-        np_image1 = numpy.array(image1)
         np_image2 = numpy.array(image2)
 
         result = dict()
@@ -80,7 +94,7 @@ class MetricWavelet:
         result["wavelet_db4_high"] = 0
 
         for i in range(0,3):
-            coeff1 = pywt.wavedec2( np_image1[...,i], "db4" )
+            coeff1 = reference[ "db4" ][ i ]
             coeff2 = pywt.wavedec2( np_image2[...,i], "db4" )
 
             len_total = len( coeff1 ) - 1
@@ -99,7 +113,7 @@ class MetricWavelet:
         result["wavelet_sym2_high"] = 0
 
         for i in range(0,3):
-            coeff1 = pywt.wavedec2( np_image1[...,i], "sym2" )
+            coeff1 = reference[ "sym2" ][ i ]
             coeff2 = pywt.wavedec2( np_image2[...,i], "sym2" )
 
             len_total = len( coeff1 ) - 1
@@ -123,7 +137,7 @@ class MetricWavelet:
         result["wavelet_haar_high"] = 0
 
         for i in range(0,3):
-            coeff1 = pywt.wavedec2( np_image1[...,i], "haar" )
+            coeff1 = reference[ "haar" ][ i ]
             coeff2 = pywt.wavedec2( np_image2[...,i], "haar" )  
             
             freqs = calculate_frequencies( coeff1, coeff2 )
@@ -181,7 +181,11 @@ class RenderingTaskTypeInfo(CoreTaskTypeInfo):
             method = cls.__get_border
 
         if not definition.options.use_frames:
-            return method(start_task, subtasks_count, res_x, res_y)
+            if getattr(definition.options, 'adaptive', False):
+                borders_y = extra_data['crops'][0]['borders_y']
+                return method(cls.__get_crop_offsets(borders_y, res_x, res_y))
+            return method(cls.__get_offsets(start_task, subtasks_count,
+                                            res_x, res_y))
         elif subtasks_count <= frames:
             if not as_path:
                 return []
@@ -192,29 +196,57 @@ class RenderingTaskTypeInfo(CoreTaskTypeInfo):
                     (x, 0), (0, 0)]
 
         parts = int(subtasks_count / frames)
-        return method((start_task - 1) % parts + 1,
-                      parts, res_x, res_y)
+        return method(cls.__get_offsets((start_task - 1) % parts + 1,
+                                        parts, res_x, res_y))
 
     @classmethod
-    def __get_border(cls, start, parts, res_x, res_y):
+    def __get_offsets(cls, start, parts, res_x, res_y):
         """
-        Return list of pixels that should be marked as a border of subtasks
-        with numbers between start and end.
-        :param int start: number of first subtask
+        Return preview width and offsets of the upper and lower edge of
+        a subtask, or None if the image is empty.
+        :param int start: number of the subtask
         :param int parts: number of parts for single frame
         :param int res_x: image resolution width
         :param int res_y: image resolution height
-        :return list: list of pixels that belong to a subtask border
+        :return tuple: (x, upper, lower)
         """
-        border = []
         if res_x == 0 or res_y == 0:
-            return border
+            return None
         offsets = generate_expected_offsets(parts, res_x, res_y)
         scale_factor = offsets[parts + 1] / res_y
         x = int(math.floor(res_x * scale_factor))
+        return x, offsets[start], offsets[start + 1]
+
+    @classmethod
+    def __get_crop_offsets(cls, borders_y, res_x, res_y):
+        """
+        Return preview width and offsets of the upper and lower edge of
+        a subtask of the given height, or None if the image is empty.
+        :param list borders_y: [min_y, max_y] of the subtask's crop
+        :param int res_x: image resolution width
+        :param int res_y: image resolution height
+        :return tuple: (x, upper, lower)
+        """
+        if res_x == 0 or res_y == 0:
+            return None
+        scale_factor = cls.scale_factor(res_x, res_y)
+        min_y, max_y = borders_y
+        x = int(math.floor(res_x * scale_factor))
+        upper = int(math.floor((1.0 - max_y) * res_y * scale_factor))
+        lower = int(math.floor((1.0 - min_y) * res_y * scale_factor))
+        return x, upper, lower
 
-        upper = offsets[start]
-        lower = offsets[start + 1]
+    @classmethod
+    def __get_border(cls, offsets):
+        """
+        Return list of pixels that should be marked as a border of a subtask.
+        :param tuple offsets: (x, upper, lower) preview width and offsets
+        :return list: list of pixels that belong to a subtask border
+        """
+        border = []
+        if offsets is None:
+            return border
+        x, upper, lower = offsets
         for i in range(upper, lower):
             border.append((0, i))
             border.append((x, i))
@@ -224,25 +256,16 @@ class RenderingTaskTypeInfo(CoreTaskTypeInfo):
         return border
 
     @classmethod
-    def __get_border_path(cls, start, parts, res_x, res_y):
+    def __get_border_path(cls, offsets):
         """
-        Return list of points that make a border of subtasks with numbers
-        between start and end.
-        :param int start: number of first subtask
-        :param int parts: number of parts for single frame
-        :param int res_x: image resolution width
-        :param int res_y: image resolution height
+        Return list of points that make a border of a subtask.
+        :param tuple offsets: (x, upper, lower) preview width and offsets
         :return list: list of pixels that belong to a subtask border
         """
-        if res_x == 0 or res_y == 0:
+        if offsets is None:
             return []
-
-        offsets = generate_expected_offsets(parts, res_x, res_y)
-        scale_factor = offsets[parts + 1] / res_y
-
-        x = int(math.floor(res_x * scale_factor))
-        upper = offsets[start]
-        lower = max(0, offsets[start + 1] - 1)
+        x, upper, lower = offsets
+        lower = max(0, lower - 1)
 
         return [(0, upper), (x, upper),
                 (x, lower), (0, lower)]
@@ -288,6 +311,11 @@ class BlenderRendererOptions(FrameRendererOptions):
         self.environment = BlenderEnvironment()
         self.compositing = False
         self.samples = 0
+        # size the strips of a frame from the providers' performance and
+        # the time the completed strips took, aiming at target_subtask_time
+        # seconds per subtask (half of the subtask timeout if not set)
+        self.adaptive = False
+        self.target_subtask_time = None
 
 
 class BlenderNVGPURendererOptions(BlenderRendererOptions):
@@ -304,6 +332,11 @@ class BlenderRenderTask(FrameRenderingTask):
 
     BLENDER_MIN_BOX = [8, 8]
     BLENDER_MIN_SAMPLE = 5
+    # adaptive strips are kept within this ratio of an equal share of
+    # the rows left
+    ADAPTIVE_MAX_RATIO = 4
+
+    adaptive = False
 
     ################
     # Task methods #
@@ -318,6 +351,20 @@ class BlenderRenderTask(FrameRenderingTask):
         self.compositing = False
         self.samples = task_definition.options.samples
 
+        # adaptive partitioning splits a single frame into strips of
+        # variable height, at least one row each
+        options = task_definition.options
+        self.adaptive = getattr(options, 'adaptive', False) \
+            and not self.use_frames and self.res_y >= self.total_tasks
+        self.target_subtask_time = \
+            getattr(options, 'target_subtask_time', None) \
+            or task_definition.subtask_timeout / 2
+        # start_task -> (top, bottom) rows of the strips assigned so far
+        self.strips = {}
+        # rows of the measured strips and their cost, in seconds * perf_index
+        self.measured_rows = 0
+        self.measured_cost = 0.
+
     def initialize(self, dir_manager):
         super(BlenderRenderTask, self).initialize(dir_manager)
 
@@ -370,7 +417,7 @@ class BlenderRenderTask(FrameRenderingTask):
             parts = 1
 
         if not self.use_frames:
-            min_y, max_y = self._get_min_max_y(start_task)
+            min_y, max_y = self._get_min_max_y(start_task, perf_index)
         elif parts > 1:
             min_y = (parts - self._count_part(start_task, parts)) \
                     * (1.0 / parts)
@@ -423,6 +470,8 @@ class BlenderRenderTask(FrameRenderingTask):
         self.subtasks_given[subtask_id]['subtask_timeout'] = \
             self.header.subtask_timeout
         self.subtasks_given[subtask_id]['tmp_dir'] = self.tmp_dir
+        self.subtasks_given[subtask_id]['perf_index'] = perf_index
+        self.subtasks_given[subtask_id]['time_started'] = time.time()
         # FIXME issue #1955
 
         part = self._count_part(start_task, parts)
@@ -446,6 +495,18 @@ class BlenderRenderTask(FrameRenderingTask):
         self.subtasks_given[subtask_id]['ctd'] = ctd
         return self.ExtraData(ctd=ctd)
 
+    def computation_finished(self, subtask_id, task_result,
+                             verification_finished=None):
+        if subtask_id in self.subtasks_given:
+            self.subtasks_given[subtask_id]['time_finished'] = time.time()
+        super().computation_finished(subtask_id, task_result,
+                                     verification_finished)
+
+    def accept_results(self, subtask_id, result_files):
+        super().accept_results(subtask_id, result_files)
+        if self.adaptive:
+            self._measure_strip(self.subtasks_given[subtask_id])
+
     def restart(self):
         super(BlenderRenderTask, self).restart()
         if self.use_frames:
@@ -495,13 +556,69 @@ class BlenderRenderTask(FrameRenderingTask):
 
         return self._new_compute_task_def(hash, extra_data, 0)
 
-    def _get_min_max_y(self, start_task):
+    def _get_min_max_y(self, start_task, perf_index=0.0):
+        if self.adaptive:
+            top, bottom = self._get_strip(start_task, perf_index)
+            return (self.res_y - bottom) / self.res_y, \
+                (self.res_y - top) / self.res_y
         if self.use_frames:
             parts = int(self.total_tasks / len(self.frames))
         else:
             parts = self.total_tasks
         return get_min_max_y(start_task, parts, self.res_y)
 
+    def _get_strip(self, start_task, perf_index):
+        """ Return the (top, bottom) rows of the strip of a subtask, counted
+        from the top of the image. A strip is sized when it's first given
+        and keeps its rows when the subtask is resent.
+        """
+        if start_task not in self.strips:
+            top = max((bottom for _, bottom in self.strips.values()),
+                      default=0)
+            rows = self._get_strip_rows(self.res_y - top,
+                                        self.total_tasks - len(self.strips),
+                                        perf_index)
+            self.strips[start_task] = (top, top + rows)
+            self._update_strip_offsets(start_task)
+        return self.strips[start_task]
+
+    def _get_strip_rows(self, rows_left, strips_left, perf_index):
+        """ Rows a provider with the given perf_index renders in
+        target_subtask_time, judging by the strips measured so far.
+        An equal share of the rows left until the first strip is measured.
+        """
+        if strips_left <= 1:
+            return rows_left
+        share = rows_left / strips_left
+        rows = share
+        if perf_index > 0 and self.measured_rows and self.measured_cost > 0:
+            cost = self.measured_cost / self.measured_rows
+            rows = self.target_subtask_time * perf_index / cost
+        rows = min(max(rows, share / self.ADAPTIVE_MAX_RATIO),
+                   share * self.ADAPTIVE_MAX_RATIO)
+        # leave at least a row for each of the other strips
+        return min(max(1, int(round(rows))), rows_left - strips_left + 1)
+
+    def _update_strip_offsets(self, start_task):
+        if self.preview_updater is None:
+            return
+        offsets = self.preview_updater.expected_offsets
+        preview_y = self.preview_updater.preview_res_y
+        for num, row in zip((start_task, start_task + 1),
+                            self.strips[start_task]):
+            offsets[num] = int(math.floor(row * preview_y / self.res_y))
+
+    def _measure_strip(self, subtask):
+        perf_index = subtask.get('perf_index')
+        started = subtask.get('time_started')
+        finished = subtask.get('time_finished')
+        if not perf_index or not started or not finished \
+                or subtask['start_task'] not in self.strips:
+            return
+        top, bottom = self.strips[subtask['start_task']]
+        self.measured_rows += bottom - top
+        self.measured_cost += (finished - started) * perf_index
+
     def after_test(self, results, tmp_dir):
         return_data = dict()
         if not results or not results.get("data"):
@@ -623,6 +740,9 @@ class BlenderRenderTaskBuilder(FrameRenderingTaskBuilder):
         dictionary = super().build_dictionary(definition)
         dictionary['options']['compositing'] = definition.options.compositing
         dictionary['options']['samples'] = definition.options.samples
+        dictionary['options']['adaptive'] = definition.options.adaptive
+        dictionary['options']['target_subtask_time'] = \
+            definition.options.target_subtask_time
         return dictionary
 
     @classmethod
@@ -642,6 +762,9 @@ class BlenderRenderTaskBuilder(FrameRenderingTaskBuilder):
         definition = super().build_full_definition(task_type, dictionary)
         definition.options.compositing = options.get('compositing', False)
         definition.options.samples = options.get('samples', 0)
+        definition.options.adaptive = options.get('adaptive', False)
+        definition.options.target_subtask_time = \
+            options.get('target_subtask_time')
 
         return definition
 
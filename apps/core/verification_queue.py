@@ -1,9 +1,14 @@
+import heapq
+import itertools
 import logging
-import queue
+import time
+from collections import Counter
 from functools import partial
 from types import FunctionType
-from typing import Optional, Type, Dict, Tuple
+from typing import Optional, Type, Dict, List, Tuple
 
+from golem.core import metrics
+from golem.core.metrics import Histogram
 from golem.verificator.verifier import Verifier
 from twisted.internet.defer import Deferred, gatherResults
 
@@ -11,8 +16,29 @@ from apps.core.verification_task import VerificationTask
 
 logger = logging.getLogger(__name__)
 
+# deadline, submission order, submission time, task, verifier class
+QueueEntry = Tuple[int, int, float, VerificationTask, Type[Verifier]]
+
+
+def verifier_name(verifier_cls) -> str:
+    """ Name of the verifier class, also when wrapped in functools.partial """
+    verifier_cls = getattr(verifier_cls, 'func', verifier_cls)
+    return getattr(verifier_cls, '__name__', repr(verifier_cls))
+
+
+def default_concurrency(num_cores: int, max_memory_size: int) -> int:
+    """ Number of concurrent verifications the node can afford, limited
+    by both the cores and the memory (KiB) it is configured to use """
+    by_memory = max_memory_size // VerificationQueue.VERIFICATION_MEMORY
+    return max(1, min(num_cores, by_memory))
+
 
 class VerificationQueue:
+    """ Runs verifications of subtask results, the ones with the nearest
+    deadline first. At most `concurrency` verifications run at a time, and
+    at most `limits[name]` of them may use a verifier class with that name.
+    The queue runs one verification at a time until it is configured.
+    """
 
     #  We assume that after 30 minutes verification tasks is stalled (possibly
     #  to bugs in third party docker api). After this period we finish
@@ -20,13 +46,41 @@ class VerificationQueue:
     #  configurable from config, and will be relative to nodes benchmark
     #  results.
     VERIFICATION_TIMEOUT = 1800
-
-    def __init__(self, concurrency: int = 1) -> None:
+    # Memory (KiB) assumed to be taken by a single verification
+    VERIFICATION_MEMORY = 2 * 1024 * 1024
+    DEFAULT_LIMITS = {
+        # Blender renders the verified crops using all the cores it gets,
+        # so more concurrent verifications would only compete for them
+        'BlenderVerifier': 2,
+    }
+
+    def __init__(self,
+                 concurrency: int = 1,
+                 limits: Optional[Dict[str, int]] = None) -> None:
         self._concurrency = concurrency
-        self._queue: queue.Queue = queue.Queue()
+        self._limits: Dict[str, int] = limits or dict()
+        self._queue: List[QueueEntry] = []
+        self._order = itertools.count()
         self._jobs: Dict[str, Deferred] = dict()
+        self._running: Counter = Counter()
         self.callbacks: Dict[VerificationTask, FunctionType] = dict()
         self._paused = False
+        self.wait_time = Histogram()
+        self.execution_time = Histogram()
+
+    def configure(self, num_cores: int, max_memory_size: int,
+                  limits: Optional[Dict[str, int]] = None) -> None:
+        """ Sizes the queue for the node's configuration and starts
+        exposing its metrics
+        :param max_memory_size: memory the node may use, in KiB
+        :param limits: per verifier class limits, DEFAULT_LIMITS if None
+        """
+        self._concurrency = default_concurrency(num_cores, max_memory_size)
+        self._limits = dict(self.DEFAULT_LIMITS if limits is None else limits)
+        logger.info("Verification queue: up to %r concurrent verifications",
+                    self._concurrency)
+        self._register_metrics()
+        self._process_queue()
 
     def submit(self,
                verifier_class: Type[Verifier],
@@ -43,9 +97,39 @@ class VerificationQueue:
 
         entry = VerificationTask(subtask_id, deadline, kwargs)
         self.callbacks[entry] = cb
-        self._queue.put((entry, verifier_class))
+        heapq.heappush(self._queue, (deadline, next(self._order), time.time(),
+                                     entry, verifier_class))
         self._process_queue()
 
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def get_stats(self) -> Dict:
+        return {
+            'queued': len(self._queue),
+            'running': len(self._jobs),
+            'concurrency': self._concurrency,
+            'wait_time': self.wait_time.snapshot(),
+            'execution_time': self.execution_time.snapshot(),
+        }
+
+    def _register_metrics(self) -> None:
+        registry = metrics.REGISTRY
+        registry.gauge(
+            'golem_verification_queue_size', 'Verifications waiting to run',
+        ).labels().set_function(self.__len__)
+        registry.gauge(
+            'golem_verifications_running', 'Verifications running',
+        ).labels().set_function(lambda: len(self._jobs))
+        registry.histogram(
+            'golem_verification_wait_seconds',
+            'Time verifications spent in the queue',
+        ).register(self.wait_time)
+        registry.histogram(
+            'golem_verification_execution_seconds',
+            'Time verifications took to run',
+        ).register(self.execution_time)
+
     def pause(self) -> Deferred:
         self._paused = True
         deferred_list = list(self._jobs.values())
@@ -60,20 +144,39 @@ class VerificationQueue:
         return not self._paused and len(self._jobs) < self._concurrency
 
     def _process_queue(self) -> None:
-        if self.can_run:
+        while self.can_run:
             entry, verifier_cls = self._next()
-            if entry and verifier_cls:
-                self._run(entry, verifier_cls)
+            if not (entry and verifier_cls):
+                break
+            self._run(entry, verifier_cls)
+
+    def _can_run_verifier(self, verifier_cls: Type[Verifier]) -> bool:
+        name = verifier_name(verifier_cls)
+        limit = self._limits.get(name)
+        return limit is None or self._running[name] < limit
 
     def _next(self) -> Tuple[Optional[VerificationTask], Optional[Verifier]]:
-        try:
-            return self._queue.get(block=False)
-        except queue.Empty:
-            return None, None
+        """ Pops the entry with the nearest deadline among the ones whose
+        verifier class has not reached its limit """
+        skipped: List[QueueEntry] = []
+        found: Tuple = (None, None)
+        while self._queue:
+            item = heapq.heappop(self._queue)
+            _, _, submitted, entry, verifier_cls = item
+            if self._can_run_verifier(verifier_cls):
+                self.wait_time.observe(time.time() - submitted)
+                found = entry, verifier_cls
+                break
+            skipped.append(item)
+        for item in skipped:
+            heapq.heappush(self._queue, item)
+        return found
 
     def _run(self, entry: VerificationTask,
              verifier_cls: Type[Verifier]) -> None:
         subtask_id = entry.subtask_id
+        name = verifier_name(verifier_cls)
+        started = time.time()
 
         logger.info("Running verification of subtask %r", subtask_id)
 
@@ -83,7 +186,9 @@ class VerificationQueue:
                 self.callbacks[entry](subtask_id=args[0][0], verdict=args[0][1],
                                       result=args[0][2])
             finally:
-                self._jobs.pop(subtask_id, None)
+                self.execution_time.observe(time.time() - started)
+                if self._jobs.pop(subtask_id, None) is not None:
+                    self._running[name] -= 1
                 self._process_queue()
 
         def errback(_):
@@ -103,6 +208,7 @@ class VerificationQueue:
             result.addTimeout(VerificationQueue.VERIFICATION_TIMEOUT, reactor,
                               onTimeoutCancel=fn_timeout)
             self._jobs[subtask_id] = result
+            self._running[name] += 1
 
     @staticmethod
     def _verification_timed_out(_result, _timeout, task, event,
@@ -111,6 +217,7 @@ class VerificationQueue:
         task.stop(event)
 
     def _reset(self) -> None:
-        self._queue = queue.Queue()
+        self._queue = []
         self._jobs = dict()
+        self._running = Counter()
         self.callbacks = dict()
@@ -4,6 +4,7 @@
 #  Harrison Ainsworth / HXA7241 and Juraj Sukop : 2007-2008, 2013.
 #  http://www.hxa.name/minilight
 import logging
+from multiprocessing import Pool
 from time import time
 
 from .camera import Camera
@@ -13,6 +14,10 @@ from .randommini import Random
 
 MODEL_FORMAT_ID = '#MiniLight'
 
+# Minimal rendering time of a single worker of the parallel test, and of each
+# renderer calibrating it, in seconds
+PARALLEL_TEST_DURATION = 3.0
+
 logger = logging.getLogger(__name__)
 
 
@@ -59,18 +64,7 @@ def make_perf_test(filename):
 
       (0 0 0) (0 1 0) (1 1 0)  (0.7 0.7 0.7) (0 0 0)
     """
-    model_file_pathname = filename
-    model_file = open(model_file_pathname, 'r')
-    if model_file.readline().strip() != MODEL_FORMAT_ID:
-        raise Exception('invalid model file')
-    for line in model_file:
-        if not line.isspace():
-            iterations = int(line)
-            break
-    image = Image(model_file)
-    camera = Camera(model_file)
-    scene = Scene(model_file, camera.view_position)
-    model_file.close()
+    iterations, image, camera, scene = load_model(filename)
 
     duration: float = render_taskable(image, camera, scene, iterations)
 
@@ -83,6 +77,93 @@ def make_perf_test(filename):
     return average
 
 
+def make_parallel_perf_test(filename, num_cores,
+                            duration=PARALLEL_TEST_DURATION):
+    """
+    Multi core CPU performance test. Renders the model with the vectorized
+    renderer in num_cores processes at the same time.
+
+    The scores are divided by the speedup of the vectorized renderer over
+    render_taskable, measured on a single core of this machine beforehand,
+    so that they stay comparable with the ones of make_perf_test.
+
+    :return: (list of the scores of every core, aggregate score), in rays/s
+    normalized to make_perf_test scores
+    """
+    speedup = vectorized_speedup(filename, duration)
+    num_cores = max(1, num_cores)
+    args = [(filename, duration, seed) for seed in range(num_cores)]
+    if num_cores == 1:
+        results = [_vectorized_perf_test(args[0])]
+    else:
+        with Pool(num_cores) as pool:
+            results = pool.map(_vectorized_perf_test, args, chunksize=1)
+
+    per_core = [num_samples / elapsed / speedup
+                for num_samples, elapsed in results]
+    aggregate = sum(per_core)
+    logger.debug("Summary: %d cores rendering at %s rays/s, aggregate"
+                 " speed %f rays/s", num_cores,
+                 ', '.join('%f' % score for score in per_core), aggregate)
+    return per_core, aggregate
+
+
+def vectorized_speedup(filename, duration=PARALLEL_TEST_DURATION):
+    """ How many times the vectorized renderer traces more rays per second
+    than render_taskable, both rendering the model on a single core """
+    num_samples, elapsed = _scalar_perf_test(filename, duration)
+    scalar = num_samples / elapsed
+    num_samples, elapsed = _vectorized_perf_test((filename, duration, 0))
+    speedup = num_samples / elapsed / scalar
+    logger.debug("Vectorized renderer speedup: %f", speedup)
+    return speedup
+
+
+def _scalar_perf_test(filename, duration):
+    iterations, image, camera, scene = load_model(filename)
+    num_samples = 0
+    elapsed = 0.
+    while True:
+        elapsed += render_taskable(image, camera, scene, iterations)
+        num_samples += image.width * image.height * iterations
+        if elapsed >= duration:
+            return num_samples, elapsed
+
+
+def _vectorized_perf_test(args):
+    filename, duration, seed = args
+    # imported here, so the single core test does not need numpy
+    from .vectorized import VectorizedRenderer
+
+    iterations, image, camera, scene = load_model(filename)
+    renderer = VectorizedRenderer(image, camera, scene, seed)
+    num_samples = 0
+    started = time()
+    while True:
+        renderer.render(iterations)
+        num_samples += image.width * image.height * iterations
+        elapsed = time() - started
+        if elapsed >= duration:
+            return num_samples, elapsed
+
+
+def load_model(filename):
+    """ Reads a model file, see make_perf_test for the format
+    :return: (iterations, Image, Camera, Scene)
+    """
+    with open(filename, 'r') as model_file:
+        if model_file.readline().strip() != MODEL_FORMAT_ID:
+            raise Exception('invalid model file')
+        for line in model_file:
+            if not line.isspace():
+                iterations = int(line)
+                break
+        image = Image(model_file)
+        camera = Camera(model_file)
+        scene = Scene(model_file, camera.view_position)
+    return iterations, image, camera, scene
+
+
 def timedafunc(function):
     def timedExecution(*args, **kwargs):
         t0 = time()
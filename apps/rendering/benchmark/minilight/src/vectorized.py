@@ -0,0 +1,259 @@
+"""
+NumPy port of the MiniLight path tracer, used by the multi-core benchmark.
+
+Instead of following one ray at a time, all camera rays of a frame are traced
+together, bounce by bounce ("wavefront" path tracing), and every bounce tests
+the whole batch against all triangles of the scene at once. The light
+transport is the same as in RayTracer: emitter sampling with shadow rays,
+Russian roulette and cosine-weighted diffuse bounces, with sky and ground
+emission for rays which leave the scene.
+"""
+from math import pi, tan
+from time import time
+
+import numpy as np
+
+from .triangle import EPSILON
+
+MAX_BOUNCES = 64
+
+
+def _cross(a, b):
+    return np.stack([
+        a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1],
+        a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2],
+        a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0],
+    ], axis=-1)
+
+
+def _dot(a, b):
+    return np.einsum('...i,...i->...', a, b)
+
+
+def _unitize(a):
+    length = np.sqrt(_dot(a, a))[..., np.newaxis]
+    return np.divide(a, length, out=np.zeros_like(a), where=length != 0)
+
+
+class SceneArrays(object):
+    """ Triangles of a Scene as arrays, one row per triangle """
+
+    def __init__(self, scene):
+        triangles = scene.triangles
+
+        def rows(attr):
+            return np.array([list(getattr(t, attr)) for t in triangles],
+                            dtype=np.float64).reshape(-1, 3)
+
+        self.vertex0 = np.array([list(t.vertexs[0]) for t in triangles],
+                                dtype=np.float64).reshape(-1, 3)
+        self.edge0 = rows('edge0')
+        self.edge3 = rows('edge3')
+        self.normal = rows('normal')
+        self.tangent = rows('tangent')
+        self.reflectivity = rows('reflectivity')
+        self.emitivity = rows('emitivity')
+        self.area = np.array([t.area for t in triangles], dtype=np.float64)
+        self.emitters = np.array([triangles.index(e) for e in scene.emitters],
+                                 dtype=np.int64)
+        self.sky_emission = np.array(list(scene.sky_emission))
+        self.ground_reflection = np.array(list(scene.ground_reflection))
+
+    def __len__(self):
+        return len(self.area)
+
+    def intersect(self, origins, directions, last_hit):
+        """
+        Moller-Trumbore test of every ray against every triangle.
+        :return: (index of the nearest triangle hit or -1, its distance)
+        """
+        if not len(self):
+            return (np.full(len(origins), -1, dtype=np.int64),
+                    np.full(len(origins), np.inf))
+
+        # (rays, triangles, 3)
+        pvec = _cross(directions[:, np.newaxis], self.edge3[np.newaxis])
+        det = _dot(self.edge0[np.newaxis], pvec)
+        valid = np.abs(det) >= EPSILON
+        inv_det = np.divide(1.0, det, out=np.zeros_like(det), where=valid)
+
+        tvec = origins[:, np.newaxis] - self.vertex0[np.newaxis]
+        u = _dot(tvec, pvec) * inv_det
+        valid &= (u >= 0.0) & (u <= 1.0)
+        qvec = _cross(tvec, self.edge0[np.newaxis])
+        v = _dot(directions[:, np.newaxis], qvec) * inv_det
+        valid &= (v >= 0.0) & (u + v <= 1.0)
+        distance = _dot(self.edge3[np.newaxis], qvec) * inv_det
+        valid &= distance >= 0.0
+
+        rays = np.arange(len(origins))
+        has_last = last_hit >= 0
+        valid[rays[has_last], last_hit[has_last]] = False
+
+        distance = np.where(valid, distance, np.inf)
+        nearest = np.argmin(distance, axis=1)
+        nearest_distance = distance[rays, nearest]
+        return (np.where(np.isfinite(nearest_distance), nearest, -1),
+                nearest_distance)
+
+    def default_emission(self, directions):
+        """ Emission of the sky (seen when going up) or the ground """
+        going_up = directions[:, 1] > 0.0
+        return np.where(going_up[:, np.newaxis], self.sky_emission,
+                        self.sky_emission * self.ground_reflection)
+
+
+class VectorizedRenderer(object):
+
+    def __init__(self, image, camera, scene, seed=None):
+        self.width = image.width
+        self.height = image.height
+        self.scene = SceneArrays(scene)
+        self.random = np.random.RandomState(seed)
+
+        self.view_position = np.array(list(camera.view_position))
+        self.view_direction = np.array(list(camera.view_direction))
+        self.right = np.array(list(camera.right))
+        self.up = np.array(list(camera.up))
+        self.view_tan = tan(camera.view_angle * 0.5)
+
+        ys, xs = np.mgrid[0:self.height, 0:self.width]
+        self._xs = xs.ravel().astype(np.float64)
+        self._ys = ys.ravel().astype(np.float64)
+
+    def render(self, iterations):
+        """
+        Renders the scene, iterations samples per pixel.
+        :return: accumulated radiance, an array of (height, width, 3) with
+        rows ordered like the pixels of Image (top row first)
+        """
+        pixels = np.zeros((self.height * self.width, 3))
+        for _ in range(iterations):
+            pixels += self.radiance(*self._camera_rays())
+        return pixels.reshape(self.height, self.width, 3)[::-1]
+
+    def _camera_rays(self):
+        count = len(self._xs)
+        x_coefficient = (self._xs + self.random.random_sample(count)) \
+            * 2.0 / self.width - 1.0
+        y_coefficient = (self._ys + self.random.random_sample(count)) \
+            * 2.0 / self.height - 1.0
+        aspect = float(self.height) / float(self.width)
+        offset = self.right * x_coefficient[:, np.newaxis] + \
+            self.up * (y_coefficient * aspect)[:, np.newaxis]
+        directions = _unitize(self.view_direction + offset * self.view_tan)
+        origins = np.tile(self.view_position, (count, 1))
+        return origins, directions
+
+    def radiance(self, origins, directions):
+        scene = self.scene
+        radiance = np.zeros_like(origins)
+        weight = np.ones_like(origins)
+        ray_ids = np.arange(len(origins))
+        last_hit = np.full(len(origins), -1, dtype=np.int64)
+
+        for _ in range(MAX_BOUNCES):
+            if not len(ray_ids):
+                break
+            hit, distance = scene.intersect(origins, directions, last_hit)
+
+            missed = hit < 0
+            radiance[ray_ids[missed]] += weight[missed] * \
+                scene.default_emission(directions[missed])
+
+            hits = ~missed
+            ray_ids, weight, hit = ray_ids[hits], weight[hits], hit[hits]
+            directions, last_hit = directions[hits], last_hit[hits]
+            positions = origins[hits] + \
+                directions * distance[hits][:, np.newaxis]
+            normal = scene.normal[hit]
+            back = -directions
+
+            # emission seen directly (on bounces it comes from sampling)
+            seen = (last_hit < 0) & (_dot(back, normal) > 0.0)
+            local_emission = scene.emitivity[hit] * seen[:, np.newaxis]
+
+            illumination = self._sample_emitters(positions, hit, back)
+            radiance[ray_ids] += weight * (illumination + local_emission)
+
+            directions, color = self._next_directions(hit, back)
+            alive = color.any(axis=1)
+            ray_ids = ray_ids[alive]
+            weight = weight[alive] * color[alive]
+            origins, directions = positions[alive], directions[alive]
+            last_hit = hit[alive]
+
+        return radiance
+
+    def _sample_emitters(self, positions, hit, back):
+        scene = self.scene
+        count = len(positions)
+        emitters_count = len(scene.emitters)
+        if not emitters_count or not count:
+            return np.zeros((count, 3))
+
+        chosen = np.minimum(
+            emitters_count - 1,
+            (self.random.random_sample(count) * emitters_count).astype(int))
+        emitter = scene.emitters[chosen]
+        sqr1 = np.sqrt(self.random.random_sample(count))[:, np.newaxis]
+        r2 = self.random.random_sample(count)[:, np.newaxis]
+        emitter_position = scene.edge0[emitter] * (1.0 - sqr1) + \
+            scene.edge3[emitter] * ((1.0 - r2) * sqr1) + \
+            scene.vertex0[emitter]
+
+        emit_direction = _unitize(emitter_position - positions)
+        shadow_hit, _ = scene.intersect(positions, emit_direction, hit)
+        visible = (shadow_hit < 0) | (shadow_hit == emitter)
+
+        # emission of the sampled point, as solid angle seen from position
+        ray = positions - emitter_position
+        distance2 = _dot(ray, ray)
+        cos_area = _dot(-emit_direction, scene.normal[emitter]) * \
+            scene.area[emitter]
+        solid_angle = cos_area / np.maximum(distance2, 1e-6)
+        emission_in = scene.emitivity[emitter] * \
+            (solid_angle * (visible & (cos_area > 0.0)))[:, np.newaxis]
+
+        normal = scene.normal[hit]
+        in_dot = _dot(emit_direction, normal)
+        out_dot = _dot(back, normal)
+        same_side = (in_dot < 0.0) == (out_dot < 0.0)
+        return emission_in * emitters_count * scene.reflectivity[hit] * \
+            (same_side * np.abs(in_dot) / pi)[:, np.newaxis]
+
+    def _next_directions(self, hit, back):
+        scene = self.scene
+        count = len(hit)
+        reflectivity = scene.reflectivity[hit]
+        reflectivity_mean = reflectivity.sum(axis=1) / 3.0
+        bounced = self.random.random_sample(count) < reflectivity_mean
+        color = np.divide(
+            reflectivity, reflectivity_mean[:, np.newaxis],
+            out=np.zeros_like(reflectivity),
+            where=bounced[:, np.newaxis] & (reflectivity_mean[:, np.newaxis]
+                                            > 0.0))
+
+        _2pr1 = pi * 2.0 * self.random.random_sample(count)
+        sr2 = np.sqrt(self.random.random_sample(count))
+        x = (np.cos(_2pr1) * sr2)[:, np.newaxis]
+        y = (np.sin(_2pr1) * sr2)[:, np.newaxis]
+        z = np.sqrt(1.0 - sr2 * sr2)[:, np.newaxis]
+        normal = scene.normal[hit]
+        tangent = scene.tangent[hit]
+        normal = np.where((_dot(normal, back) < 0.0)[:, np.newaxis],
+                          -normal, normal)
+        directions = tangent * x + _cross(normal, tangent) * y + normal * z
+        return directions, color
+
+
+def render_vectorized(image, camera, scene, iterations, seed=None):
+    """
+    Renders the scene with VectorizedRenderer.
+    :return: (accumulated radiance as in VectorizedRenderer.render,
+    duration in seconds)
+    """
+    renderer = VectorizedRenderer(image, camera, scene, seed)
+    started = time()
+    pixels = renderer.render(iterations)
+    return pixels, time() - started
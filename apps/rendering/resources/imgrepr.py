@@ -1,8 +1,9 @@
 import os
 import abc
 import logging
+import struct
 from copy import deepcopy
-from typing import Optional
+from typing import NamedTuple, Optional
 import numpy
 import cv2
 import OpenEXR
@@ -15,6 +16,13 @@ class OpenCVError(Exception):
     pass
 
 
+# Shape and type of an image as it will be loaded by OpenCV
+ImgHeader = NamedTuple("ImgHeader", [("width", int),
+                                     ("height", int),
+                                     ("channels", int),
+                                     ("dtype", type)])
+
+
 class ImgRepr(object, metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def load_from_file(self, file_):
@@ -252,3 +260,54 @@ def load_img(file_: str) -> Optional[ImgRepr]:
     except Exception as err:
         logger.warning("Can't load img file {}:{}".format(file_, err))
         return None
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# PNG colour type -> number of channels returned by cv2.IMREAD_UNCHANGED;
+# palette images (colour type 3) are left out as their channel count depends
+# on the presence of a transparency chunk
+PNG_CHANNELS = {0: 1, 2: 3, 4: 4, 6: 4}
+
+
+def _read_png_header(file_: str) -> Optional[ImgHeader]:
+    with open(file_, 'rb') as f:
+        data = f.read(26)
+    if len(data) < 26 or not data.startswith(PNG_SIGNATURE) \
+            or data[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth, colour_type = \
+        struct.unpack('>IIBB', data[16:26])
+    if colour_type not in PNG_CHANNELS:
+        return None
+    dtype = numpy.uint16 if bit_depth == 16 else numpy.uint8
+    return ImgHeader(width, height, PNG_CHANNELS[colour_type], dtype)
+
+
+def _read_exr_header(file_: str) -> Optional[ImgHeader]:
+    exr_file = OpenEXR.InputFile(file_)
+    try:
+        header = exr_file.header()
+    finally:
+        exr_file.close()
+    dw = header['dataWindow']
+    # OpenCV decodes EXR images as BGR, dropping the alpha channel
+    return ImgHeader(dw.max.x - dw.min.x + 1, dw.max.y - dw.min.y + 1,
+                     3, numpy.float32)
+
+
+def read_img_header(file_: str) -> Optional[ImgHeader]:
+    """
+    Read the size, number of channels and pixel type of an image without
+    decoding its pixel data
+    :param file_: path to the file
+    :return: ImgHeader or None if the format is not supported or the header
+    could not be read
+    """
+    try:
+        _, ext = os.path.splitext(file_)
+        if ext.upper() == ".EXR":
+            return _read_exr_header(file_)
+        return _read_png_header(file_)
+    except Exception as err:  # pylint: disable=broad-except
+        logger.debug("Can't read img header %s: %s", file_, err)
+        return None
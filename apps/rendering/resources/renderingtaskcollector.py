@@ -1,11 +1,26 @@
 import logging
 import math
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-from apps.rendering.resources.imgrepr import OpenCVImgRepr
+import cv2
+import numpy
+
+from apps.rendering.resources.imgrepr import (ImgHeader, OpenCVImgRepr,
+                                              read_img_header)
 
 logger = logging.getLogger("apps.rendering")
 
+# (decoded channels, output channels) -> OpenCV conversion
+CHANNEL_CONVERSIONS = {
+    (1, 3): cv2.COLOR_GRAY2BGR,
+    (1, 4): cv2.COLOR_GRAY2BGRA,
+    (3, 4): cv2.COLOR_BGR2BGRA,
+    (4, 3): cv2.COLOR_BGRA2BGR,
+}
+
 
 class RenderingTaskCollector(object):
     def __init__(self, width=None, height=None):
@@ -63,3 +78,92 @@ class RenderingTaskCollector(object):
         img_offset.paste_image(new_part, 0, offset)
         img_offset.add(final_img)
         return img_offset
+
+
+class StreamingRenderingTaskCollector(RenderingTaskCollector):
+    """
+    Collector which sizes the final image from the image headers only and
+    then decodes the parts on a thread pool, pasting each of them straight
+    into a preallocated output buffer. If mmap_dir is given, the buffer is
+    memory-mapped from a temporary file in that directory, so peak memory is
+    bounded by the parts being decoded plus the resident output pages.
+    """
+
+    def __init__(self, width=None, height=None,
+                 max_workers: Optional[int] = None,
+                 mmap_dir: Optional[str] = None) -> None:
+        super().__init__(width, height)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.mmap_dir = mmap_dir
+
+    def finalize_img(self):
+        headers = [self._read_header(path)
+                   for path in self.accepted_img_files]
+
+        offsets = []
+        res_y = 0
+        for header in headers:
+            offsets.append(res_y)
+            res_y += header.height
+        last = headers[-1]
+        self.width = last.width
+        self.height = res_y
+        self.channels = last.channels
+        self.dtype = last.dtype
+
+        final_img = self._allocate()
+
+        def paste(args):
+            path, offset = args
+            image = OpenCVImgRepr.from_image_file(path)
+            self._convert_channels(image)
+            final_img.paste_image(image, 0, offset)
+
+        workers = min(self.max_workers, len(self.accepted_img_files))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # consume the iterator to re-raise errors from the workers
+            list(executor.map(paste, zip(self.accepted_img_files, offsets)))
+        return final_img
+
+    @staticmethod
+    def _read_header(path: str) -> ImgHeader:
+        header = read_img_header(path)
+        if header is not None:
+            return header
+        # Unsupported format, fall back to decoding the whole image
+        image = OpenCVImgRepr.from_image_file(path)
+        shape = image.img.shape
+        return ImgHeader(shape[1], shape[0],
+                         shape[2] if len(shape) == 3 else 1, image.img.dtype)
+
+    def _convert_channels(self, image: OpenCVImgRepr) -> None:
+        """ Converts a decoded part to the channel count of the output, in
+        case it differs from the one predicted from the part's header """
+        shape = image.img.shape
+        channels = shape[2] if len(shape) == 3 else 1
+        if channels == self.channels:
+            if len(shape) == 2:
+                image.img = image.img.reshape(shape + (1,))
+            return
+        conversion = CHANNEL_CONVERSIONS.get((channels, self.channels))
+        if conversion is None:
+            return
+        logger.debug("Converting image part from %r to %r channels",
+                     channels, self.channels)
+        image.img = cv2.cvtColor(image.img, conversion)
+
+    def _allocate(self) -> OpenCVImgRepr:
+        if self.mmap_dir is None:
+            return OpenCVImgRepr.empty(self.width, self.height, self.channels,
+                                       self.dtype)
+
+        final_img = OpenCVImgRepr()
+        # The mapping stays valid after the file is closed and the file is
+        # removed as soon as the mapping is released
+        with tempfile.TemporaryFile(dir=self.mmap_dir) as buffer_file:
+            final_img.img = numpy.memmap(
+                buffer_file, dtype=self.dtype, mode='w+',
+                shape=(self.height, self.width, self.channels))
+        if self.channels == 4:
+            final_img.img[:] = (0, 0, 0, 255)
+        return final_img
@@ -11,7 +11,7 @@ from apps.core.task.coretask import CoreTask
 from apps.core.task.coretaskstate import Options
 from apps.rendering.resources.imgrepr import OpenCVImgRepr
 from apps.rendering.resources.renderingtaskcollector import \
-    RenderingTaskCollector
+    StreamingRenderingTaskCollector
 from apps.rendering.resources.utils import handle_opencv_image_error
 from apps.rendering.task.renderingtask import (RenderingTask,
                                                RenderingTaskBuilder,
@@ -376,8 +376,9 @@ class FrameRenderingTask(RenderingTask):
         output_file_name = self.output_file
         self.collected_file_names = OrderedDict(sorted(self.collected_file_names.items()))
         if not self._use_outer_task_collector():
-            collector = RenderingTaskCollector(width=self.res_x,
-                                               height=self.res_y)
+            collector = StreamingRenderingTaskCollector(width=self.res_x,
+                                                        height=self.res_y,
+                                                        mmap_dir=self.tmp_dir)
             for file in self.collected_file_names.values():
                 collector.add_img_file(file)
             with handle_opencv_image_error(logger):
@@ -394,8 +395,9 @@ class FrameRenderingTask(RenderingTask):
         collected = self.frames_given[frame_key]
         collected = OrderedDict(sorted(collected.items()))
         if not self._use_outer_task_collector():
-            collector = RenderingTaskCollector(width=self.res_x,
-                                               height=self.res_y)
+            collector = StreamingRenderingTaskCollector(width=self.res_x,
+                                                        height=self.res_y,
+                                                        mmap_dir=self.tmp_dir)
             for file in collected.values():
                 collector.add_img_file(file)
             with handle_opencv_image_error(logger):
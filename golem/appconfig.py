@@ -39,6 +39,10 @@ ACCEPT_TASKS = 1
 SEND_PINGS = 1
 ENABLE_MONITOR = 1
 DEBUG_THIRD_PARTY = 0
+# Run the default benchmark on all cores, with the vectorized renderer
+PARALLEL_DEFAULT_BENCHMARK = 0
+# Local port serving metrics in the Prometheus format, 0 to disable
+METRICS_PORT = 0
 
 PINGS_INTERVALS = 120
 GETTING_PEERS_INTERVAL = 4.0
@@ -53,8 +57,10 @@ MAX_SENDING_DELAY = 360
 OFFER_POOLING_INTERVAL = 15.0
 # How frequently task archive should be saved to disk (in seconds)
 TASKARCHIVE_MAINTENANCE_INTERVAL = 30
-# Filename for task archive disk file
+# Filename for task archive disk file of previous versions
 TASKARCHIVE_FILENAME = "task_archive.pickle"
+# Filename for task archive journal
+TASKARCHIVE_JOURNAL_FILENAME = "task_archive.journal"
 # Number of past days task archive will store aggregated information for
 TASKARCHIVE_NUM_INTERVALS = 365
 # Limit of the number  of non-expired tasks stored in task archive at any moment
@@ -68,6 +74,10 @@ FORWARDED_SESSION_REQUEST_TIMEOUT = 30
 COMPUTATION_CANCELLATION_TIMEOUT = 10.0
 CLEAN_RESOURES_OLDER_THAN_SECS = 3*24*60*60     # 3 days
 CLEAN_TASKS_OLDER_THAN_SECONDS = 3*24*60*60     # 3 days
+CONTENT_STORE_MAX_SIZE = 10*1024*1024           # KiB
+RESOURCE_DIRS_MAX_SIZE = 0                      # KiB, 0 - unlimited
+DISK_USAGE_INTERVAL = 10                        # seconds
+DISK_USAGE_RESCAN_EVERY = 60                    # intervals
 # FIXME Issue #3862
 CLEANING_ENABLED = 0
 
@@ -158,6 +168,8 @@ class AppConfig:
             send_pings=SEND_PINGS,
             enable_talkback=ENABLE_TALKBACK,
             enable_monitor=ENABLE_MONITOR,
+            parallel_default_benchmark=PARALLEL_DEFAULT_BENCHMARK,
+            metrics_port=METRICS_PORT,
             # hardware
             hardware_preset_name=CUSTOM_HARDWARE_PRESET_NAME,
             # price and trust
@@ -184,6 +196,8 @@ class AppConfig:
             computation_cancellation_timeout=COMPUTATION_CANCELLATION_TIMEOUT,
             clean_resources_older_than_seconds=CLEAN_RESOURES_OLDER_THAN_SECS,
             clean_tasks_older_than_seconds=CLEAN_TASKS_OLDER_THAN_SECONDS,
+            content_store_max_size=CONTENT_STORE_MAX_SIZE,
+            resource_dirs_max_size=RESOURCE_DIRS_MAX_SIZE,
             cleaning_enabled=CLEANING_ENABLED,
             debug_third_party=DEBUG_THIRD_PARTY,
             # network masking
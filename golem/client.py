@@ -3,6 +3,7 @@
 import collections
 import enum
 import logging
+import os
 import sys
 import time
 import uuid
@@ -19,8 +20,10 @@ from twisted.internet.defer import (
 
 from apps.appsmanager import AppsManager
 import golem
-from golem.appconfig import TASKARCHIVE_MAINTENANCE_INTERVAL, AppConfig
+from golem.appconfig import DISK_USAGE_INTERVAL, DISK_USAGE_RESCAN_EVERY, \
+    TASKARCHIVE_MAINTENANCE_INTERVAL, AppConfig
 from golem.clientconfigdescriptor import ConfigApprover, ClientConfigDescriptor
+from golem.core import metrics
 from golem.core import variables
 from golem.core.common import (
     get_timestamp_utc,
@@ -35,6 +38,7 @@ from golem.core.keysauth import KeysAuth
 from golem.core.service import LoopingCallService, IService
 from golem.core.simpleserializer import DictSerializer
 from golem.database import Database
+from golem.diag.reactor import ReactorDiagnosticsProvider, timed
 from golem.diag.service import DiagnosticsService, DiagnosticsOutputFormat
 from golem.diag.vm import VMDiagnosticsProvider
 from golem.environments.environmentsmanager import EnvironmentsManager
@@ -47,6 +51,7 @@ from golem.monitor.model.nodemetadatamodel import NodeMetadataModel
 from golem.monitor.monitor import SystemMonitor
 from golem.monitorconfig import MONITOR_CONFIG
 from golem.network import nodeskeeper
+from golem.network.capture import TrafficCapture
 from golem.network.concent.client import ConcentClientService
 from golem.network.concent.filetransfers import ConcentFiletransferService
 from golem.network.history import MessageHistoryService
@@ -60,6 +65,8 @@ from golem.network.upnp.mapper import PortMapperManager
 from golem.ranking.ranking import Ranking
 from golem.report import Component, Stage, StatusPublisher, report_calls
 from golem.resource.base.resourceserver import BaseResourceServer
+from golem.resource.contentstore import CONTENT_STORE_DIR, ContentStore
+from golem.resource.diskusage import DiskUsage
 from golem.resource.dirmanager import DirManager, DirectoryType
 from golem.resource.hyperdrive.resourcesmanager import HyperdriveResourceManager
 from golem.rpc import utils as rpc_utils
@@ -69,6 +76,7 @@ from golem.task.taskarchiver import TaskArchiver
 from golem.task.taskmanager import TaskManager
 from golem.task.taskserver import TaskServer
 from golem.task.tasktester import TaskTester
+from golem.tools import memoryhelper
 from golem.tools.os_info import OSInfo
 from golem.tools.talkback import enable_sentry_logger
 
@@ -140,6 +148,9 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
 
         self.p2pservice = None
         self.diag_service = None
+        self.reactor_diagnostics = ReactorDiagnosticsProvider()
+        self.traffic_capture: Optional[TrafficCapture] = None
+        self._metrics_port = None
 
         if not transaction_system.deposit_contract_available:
             logger.warning(
@@ -157,6 +168,8 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
 
         self.task_server: Optional[TaskServer] = None
         self.port_mapper = None
+        # Disk usage of the distributed and received files directories
+        self.disk_usage: Dict[int, DiskUsage] = dict()
 
         self.nodes_manager_client = None
 
@@ -290,6 +303,10 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
 
         op = kwargs['op'] if 'op' in kwargs else None
 
+        received_usage = self.disk_usage.get(DirectoryType.RECEIVED)
+        if received_usage:
+            received_usage.update(kwargs['task_id'])
+
         if op is not None and op.subtask_related():
             self._publish(Task.evt_subtask_status, kwargs['task_id'],
                           kwargs['subtask_id'], op.value)
@@ -326,6 +343,8 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
         self.concent_service.start()
         self.concent_filetransfers.start()
 
+        self.reactor_diagnostics.start()
+        self.start_metrics()
         if self.use_monitor and not self.monitor:
             self.init_monitor()
         try:
@@ -355,6 +374,9 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
         if self.use_monitor and self.monitor:
             self.stop_monitor()
             self.monitor = None
+        self.reactor_diagnostics.stop()
+        self.stop_traffic_capture()
+        self.stop_metrics()
         logger.debug('Stopped client services')
 
     def start_network(self):
@@ -440,6 +462,11 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
         if cleaning_enabled and clean_tasks_older_than > 0:
             self.clean_old_tasks()
 
+        content_store = ContentStore(
+            os.path.join(self.datadir, CONTENT_STORE_DIR),
+            # 0 stands for an unlimited store
+            max_size=self.config_desc.content_store_max_size * 1024 or None)
+
         resource_manager = HyperdriveResourceManager(
             dir_manager=dir_manager,
             daemon_address=hyperdrive_addrs,
@@ -447,6 +474,7 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
                 'host': self.config_desc.hyperdrive_rpc_address,
                 'port': self.config_desc.hyperdrive_rpc_port,
             },
+            content_store=content_store,
         )
         self.resource_server = BaseResourceServer(
             resource_manager=resource_manager,
@@ -456,6 +484,8 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
         logger.info("Restoring resources ...")
         self.task_server.restore_resources()
 
+        self._start_disk_usage_service()
+
         # Start service after restore_resources() to avoid race conditions
         if cleaning_enabled and clean_tasks_older_than > 0:
             logger.debug('Starting task cleaner service ...')
@@ -613,13 +643,72 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
             VMDiagnosticsProvider(),
             self.monitor.on_vm_snapshot
         )
+        self.diag_service.register(self.reactor_diagnostics)
         self.diag_service.start()
 
+    def start_metrics(self):
+        port = self.config_desc.metrics_port
+        if not port or self._metrics_port:
+            return
+        try:
+            self._metrics_port = metrics.listen(port)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Cannot serve metrics on port %r: %r", port, e)
+
+    def stop_metrics(self):
+        if self._metrics_port:
+            self._metrics_port.stopListening()
+            self._metrics_port = None
+
     def stop_monitor(self):
         logger.debug("Stopping monitor ...")
         self.monitor.shut_down()
         self.diag_service.stop()
 
+    @rpc_utils.expose('diag.reactor')
+    def get_reactor_diagnostics(self) -> dict:
+        return self.reactor_diagnostics.get_diagnostics(
+            DiagnosticsOutputFormat.data)
+
+    @rpc_utils.expose('diag.profiler.start')
+    def start_reactor_profiler(self, interval: Optional[float] = None) -> bool:
+        return self.reactor_diagnostics.start_profiler(interval)
+
+    @rpc_utils.expose('diag.profiler.stop')
+    def stop_reactor_profiler(self) -> Optional[str]:
+        """ Stops the reactor profiler and returns the path of the file with
+        the collected stacks, in the folded format of flamegraph.pl """
+        profiles_dir = os.path.join(self.datadir, 'profiles')
+        os.makedirs(profiles_dir, exist_ok=True)
+        path = os.path.join(profiles_dir, 'reactor_{}.folded'.format(
+            time.strftime('%Y%m%d_%H%M%S')))
+        if self.reactor_diagnostics.stop_profiler(path) is None:
+            return None
+        return path
+
+    @rpc_utils.expose('diag.capture.start')
+    def start_traffic_capture(self) -> Optional[str]:
+        """ Starts logging the messages of all sessions and returns the path
+        of the log, None if a capture is already running """
+        if self.traffic_capture:
+            return None
+        captures_dir = os.path.join(self.datadir, 'captures')
+        os.makedirs(captures_dir, exist_ok=True)
+        path = os.path.join(captures_dir, 'traffic_{}.gcap'.format(
+            time.strftime('%Y%m%d_%H%M%S')))
+        self.traffic_capture = TrafficCapture(path)
+        self.traffic_capture.start()
+        return path
+
+    @rpc_utils.expose('diag.capture.stop')
+    def stop_traffic_capture(self) -> Optional[str]:
+        """ Stops the capture and returns the path of the log """
+        capture, self.traffic_capture = self.traffic_capture, None
+        if capture is None:
+            return None
+        capture.stop()
+        return capture.path
+
     @rpc_utils.expose('net.peer.connect')
     def connect(self, socket_address):
         if isinstance(socket_address, collections.Iterable):
@@ -1080,8 +1169,19 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
 
     @rpc_utils.expose('res.dirs.size')
     def get_res_dirs_sizes(self):
-        return {str(name): str(du(d))
-                for name, d in list(self.get_res_dirs().items())}
+        if not self.disk_usage:
+            return {str(name): str(du(d))
+                    for name, d in list(self.get_res_dirs().items())}
+
+        def display(size):
+            human_readable_size, idx = memoryhelper.dir_size_to_display(size)
+            return "{} {}".format(human_readable_size,
+                                  memoryhelper.translate_resource_index(idx))
+
+        distributed = self.disk_usage[DirectoryType.DISTRIBUTED]
+        received = self.disk_usage[DirectoryType.RECEIVED]
+        return {"total received data": display(received.size),
+                "total distributed data": display(distributed.size)}
 
     @rpc_utils.expose('res.dir')
     def get_res_dir(self, dir_type):
@@ -1106,14 +1206,81 @@ class Client:  # noqa pylint: disable=too-many-instance-attributes,too-many-publ
         raise Exception("Unknown dir type: {}".format(dir_type))
 
     def remove_distributed_files(self, older_than_seconds: int = 0):
-        dir_manager = DirManager(self.datadir)
-        dir_manager.clear_dir(self.get_distributed_files_dir(),
-                              older_than_seconds)
+        self._remove_files(DirectoryType.DISTRIBUTED,
+                           self.get_distributed_files_dir(),
+                           older_than_seconds)
 
     def remove_received_files(self, older_than_seconds: int = 0):
-        dir_manager = DirManager(self.datadir)
-        dir_manager.clear_dir(
-            self.get_received_files_dir(), older_than_seconds)
+        self._remove_files(DirectoryType.RECEIVED,
+                           self.get_received_files_dir(),
+                           older_than_seconds)
+
+    def _remove_files(self, dir_type, dir_path, older_than_seconds):
+        disk_usage = self.disk_usage.get(dir_type)
+        if disk_usage:
+            # Removed in the background by DiskUsageService
+            disk_usage.remove_older_than(older_than_seconds)
+        else:
+            dir_manager = DirManager(self.datadir)
+            names = set(os.listdir(dir_path)) if os.path.isdir(dir_path) \
+                else set()
+            dir_manager.clear_dir(dir_path, older_than_seconds)
+            if dir_type == DirectoryType.DISTRIBUTED:
+                for name in names - set(os.listdir(dir_path)):
+                    self._release_stored_resources(name)
+
+    def update_disk_usage(self, rescan: bool = False) -> None:
+        for disk_usage in self.disk_usage.values():
+            if rescan:
+                disk_usage.rescan()
+            disk_usage.step()
+
+    def _start_disk_usage_service(self):
+        # 0 stands for an unlimited directory size
+        max_size = self.config_desc.resource_dirs_max_size * 1024 or None
+        self.disk_usage = {
+            DirectoryType.DISTRIBUTED: DiskUsage(
+                self.get_distributed_files_dir(),
+                max_size=max_size,
+                is_protected=self._is_task_in_use,
+                on_removed=self._release_stored_resources),
+            DirectoryType.RECEIVED: DiskUsage(
+                self.get_received_files_dir(),
+                max_size=max_size,
+                is_protected=self._is_task_in_use),
+        }
+        disk_usage_service = DiskUsageService(self)
+        disk_usage_service.start()
+        self._services.append(disk_usage_service)
+
+    def _is_task_in_use(self, task_id: str) -> bool:
+        task_state = self.task_server.task_manager.tasks_states.get(task_id)
+        if task_state and task_state.status.is_active():
+            return True
+        subtask = self.task_server.task_computer.assigned_subtask
+        return bool(subtask) and subtask['task_id'] == task_id
+
+    def evict_stored_resources(self, older_than_seconds: int = 0) -> int:
+        """ Evicts unreferenced files from the content store, the ones unused
+        for older_than_seconds and any other exceeding the store's budget
+        :return: number of bytes freed
+        """
+        store = self._get_content_store()
+        if store is None:
+            return 0
+        return store.evict(older_than_seconds=older_than_seconds)
+
+    def _release_stored_resources(self, task_id: str) -> None:
+        """ Drops the content store references of a task whose distributed
+        resource directory has been removed, so its files can be evicted """
+        store = self._get_content_store()
+        if store is not None:
+            store.release(task_id)
+
+    def _get_content_store(self):
+        if not self.resource_server:
+            return None
+        return self.resource_server.resource_manager.content_store
 
     def remove_task(self, task_id):
         self.p2pservice.remove_task(task_id)
@@ -1366,19 +1533,23 @@ class DoWorkService(LoopingCallService):
                 self._client.config_desc.pings_interval)
 
         try:
-            self._client.p2pservice.sync_network()
+            with timed('sync_network', 'p2pservice'):
+                self._client.p2pservice.sync_network()
         except Exception:
             logger.exception("p2pservice.sync_network failed")
         try:
-            self._client.task_server.sync_network()
+            with timed('sync_network', 'task_server'):
+                self._client.task_server.sync_network()
         except Exception:
             logger.exception("task_server.sync_network failed")
         try:
-            self._client.resource_server.sync_network()
+            with timed('sync_network', 'resource_server'):
+                self._client.resource_server.sync_network()
         except Exception:
             logger.exception("resource_server.sync_network failed")
         try:
-            self._client.ranking.sync_network()
+            with timed('sync_network', 'ranking'):
+                self._client.ranking.sync_network()
         except Exception:
             logger.exception("ranking.sync_network failed")
 
@@ -1481,6 +1652,29 @@ class ResourceCleanerService(LoopingCallService):
         # Issue #2432
         self._client.remove_distributed_files(self.older_than_seconds)
         self._client.remove_received_files(self.older_than_seconds)
+        # Removed task directories release their content store references,
+        # so the shared files are evicted afterwards
+        self._client.evict_stored_resources(self.older_than_seconds)
+
+
+class DiskUsageService(LoopingCallService):
+    """ Measures and cleans up resource directories in small steps """
+    _client = None  # type: Client
+
+    def __init__(self,
+                 client: Client,
+                 interval_seconds: int = DISK_USAGE_INTERVAL,
+                 rescan_every: int = DISK_USAGE_RESCAN_EVERY) -> None:
+        super().__init__(interval_seconds)
+        self._client = client
+        self._rescan_every = rescan_every
+        self._runs = 0
+
+    def _run(self):
+        # Catch up with changes not reported to the index
+        rescan = self._runs % self._rescan_every == 0
+        self._runs += 1
+        self._client.update_disk_usage(rescan=rescan)
 
 
 class TaskCleanerService(LoopingCallService):
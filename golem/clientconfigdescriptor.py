@@ -25,6 +25,8 @@ class ClientConfigDescriptor(object):
         self.use_upnp = 0
         self.enable_talkback = 0
         self.enable_monitor = 0
+        self.parallel_default_benchmark = 0
+        self.metrics_port = 0
 
         self.seed_host = None
         self.seed_port = 0
@@ -41,6 +43,8 @@ class ClientConfigDescriptor(object):
         self.resource_session_timeout = 0
         self.clean_resources_older_than_seconds = 0
         self.clean_tasks_older_than_seconds = 0
+        self.content_store_max_size = 0
+        self.resource_dirs_max_size = 0
         self.cleaning_enabled = 0
         self.offer_pooling_interval = 0.0
 
@@ -108,9 +108,17 @@ class AESFileEncryptor(FileEncryptor):
     @classmethod
     def decrypt(cls, file_in, file_out, secret, key_len=32):
 
+        with FileHelper(file_out, 'wb') as dst:
+            for chunk in cls.decrypt_chunks(file_in, secret, key_len):
+                dst.write(chunk)
+
+    @classmethod
+    def decrypt_chunks(cls, file_in, secret, key_len=32):
+        """ Yields the decrypted contents of file_in, chunk by chunk """
+
         block_size = cls.block_size
 
-        with FileHelper(file_in, 'rb') as src, FileHelper(file_out, 'wb') as dst:
+        with FileHelper(file_in, 'rb') as src:
 
             block = src.read(block_size)
             salt = block[cls.salt_prefix_len:]
@@ -130,4 +138,5 @@ class AESFileEncryptor(FileEncryptor):
                     chunk = chunk[:-pad_len]
                     working = False
 
-                dst.write(chunk)
+                if chunk:
+                    yield chunk
@@ -0,0 +1,282 @@
+"""
+In-process metrics: counters, gauges and histograms, optionally with labels,
+kept in a registry which renders them in the Prometheus text exposition
+format. The registry can be served on a local HTTP port, see listen().
+"""
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from twisted.web.resource import Resource
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIME_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1., 5., 10., 30., 60., 120.,
+                        300., 600., 1800.)
+# For operations expected to take milliseconds, e.g. database writes
+FAST_TIME_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1., 5.)
+
+
+class Histogram:
+    """ Counts observed values in cumulative buckets, as in the Prometheus
+    histogram: each bucket counts values lower than or equal to its upper
+    bound. """
+
+    def __init__(self,
+                 buckets: Sequence[float] = DEFAULT_TIME_BUCKETS) -> None:
+        self.buckets: List[float] = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def snapshot(self) -> Dict:
+        """
+        :return: dict with the cumulative count per bucket upper bound
+        ('+Inf' for all values), the number and the sum of observed values
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative: Dict[str, int] = dict()
+        running = 0
+        for bound, count in zip(self.buckets + [float('inf')], counts):
+            running += count
+            cumulative[_format_bound(bound)] = running
+        return {
+            'buckets': cumulative,
+            'count': running,
+            'sum': total,
+        }
+
+
+def _format_bound(bound: float) -> str:
+    if bound == float('inf'):
+        return '+Inf'
+    return repr(float(bound))
+
+
+class Counter:
+    """ Monotonically increasing value """
+
+    def __init__(self) -> None:
+        self._value = 0.
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """ Value which can go up and down; can be read from a function when
+    the metrics are collected, e.g. the length of a queue """
+
+    def __init__(self) -> None:
+        self._value = 0.
+        self._function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+
+class Metric:
+    """ A named metric: one Counter, Gauge or Histogram per set of label
+    values. The number of label sets is bounded; values observed with any
+    further label set are accumulated under OVERFLOW_LABEL. """
+
+    MAX_LABEL_SETS = 100
+    OVERFLOW_LABEL = '_other'
+
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 kind: str,
+                 factory: Callable,
+                 label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = dict()
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """ Returns the Counter, Gauge or Histogram for the label values;
+        call without arguments for a metric without labels """
+        if len(values) != len(self.label_names):
+            raise ValueError("{} expects labels {}".format(
+                self.name, self.label_names))
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                if key not in self._children and \
+                        len(self._children) >= self.MAX_LABEL_SETS:
+                    logger.debug('Too many label sets of %s, %r counted as %s',
+                                 self.name, key, self.OVERFLOW_LABEL)
+                    key = (self.OVERFLOW_LABEL,) * len(key)
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def children(self) -> Dict[Tuple[str, ...], object]:
+        """ The Counters, Gauges or Histograms by label values """
+        with self._lock:
+            return dict(self._children)
+
+    def register(self, child, *values) -> None:
+        """ Exposes an existing Counter, Gauge or Histogram under the label
+        values """
+        with self._lock:
+            self._children[tuple(str(value) for value in values)] = child
+
+    def expose(self) -> List[str]:
+        lines = [
+            '# HELP {} {}'.format(self.name, _escape(self.description)),
+            '# TYPE {} {}'.format(self.name, self.kind),
+        ]
+        for key, child in sorted(self._children.items()):
+            labels = list(zip(self.label_names, key))
+            if self.kind != 'histogram':
+                lines.append(_sample(self.name, labels, child.value))
+                continue
+            snapshot = child.snapshot()
+            for bound, count in snapshot['buckets'].items():
+                lines.append(_sample(self.name + '_bucket',
+                                     labels + [('le', bound)], count))
+            lines.append(_sample(self.name + '_sum', labels, snapshot['sum']))
+            lines.append(_sample(self.name + '_count', labels,
+                                 snapshot['count']))
+        return lines
+
+
+class Registry:
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = dict()
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str,
+                labels: Sequence[str] = ()) -> Metric:
+        return self._get(name, description, 'counter', Counter, labels)
+
+    def gauge(self, name: str, description: str,
+              labels: Sequence[str] = ()) -> Metric:
+        return self._get(name, description, 'gauge', Gauge, labels)
+
+    def histogram(self, name: str, description: str,
+                  labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_TIME_BUCKETS) -> Metric:
+        return self._get(name, description, 'histogram',
+                         lambda: Histogram(buckets), labels)
+
+    def _get(self, name: str, description: str, kind: str,
+             factory: Callable, labels: Sequence[str]) -> Metric:
+        """ Returns the metric registered under name, creating it if
+        necessary """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = Metric(name, description, kind, factory, labels)
+                self._metrics[name] = metric
+            elif metric.kind != kind or metric.label_names != tuple(labels):
+                raise ValueError("Metric {} already registered as {} {}"
+                                 .format(name, metric.kind,
+                                         metric.label_names))
+            return metric
+
+    def expose(self) -> str:
+        """ All metrics in the Prometheus text exposition format """
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines: List[str] = []
+        for _, metric in metrics:
+            try:
+                lines += metric.expose()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Cannot collect metric %s', metric.name)
+        return ''.join(line + '\n' for line in lines)
+
+
+REGISTRY = Registry()
+
+
+class MetricsResource(Resource):
+    isLeaf = True
+    CONTENT_TYPE = b'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, registry: Registry = REGISTRY) -> None:
+        super().__init__()
+        self.registry = registry
+
+    def render_GET(self, request):  # pylint: disable=invalid-name
+        request.setHeader(b'Content-Type', self.CONTENT_TYPE)
+        return self.registry.expose().encode('utf-8')
+
+
+def listen(port: int, registry: Registry = REGISTRY,
+           interface: str = '127.0.0.1'):
+    """ Serves the metrics over HTTP on the local interface; returns the
+    listening port """
+    from twisted.internet import reactor
+    from twisted.web.server import Site
+
+    listening_port = reactor.listenTCP(port, Site(MetricsResource(registry)),
+                                       interface=interface)
+    logger.info('Serving metrics on http://%s:%d/', interface,
+                listening_port.getHost().port)
+    return listening_port
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _sample(name: str, labels: List[Tuple[str, str]], value) -> str:
+    if labels:
+        name += '{' + ','.join(
+            '{}="{}"'.format(label, _escape(label_value).replace('"', '\\"'))
+            for label, label_value in labels) + '}'
+    return '{} {}'.format(name, _format_value(value))
+
+
+def _format_value(value) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return _format_bound(value)
@@ -1,9 +1,11 @@
+import abc
 import collections
 import inspect
 import logging
 import sys
 import types
 from abc import ABC, abstractmethod
+from typing import Callable, Dict, Tuple
 
 from golem_messages import datastructures
 
@@ -12,17 +14,47 @@ from golem.core.common import to_unicode
 logger = logging.getLogger('golem.core.simpleserializer')
 
 
+def _identity(obj, _typed=True):
+    return obj
+
+
+def _encode_str(obj, _typed=True):
+    return to_unicode(obj)
+
+
+def _encode_container(obj, _typed=True):
+    return obj.to_dict()
+
+
 class DictCoder:
+    """
+    Objects are traversed by reflection only once per type: the checks
+    selecting how a value is (de)serialized are evaluated for the first
+    value of a type and the resulting function is cached for that type.
+    A redefined class is a new type and gets its own functions; call
+    invalidate() after modifying a class in place.
+    """
+
     cls_key = 'py/object'
     deep_serialization = True
     builtin_types = [i for i in types.__dict__.values() if isinstance(i, type)]
 
+    # type -> (is callable, serializer)
+    _encoders: Dict[type, Tuple[bool, Callable]] = dict()
+    # type -> deserializer
+    _decoders: Dict[type, Callable] = dict()
+    # class path -> (module name, class name, class)
+    _classes: Dict[str, Tuple[str, str, type]] = dict()
+    _abc_token = None
+
     @classmethod
     def to_dict(cls, obj, typed=True):
+        cls._check_cache()
         return cls._to_dict_traverse_obj(obj, typed)
 
     @classmethod
     def from_dict(cls, dictionary, as_class=None):
+        cls._check_cache()
         if as_class:
             dictionary = dict(dictionary)
             dictionary[cls.cls_key] = cls.module_and_class(as_class)
@@ -31,41 +63,146 @@ class DictCoder:
     @classmethod
     def obj_to_dict(cls, obj, typed=True):
         """Stores object's public properties in a dictionary"""
+        cls._check_cache()
+        return cls._obj_to_dict(obj, typed)
+
+    @classmethod
+    def obj_from_dict(cls, dictionary):
+        cls._check_cache()
+        return cls._obj_from_dict(dictionary)
+
+    @classmethod
+    def invalidate(cls):
+        """ Drops the cached (de)serializers """
+        cls._encoders = dict()
+        cls._decoders = dict()
+        cls._classes = dict()
+        cls._abc_token = abc.get_cache_token()
+
+    @classmethod
+    def _check_cache(cls):
+        # Registering a class in an ABC changes the results of isinstance
+        # checks the cached functions were selected with. Subclasses keep
+        # their own cache, as they may select different functions.
+        if cls.__dict__.get('_abc_token') != abc.get_cache_token():
+            cls.invalidate()
+
+    @classmethod
+    def _obj_to_dict(cls, obj, typed=True):
         result = cls._to_dict_traverse_dict(obj.__dict__, typed)
         if typed:
             result[cls.cls_key] = cls.module_and_class(obj)
         return result
 
     @classmethod
-    def obj_from_dict(cls, dictionary):
-        cls_path = dictionary.pop(cls.cls_key)
+    def _obj_from_dict(cls, dictionary):
+        sub_cls = cls._class(dictionary.pop(cls.cls_key))
+        obj = sub_cls.__new__(sub_cls)
+
+        for k, v in list(dictionary.items()):
+            setattr(obj, k, cls._from_dict_traverse_obj(v))
+        return obj
+
+    @classmethod
+    def _class(cls, cls_path):
+        try:
+            module_name, cls_name, sub_cls = cls._classes[cls_path]
+            # the class is still there, e.g. its module was not reloaded
+            module = sys.modules.get(module_name)
+            if module is not None and vars(module).get(cls_name) is sub_cls:
+                return sub_cls
+        except KeyError:
+            pass
 
         _idx = cls_path.rfind('.')
         module_name, cls_name = cls_path[:_idx], cls_path[_idx+1:]
         module = sys.modules[module_name]
         sub_cls = getattr(module, cls_name)
 
-        obj = sub_cls.__new__(sub_cls)
-
-        for k, v in list(dictionary.items()):
-            if cls._is_class(v):
-                setattr(obj, k, cls.obj_from_dict(v))
-            else:
-                setattr(obj, k, cls._from_dict_traverse_obj(v))
-        return obj
+        cls._classes[cls_path] = module_name, cls_name, sub_cls
+        return sub_cls
 
     @classmethod
     def _to_dict_traverse_dict(cls, dictionary, typed=True):
         result = dict()
         for k, v in list(dictionary.items()):
-            if (isinstance(k, str) and k.startswith('_')) \
-                    or isinstance(v, collections.Callable):
+            if isinstance(k, str) and k.startswith('_'):
+                continue
+            is_callable, encode = cls._encoder(v)
+            if is_callable:
                 continue
-            result[str(k)] = cls._to_dict_traverse_obj(v, typed)
+            result[str(k)] = encode(v, typed)
         return result
 
     @classmethod
     def _to_dict_traverse_obj(cls, obj, typed=True):
+        return cls._encoder(obj)[1](obj, typed)
+
+    @classmethod
+    def _encoder(cls, obj) -> Tuple[bool, Callable]:
+        try:
+            return cls._encoders[type(obj)]
+        except KeyError:
+            return cls._compile_encoder(obj)
+
+    @classmethod
+    def _compile_encoder(cls, obj) -> Tuple[bool, Callable]:
+        """ Selects the serializer of obj the way _to_dict_reflect does and
+        caches it for the type of obj """
+        obj_type = type(obj)
+        is_callable = isinstance(obj, collections.Callable)
+        if not cls._is_cacheable(obj):
+            return is_callable, cls._to_dict_reflect
+
+        if isinstance(obj, dict):
+            encode = cls._to_dict_traverse_dict
+        elif isinstance(obj, str):
+            encode = _encode_str
+        elif obj_type is bytes:
+            # rebuilding bytes from its (int) items gives an equal value
+            encode = _identity
+        elif isinstance(obj, collections.Iterable):
+            encode = cls._compile_iterable_encoder(obj_type)
+        elif isinstance(obj, datastructures.Container):
+            encode = _encode_container
+        elif cls.deep_serialization and hasattr(obj, '__dict__') \
+                and not cls._is_builtin(obj):
+            encode = cls._compile_obj_encoder(obj_type)
+        else:
+            encode = _identity
+
+        entry = cls._encoders[obj_type] = is_callable, encode
+        return entry
+
+    @classmethod
+    def _compile_iterable_encoder(cls, obj_type) -> Callable:
+        is_set = issubclass(obj_type, (set, frozenset))
+        encode_item = cls._to_dict_traverse_obj
+
+        def encode(obj, typed=True):
+            if is_set:
+                logger.warning(
+                    'set/frozenset have known problems with umsgpack: %r',
+                    obj,
+                )
+            return obj_type([encode_item(o, typed) for o in obj])
+        return encode
+
+    @classmethod
+    def _compile_obj_encoder(cls, obj_type) -> Callable:
+        cls_key = cls.cls_key
+        cls_path = cls.module_and_class(obj_type)
+        encode_dict = cls._to_dict_traverse_dict
+
+        def encode(obj, typed=True):
+            result = encode_dict(obj.__dict__, typed)
+            if typed:
+                result[cls_key] = cls_path
+            return result
+        return encode
+
+    @classmethod
+    def _to_dict_reflect(cls, obj, typed=True):
         if isinstance(obj, dict):
             return cls._to_dict_traverse_dict(obj, typed)
         elif isinstance(obj, str):
@@ -83,7 +220,7 @@ class DictCoder:
             return obj.to_dict()
         elif cls.deep_serialization:
             if hasattr(obj, '__dict__') and not cls._is_builtin(obj):
-                return cls.obj_to_dict(obj, typed)
+                return cls._obj_to_dict(obj, typed)
         return obj
 
     @classmethod
@@ -95,9 +232,48 @@ class DictCoder:
 
     @classmethod
     def _from_dict_traverse_obj(cls, obj):
+        try:
+            decode = cls._decoders[type(obj)]
+        except KeyError:
+            decode = cls._compile_decoder(obj)
+        return decode(obj)
+
+    @classmethod
+    def _compile_decoder(cls, obj) -> Callable:
+        """ Selects the deserializer of obj the way _from_dict_reflect does
+        and caches it for the type of obj """
+        obj_type = type(obj)
+        if not cls._is_cacheable(obj):
+            return cls._from_dict_reflect
+
+        if isinstance(obj, dict):
+            decode = cls._decode_dict
+        elif isinstance(obj, str):
+            decode = to_unicode
+        elif obj_type is bytes:
+            decode = _identity
+        elif isinstance(obj, collections.Iterable):
+            decode_item = cls._from_dict_traverse_obj
+
+            def decode(obj):
+                return obj_type([decode_item(o) for o in obj])
+        else:
+            decode = _identity
+
+        cls._decoders[obj_type] = decode
+        return decode
+
+    @classmethod
+    def _decode_dict(cls, obj):
+        if cls.cls_key in obj:
+            return cls._obj_from_dict(obj)
+        return cls._from_dict_traverse_dict(obj)
+
+    @classmethod
+    def _from_dict_reflect(cls, obj):
         if isinstance(obj, dict):
             if cls._is_class(obj):
-                return cls.obj_from_dict(obj)
+                return cls._obj_from_dict(obj)
             return cls._from_dict_traverse_dict(obj)
         elif isinstance(obj, str):
             return to_unicode(obj)
@@ -105,6 +281,14 @@ class DictCoder:
             return obj.__class__([cls._from_dict_traverse_obj(o) for o in obj])
         return obj
 
+    @classmethod
+    def _is_cacheable(cls, obj):
+        # pylint: disable=unidiomatic-typecheck
+        # Objects pretending to be of another class (e.g. mocks with a spec)
+        # may pass different checks than other objects of their type
+        return obj.__class__ is type(obj) \
+            and type(obj) not in cls.builtin_types
+
     @classmethod
     def _is_class(cls, obj):
         return isinstance(obj, dict) and cls.cls_key in obj
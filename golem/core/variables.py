@@ -63,6 +63,9 @@ CONCENT_PULL_INTERVAL = (MAX_CONCENT_PING_INTERVAL / 2).total_seconds()
 
 # Number of task headers transmitted per message
 TASK_HEADERS_LIMIT = 20
+# Time after which task headers known to a peer may be sent to it again
+# (seconds)
+TASK_HEADERS_RESEND_INTERVAL = 15 * 60
 KEY_DIFFICULTY = 14
 
 # Maximum acceptable difference between node time and monitor time (seconds)
@@ -6,19 +6,39 @@ from typing import Optional, Type, Sequence
 
 import peewee
 
+from golem.core import metrics
 from golem.database.migration import default_migrate_dir
 from golem.database.migration.migrate import migrate_schema, MigrationError
+from golem.database.writer import DatabaseWriter
 
 logger = logging.getLogger('golem.db')
 
+WRITE_STATEMENTS = frozenset(['INSERT', 'UPDATE', 'DELETE', 'REPLACE'])
+WRITE_DURATION = metrics.REGISTRY.histogram(
+    'golem_db_write_seconds', 'Duration of database writes, with retries',
+    ['statement'], buckets=metrics.FAST_TIME_BUCKETS)
+
 
 class GolemSqliteDatabase(peewee.SqliteDatabase):
     RETRY_TIMEOUT = datetime.timedelta(minutes=1)
+    RETRY_DELAY = 0.001
+    MAX_RETRY_DELAY = 0.1
 
     def sequence_exists(self, seq):
         raise NotImplementedError()
 
     def execute_sql(self, sql, params=None, require_commit=True):
+        statement = sql.split(None, 1)[0].upper() if sql else ''
+        if statement not in WRITE_STATEMENTS:
+            return self._execute_sql(sql, params, require_commit)
+        started = time.monotonic()
+        try:
+            return self._execute_sql(sql, params, require_commit)
+        finally:
+            WRITE_DURATION.labels(statement).observe(
+                time.monotonic() - started)
+
+    def _execute_sql(self, sql, params=None, require_commit=True):
         # Loosely based on
         # https://github.com/coleifer/peewee/blob/2.10.2/playhouse/shortcuts.py#L206-L219
         deadline = datetime.datetime.now() + self.RETRY_TIMEOUT
@@ -32,6 +52,11 @@ class GolemSqliteDatabase(peewee.SqliteDatabase):
                 if str(e).startswith('no such savepoint'):
                     logger.warning('execute_sql() tx rollback failed: %r', e)
                     return
+                # Reconnecting would lose the batch: the writer rolls it back
+                # and retries it with backoff if the database is locked, or
+                # reports a failure of each write otherwise
+                elif self.transaction_depth() > 0 and _in_writer_thread():
+                    raise
                 # Check retry deadline
                 elif datetime.datetime.now() > deadline:
                     logger.warning(
@@ -51,12 +76,18 @@ class GolemSqliteDatabase(peewee.SqliteDatabase):
                 )
                 if not self.is_closed():
                     self.close()
-                time.sleep(0)
+                time.sleep(min(self.RETRY_DELAY * iterations,
+                               self.MAX_RETRY_DELAY))
+
+
+def _in_writer_thread() -> bool:
+    writer = DatabaseWriter.instance
+    return bool(writer and writer.in_writer_thread())
 
 
 class Database:
 
-    SCHEMA_VERSION = 26
+    SCHEMA_VERSION = 28
 
     def __init__(self,  # noqa pylint: disable=too-many-arguments
                  db: peewee.Database,
@@ -64,7 +95,12 @@ class Database:
                  models: Sequence[Type[peewee.Model]],
                  db_dir: str,
                  db_name: str = 'golem.db',
-                 schemas_dir: Optional[str] = default_migrate_dir()) -> None:
+                 schemas_dir: Optional[str] = default_migrate_dir(),
+                 use_writer: bool = False) -> None:
+        """
+        :param use_writer: funnel writes issued through golem.database.writer
+        to a DatabaseWriter thread; otherwise they are executed by the caller
+        """
 
         self.fields = fields
         self.models = models
@@ -84,7 +120,14 @@ class Database:
         elif schemas_dir and version < self.SCHEMA_VERSION:
             self._migrate_schema(version, to_version=self.SCHEMA_VERSION)
 
+        self.writer: Optional[DatabaseWriter] = None
+        if use_writer:
+            self.writer = DatabaseWriter(self.db)
+            self.writer.start()
+
     def close(self):
+        if self.writer:
+            self.writer.stop()
         if not self.db.is_closed():
             self.db.close()
 
@@ -0,0 +1,16 @@
+# pylint: disable=no-member
+# pylint: disable=unused-argument
+import peewee as pw
+
+SCHEMA_VERSION = 27
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    migrator.add_fields(
+        'performance',
+        aggregate_value=pw.FloatField(null=True),
+    )
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_fields('performance', 'aggregate_value')
@@ -0,0 +1,25 @@
+# pylint: disable=no-member
+# pylint: disable=unused-argument
+import datetime
+
+import peewee as pw
+
+SCHEMA_VERSION = 28
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    @migrator.create_model  # pylint: disable=unused-variable
+    class CachedPerformance(pw.Model):
+        fingerprint = pw.CharField(primary_key=True)
+        environment_id = pw.CharField(index=True)
+        value = pw.FloatField()
+        aggregate_value = pw.FloatField(null=True)
+        created_date = pw.DateTimeField(default=datetime.datetime.now)
+        modified_date = pw.DateTimeField(default=datetime.datetime.now)
+
+        class Meta:
+            db_table = "cachedperformance"
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_model("cachedperformance")
@@ -0,0 +1,266 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Callable, List, NamedTuple, Optional
+
+import peewee
+from twisted.internet.defer import Deferred
+
+from golem.core import metrics
+
+logger = logging.getLogger('golem.db')
+
+# Maximum number of writes committed in a single transaction
+MAX_BATCH_SIZE = 256
+# How long to wait for more writes after the first one of a batch, in seconds
+MAX_BATCH_DELAY = 0.005
+# Backoff between retries of a transaction failing on a database lock
+RETRY_DELAY = 0.005
+MAX_RETRY_DELAY = 1.
+
+BATCH_SIZE = metrics.REGISTRY.histogram(
+    'golem_db_write_batch_size', 'Number of writes committed together',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+BATCH_DURATION = metrics.REGISTRY.histogram(
+    'golem_db_write_batch_seconds', 'Duration of committing a batch of writes',
+    buckets=metrics.FAST_TIME_BUCKETS)
+LOCK_RETRIES = metrics.REGISTRY.counter(
+    'golem_db_write_lock_retries_total',
+    'Transactions of the writer retried because the database was locked')
+
+Write = NamedTuple('Write', [
+    ('func', Callable),
+    ('args', tuple),
+    ('kwargs', dict),
+    ('future', Future),
+])
+
+
+class DatabaseWriter:
+    """
+    Funnels writes to the database through a single thread. Writes queued by
+    other threads are executed in batches, each committed as one transaction,
+    with a savepoint per write, so a failing write does not affect the others.
+    Transactions failing because the database is locked (by another process
+    or connection) are retried with backoff until they succeed, so no queued
+    write is lost. Readers keep using their own (thread local) connections.
+
+    Callers get a Future (or a Deferred, see write_deferred) of the result,
+    resolved once the batch has been committed.
+    """
+
+    # Writer used by the shortcuts below, if running
+    instance: Optional['DatabaseWriter'] = None
+
+    def __init__(self, db: peewee.Database,
+                 max_batch_size: int = MAX_BATCH_SIZE,
+                 max_batch_delay: float = MAX_BATCH_DELAY,
+                 retry_delay: float = RETRY_DELAY,
+                 max_retry_delay: float = MAX_RETRY_DELAY) -> None:
+        self.db = db
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._queue: 'queue.Queue[Optional[Write]]' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def backlog(self) -> int:
+        """ Number of writes waiting in the queue """
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='DatabaseWriter')
+        self._thread.start()
+        if self.__class__.instance is None:
+            self.__class__.instance = self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """ Commits the writes queued so far and stops the thread """
+        if self.__class__.instance is self:
+            self.__class__.instance = None
+        if not self.running:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def in_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """ Queues func(*args, **kwargs) to be executed and committed by the
+        writer thread. Writes issued from the writer thread itself are
+        executed right away. """
+        future: Future = Future()
+        if self.in_writer_thread():
+            _execute(future, func, args, kwargs)
+        else:
+            self._queue.put(Write(func, args, kwargs, future))
+        return future
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """ Executes func in the writer thread, waiting for the commit """
+        return self.submit(func, *args, **kwargs).result()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Write] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.max_batch_delay
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.max_batch_size:
+                    break
+                try:
+                    item = self._queue.get(
+                        timeout=max(0., deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if batch:
+                started = time.monotonic()
+                self._commit(batch)
+                BATCH_SIZE.labels().observe(len(batch))
+                BATCH_DURATION.labels().observe(time.monotonic() - started)
+        if not self.db.is_closed():
+            self.db.close()
+
+    def _commit(self, batch: List[Write]) -> None:
+        try:
+            results = self._retry_locked(self._transaction, batch)
+        except Exception as e:  # pylint: disable=broad-except
+            # the whole batch was rolled back, retry the writes one by one
+            logger.warning("Batch of %d writes failed: %r. Retrying.",
+                           len(batch), e)
+            for write in batch:
+                try:
+                    result = self._retry_locked(self._transaction, [write])[0]
+                except Exception as exc:  # pylint: disable=broad-except
+                    result = None, exc
+                _set_result(write.future, result)
+            return
+
+        for write, result in zip(batch, results):
+            _set_result(write.future, result)
+
+    def _transaction(self, batch: List[Write]) -> list:
+        with self.db.transaction():
+            return [_call(self.db, write) for write in batch]
+
+    def _retry_locked(self, func: Callable, *args) -> Any:
+        """ Calls func until it does not fail on a database lock, sleeping
+        for an exponentially growing delay between the attempts """
+        delay = self.retry_delay
+        attempts = 0
+        while True:
+            try:
+                return func(*args)
+            except peewee.OperationalError as e:
+                if not is_lock_error(e):
+                    raise
+                attempts += 1
+                LOCK_RETRIES.labels().inc()
+                log = logger.warning if attempts % 10 == 0 else logger.debug
+                log("Database locked, retrying the transaction (%d): %r",
+                    attempts, e)
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+
+def is_lock_error(error: Exception) -> bool:
+    """ Tells whether the error is caused by the database being locked or
+    busy, so the failed transaction can be retried as a whole """
+    message = str(error).lower()
+    return isinstance(error, peewee.OperationalError) \
+        and ('locked' in message or 'busy' in message)
+
+
+def _call(db: peewee.Database, write: Write):
+    """ Executes a write in a savepoint, returns (result, exception). Lock
+    errors are raised, failing the whole transaction to be retried. """
+    try:
+        with db.savepoint():
+            return write.func(*write.args, **write.kwargs), None
+    except Exception as e:  # pylint: disable=broad-except
+        if is_lock_error(e):
+            raise
+        return None, e
+
+
+def _set_result(future: Future, result) -> None:
+    value, exception = result
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(value)
+
+
+def _execute(future: Future, func: Callable, args: tuple, kwargs: dict):
+    try:
+        future.set_result(func(*args, **kwargs))
+    except Exception as e:  # pylint: disable=broad-except
+        future.set_exception(e)
+
+
+# SHORTCUTS #
+
+def submit(func: Callable, *args, **kwargs) -> Future:
+    """ Queues a write in the running DatabaseWriter, or executes it right
+    away if there is none """
+    writer = DatabaseWriter.instance
+    if writer and writer.running:
+        return writer.submit(func, *args, **kwargs)
+    future: Future = Future()
+    _execute(future, func, args, kwargs)
+    return future
+
+
+def call(func: Callable, *args, **kwargs) -> Any:
+    """ Executes a write like submit, waiting for it to be committed """
+    return submit(func, *args, **kwargs).result()
+
+
+def write_deferred(func: Callable, *args, **kwargs) -> Deferred:
+    """ Executes a write like submit; the Deferred is fired in the reactor
+    thread """
+    from twisted.internet import reactor
+
+    deferred = Deferred()
+
+    def done(future: Future) -> None:
+        exception = future.exception()
+        if exception is not None:
+            reactor.callFromThread(deferred.errback, exception)
+        else:
+            reactor.callFromThread(deferred.callback, future.result())
+
+    submit(func, *args, **kwargs).add_done_callback(done)
+    return deferred
+
+
+def write_behind(func: Callable) -> Callable[..., Future]:
+    """ Decorator queueing the calls in the DatabaseWriter; failures are
+    logged """
+    def log_failure(future: Future) -> None:
+        exception = future.exception()
+        if exception is not None:
+            logger.error("Write %s failed: %r", func.__name__, exception)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> Future:
+        future = submit(func, *args, **kwargs)
+        future.add_done_callback(log_failure)
+        return future
+    return wrapper
@@ -0,0 +1,67 @@
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+
+class SamplingProfiler(object):
+    """
+    Periodically samples the stack of a single thread (by default the one
+    calling start(), i.e. the reactor thread when started from an RPC call).
+    Samples are aggregated as folded stacks, the input format of flamegraph.pl
+    and compatible tools.
+    """
+
+    DEFAULT_INTERVAL = 0.005
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        if self.running:
+            return
+        self._thread_id = thread_id or threading.get_ident()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='SamplingProfiler')
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopped.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        """ One 'frame;frame;...;frame count' line per distinct stack """
+        return ''.join('{} {}\n'.format(stack, count)
+                       for stack, count in sorted(self.samples.items()))
+
+    def dump(self, path: str) -> None:
+        with open(path, 'w') as f:
+            f.write(self.folded())
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)  # noqa pylint: disable=protected-access
+            if frame is None:
+                break
+            self.samples[_collapse(frame)] += 1
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append('{} ({}:{})'.format(
+            code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
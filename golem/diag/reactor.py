@@ -0,0 +1,157 @@
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from golem.diag.profiler import SamplingProfiler
+from golem.diag.service import DiagnosticsProvider
+
+logger = logging.getLogger(__name__)
+
+# Interval of the timer measuring the reactor loop lag, in seconds
+LAG_CHECK_INTERVAL = 0.01
+# Number of recent lag samples used for percentiles
+LAG_WINDOW = 1000
+
+
+class TimingStats(object):
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.,
+            'max': self.max,
+        }
+
+
+class ReactorDiagnosticsProvider(DiagnosticsProvider):
+    """
+    Measures how long the reactor thread is blocked. A timer scheduled every
+    LAG_CHECK_INTERVAL records how late it fires (the loop lag); jobs run
+    in the reactor thread are timed with the timed() context manager, by
+    category and key (e.g. 'sync_network' / 'p2pservice', 'interpret' /
+    message type). A sampling profiler of the reactor thread can be run
+    on demand.
+    """
+
+    # Provider used by timed(), if started
+    instance: Optional['ReactorDiagnosticsProvider'] = None
+
+    def __init__(self, interval: float = LAG_CHECK_INTERVAL,
+                 clock=None) -> None:
+        if clock is None:
+            from twisted.internet import reactor
+            clock = reactor
+        self.interval = interval
+        self.lag = TimingStats()
+        self.recent_lag: deque = deque(maxlen=LAG_WINDOW)
+        self.timings: Dict[str, Dict[str, TimingStats]] = \
+            defaultdict(lambda: defaultdict(TimingStats))
+        self.profiler: Optional[SamplingProfiler] = None
+        self._clock = clock
+        self._call = None
+        self._expected = 0.
+
+    @property
+    def running(self) -> bool:
+        return self._call is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._schedule()
+        if self.__class__.instance is None:
+            self.__class__.instance = self
+
+    def stop(self) -> None:
+        if self.__class__.instance is self:
+            self.__class__.instance = None
+        self.stop_profiler()
+        if self._call and self._call.active():
+            self._call.cancel()
+        self._call = None
+
+    def record(self, category: str, key: str, duration: float) -> None:
+        self.timings[category][key].add(duration)
+
+    def start_profiler(self, interval: Optional[float] = None) -> bool:
+        """ Starts sampling the calling (reactor) thread. Returns False if
+        the profiler is already running. """
+        if self.profiler and self.profiler.running:
+            return False
+        self.profiler = SamplingProfiler(
+            interval or SamplingProfiler.DEFAULT_INTERVAL)
+        self.profiler.start()
+        return True
+
+    def stop_profiler(self, path: Optional[str] = None) -> Optional[int]:
+        """ Stops the profiler and writes the folded stacks to path.
+        Returns the number of samples, None if the profiler wasn't running """
+        profiler, self.profiler = self.profiler, None
+        if not (profiler and profiler.running):
+            return None
+        profiler.stop()
+        if path:
+            profiler.dump(path)
+            logger.info('Reactor profile written to %s', path)
+        return sum(profiler.samples.values())
+
+    def get_diagnostics(self, output_format):
+        recent = sorted(self.recent_lag)
+        lag = self.lag.to_dict()
+        lag.update({
+            'p50': _percentile(recent, 0.5),
+            'p99': _percentile(recent, 0.99),
+        })
+        data = {
+            'lag': lag,
+            'profiling': bool(self.profiler and self.profiler.running),
+        }
+        for category, stats in self.timings.items():
+            data[category] = {key: s.to_dict() for key, s in stats.items()}
+        return self._format_diagnostics(data, output_format)
+
+    def _schedule(self) -> None:
+        self._expected = self._clock.seconds() + self.interval
+        self._call = self._clock.callLater(self.interval, self._check_lag)
+
+    def _check_lag(self) -> None:
+        lag = max(0., self._clock.seconds() - self._expected)
+        self.lag.add(lag)
+        self.recent_lag.append(lag)
+        self._schedule()
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+@contextmanager
+def timed(category: str, key: str):
+    """ Records the duration of the block in the running
+    ReactorDiagnosticsProvider """
+    provider = ReactorDiagnosticsProvider.instance
+    if provider is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        provider.record(category, key, time.perf_counter() - started)
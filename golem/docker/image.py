@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Union, Tuple
+from typing import Dict, Optional, Union, Tuple
 
 import requests.exceptions
 
@@ -64,3 +64,14 @@ class DockerImage(object):
         except requests.exceptions.ConnectionError:
             log.debug("DockerImage Can't connect", exc_info=True)
             return False
+
+    def get_digest(self) -> Optional[str]:
+        """ Id of the local image, which changes whenever its content does.
+        None if the image is not available. """
+        client = local_client()
+        try:
+            return client.inspect_image(self.id or self.name)["Id"]
+        except (NotFound, APIError, ValueError,
+                requests.exceptions.ConnectionError):
+            log.debug('DockerImage digest unavailable', exc_info=True)
+            return None
@@ -0,0 +1,118 @@
+import logging
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+from golem.docker.client import local_client
+
+logger = logging.getLogger(__name__)
+
+ContainerUsage = NamedTuple('ContainerUsage', [
+    ('cpu_time_ns', int),
+    ('memory_bytes', int),
+    ('max_memory_bytes', int),
+    ('io_read_bytes', int),
+    ('io_write_bytes', int),
+])
+
+EMPTY_USAGE = ContainerUsage(0, 0, 0, 0, 0)
+
+# Returns a stream of stats, as reported by the Docker stats API
+StatsSource = Callable[[str], Iterable[Dict[str, Any]]]
+
+
+def docker_stats_source(container_id: str) -> Iterable[Dict[str, Any]]:
+    """ Streams cgroup counters of a container, about once a second, until
+    the container stops """
+    client = local_client()
+    return client.stats(container_id, decode=True, stream=True)
+
+
+def parse_stats(stats: Dict[str, Any]) -> ContainerUsage:
+    """ Reads the counters from a Docker stats API entry. Missing values
+    (e.g. the memory high watermark under cgroup v2) are reported as 0. """
+    cpu_usage = (stats.get('cpu_stats') or {}).get('cpu_usage') or {}
+    memory = stats.get('memory_stats') or {}
+    io_read = io_write = 0
+    blkio = (stats.get('blkio_stats') or {}) \
+        .get('io_service_bytes_recursive') or []
+    for entry in blkio:
+        op = entry.get('op', '').lower()
+        if op == 'read':
+            io_read += entry.get('value', 0)
+        elif op == 'write':
+            io_write += entry.get('value', 0)
+
+    usage = memory.get('usage', 0)
+    return ContainerUsage(
+        cpu_time_ns=cpu_usage.get('total_usage', 0),
+        memory_bytes=usage,
+        max_memory_bytes=max(usage, memory.get('max_usage', 0)),
+        io_read_bytes=io_read,
+        io_write_bytes=io_write,
+    )
+
+
+class ContainerStatsCollector:
+    """ Follows the stats stream of a container in a background thread,
+    keeping the latest values of the cumulative counters and the peak memory
+    usage. Once the container stops, the stream ends and the collected
+    values stay available. """
+
+    def __init__(self, container_id: str,
+                 source: StatsSource = docker_stats_source) -> None:
+        self._container_id = container_id
+        self._source = source
+        self._usage = EMPTY_USAGE
+        self._lock = Lock()
+        self._stopped = False
+        self._thread: Optional[Thread] = None
+
+    def __enter__(self) -> 'ContainerStatsCollector':
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> bool:
+        self.stop()
+        return False
+
+    @property
+    def usage(self) -> ContainerUsage:
+        with self._lock:
+            return self._usage
+
+    @property
+    def peak_memory(self) -> int:
+        """ Highest memory usage of the container seen so far, in bytes """
+        return self.usage.max_memory_bytes
+
+    def start(self) -> None:
+        self._thread = Thread(target=self._collect, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """ Stops collecting, the values are kept """
+        self._stopped = True
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """ Waits for the end of the stats stream, i.e. until the container
+        stops """
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _collect(self) -> None:
+        try:
+            for stats in self._source(self._container_id):
+                if self._stopped:
+                    break
+                self.update(parse_stats(stats))
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Cannot read stats of container %r: %r",
+                           self._container_id, e)
+
+    def update(self, usage: ContainerUsage) -> None:
+        # All counters are cumulative, except for current memory usage;
+        # a stopped container reports zeros
+        with self._lock:
+            self._usage = ContainerUsage(
+                *(max(old, new) for old, new in zip(self._usage, usage))
+            )._replace(memory_bytes=usage.memory_bytes)
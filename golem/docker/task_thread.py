@@ -8,9 +8,9 @@ import requests
 from golem.core.common import posix_path
 from golem.docker.image import DockerImage
 from golem.docker.job import DockerJob
+from golem.docker.stats import ContainerStatsCollector
 from golem.environments.environmentsmanager import EnvironmentsManager
 from golem.task.taskthread import TaskThread, JobException, TimeoutException
-from golem.vm.memorychecker import MemoryChecker
 
 if TYPE_CHECKING:
     from .manager import DockerManager  # noqa pylint:disable=unused-import
@@ -73,6 +73,8 @@ class DockerTaskThread(TaskThread):
     # and will contain dumps of the task script's stdout and stderr.
     STDOUT_FILE = "stdout.log"
     STDERR_FILE = "stderr.log"
+    # Time to wait for the last container stats after it exits (seconds)
+    STATS_JOIN_TIMEOUT = 5.0
 
     docker_manager: ClassVar[Optional['DockerManager']] = None
 
@@ -199,12 +201,21 @@ class DockerTaskThread(TaskThread):
             host_config=host_config
         )
 
-        with DockerJob(**params) as job, MemoryChecker(self.check_mem) as mc:
+        with DockerJob(**params) as job:
             self.job = job
             job.start()
 
+            stats = None
+            if self.check_mem:
+                stats = ContainerStatsCollector(job.container_id)
+                stats.start()
+
             exit_code = job.wait()
-            estm_mem = mc.estm_mem
+            estm_mem = None
+            if stats:
+                stats.join(self.STATS_JOIN_TIMEOUT)
+                stats.stop()
+                estm_mem = stats.peak_memory
 
             job.dump_logs(str(self.dir_mapping.logs / self.STDOUT_FILE),
                           str(self.dir_mapping.logs / self.STDERR_FILE))
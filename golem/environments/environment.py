@@ -3,7 +3,8 @@ import logging
 
 from os import path
 
-from apps.rendering.benchmark.minilight.src.minilight import make_perf_test
+from apps.rendering.benchmark.minilight.src.minilight import \
+    make_parallel_perf_test, make_perf_test
 
 from golem.core.common import get_golem_path
 from golem.environments.minperformancemultiplier import MinPerformanceMultiplier
@@ -110,13 +111,25 @@ class Environment():
         return step * MinPerformanceMultiplier.get()
 
     @classmethod
-    def run_default_benchmark(cls, save=False):
+    def run_default_benchmark(cls, save=False, num_cores=None):
+        """ Run the single core benchmark or, if num_cores is given, the
+        parallel one. The performance is a single core score in both cases.
+        :return float:
+        """
         logger = logging.getLogger('golem.task.benchmarkmanager')
         logger.info('Running benchmark for %s', cls.get_id())
         test_file = path.join(get_golem_path(), 'apps', 'rendering',
                               'benchmark', 'minilight', 'cornellbox.ml.txt')
-        performance = make_perf_test(test_file)
-        logger.info('%s performance is %.2f', cls.get_id(), performance)
+        aggregate = None
+        if num_cores:
+            per_core, aggregate = make_parallel_perf_test(test_file,
+                                                          num_cores)
+            performance = aggregate / len(per_core)
+            logger.info('%s performance is %.2f per core, %.2f on %d cores',
+                        cls.get_id(), performance, aggregate, len(per_core))
+        else:
+            performance = make_perf_test(test_file)
+            logger.info('%s performance is %.2f', cls.get_id(), performance)
         if save:
-            Performance.update_or_create(cls.get_id(), performance)
+            Performance.update_or_create(cls.get_id(), performance, aggregate)
         return performance
@@ -1,5 +1,3 @@
-from golem import model
-from golem.model import GenericKeyValue
 from golem.rpc import utils as rpc_utils
 
 
@@ -15,6 +13,9 @@ class MinPerformanceMultiplier:
         """ Returns performance multiplier. Default is 0.
         :return float:
         """
+        # golem.model is imported on use, this module is loaded by golemcli
+        from golem.model import GenericKeyValue
+
         rows = GenericKeyValue.select(GenericKeyValue.value).where(
             GenericKeyValue.key == cls.DB_KEY)
         return float(rows.get().value) if rows.count() == 1 else cls.DEFAULT
@@ -27,7 +28,9 @@ class MinPerformanceMultiplier:
             raise Exception(f'minimal performance multiplier ({value}) must be '
                             f'within [{cls.MIN}, {cls.MAX}] inclusive.')
 
+        from golem import model
+
         with model.db.atomic():
-            entry, _ = GenericKeyValue.get_or_create(key=cls.DB_KEY)
+            entry, _ = model.GenericKeyValue.get_or_create(key=cls.DB_KEY)
             entry.value = str(value)
             entry.save()
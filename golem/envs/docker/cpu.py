@@ -21,6 +21,7 @@ from golem.docker.hypervisor.dummy import DummyHypervisor
 from golem.docker.hypervisor.hyperv import HyperVHypervisor
 from golem.docker.hypervisor.virtualbox import VirtualBoxHypervisor
 from golem.docker.hypervisor.xhyve import XhyveHypervisor
+from golem.docker.stats import ContainerStatsCollector
 from golem.docker.task_thread import DockerBind
 from golem.envs import Environment, EnvSupportStatus, Payload, EnvConfig, \
     Runtime, EnvMetadata, EnvStatus, CounterId, CounterUsage, RuntimeStatus, \
@@ -34,6 +35,11 @@ logger = logging.getLogger(__name__)
 mem = CONSTRAINT_KEYS['mem']
 cpu = CONSTRAINT_KEYS['cpu']
 
+# Usage counters read from container's cgroup: CPU time in seconds, peak
+# memory usage and bytes read from / written to block devices
+USAGE_COUNTERS: List[CounterId] = [
+    'cpu_time', 'memory_peak', 'io_read', 'io_write']
+
 
 class DockerCPUConfigData(NamedTuple):
     work_dir: Path
@@ -148,6 +154,7 @@ class DockerCPURuntime(Runtime):
         client = local_client()
 
         self._status_update_thread: Optional[Thread] = None
+        self._stats_collector: Optional[ContainerStatsCollector] = None
         self._container_id: Optional[str] = None
         self._stdin_socket: Optional[InputSocket] = None
         self._container_config = client.create_container_config(
@@ -278,9 +285,14 @@ class DockerCPURuntime(Runtime):
             self._status_update_thread.start()
             logger.debug("Status update thread spawned.")
 
+        def _spawn_stats_collector(_):
+            self._stats_collector = ContainerStatsCollector(self._container_id)
+            self._stats_collector.start()
+
         deferred_start = deferToThread(_start)
         deferred_start.addCallback(self._started)
         deferred_start.addCallback(_spawn_status_update_thread)
+        deferred_start.addCallback(_spawn_stats_collector)
         deferred_start.addErrback(self._error_callback(
             f"Starting container '{self._container_id}' failed."))
         return deferred_start
@@ -390,7 +402,17 @@ class DockerCPURuntime(Runtime):
         return self._get_output(stderr=True, encoding=encoding)
 
     def usage_counters(self) -> Dict[CounterId, CounterUsage]:
-        raise NotImplementedError
+        """ Counters are collected while the container is running and keep
+            their final values after it stops. """
+        if self._stats_collector is None:
+            return {counter: 0 for counter in USAGE_COUNTERS}
+        usage = self._stats_collector.usage
+        return {
+            'cpu_time': usage.cpu_time_ns / 1e9,
+            'memory_peak': usage.max_memory_bytes,
+            'io_read': usage.io_read_bytes,
+            'io_write': usage.io_write_bytes,
+        }
 
     def call(self, alias: str, *args, **kwargs) -> Deferred:
         raise NotImplementedError
@@ -510,7 +532,7 @@ class DockerCPUEnvironment(Environment):
         return EnvMetadata(
             id=cls.ENV_ID,
             description=cls.ENV_DESCRIPTION,
-            supported_counters=[],  # TODO: Specify usage counters
+            supported_counters=list(USAGE_COUNTERS),
             custom_metadata={}
         )
 
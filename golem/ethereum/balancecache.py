@@ -0,0 +1,80 @@
+"""
+Cached balances of the node's Ethereum address.
+
+The balances are read from the Ethereum node when they expire: `ttl` seconds
+after they were read or as soon as they are known to have changed, e.g. when
+a transaction of the node gets mined. Transfers the node learns about from
+contract events are added right away, so the readers see them before the
+next refresh reconciles the balances with the chain.
+"""
+import logging
+import time
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+# Top ups from outside Golem are only seen by the periodic refresh
+BALANCES_TTL = 5 * 60
+
+
+class BalanceCache:
+
+    def __init__(self, sci, deposit: bool = False,
+                 ttl: int = BALANCES_TTL) -> None:
+        self._sci = sci
+        self._deposit = deposit
+        self._ttl = ttl
+        self._expires_at = 0.
+
+        self.eth: int = 0
+        self.gnt: int = 0
+        self.gntb: int = 0
+        self.deposit: int = 0
+        self.block_number: int = 0
+        self.block_gas_limit: int = 0
+        self.gas_price: int = 0
+        self.eth_update_time: Optional[float] = None
+        self.gnt_update_time: Optional[float] = None
+
+    def expired(self) -> bool:
+        return time.time() >= self._expires_at
+
+    def invalidate(self) -> None:
+        """ The balances will be read again on the next refresh """
+        self._expires_at = 0.
+
+    def refresh(self, force: bool = False) -> None:
+        if not force and not self.expired():
+            return
+        now = time.time()
+        addr = self._sci.get_eth_address()
+
+        # Sometimes web3 may throw but it's fine here, we'll just update the
+        # balances next time
+        try:
+            self.eth = self._sci.get_eth_balance(addr)
+            self.eth_update_time = now
+
+            self.gnt = self._sci.get_gnt_balance(addr)
+            self.gntb = self._sci.get_gntb_balance(addr)
+            self.gnt_update_time = now
+
+            if self._deposit:
+                self.deposit = self._sci.get_deposit_value(
+                    account_address=addr,
+                )
+            self.block_number = self._sci.get_latest_confirmed_block_number()
+            self.block_gas_limit = \
+                self._sci.get_latest_confirmed_block().gas_limit
+            self.gas_price = self._sci.get_current_gas_price()
+        except Exception as e:  # pylint: disable=broad-except
+            log.warning('Failed to update balances: %r', e)
+            return
+        self._expires_at = now + self._ttl
+
+    def received_gntb(self, amount: int) -> None:
+        """ GNTB transferred to the node, seen in a contract event. The
+        event may be one the last refresh already accounted for, so the
+        balances expire. """
+        self.gntb += amount
+        self.invalidate()
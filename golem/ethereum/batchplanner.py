@@ -0,0 +1,153 @@
+"""
+Planning of requestor batch transfers.
+
+A batch transfer pays every awaiting payment processed up to its closure
+time, so a batch is always a prefix of the payments sorted by
+`processed_ts` that ends on a change of `processed_ts`. The gas it takes
+depends on the number of distinct payees only, so payments to payees
+already in the batch are paid for free.
+"""
+import itertools
+import logging
+import statistics
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from ethereum.utils import denoms
+
+log = logging.getLogger(__name__)
+
+BatchBudget = NamedTuple('BatchBudget', [
+    ('gntb_balance', int),
+    ('eth_balance', int),
+    ('gas_price', int),
+    ('gas_limit', int),
+    ('gas_per_payment', int),
+    ('gas_batch_base', int),
+])
+
+
+def batch_gas(payees_count: int, budget: BatchBudget) -> int:
+    return payees_count * budget.gas_per_payment + budget.gas_batch_base
+
+
+def _batch_ends(payments: Sequence, closure_time: int,
+                budget: BatchBudget) -> List[Tuple[int, int]]:
+    """ (n, gas) of the batches of the first n payments the budget allows,
+    for every n a batch may end on """
+    gntb_balance = budget.gntb_balance
+    payees = set()
+    ends: List[Tuple[int, int]] = []
+    for n, p in enumerate(payments):
+        if p.processed_ts > closure_time:
+            break
+        gntb_balance -= p.value
+        if gntb_balance < 0:
+            log.debug(
+                'Insufficient GNTB balance.'
+                ' value=%(value).18f, subtask_id=%(subtask)s',
+                {
+                    'value': p.value / denoms.ether,
+                    'subtask': p.subtask,
+                },
+            )
+            break
+
+        payees.add(p.payee)
+        gas = batch_gas(len(payees), budget)
+        if gas > budget.gas_limit:
+            break
+        gas_cost = gas * budget.gas_price
+        if gas_cost > budget.eth_balance:
+            log.debug(
+                'Not enough ETH to pay gas for transaction.'
+                ' gas_cost=%(gas_cost).18f, subtask_id=%(subtask)s',
+                {
+                    'gas_cost': gas_cost / denoms.ether,
+                    'subtask': p.subtask,
+                },
+            )
+            break
+
+        # we need to take either all payments with given processed_ts or none
+        if n + 1 == len(payments) \
+                or payments[n + 1].processed_ts != p.processed_ts:
+            ends.append((n + 1, gas))
+    return ends
+
+
+def plan_greedy(payments: Sequence, closure_time: int,
+                budget: BatchBudget) -> int:
+    """ Number of the first payments to send: as many as the budget
+    allows """
+    ends = _batch_ends(payments, closure_time, budget)
+    return ends[-1][0] if ends else 0
+
+
+def plan_batch(payments: Sequence, closure_time: int, due_time: int,
+               budget: BatchBudget,
+               reference_gas_price: Optional[int] = None) -> int:
+    """
+    Number of the first payments to send. The payments processed up to
+    `due_time` are sent, as many of them as the budget allows. The later
+    ones are sent now or left for a later batch, whichever is expected to
+    cost less: the fee of a later batch is estimated at the
+    `reference_gas_price`, with the base gas and the gas of every payee it
+    pays, also the ones paid now.
+    """
+    ends = _batch_ends(payments, closure_time, budget)
+    due = sum(1 for _ in itertools.takewhile(
+        lambda p: p.processed_ts <= due_time, payments))
+    due_ends = [end for end in ends if end[0] <= due]
+    if not due_ends:
+        return 0
+    if due_ends[-1][0] < due or due_ends[-1] == ends[-1]:
+        return due_ends[-1][0]
+    if reference_gas_price is None \
+            or budget.gas_price <= reference_gas_price:
+        # a later batch can't be cheaper
+        return ends[-1][0]
+
+    # distinct payees of the payments from n to the last end, for every n
+    last = ends[-1][0]
+    payees_from = [0] * (last + 1)
+    seen: Set = set()
+    for n in range(last - 1, -1, -1):
+        seen.add(payments[n].payee)
+        payees_from[n] = len(seen)
+
+    def cost(n, gas):
+        later = 0
+        if n < last:
+            later = batch_gas(payees_from[n], budget) * reference_gas_price
+        return gas * budget.gas_price + later
+
+    best, best_cost = last, cost(*ends[-1])
+    for n, gas in ends[len(due_ends) - 1:-1]:
+        n_cost = cost(n, gas)
+        if n_cost < best_cost:
+            best, best_cost = n, n_cost
+    return best
+
+
+class GasPriceTrend:
+    """ Gas prices sampled every `interval` seconds; the median of the last
+    `size` samples is the price expected later """
+
+    def __init__(self, size: int = 24, interval: int = 60 * 60) -> None:
+        self._prices: Deque[int] = deque(maxlen=size)
+        self._interval = interval
+        self._last_sample: Optional[int] = None
+
+    def sample_due(self, timestamp: int) -> bool:
+        return self._last_sample is None \
+            or timestamp - self._last_sample >= self._interval
+
+    def observe(self, gas_price: int, timestamp: int) -> None:
+        self._prices.append(gas_price)
+        self._last_sample = timestamp
+
+    def reference(self) -> Optional[int]:
+        if not self._prices:
+            return None
+        return int(statistics.median(self._prices))
@@ -1,12 +1,13 @@
 # -*- coding: utf-8 -*-
 import logging
 import time
+from collections import defaultdict
 
 from ethereum.utils import denoms
 from pydispatch import dispatcher
 
 from golem.core.variables import PAYMENT_DEADLINE
-from golem.model import Income
+from golem.model import Income, chunks
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +22,12 @@ class IncomesKeeper:
             sender: str,
             amount: int,
             closure_time: int) -> None:
-        expected = Income.select().where(
+        expected = list(Income.select().where(
             Income.payer_address == sender,
             Income.accepted_ts > 0,
             Income.accepted_ts <= closure_time,
             Income.transaction.is_null(),
-            Income.settled_ts.is_null())
+            Income.settled_ts.is_null()))
 
         expected_value = sum([e.value_expected for e in expected])
         if expected_value == 0:
@@ -40,14 +41,48 @@ class IncomesKeeper:
                 amount / denoms.ether)
 
         amount_left = amount
+        transaction = tx_hash[2:]
+        # sender node -> subtasks, of incomes received in full and of the
+        # ones the amount ran out before
+        paid: defaultdict = defaultdict(list)
+        unpaid: defaultdict = defaultdict(list)
+        partially_paid = []
 
         for e in expected:
             received = min(amount_left, e.value_expected)
-            e.value_received += received
             amount_left -= received
-            e.transaction = tx_hash[2:]
-            e.save()
+            e.transaction = transaction
+            if received == 0:
+                unpaid[e.sender_node].append(e.subtask)
+                continue
+            e.value_received += received
+            if e.value_expected == 0:
+                paid[e.sender_node].append(e.subtask)
+            else:
+                partially_paid.append(e)
+
+        with Income._meta.database.atomic():
+            for sender_node, subtasks in paid.items():
+                for chunk in chunks(subtasks):
+                    Income.update(
+                        value_received=Income.value,
+                        transaction=transaction,
+                    ).where(
+                        Income.sender_node == sender_node,
+                        Income.subtask.in_(chunk),
+                    ).execute()
+            for sender_node, subtasks in unpaid.items():
+                for chunk in chunks(subtasks):
+                    Income.update(
+                        transaction=transaction,
+                    ).where(
+                        Income.sender_node == sender_node,
+                        Income.subtask.in_(chunk),
+                    ).execute()
+            for e in partially_paid:
+                e.save()
 
+        for e in expected:
             if e.value_expected == 0:
                 dispatcher.send(
                     signal='golem.income',
@@ -4,7 +4,7 @@ import logging
 import time
 
 from collections import defaultdict
-from typing import List
+from typing import List, Optional
 
 from pydispatch import dispatcher
 from sortedcontainers import SortedListWithKey
@@ -15,7 +15,10 @@ from twisted.internet import threads
 import golem_sci
 
 from golem.core.variables import PAYMENT_DEADLINE
-from golem.model import Payment, PaymentStatus
+from golem.ethereum.balancecache import BalanceCache
+from golem.ethereum.batchplanner import BatchBudget, GasPriceTrend, \
+    plan_batch
+from golem.model import Payment, PaymentStatus, chunks
 
 log = logging.getLogger(__name__)
 
@@ -38,15 +41,35 @@ def _make_batch_payments(payments: List[Payment]) -> List[golem_sci.Payment]:
     return res
 
 
+def _save_payments(payments: List[Payment]) -> None:
+    """ Saves the status and details of payments in a single transaction,
+    with an UPDATE per status and details the payments have in common """
+    groups: defaultdict = defaultdict(list)
+    for p in payments:
+        groups[p.status, Payment.details.db_value(p.details)].append(p)
+
+    with Payment._meta.database.atomic():
+        for group in groups.values():
+            subtasks = [p.subtask for p in group]
+            for chunk in chunks(subtasks):
+                Payment.update(
+                    status=group[0].status,
+                    details=group[0].details,
+                ).where(Payment.subtask.in_(chunk)).execute()
+
+
 class PaymentProcessor:
     CLOSURE_TIME_DELAY = 2
     # Don't try to use more than 75% of block gas limit
     BLOCK_GAS_LIMIT_RATIO = 0.75
 
-    def __init__(self, sci) -> None:
+    def __init__(self, sci, balances: Optional[BalanceCache] = None) -> None:
         self._sci = sci
+        self._balances = balances if balances is not None \
+            else BalanceCache(sci)
         self._gntb_reserved = 0
         self._awaiting = SortedListWithKey(key=lambda p: p.processed_ts)
+        self._gas_price_trend = GasPriceTrend()
         self.load_from_db()
         self.last_print_time = 0
 
@@ -93,12 +116,13 @@ class PaymentProcessor:
             self._gntb_reserved += awaiting_payment.value
 
     def _on_batch_confirmed(self, payments: List[Payment], receipt) -> None:
+        self._balances.invalidate()
         if not receipt.status:
             log.critical("Failed batch transfer: %s", receipt)
             for p in payments:
                 p.status = PaymentStatus.awaiting  # type: ignore
-                p.save()
-                self._awaiting.add(p)
+            _save_payments(payments)
+            self._awaiting.update(payments)
             return
 
         block = self._sci.get_block_by_number(receipt.block_number)
@@ -115,7 +139,8 @@ class PaymentProcessor:
             p.details.block_number = receipt.block_number
             p.details.block_hash = receipt.block_hash[2:]
             p.details.fee = fee
-            p.save()
+        _save_payments(payments)
+        for p in payments:
             self._gntb_reserved -= p.value
             self._payment_confirmed(p, block.timestamp)
 
@@ -158,62 +183,27 @@ class PaymentProcessor:
         log.info("Reserved %.3f GNTB", self._gntb_reserved / denoms.ether)
         return payment.processed_ts
 
-    def __get_next_batch(self, closure_time: int) -> int:
-        gntb_balance = self._sci.get_gntb_balance(self._sci.get_eth_address())
-        eth_balance = self._sci.get_eth_balance(self._sci.get_eth_address())
-        gas_price = self._sci.get_current_gas_price()
-
-        ind = 0
-        gas_limit = self._sci.get_latest_confirmed_block().gas_limit * \
-            self.BLOCK_GAS_LIMIT_RATIO
-        payees = set()
-        for p in self._awaiting:
-            if p.processed_ts > closure_time:
-                break
-            gntb_balance -= p.value
-            if gntb_balance < 0:
-                log.debug(
-                    'Insufficient GNTB balance.'
-                    ' value=%(value).18f, subtask_id=%(subtask)s',
-                    {
-                        'value': p.value / denoms.ether,
-                        'subtask': p.subtask,
-                    },
-                )
-                break
-
-            payees.add(p.payee)
-            gas = len(payees) * self._sci.GAS_PER_PAYMENT + \
-                self._sci.GAS_BATCH_PAYMENT_BASE
-            if gas > gas_limit:
-                break
-            gas_cost = gas * gas_price
-            if gas_cost > eth_balance:
-                log.debug(
-                    'Not enough ETH to pay gas for transaction.'
-                    ' gas_cost=%(gas_cost).18f, subtask_id=%(subtask)s',
-                    {
-                        'gas_cost': gas_cost / denoms.ether,
-                        'subtask': p.subtask,
-                    },
-                )
-                break
-
-            ind += 1
-
-        # we need to take either all payments with given processed_ts or none
-        if ind < len(self._awaiting):
-            while ind > 0 and self._awaiting[ind - 1]\
-                    .processed_ts == self._awaiting[ind].processed_ts:
-                ind -= 1
-
-        return ind
+    def __get_next_batch(self, closure_time: int, due_time: int) -> int:
+        budget = BatchBudget(
+            gntb_balance=self._balances.gntb,
+            eth_balance=self._balances.eth,
+            gas_price=self._balances.gas_price,
+            gas_limit=int(self._balances.block_gas_limit *
+                          self.BLOCK_GAS_LIMIT_RATIO),
+            gas_per_payment=self._sci.GAS_PER_PAYMENT,
+            gas_batch_base=self._sci.GAS_BATCH_PAYMENT_BASE,
+        )
+        return plan_batch(self._awaiting, closure_time, due_time, budget,
+                          self._gas_price_trend.reference())
 
     def sendout(self, acceptable_delay: int = PAYMENT_MAX_DELAY):
         if not self._awaiting:
             return False
 
+        self._balances.refresh()
         now = get_timestamp()
+        if self._gas_price_trend.sample_due(now):
+            self._gas_price_trend.observe(self._balances.gas_price, now)
         deadline = self._awaiting[0].processed_ts + acceptable_delay
         if deadline > now:
             if now > self.last_print_time + 300:
@@ -222,7 +212,10 @@ class PaymentProcessor:
                 self.last_print_time = now
             return False
 
-        payments_count = self.__get_next_batch(now - self.CLOSURE_TIME_DELAY)
+        payments_count = self.__get_next_batch(
+            now - self.CLOSURE_TIME_DELAY,
+            now - acceptable_delay,
+        )
         if payments_count == 0:
             return False
         payments = self._awaiting[:payments_count]
@@ -236,11 +229,14 @@ class PaymentProcessor:
             closure_time,
         )
         del self._awaiting[:payments_count]
+        # read the balances again before planning the next batch
+        self._balances.invalidate()
 
         for payment in payments:
             payment.status = PaymentStatus.sent
             payment.details.tx = tx_hash[2:]
-            payment.save()
+        _save_payments(payments)
+        for payment in payments:
             log.debug("- {} send to {} ({:.18f} GNTB)".format(
                 payment.subtask,
                 encode_hex(payment.payee),
@@ -258,7 +254,7 @@ class PaymentProcessor:
         """Sets overdue status for awaiting payments"""
 
         processed_ts_deadline = int(time.time()) - PAYMENT_DEADLINE
-        counter = 0
+        overdue = []
         for payment in self._awaiting:
             if payment.processed_ts >= processed_ts_deadline:
                 # All subsequent payments won't be overdue
@@ -267,8 +263,8 @@ class PaymentProcessor:
             if payment.status is PaymentStatus.overdue:
                 continue
             payment.status = PaymentStatus.overdue
-            payment.save()
+            overdue.append(payment)
             log.debug("Marked as overdue. payment=%r", payment)
-            counter += 1
-        if counter:
-            log.info("Marked %d payments as overdue.", counter)
+        if overdue:
+            _save_payments(overdue)
+            log.info("Marked %d payments as overdue.", len(overdue))
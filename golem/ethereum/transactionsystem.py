@@ -5,7 +5,7 @@ import os
 import random
 import time
 from enum import Enum
-from datetime import datetime, timedelta
+from datetime import timedelta
 from pathlib import Path
 from typing import (
     Any,
@@ -35,6 +35,7 @@ from golem import model
 from golem.core import common
 from golem.core.deferred import call_later
 from golem.core.service import LoopingCallService
+from golem.ethereum.balancecache import BalanceCache
 from golem.ethereum.node import NodeProcess
 from golem.ethereum.paymentprocessor import PaymentProcessor
 from golem.ethereum.incomeskeeper import IncomesKeeper
@@ -105,6 +106,7 @@ class TransactionSystem(LoopingCallService):
         node_list += config.FALLBACK_NODE_LIST
         self._node = NodeProcess(node_list)
         self._sci: Optional[SmartContractsInterface] = None
+        self._balances: Optional[BalanceCache] = None
 
         self._payments_keeper = PaymentsKeeper()
         self._incomes_keeper = IncomesKeeper()
@@ -115,11 +117,6 @@ class TransactionSystem(LoopingCallService):
             (ConversionStatus.NONE, None)
         self._concent_withdraw_requested = False
 
-        self._eth_balance: int = 0
-        self._gnt_balance: int = 0
-        self._gntb_balance: int = 0
-        self._last_eth_update: Optional[float] = None
-        self._last_gnt_update: Optional[float] = None
         self._payments_locked: int = 0
         self._gntb_locked: int = 0
         self._gntb_withdrawn: int = 0
@@ -221,13 +218,17 @@ class TransactionSystem(LoopingCallService):
                 self._gnt_conversion_status = \
                     (ConversionStatus.UNFINISHED, None)
 
-        self._payment_processor = PaymentProcessor(self._sci)
+        self._balances = BalanceCache(
+            self._sci,
+            deposit=self.deposit_contract_available,
+        )
+        self._payment_processor = PaymentProcessor(self._sci, self._balances)
         self._eth_per_payment = self._current_eth_per_payment()
         recipients_count = self._payment_processor.recipients_count
         if recipients_count > 0:
             required_eth = recipients_count * self._eth_per_payment
-            if required_eth > self._eth_balance:
-                self._eth_per_payment = self._eth_balance // recipients_count
+            if required_eth > self._balances.eth:
+                self._eth_per_payment = self._balances.eth // recipients_count
 
         try:
             self._subscribe_to_events()
@@ -237,9 +238,9 @@ class TransactionSystem(LoopingCallService):
         self._refresh_balances()
         log.info(
             "Initial balances: %f GNTB, %f GNT, %f ETH",
-            self._gntb_balance / denoms.ether,
-            self._gnt_balance / denoms.ether,
-            self._eth_balance / denoms.ether,
+            self._balances.gntb / denoms.ether,
+            self._balances.gnt / denoms.ether,
+            self._balances.eth / denoms.ether,
         )
 
     def start(self, now: bool = True) -> None:
@@ -272,40 +273,54 @@ class TransactionSystem(LoopingCallService):
         from_block = int(values.get().value) if values.count() == 1 else 0
 
         ik = self._incomes_keeper
-        self._sci.subscribe_to_batch_transfers(
-            None,
-            self._sci.get_eth_address(),
-            from_block,
-            lambda event: ik.received_batch_transfer(
+        balances = self._balances
+
+        def on_batch_transfer(event) -> None:
+            balances.received_gntb(event.amount)
+            ik.received_batch_transfer(
                 event.tx_hash,
                 event.sender,
                 event.amount,
                 event.closure_time,
             )
+
+        self._sci.subscribe_to_batch_transfers(
+            None,
+            self._sci.get_eth_address(),
+            from_block,
+            on_batch_transfer,
         )
 
         if self.deposit_contract_available:
-            self._sci.subscribe_to_forced_subtask_payments(
-                None,
-                self._sci.get_eth_address(),
-                from_block,
-                lambda event: ik.received_forced_subtask_payment(
+            def on_forced_subtask_payment(event) -> None:
+                balances.received_gntb(event.amount)
+                ik.received_forced_subtask_payment(
                     event.tx_hash,
                     event.requestor,
                     str(bytes32_to_uuid(event.subtask_id)),
                     event.amount,
                 )
+
+            def on_forced_payment(event) -> None:
+                balances.received_gntb(event.amount)
+                ik.received_forced_payment(
+                    tx_hash=event.tx_hash,
+                    sender=event.requestor,
+                    amount=event.amount,
+                    closure_time=event.closure_time,
+                )
+
+            self._sci.subscribe_to_forced_subtask_payments(
+                None,
+                self._sci.get_eth_address(),
+                from_block,
+                on_forced_subtask_payment,
             )
             self._sci.subscribe_to_forced_payments(
                 requestor_address=None,
                 provider_address=self._sci.get_eth_address(),
                 from_block=from_block,
-                cb=lambda event: ik.received_forced_payment(
-                    tx_hash=event.tx_hash,
-                    sender=event.requestor,
-                    amount=event.amount,
-                    closure_time=event.closure_time,
-                ),
+                cb=on_forced_payment,
             )
             self._schedule_concent_withdraw()
 
@@ -407,7 +422,9 @@ class TransactionSystem(LoopingCallService):
         return [item(income) for income in incomes]
 
     def get_available_eth(self) -> int:
-        return self._eth_balance - self.get_locked_eth()
+        if not self._balances:
+            raise Exception('Start was not called')
+        return self._balances.eth - self.get_locked_eth()
 
     def get_locked_eth(self) -> int:
         if not self._payment_processor:
@@ -423,7 +440,7 @@ class TransactionSystem(LoopingCallService):
         self._sci: SmartContractsInterface
         if (account_address is None) \
                 or (account_address == self._sci.get_eth_address()):
-            return self._gntb_balance - self.get_locked_gnt() - \
+            return self._balances.gntb - self.get_locked_gnt() - \
                 self._gntb_withdrawn
         return self._sci.get_gntb_balance(address=account_address)
 
@@ -434,16 +451,16 @@ class TransactionSystem(LoopingCallService):
 
     @sci_required()
     def get_balance(self) -> Dict[str, Any]:
-        self._sci: SmartContractsInterface
+        self._balances: BalanceCache
         return {
             'gnt_available': self.get_available_gnt(),
             'gnt_locked': self.get_locked_gnt(),
-            'gnt_nonconverted': self._gnt_balance,
+            'gnt_nonconverted': self._balances.gnt,
             'eth_available': self.get_available_eth(),
             'eth_locked': self.get_locked_eth(),
-            'block_number': self._sci.get_latest_confirmed_block_number(),
-            'gnt_update_time': self._last_gnt_update,
-            'eth_update_time': self._last_eth_update,
+            'block_number': self._balances.block_number,
+            'gnt_update_time': self._balances.gnt_update_time,
+            'eth_update_time': self._balances.eth_update_time,
         }
 
     def lock_funds_for_payments(self, price: int, num: int) -> None:
@@ -601,11 +618,16 @@ class TransactionSystem(LoopingCallService):
                     available=self.get_available_eth(),
                     currency=currency,
                 )
-            return self._sci.transfer_eth(
+            tx_hash = self._sci.transfer_eth(
                 destination,
                 amount - gas_eth,
                 gas_price,
             )
+            self._sci.on_transaction_confirmed(
+                tx_hash,
+                lambda _: self._balances.invalidate(),
+            )
+            return tx_hash
 
         if currency == 'GNT':
             if amount > self.get_available_gnt():
@@ -621,6 +643,7 @@ class TransactionSystem(LoopingCallService):
             )
 
             def on_receipt(receipt) -> None:
+                self._balances.invalidate()
                 self._gntb_withdrawn -= amount
                 if not receipt.status:
                     log.error("Failed GNTB withdrawal: %r", receipt)
@@ -635,7 +658,7 @@ class TransactionSystem(LoopingCallService):
     def concent_balance(self, account_address: Optional[str] = None) -> int:
         self._sci: SmartContractsInterface
         if account_address is None:
-            account_address = self._sci.get_eth_address()
+            return self._balances.deposit
         return self._sci.get_deposit_value(
             account_address=account_address,
         )
@@ -702,7 +725,9 @@ class TransactionSystem(LoopingCallService):
             expected: int) \
             -> Generator[defer.Deferred, TransactionReceipt, Optional[str]]:
         self._sci: SmartContractsInterface
-        current = self.concent_balance()
+        # Forced payments may have taken from the deposit since the balances
+        # were read
+        current = self.concent_balance(self._sci.get_eth_address())
         if current >= required:
             if self.concent_timelock() != 0:
                 self._sci.lock_deposit()
@@ -731,6 +756,7 @@ class TransactionSystem(LoopingCallService):
         )
 
         receipt = yield transaction_receipt
+        self._balances.invalidate()
         if not receipt.status:
             dpayment.delete_instance()
             raise exceptions.DepositError(
@@ -790,6 +816,7 @@ class TransactionSystem(LoopingCallService):
         self._concent_withdraw_requested = True
 
         def on_confirmed(_receipt) -> None:
+            self._balances.invalidate()
             self._concent_withdraw_requested = False
         self._sci.on_transaction_confirmed(tx_hash, on_confirmed)
         log.info("Withdrawing concent deposit, tx: %s", tx_hash)
@@ -797,49 +824,41 @@ class TransactionSystem(LoopingCallService):
     @sci_required()
     def _get_funds_from_faucet(self) -> None:
         self._sci: SmartContractsInterface
+        self._balances: BalanceCache
         if not self._config.FAUCET_ENABLED:
             return
-        if self._eth_balance < 0.005 * denoms.ether:
+        if self._balances.eth < 0.005 * denoms.ether:
             log.info("Requesting tETH from faucet")
             tETH_faucet_donate(self._sci.get_eth_address())
+            # check the balance on each run until the funds arrive
+            self._balances.invalidate()
             return
 
-        if self._gnt_balance + self._gntb_balance < 100 * denoms.ether:
+        if self._balances.gnt + self._balances.gntb < 100 * denoms.ether:
             if not self._gnt_faucet_requested:
                 log.info("Requesting GNT from faucet")
                 self._sci.request_gnt_from_faucet()
                 self._gnt_faucet_requested = True
+                self._balances.invalidate()
         else:
             self._gnt_faucet_requested = False
 
     @sci_required()
     def _refresh_balances(self) -> None:
-        self._sci: SmartContractsInterface
-        now = time.mktime(datetime.today().timetuple())
-        addr = self._sci.get_eth_address()
-
-        # Sometimes web3 may throw but it's fine here, we'll just update the
-        # balances next time
-        try:
-            self._eth_balance = self._sci.get_eth_balance(addr)
-            self._last_eth_update = now
-
-            self._gnt_balance = self._sci.get_gnt_balance(addr)
-            self._gntb_balance = self._sci.get_gntb_balance(addr)
-            self._last_gnt_update = now
-        except Exception as e:  # pylint: disable=broad-except
-            log.warning('Failed to update balances: %r', e)
+        self._balances: BalanceCache
+        self._balances.refresh(force=True)
 
     @sci_required()
     def _try_convert_gnt(self) -> None:  # pylint: disable=too-many-branches
         self._sci: SmartContractsInterface
+        self._balances: BalanceCache
         if self._gnt_conversion_status[0] == ConversionStatus.UNFINISHED:
-            if self._gnt_balance > 0:
+            if self._balances.gnt > 0:
                 self._gnt_conversion_status = (ConversionStatus.NONE, None)
             else:
                 gas_cost = self.gas_price * \
                     self._sci.GAS_TRANSFER_FROM_GATE
-                if self._eth_balance >= gas_cost:
+                if self._balances.eth >= gas_cost:
                     tx_hash = self._sci.transfer_from_gate()
                     log.info(
                         "Finishing previously started GNT conversion %s",
@@ -847,11 +866,12 @@ class TransactionSystem(LoopingCallService):
                     )
                     self._gnt_conversion_status = \
                         (ConversionStatus.TRANSFERRING, tx_hash)
+                    self._balances.invalidate()
                 else:
                     log.info(
                         "Not enough gas to finish GNT conversion, has %.6f,"
                         " needed: %.6f",
-                        self._eth_balance / denoms.ether,
+                        self._balances.eth / denoms.ether,
                         gas_cost / denoms.ether,
                     )
             return
@@ -862,8 +882,9 @@ class TransactionSystem(LoopingCallService):
             if receipt is None:
                 return
             self._gnt_conversion_status = (ConversionStatus.NONE, None)
+            self._refresh_balances()
 
-        if self._gnt_balance == 0:
+        if self._balances.gnt == 0:
             return
 
         gas_price = self.gas_price
@@ -872,16 +893,17 @@ class TransactionSystem(LoopingCallService):
             if self._gnt_conversion_status[0] == ConversionStatus.OPENING_GATE:
                 return
             gas_cost = gas_price * self._sci.GAS_OPEN_GATE
-            if self._eth_balance >= gas_cost:
+            if self._balances.eth >= gas_cost:
                 tx_hash = self._sci.open_gate()
                 log.info("Opening GNT-GNTB conversion gate %s", tx_hash)
                 self._gnt_conversion_status = \
                     (ConversionStatus.OPENING_GATE, None)
+                self._balances.invalidate()
             else:
                 log.info(
                     "Not enough gas for opening conversion gate, has: %.6f,"
                     " needed: %.6f",
-                    self._eth_balance / denoms.ether,
+                    self._balances.eth / denoms.ether,
                     gas_cost / denoms.ether,
                 )
             return
@@ -896,30 +918,31 @@ class TransactionSystem(LoopingCallService):
 
         gas_cost = gas_price * \
             (self._sci.GAS_GNT_TRANSFER + self._sci.GAS_TRANSFER_FROM_GATE)
-        if self._eth_balance >= gas_cost:
+        if self._balances.eth >= gas_cost:
             tx_hash1 = \
-                self._sci.transfer_gnt(gate_address, self._gnt_balance)
+                self._sci.transfer_gnt(gate_address, self._balances.gnt)
             tx_hash2 = self._sci.transfer_from_gate()
             log.info(
                 "Converting %.6f GNT to GNTB %s %s",
-                self._gnt_balance / denoms.ether,
+                self._balances.gnt / denoms.ether,
                 tx_hash1,
                 tx_hash2,
             )
             self._gnt_conversion_status = \
                 (ConversionStatus.TRANSFERRING, tx_hash2)
+            self._balances.invalidate()
         else:
             log.info(
                 "Not enough gas for GNT conversion, has: %.6f,"
                 " needed: %.6f",
-                self._eth_balance / denoms.ether,
+                self._balances.eth / denoms.ether,
                 gas_cost / denoms.ether,
             )
 
     def _run(self) -> None:
         if not self._payment_processor:
             raise Exception('Start was not called')
-        self._refresh_balances()
+        self._balances.refresh()
         self._get_funds_from_faucet()
         self._try_convert_gnt()
         self._payment_processor.sendout()
@@ -7,7 +7,6 @@ from decimal import Decimal
 from ethereum.utils import denoms
 import zxcvbn
 
-from golem.node import ShutdownResponse
 from golem.core.deferred import sync_wait
 from golem.interface.command import Argument, command, group
 
@@ -140,6 +139,8 @@ class Account:
     @command(help="Trigger graceful shutdown of your golem")
     def shutdown(self) -> str:  # pylint: disable=no-self-use
 
+        from golem.node import ShutdownResponse  # imports the whole node
+
         result = sync_wait(Account.client.graceful_shutdown())
         readable_result = repr(ShutdownResponse(result))
 
@@ -5,10 +5,8 @@ import json
 import typing
 from typing import Any, Optional, Tuple
 
-from apps.core.task.coretaskstate import TaskDefinition
 from golem.core.deferred import sync_wait
 from golem.interface.command import doc, group, command, Argument, CommandResult
-from golem.task.taskstate import TaskStatus
 
 if typing.TYPE_CHECKING:
     from golem.rpc.session import ClientProxy  # noqa pylint: disable=unused-import
@@ -81,6 +79,7 @@ class Tasks:
             values = []
 
             if current:
+                from golem.task.taskstate import TaskStatus
                 result = [t for t in result
                           if TaskStatus(t['status']).is_active()]
 
@@ -183,6 +182,9 @@ class Tasks:
 
     @command(argument=outfile, help="Dump a task template")
     def template(self, outfile: Optional[str]) -> None:
+        # imports all environments
+        from apps.core.task.coretaskstate import TaskDefinition
+
         template = TaskDefinition()
         self.__dump_dict(template.to_dict(), outfile)
 
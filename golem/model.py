@@ -5,7 +5,7 @@ import json
 import pickle
 import sys
 import time
-from typing import Optional
+from typing import Iterator, Optional, Sequence
 
 from eth_utils import decode_hex, encode_hex
 from ethereum.utils import denoms
@@ -59,6 +59,18 @@ class BaseModel(Model):
         return type(self).get(self._pk_expr())
 
 
+# SQLite (before 3.32) allows at most 999 parameters in a statement, some
+# are left for the conditions other than the IN list
+MAX_IN_PARAMETERS = 900
+
+
+def chunks(values: Sequence, size: int = MAX_IN_PARAMETERS) \
+        -> Iterator[Sequence]:
+    """ Splits values for IN conditions that fit in a single statement """
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
 class GenericKeyValue(BaseModel):
     key = CharField(primary_key=True)
     value = CharField(null=True)
@@ -509,21 +521,33 @@ class Performance(BaseModel):
     environment_id = CharField(null=False, index=True, unique=True)
     value = FloatField(default=0.0)
     min_accepted_step = FloatField(default=300.0)
+    # Score of all cores together, if measured
+    aggregate_value = FloatField(null=True)
 
     class Meta:
         database = db
 
     @classmethod
-    def update_or_create(cls, env_id, performance):
+    def update_or_create(cls, env_id, performance, aggregate=None):
         try:
             perf = Performance.get(Performance.environment_id == env_id)
             perf.value = performance
+            perf.aggregate_value = aggregate
             perf.save()
         except Performance.DoesNotExist:
-            perf = Performance(environment_id=env_id, value=performance)
+            perf = Performance(environment_id=env_id, value=performance,
+                               aggregate_value=aggregate)
             perf.save()
 
 
+class CachedPerformance(BaseModel):
+    """ Keeps benchmark results of past hardware configurations """
+    fingerprint = CharField(primary_key=True)
+    environment_id = CharField(null=False, index=True)
+    value = FloatField(null=False)
+    aggregate_value = FloatField(null=True)
+
+
 class DockerWhitelist(BaseModel):
     repository = CharField(primary_key=True)
 
@@ -0,0 +1,362 @@
+"""
+Capture and replay of the messages exchanged with peers.
+
+While a TrafficCapture is running, the messages received and sent by every
+session are appended to a binary log, with the time they were interpreted
+or sent. Frames on the wire are encrypted with the session's keys, so the
+messages are logged the way NetworkMessage and QueuedMessage store them:
+serialized without encryption, with the signatures they carried.
+
+The log is a MAGIC followed by records: a RECORD header (timestamp, kind,
+flags, session number, length) and the data. Each session starts with an
+OPENED record holding its class and peer address, as JSON. A capture to an
+existing log is appended to it, numbering its sessions after the logged ones.
+
+A Replay feeds the received messages of a log to new sessions of the
+captured classes, connected to the given servers (TaskServer, P2PService),
+at the recorded speed, faster, or as fast as the reactor allows. The
+sessions' replies are counted, not sent.
+
+Usage: python -m golem.network.capture <log>
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import struct
+import time
+import weakref
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import golem_messages
+from golem_messages import message
+from twisted.internet.address import IPv4Address
+from twisted.internet.defer import Deferred
+
+from golem.diag.reactor import TimingStats
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'GOLEMCAP\x01'
+RECORD = struct.Struct('!dBBIL')
+
+OPENED = 0
+RECEIVED = 1
+SENT = 2
+CLOSED = 3
+
+FLAG_ENCRYPTED = 0x01
+
+Record = NamedTuple('Record', [
+    ('timestamp', float),
+    ('kind', int),
+    ('flags', int),
+    ('session', int),
+    ('data', bytes),
+])
+
+
+class TrafficCapture:
+    """ Appends the messages of all sessions to the log at `path` """
+
+    # Capture used by the protocols, if started
+    instance: Optional['TrafficCapture'] = None
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.records = 0
+        self._file = None
+        self._next_session = 0
+        self._sessions: weakref.WeakKeyDictionary = \
+            weakref.WeakKeyDictionary()
+
+    @property
+    def running(self) -> bool:
+        return self._file is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        try:
+            self._file = open(self.path, 'xb')
+            end = 0
+        except FileExistsError:
+            end, next_session = _scan(self.path)
+            self._next_session = max(self._next_session, next_session)
+            self._file = open(self.path, 'r+b')
+            # drop a record truncated when the log was last written
+            self._file.truncate(end)
+            self._file.seek(end)
+        if not end:
+            self._file.write(MAGIC)
+            self._file.flush()
+        if self.__class__.instance is None:
+            self.__class__.instance = self
+        logger.info('Capturing traffic to %s', self.path)
+
+    def stop(self) -> None:
+        if self.__class__.instance is self:
+            self.__class__.instance = None
+        if self._file:
+            self._file.close()
+            self._file = None
+            logger.info('Captured %d records to %s', self.records, self.path)
+
+    def received(self, session, msg: message.base.Message) -> None:
+        self._message(session, RECEIVED, msg)
+
+    def sent(self, session, msg: message.base.Message) -> None:
+        self._message(session, SENT, msg)
+
+    def closed(self, session) -> None:
+        number = self._sessions.pop(session, None)
+        if number is not None:
+            self._write(CLOSED, 0, number, b'')
+
+    def _message(self, session, kind: int, msg: message.base.Message) -> None:
+        if session is None:
+            return
+        try:
+            data = golem_messages.dump(msg, None, None)
+        except golem_messages.exceptions.SerializationError:
+            logger.debug('Cannot capture %r', msg, exc_info=True)
+            return
+        flags = FLAG_ENCRYPTED if msg.encrypted else 0
+        self._write(kind, flags, self._session_number(session), data)
+
+    def _session_number(self, session) -> int:
+        number = self._sessions.get(session)
+        if number is None:
+            number = self._sessions[session] = self._next_session
+            self._next_session += 1
+            info = {
+                'cls': session.__class__.__name__,
+                'host': getattr(session, 'address', None),
+                'port': getattr(session, 'port', None),
+                'key_id': getattr(session, 'key_id', None),
+            }
+            self._write(OPENED, 0, number, json.dumps(info).encode())
+        return number
+
+    def _write(self, kind: int, flags: int, session: int, data: bytes) -> None:
+        if not self._file:
+            return
+        self._file.write(RECORD.pack(time.time(), kind, flags, session,
+                                     len(data)))
+        self._file.write(data)
+        self.records += 1
+
+
+def _scan(path: str) -> Tuple[int, int]:
+    """ Returns the offset where the last complete record of the log ends
+    (0 if the log is empty) and the number of the next session """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        magic = f.read(len(MAGIC))
+        if not magic:
+            return 0, 0
+        if magic != MAGIC:
+            raise ValueError('Not a traffic capture: {}'.format(path))
+        end, next_session = f.tell(), 0
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                break
+            _, _, _, session, length = RECORD.unpack(header)
+            if f.seek(length, io.SEEK_CUR) > size:
+                break
+            end = f.tell()
+            next_session = max(next_session, session + 1)
+    return end, next_session
+
+
+def read(path: str) -> Iterator[Record]:
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('Not a traffic capture: {}'.format(path))
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            timestamp, kind, flags, session, length = RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                logger.warning('Truncated capture: %s', path)
+                return
+            yield Record(timestamp, kind, flags, session, data)
+
+
+def load_message(record: Record) -> message.base.Message:
+    msg = golem_messages.load(record.data, None, None, check_time=False)
+    msg.encrypted = bool(record.flags & FLAG_ENCRYPTED)
+    return msg
+
+
+class ReplayTransport:
+
+    def __init__(self, host: str, port: int) -> None:
+        self._peer = IPv4Address('TCP', host, port)
+
+    def getPeer(self):  # pylint: disable=invalid-name
+        return self._peer
+
+    def getHandle(self):  # pylint: disable=invalid-name
+        return None
+
+    def loseConnection(self):  # pylint: disable=invalid-name
+        pass
+
+
+class ReplayConnection:
+    """ Stands in for the protocol of a captured session; the messages the
+    session sends are counted by type """
+
+    def __init__(self, server, host: str, port: int) -> None:
+        self.server = server
+        self.transport = ReplayTransport(host, port)
+        self.opened = True
+        self.session = None
+        self.producer = None
+        self.sent: Counter = Counter()
+
+    def send_message(self, msg: message.base.Message) -> bool:
+        if not self.opened:
+            return False
+        self.sent[msg.__class__.__name__] += 1
+        return True
+
+    def close(self) -> None:
+        self.opened = False
+
+
+class Replay:
+    """
+    Feeds the messages received by the sessions of a capture to new
+    sessions. `servers` maps the session classes to the servers their
+    connections belong to; sessions of other classes are skipped.
+    The records are replayed `speed` times faster than captured, or
+    without waiting if speed is None.
+    """
+
+    def __init__(self,
+                 records: List[Record],
+                 servers: Dict[type, Any],
+                 speed: Optional[float] = 1.,
+                 reactor=None) -> None:
+        self.records = records
+        self.servers = {cls.__name__: (cls, server)
+                        for cls, server in servers.items()}
+        self.speed = speed
+        self.connections: Dict[int, ReplayConnection] = dict()
+        # time spent interpreting the messages, by type
+        self.timings: Dict[str, TimingStats] = defaultdict(TimingStats)
+        # records of the sessions which weren't replayed
+        self.skipped = 0
+        self._reactor = reactor
+        self._index = 0
+        self._started = 0.
+        self._deferred: Optional[Deferred] = None
+
+    def run(self) -> Deferred:
+        """ Fires with the Replay when all the records are fed """
+        self._deferred = Deferred()
+        self._started = self._get_reactor().seconds()
+        self._schedule()
+        return self._deferred
+
+    def _schedule(self) -> None:
+        if self._index >= len(self.records):
+            self._deferred.callback(self)
+            return
+        delay = 0.
+        if self.speed:
+            record = self.records[self._index]
+            elapsed = (record.timestamp - self.records[0].timestamp) \
+                / self.speed
+            delay = max(0., self._started + elapsed -
+                        self._get_reactor().seconds())
+        self._get_reactor().callLater(delay, self._next)
+
+    def _next(self) -> None:
+        record = self.records[self._index]
+        self._index += 1
+        try:
+            self._feed(record)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Failed to replay %r', record[:4])
+        self._schedule()
+
+    def _feed(self, record: Record) -> None:
+        if record.kind == OPENED:
+            self._open(record)
+            return
+        if record.kind == SENT:
+            return
+        connection = self.connections.get(record.session)
+        if connection is None:
+            self.skipped += 1
+            return
+        session = connection.session
+        if record.kind == CLOSED:
+            del self.connections[record.session]
+            session.dropped()
+        elif record.kind == RECEIVED and connection.opened:
+            msg = load_message(record)
+            if isinstance(msg, message.base.RandVal):
+                # answer the challenge of the new session, the captured one
+                # was drawn at random
+                session.rand_val = msg.rand_val
+            started = time.perf_counter()
+            session.interpret(msg)
+            self.timings[msg.__class__.__name__].add(
+                time.perf_counter() - started)
+
+    def _open(self, record: Record) -> None:
+        info = json.loads(record.data.decode())
+        if info['cls'] not in self.servers:
+            return
+        cls, server = self.servers[info['cls']]
+        connection = ReplayConnection(server, info['host'] or '127.0.0.1',
+                                      info['port'] or 0)
+        connection.session = cls(connection)
+        self.connections[record.session] = connection
+
+    def _get_reactor(self):
+        if self._reactor is None:
+            from twisted.internet import reactor
+            return reactor
+        return self._reactor
+
+
+def summarize(records: List[Record]) -> Dict[str, Any]:
+    """ Sessions, duration and message counts by direction and type """
+    sessions: Dict[int, str] = dict()
+    counts: Dict[str, Counter] = {'received': Counter(), 'sent': Counter()}
+    for record in records:
+        if record.kind == OPENED:
+            sessions[record.session] = json.loads(record.data.decode())['cls']
+        elif record.kind in (RECEIVED, SENT):
+            direction = 'received' if record.kind == RECEIVED else 'sent'
+            counts[direction][load_message(record).__class__.__name__] += 1
+    duration = records[-1].timestamp - records[0].timestamp \
+        if records else 0.
+    return {
+        'sessions': dict(Counter(sessions.values())),
+        'duration': duration,
+        'received': dict(counts['received']),
+        'sent': dict(counts['sent']),
+    }
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Traffic capture summary')
+    parser.add_argument('path', help='captured log')
+    parsed = parser.parse_args(args)
+    print(json.dumps(summarize(list(read(parsed.path))), indent=4,
+                     sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
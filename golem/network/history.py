@@ -12,7 +12,9 @@ from golem_messages import message
 from peewee import (PeeweeException, DataError, ProgrammingError,
                     NotSupportedError, Field, IntegrityError)
 
+from golem.core import metrics
 from golem.core.service import IService
+from golem.database.writer import DatabaseWriter
 from golem.model import NetworkMessage, Actor
 
 logger = logging.getLogger('golem.network.history')
@@ -35,6 +37,9 @@ class MessageHistoryService(IService):
     - NetworkMessages have to be saved ASAP
     - removal and sweeping is not critical and can be slightly delayed
 
+    If a DatabaseWriter is running, messages are saved and removed by its
+    thread instead, together with other writes.
+
     Background operations performed by this service do not fit the looping call
     model of golem.core.service.LoopingCallService.
     """
@@ -59,6 +64,15 @@ class MessageHistoryService(IService):
         self._save_queue = queue.Queue()
         self._remove_queue = queue.Queue()
         self._sweep_ts = datetime.datetime.now()
+        # Saves submitted to the DatabaseWriter and not committed yet
+        self._writer_saves = 0
+        self._writer_saves_lock = threading.Lock()
+
+        queue_size = metrics.REGISTRY.gauge(
+            'golem_history_queue_size', 'Messages waiting to be saved',
+            ['queue'])
+        queue_size.labels('service').set_function(self._save_queue.qsize)
+        queue_size.labels('writer').set_function(lambda: self._writer_saves)
 
     def run(self) -> None:
         """
@@ -126,9 +140,21 @@ class MessageHistoryService(IService):
         Appends the dict message representation to the save queue.
         :param msg_dict:
         """
-        if msg_dict:
+        if not msg_dict:
+            return
+        writer = DatabaseWriter.instance
+        if writer and writer.running:
+            with self._writer_saves_lock:
+                self._writer_saves += 1
+            writer.submit(self.add_sync, msg_dict).add_done_callback(
+                self._writer_save_done)
+        else:
             self._save_queue.put(msg_dict)
 
+    def _writer_save_done(self, _future) -> None:
+        with self._writer_saves_lock:
+            self._writer_saves -= 1
+
     def add_sync(self, msg_dict: dict) -> None:
         """
         Saves a message in the database synchronously.
@@ -153,7 +179,12 @@ class MessageHistoryService(IService):
         a new message.
         :param task: Task id
         """
-        if task:
+        if not task:
+            return
+        writer = DatabaseWriter.instance
+        if writer and writer.running:
+            writer.submit(self.remove_sync, task, **properties)
+        else:
             self._remove_queue.put((task, properties))
 
     def remove_sync(self, task: str, **properties) -> None:
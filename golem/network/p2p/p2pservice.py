@@ -1,7 +1,6 @@
 import ipaddress
 import itertools
 import logging
-import socket
 import random
 import time
 from collections import deque
@@ -16,6 +15,7 @@ from typing import (
 from golem_messages import message
 from golem_messages.datastructures import p2p as dt_p2p
 from golem_messages.datastructures import tasks as dt_tasks
+from twisted.internet.defer import DeferredList
 
 from golem.config.active import P2P_SEEDS
 from golem.core import simplechallenge
@@ -27,6 +27,7 @@ from golem.network.p2p.peersession import PeerSession, PeerSessionInfo
 from golem.network.transport import tcpnetwork
 from golem.network.transport import tcpserver
 from golem.network.transport.network import ProtocolFactory, SessionFactory
+from golem.network.transport.resolver import RESOLVER
 from golem.ranking.manager.gossip_manager import GossipManager
 from .peerkeeper import PeerKeeper, key_distance
 
@@ -115,6 +116,8 @@ class P2PService(tcpserver.PendingConnectionsServer, DiagnosticsProvider):  # no
         self.seeds = set()
         self.used_seeds = set()
         self.bootstrap_seeds = P2P_SEEDS
+        # connect_to_seeds was called before any seed got resolved
+        self._connect_on_resolve = False
 
         self._peer_lock = Lock()
 
@@ -169,6 +172,8 @@ class P2PService(tcpserver.PendingConnectionsServer, DiagnosticsProvider):  # no
         self.last_time_tried_connect_with_seed = time.time()
         if not self.connect_to_known_hosts:
             return
+        # Seed host names may still be resolved, e.g. on start-up
+        self._connect_on_resolve = not self.seeds
 
         for _ in range(len(self.seeds)):
             ip_address, port = self._get_next_random_seed()
@@ -967,11 +972,21 @@ class P2PService(tcpserver.PendingConnectionsServer, DiagnosticsProvider):  # no
         if peers_to_find:
             self.send_find_nodes(peers_to_find)
 
-    def _sync_seeds(self, known_hosts=None):
+    def _sync_seeds(self, known_hosts=None) -> DeferredList:
+        """ Resolves the seed addresses. Connects to the seeds as soon as
+        the first ones are resolved, if connect_to_seeds found none before.
+        :return: DeferredList firing once all addresses are resolved
+        """
         self.last_seeds_sync = time.time()
         if not known_hosts:
             known_hosts = KnownHosts.select().where(KnownHosts.is_seed)
 
+        def _add_seeds(addresses):
+            seeds.update(addresses)
+            if addresses and seeds is self.seeds \
+                    and self._connect_on_resolve and not self.peers:
+                self.connect_to_seeds()
+
         def _resolve_hostname(host, port):
             try:
                 port = int(port)
@@ -989,18 +1004,14 @@ class P2PService(tcpserver.PendingConnectionsServer, DiagnosticsProvider):  # no
                     port,
                 )
                 return
-            try:
-                for addrinfo in socket.getaddrinfo(host, port):
-                    yield addrinfo[4]  # (ip, port)
-            except OSError as e:
-                logger.error(
-                    "Can't resolve %s:%s. %s",
-                    host,
-                    port,
-                    e,
-                )
+            # IP addresses and cached names are added right away, the
+            # others once resolved
+            lookups.append(
+                RESOLVER.resolve(host, port).addCallback(_add_seeds))
 
-        self.seeds = set()
+        # a new set, not to be updated by lookups of the previous sync
+        self.seeds = seeds = set()
+        lookups = []
 
         ip_address = self.config_desc.seed_host or ''
         port = self.config_desc.seed_port
@@ -1014,7 +1025,8 @@ class P2PService(tcpserver.PendingConnectionsServer, DiagnosticsProvider):  # no
                         None,
                     )
                 )):
-            self.seeds.update(_resolve_hostname(*hostport))
+            _resolve_hostname(*hostport)
+        return DeferredList(lookups, consumeErrors=True)
 
     def _get_next_random_seed(self):
         # this loop won't execute more than twice
@@ -74,6 +74,10 @@ class PeerSession(BasicSafeSession):
         self.listen_port = None
         self.conn_id = None
         self.metadata = None
+        # Task headers the peer is known to have: task id -> (header
+        # timestamp, time the peer sent or was sent the header)
+        self.known_task_headers: typing.Dict[str, typing.Tuple[int, float]] \
+            = {}
 
         # Verification by challenge not a random value
         self.solve_challenge = False
@@ -339,8 +343,12 @@ class PeerSession(BasicSafeSession):
             self.p2p_service.try_to_add_peer(pi)
 
     def _react_to_get_tasks(self, msg):
-        my_tasks = self.p2p_service.get_own_tasks_headers()
-        other_tasks = self.p2p_service.get_others_tasks_headers()
+        now = time.time()
+        self._forget_known_task_headers(now)
+        my_tasks = self._unknown_task_headers(
+            self.p2p_service.get_own_tasks_headers())
+        other_tasks = self._unknown_task_headers(
+            self.p2p_service.get_others_tasks_headers())
         if not my_tasks and not other_tasks:
             return
 
@@ -362,16 +370,43 @@ class PeerSession(BasicSafeSession):
         except TypeError:
             logger.debug("Unexpected format of other task list %r", other_tasks)
 
+        for header in tasks_to_send:
+            self._add_known_task_header(header, now)
         self.send(message.p2p.Tasks(tasks=tasks_to_send))
 
     def _react_to_tasks(self, msg):
         logger.debug("Running handler for `Tasks`. msg=%r", msg)
+        now = time.time()
         for t in msg.tasks:
             logger.debug("Task information received. task header: %r", t)
             if not self.p2p_service.add_task_header(t):
                 self.disconnect(
                     message.base.Disconnect.REASON.BadProtocol
                 )
+                continue
+            self._add_known_task_header(t, now)
+
+    def _add_known_task_header(self, header, now: float) -> None:
+        known = self.known_task_headers.get(header.task_id)
+        if known is None or known[0] <= header.timestamp:
+            self.known_task_headers[header.task_id] = (header.timestamp, now)
+
+    def _forget_known_task_headers(self, now: float) -> None:
+        """ Peers may drop headers, e.g. when they stop supporting a task.
+        The ones sent or received long ago are sent again. """
+        deadline = now - variables.TASK_HEADERS_RESEND_INTERVAL
+        for task_id, (_, since) in list(self.known_task_headers.items()):
+            if since < deadline:
+                del self.known_task_headers[task_id]
+
+    def _unknown_task_headers(self, headers):
+        """ Headers the peer doesn't have or has an older version of """
+        if not headers:
+            return headers
+        known = self.known_task_headers
+        return [header for header in headers
+                if header.task_id not in known
+                or known[header.task_id][0] < header.timestamp]
 
     def _react_to_remove_task(self, msg):
         if not self._verify_remove_task(msg):
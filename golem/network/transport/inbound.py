@@ -0,0 +1,115 @@
+import logging
+from collections import deque
+from typing import Deque
+
+logger = logging.getLogger(__name__)
+
+# Messages interpreted in a single reactor iteration, from all connections
+MESSAGES_PER_TICK = 100
+# Bytes queued for a connection before it stops being read
+QUEUE_BYTES_LIMIT = 8 * 1024 * 1024
+
+
+class InboundQueue:
+    """ Frames received from a connection, waiting to be interpreted """
+
+    def __init__(self, protocol) -> None:
+        self.protocol = protocol
+        self.frames: Deque[bytes] = deque()
+        self.size = 0
+        self.paused = False
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def append(self, frame: bytes) -> None:
+        self.frames.append(frame)
+        self.size += len(frame)
+
+    def popleft(self) -> bytes:
+        frame = self.frames.popleft()
+        self.size -= len(frame)
+        return frame
+
+    def clear(self) -> None:
+        self.frames.clear()
+        self.size = 0
+
+
+class InboundDispatcher:
+    """
+    Interprets the messages received from peers without letting a single
+    connection monopolize the reactor. Protocols queue the frames they
+    receive; the queues are drained round-robin, a message of each
+    connection in turn, up to `messages_per_tick` messages per reactor
+    iteration. A connection whose queue grows over `queue_limit` bytes is
+    paused until its queue is drained below half of the limit.
+    """
+
+    def __init__(self,
+                 messages_per_tick: int = MESSAGES_PER_TICK,
+                 queue_limit: int = QUEUE_BYTES_LIMIT,
+                 reactor=None) -> None:
+        self.messages_per_tick = messages_per_tick
+        self.queue_limit = queue_limit
+        self._reactor = reactor
+        # queues with frames to interpret, in the order of their turns
+        self._ready: Deque[InboundQueue] = deque()
+        self._call = None
+
+    def put(self, queue: InboundQueue, frame: bytes) -> None:
+        if not queue:
+            self._ready.append(queue)
+        queue.append(frame)
+        if queue.size > self.queue_limit and not queue.paused:
+            logger.info(
+                'Pausing %r, %d bytes of messages queued',
+                queue.protocol.transport.getPeer(),
+                queue.size,
+            )
+            queue.paused = True
+            queue.protocol.transport.pauseProducing()
+        self._schedule()
+
+    def discard(self, queue: InboundQueue) -> None:
+        """ Drops the frames of a closed connection """
+        if queue:
+            self._ready.remove(queue)
+            queue.clear()
+
+    def _schedule(self) -> None:
+        if self._call is None and self._ready:
+            self._call = self._get_reactor().callLater(0, self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._call = None
+        budget = self.messages_per_tick
+        while self._ready and budget > 0:
+            queue = self._ready.popleft()
+            frame = queue.popleft()
+            if queue:
+                self._ready.append(queue)
+            if queue.paused and queue.size <= self.queue_limit // 2:
+                queue.paused = False
+                queue.protocol.transport.resumeProducing()
+            budget -= 1
+            try:
+                queue.protocol.interpret_frame(frame)
+            except Exception:  # pylint: disable=broad-except
+                # the connection would be dropped if it was interpreted
+                # in dataReceived
+                logger.exception('Failed to interpret message from %r',
+                                 queue.protocol.transport.getPeer())
+                self.discard(queue)
+                queue.protocol.close()
+        self._schedule()
+
+    def _get_reactor(self):
+        if self._reactor is None:
+            from twisted.internet import reactor
+            return reactor
+        return self._reactor
+
+
+# Dispatcher shared by the connections of TCPNetwork
+DISPATCHER = InboundDispatcher()
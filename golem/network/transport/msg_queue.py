@@ -9,7 +9,9 @@ from golem_messages import message
 
 from golem import decorators
 from golem import model
+from golem.core import metrics
 from golem.core import variables
+from golem.database import writer
 
 
 logger = logging.getLogger(__name__)
@@ -21,11 +23,21 @@ FORBIDDEN_CLASSES = (
     message.base.RandVal,
 )
 
+metrics.REGISTRY.gauge(
+    'golem_msg_queue_size', 'Messages queued for peers not connected',
+).labels().set_function(lambda: model.QueuedMessage.select().count())
+
 
 def put(node_id: str, msg: message.base.Message) -> None:
     assert not isinstance(msg, FORBIDDEN_CLASSES),\
         "Disconnect message shouldn't be in a queue"
     db_model = model.QueuedMessage.from_message(node_id, msg)
+    # Queued behind other writes, not to block the caller (the reactor)
+    _save(db_model)
+
+
+@writer.write_behind
+def _save(db_model: model.QueuedMessage) -> None:
     db_model.save()
 
 
@@ -0,0 +1,113 @@
+import ipaddress
+import logging
+import socket
+import time
+from typing import Dict, List, Tuple
+
+from twisted.internet import threads
+from twisted.internet.defer import Deferred, succeed
+
+logger = logging.getLogger(__name__)
+
+# How long resolved addresses are used before resolving again (seconds)
+DNS_CACHE_TTL = 300
+# How long a failed name is not resolved again (seconds)
+DNS_NEGATIVE_CACHE_TTL = 60
+
+
+class HostResolver:
+    """
+    Resolves host names without blocking the reactor: getaddrinfo is called
+    in the reactor's thread pool. Addresses are cached for `ttl` seconds and
+    failures for `negative_ttl` seconds. After `ttl` the cached addresses are
+    still returned while the name is resolved again in the background.
+    Concurrent lookups of a name share a single getaddrinfo call.
+    """
+
+    def __init__(self,
+                 ttl: float = DNS_CACHE_TTL,
+                 negative_ttl: float = DNS_NEGATIVE_CACHE_TTL,
+                 reactor=None) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._reactor = reactor
+        # host -> (expiration time, addresses; empty if resolution failed)
+        self._cache: Dict[str, Tuple[float, List[str]]] = dict()
+        self._pending: Dict[str, List[Deferred]] = dict()
+
+    def resolve(self, host: str, port: int) -> Deferred:
+        """ Returns a Deferred firing with a list of (ip address, port)
+        tuples, empty if the host could not be resolved. Fires right away
+        for IP addresses and names in the cache. """
+        try:
+            ipaddress.ip_address(host)
+            return succeed([(host, port)])
+        except ValueError:
+            pass
+
+        cached = self._cache.get(host)
+        if cached is not None:
+            expires, addresses = cached
+            if expires < time.time():
+                if not addresses:
+                    cached = None  # resolve failed names again
+                elif host not in self._pending:
+                    self._lookup(host)
+        if cached is not None:
+            return succeed([(address, port) for address in cached[1]])
+
+        deferred = Deferred()
+        deferred.addCallback(
+            lambda addresses: [(address, port) for address in addresses])
+        if host in self._pending:
+            self._pending[host].append(deferred)
+        else:
+            self._lookup(host).append(deferred)
+        return deferred
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _lookup(self, host: str) -> List[Deferred]:
+        waiting: List[Deferred] = []
+        self._pending[host] = waiting
+        reactor = self._get_reactor()
+        deferred = threads.deferToThreadPool(
+            reactor, reactor.getThreadPool(), _getaddrinfo, host)
+        deferred.addCallbacks(self._resolved, self._failed,
+                              callbackArgs=(host,), errbackArgs=(host,))
+        return waiting
+
+    def _resolved(self, addresses: List[str], host: str) -> None:
+        self._cache[host] = time.time() + self.ttl, addresses
+        for deferred in self._pending.pop(host, []):
+            deferred.callback(addresses)
+
+    def _failed(self, failure, host: str) -> None:
+        logger.error("Can't resolve %s. %s", host, failure.getErrorMessage())
+        previous = self._cache.get(host)
+        # keep the addresses resolved before, if any
+        addresses = previous[1] if previous else []
+        self._cache[host] = time.time() + self.negative_ttl, addresses
+        for deferred in self._pending.pop(host, []):
+            deferred.callback(addresses)
+
+    def _get_reactor(self):
+        if self._reactor is None:
+            from twisted.internet import reactor
+            return reactor
+        return self._reactor
+
+
+def _getaddrinfo(host: str) -> List[str]:
+    """ Distinct addresses of the host, in the order of getaddrinfo """
+    addresses: List[str] = []
+    for addrinfo in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP):
+        address = addrinfo[4][0]
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+# Resolver shared by the seeds of P2PService and connections of TCPNetwork
+RESOLVER = HostResolver()
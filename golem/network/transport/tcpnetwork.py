@@ -1,3 +1,4 @@
+import ipaddress
 import logging
 import struct
 import time
@@ -6,13 +7,17 @@ import golem_messages
 from golem_messages import message
 from twisted.internet.defer import maybeDeferred
 from twisted.internet.endpoints import TCP4ServerEndpoint, \
-    TCP4ClientEndpoint, TCP6ServerEndpoint, TCP6ClientEndpoint, \
-    HostnameEndpoint
+    TCP4ClientEndpoint, TCP6ServerEndpoint, TCP6ClientEndpoint
 from twisted.internet.protocol import connectionDone
 
 from golem.core.databuffer import DataBuffer
+from golem.core import metrics
 from golem.core.hostaddress import get_host_addresses
+from golem.diag.reactor import timed
+from golem.network.capture import TrafficCapture
+from golem.network.transport.inbound import DISPATCHER, InboundQueue
 from golem.network.transport.limiter import CallRateLimiter
+from golem.network.transport.resolver import RESOLVER
 from .network import Network, SessionProtocol, IncomingProtocolFactoryWrapper, \
     OutgoingProtocolFactoryWrapper
 from .spamprotector import SpamProtector
@@ -25,6 +30,11 @@ logger = logging.getLogger(__name__)
 
 MAX_MESSAGE_SIZE = 2 * 1024 * 1024
 
+MESSAGES_SENT = metrics.REGISTRY.counter(
+    'golem_messages_sent_total', 'Messages sent, by type', ['type'])
+MESSAGES_RECEIVED = metrics.REGISTRY.counter(
+    'golem_messages_received_total', 'Messages received, by type', ['type'])
+
 
 ###############
 # TCP Network #
@@ -145,12 +155,13 @@ class TCPNetwork(Network):
 
         use_ipv6 = connect_info.socket_addresses[0].ipv6
         use_hostname = connect_info.socket_addresses[0].hostname
+        if use_hostname:
+            RESOLVER.resolve(address, port).addCallback(
+                self.__hostname_resolved, connect_info)
+            return
         if use_ipv6:
             endpoint = TCP6ClientEndpoint(self.reactor, address, port,
                                           self.timeout)
-        elif use_hostname:
-            endpoint = HostnameEndpoint(self.reactor, address, port,
-                                        self.timeout)
         else:
             endpoint = TCP4ClientEndpoint(self.reactor, address, port,
                                           self.timeout)
@@ -164,6 +175,21 @@ class TCPNetwork(Network):
                          self.__connection_to_address_failure,
                          connect_info)
 
+    def __hostname_resolved(self, addresses, connect_info: TCPConnectInfo):
+        """ Replaces the host name with its addresses and tries to connect
+        to them """
+        resolved = []
+        for address, port in addresses:
+            try:
+                resolved.append(SocketAddress(address, port))
+            except ipaddress.AddressValueError as exc:
+                logger.debug("Invalid resolved address %r: %r", address, exc)
+        if not resolved:
+            self.__connection_to_address_failure(connect_info)
+            return
+        connect_info.socket_addresses[:1] = resolved
+        self.__try_to_connect_to_addresses(connect_info)
+
     @staticmethod
     def __connection_established(conn, established_callback,
                                  connect_info: TCPConnectInfo):
@@ -273,6 +299,7 @@ class BasicProtocol(SessionProtocol):
         super().__init__()
         self.opened = False
         self.db = DataBuffer()
+        self.inbound = InboundQueue(self)
         self.spam_protector = SpamProtector()
 
     def send_message(self, msg):
@@ -296,6 +323,9 @@ class BasicProtocol(SessionProtocol):
 
         self.transport.getHandle()
         self.transport.write(msg_to_send)
+        MESSAGES_SENT.labels(msg.__class__.__name__).inc()
+        if TrafficCapture.instance:
+            TrafficCapture.instance.sent(self.session, msg)
 
         return True
 
@@ -328,11 +358,27 @@ class BasicProtocol(SessionProtocol):
     def connectionLost(self, reason=connectionDone):
         """Called when connection is lost (for whatever reason)"""
         self.opened = False
+        DISPATCHER.discard(self.inbound)
         if self.session:
+            if TrafficCapture.instance:
+                TrafficCapture.instance.closed(self.session)
             self.session.dropped()
 
         SessionProtocol.connectionLost(self, reason)
 
+    def interpret_frame(self, data):
+        """Called by the dispatcher when the frame is due to be interpreted"""
+        if not self.session:
+            return
+        msg = self._frame_to_message(data)
+        if msg is None:
+            return
+        MESSAGES_RECEIVED.labels(msg.__class__.__name__).inc()
+        if TrafficCapture.instance:
+            TrafficCapture.instance.received(self.session, msg)
+        with timed('interpret', msg.__class__.__name__):
+            self.session.interpret(msg)
+
     # Protected functions
     def _prepare_msg_to_send(self, msg):
         ser_msg = golem_messages.dump(msg, None, None)
@@ -347,9 +393,9 @@ class BasicProtocol(SessionProtocol):
     def _interpret(self, data):
         self.session.last_message_time = time.time()
         self.db.append_bytes(data)
-        mess = self._data_to_messages()
-        for m in mess:
-            self.session.interpret(m)
+        for frame in self.db.get_len_prefixed_bytes():
+            if self._check_size(frame):
+                DISPATCHER.put(self.inbound, frame)
 
     def _load_message(self, data):
         msg = golem_messages.load(data, None, None)
@@ -359,61 +405,57 @@ class BasicProtocol(SessionProtocol):
         )
         return msg
 
-    def _data_to_messages(self):
-        messages = []
-
-        for data in self.db.get_len_prefixed_bytes():
-            if len(data) > MAX_MESSAGE_SIZE:
-                logger.info(
-                    'Ignoring huge message %dB from %r',
-                    len(data),
-                    self.transport.getPeer(),
-                )
-                continue
-
-            try:
-                if not self.spam_protector.check_msg(data):
-                    continue
-                msg = self._load_message(data)
-            except golem_messages.exceptions.HeaderError as e:
-                logger.debug(
-                    "Invalid message header: %s from %s. Ignoring.",
-                    e,
-                    self.transport.getPeer(),
-                )
-                continue
-            except golem_messages.exceptions.VersionMismatchError as e:
-                logger.debug(
-                    "Message version mismatch: %s from %s. Closing.",
-                    e,
-                    self.transport.getPeer(),
-                )
-                msg = message.base.Disconnect(
-                    reason=message.base.Disconnect.REASON.ProtocolVersion,
-                )
-                self.send_message(msg)
-                self.close()
-                return []
-            except golem_messages.exceptions.MessageError as e:
-                logger.debug(
-                    "Failed to deserialize message: %(e)s from %(peer)s."
-                    " data=%(data)r",
-                    {
-                        'e': e,
-                        'peer': self.transport.getPeer(),
-                        'data': data,
-                    },
-                )
-                logger.debug(
-                    "BasicProtocol._data_to_messages() failed %r",
-                    data,
-                    exc_info=True,
-                )
-                continue
-
-            messages.append(msg)
+    def _check_size(self, data) -> bool:
+        if len(data) > MAX_MESSAGE_SIZE:
+            logger.info(
+                'Ignoring huge message %dB from %r',
+                len(data),
+                self.transport.getPeer(),
+            )
+            return False
+        return True
 
-        return messages
+    def _frame_to_message(self, data):
+        try:
+            if not self.spam_protector.check_msg(data):
+                return None
+            return self._load_message(data)
+        except golem_messages.exceptions.HeaderError as e:
+            logger.debug(
+                "Invalid message header: %s from %s. Ignoring.",
+                e,
+                self.transport.getPeer(),
+            )
+        except golem_messages.exceptions.VersionMismatchError as e:
+            logger.debug(
+                "Message version mismatch: %s from %s. Closing.",
+                e,
+                self.transport.getPeer(),
+            )
+            msg = message.base.Disconnect(
+                reason=message.base.Disconnect.REASON.ProtocolVersion,
+            )
+            self.send_message(msg)
+            self.close()
+            # the rest of the messages won't be interpreted
+            DISPATCHER.discard(self.inbound)
+            self.db.clear_buffer()
+        except golem_messages.exceptions.MessageError as e:
+            logger.debug(
+                "Failed to deserialize message: %(e)s from %(peer)s."
+                " data=%(data)r",
+                {
+                    'e': e,
+                    'peer': self.transport.getPeer(),
+                    'data': data,
+                },
+            )
+            logger.debug(
+                "BasicProtocol._frame_to_message() failed %r",
+                data,
+                exc_info=True,
+            )
+        return None
 
 
 class ServerProtocol(BasicProtocol):
@@ -10,6 +10,7 @@ from typing import (
     Dict,
     List,
     Optional,
+    TYPE_CHECKING,
     TypeVar,
 )
 
@@ -22,7 +23,6 @@ from twisted.python.failure import Failure
 from apps.appsmanager import AppsManager
 import golem
 from golem.appconfig import AppConfig
-from golem.client import Client
 from golem.clientconfigdescriptor import ClientConfigDescriptor
 from golem.config.active import IS_MAINNET, EthereumConfig
 from golem.core.deferred import chain_function
@@ -32,7 +32,6 @@ from golem.core import golem_async
 from golem.core.variables import PRIVATE_KEY
 from golem.core import virtualization
 from golem.database import Database
-from golem.docker.manager import DockerManager
 from golem.ethereum.transactionsystem import TransactionSystem
 from golem.model import DB_MODELS, db, DB_FIELDS
 from golem.network.transport.tcpnetwork_helpers import SocketAddress
@@ -48,6 +47,11 @@ from golem import terms
 from golem.tools.uploadcontroller import UploadController
 from golem.tools.remotefs import RemoteFS
 
+if TYPE_CHECKING:
+    # pylint: disable=unused-import
+    from golem import client as golem_client
+    from golem.docker import manager as dockermanager
+
 F = TypeVar('F', bound=Callable[..., Any])
 logger = logging.getLogger(__name__)
 
@@ -100,7 +104,7 @@ class Node(HardwarePresetsMixin):
         self._config_desc = config_desc
         self._datadir = datadir
         self._use_docker_manager = use_docker_manager
-        self._docker_manager: Optional[DockerManager] = None
+        self._docker_manager: Optional['dockermanager.DockerManager'] = None
 
         self._use_monitor = config_desc.enable_monitor \
             if use_monitor is None else use_monitor
@@ -125,26 +129,33 @@ class Node(HardwarePresetsMixin):
 
         # Initialize database
         self._db = Database(
-            db, fields=DB_FIELDS, models=DB_MODELS, db_dir=datadir)
+            db, fields=DB_FIELDS, models=DB_MODELS, db_dir=datadir,
+            use_writer=True)
 
-        self.client: Optional[Client] = None
+        self.client: Optional['golem_client.Client'] = None
 
         self.apps_manager = AppsManager()
 
-        self._client_factory = lambda keys_auth: Client(
-            datadir=datadir,
-            app_config=app_config,
-            config_desc=config_desc,
-            keys_auth=keys_auth,
-            database=self._db,
-            transaction_system=self._ets,
-            use_docker_manager=use_docker_manager,
-            use_monitor=self._use_monitor,
-            concent_variant=concent_variant,
-            apps_manager=self.apps_manager,
-            task_finished_cb=self._try_shutdown,
-            update_hw_preset=self.upsert_hw_preset
-        )
+        def client_factory(keys_auth: KeysAuth) -> 'golem_client.Client':
+            # The client's subsystems are loaded once RPC is ready, not to
+            # delay it
+            from golem.client import Client
+            return Client(
+                datadir=datadir,
+                app_config=app_config,
+                config_desc=config_desc,
+                keys_auth=keys_auth,
+                database=self._db,
+                transaction_system=self._ets,
+                use_docker_manager=use_docker_manager,
+                use_monitor=self._use_monitor,
+                concent_variant=concent_variant,
+                apps_manager=self.apps_manager,
+                task_finished_cb=self._try_shutdown,
+                update_hw_preset=self.upsert_hw_preset
+            )
+
+        self._client_factory = client_factory
 
         self.tempfs = TempFS()
         self.remotefs = RemoteFS(self.tempfs, UploadController(self.tempfs))
@@ -475,6 +486,7 @@ class Node(HardwarePresetsMixin):
             return succeed(None)
 
         def start_docker():
+            from golem.docker.manager import DockerManager
             # pylint: disable=no-member
             self._docker_manager = DockerManager.install(self._config_desc)
             self._docker_manager.check_environment()
@@ -3,6 +3,7 @@ import logging
 
 from peewee import IntegrityError
 
+from golem.database.writer import write_behind
 from golem.model import LocalRank, GlobalRank, NeighbourLocRank, db
 from golem.ranking import ProviderEfficacy
 from golem.task.taskstate import SubtaskOp
@@ -14,11 +15,12 @@ REQUESTOR_FORGETTING_FACTOR = 0.9
 PROVIDER_FORGETTING_FACTOR = 0.9
 
 
+@write_behind
 def increase_positive_computed(node_id, trust_mod):
     logger.debug('increase_positive_computed. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, positive_computed=trust_mod)
     except IntegrityError:
         LocalRank.update(positive_computed=LocalRank.positive_computed + trust_mod,
@@ -26,11 +28,12 @@ def increase_positive_computed(node_id, trust_mod):
             .where(LocalRank.node_id == node_id).execute()
 
 
+@write_behind
 def increase_negative_computed(node_id, trust_mod):
     logger.debug('increase_negative_computed. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, negative_computed=trust_mod)
     except IntegrityError:
         LocalRank.update(negative_computed=LocalRank.negative_computed + trust_mod,
@@ -38,11 +41,12 @@ def increase_negative_computed(node_id, trust_mod):
             .where(LocalRank.node_id == node_id).execute()
 
 
+@write_behind
 def increase_wrong_computed(node_id, trust_mod):
     logger.debug('increase_wrong_computed. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, wrong_computed=trust_mod)
     except IntegrityError:
         LocalRank.update(wrong_computed=LocalRank.wrong_computed + trust_mod,
@@ -50,11 +54,12 @@ def increase_wrong_computed(node_id, trust_mod):
             .where(LocalRank.node_id == node_id).execute()
 
 
+@write_behind
 def increase_positive_requested(node_id, trust_mod):
     logger.debug('increase_positive_requested. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, positive_requested=trust_mod)
     except IntegrityError:
         LocalRank.update(positive_requested=LocalRank.positive_requested + trust_mod,
@@ -62,11 +67,12 @@ def increase_positive_requested(node_id, trust_mod):
             .where(LocalRank.node_id == node_id).execute()
 
 
+@write_behind
 def increase_negative_requested(node_id, trust_mod):
     logger.debug('increase_negative_requested. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, negative_requested=trust_mod)
     except IntegrityError:
         LocalRank.update(negative_requested=LocalRank.negative_requested + trust_mod,
@@ -74,11 +80,12 @@ def increase_negative_requested(node_id, trust_mod):
             .where(LocalRank.node_id == node_id).execute()
 
 
+@write_behind
 def increase_positive_payment(node_id, trust_mod):
     logger.debug('increase_positive_payment. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, positive_payment=trust_mod)
     except IntegrityError:
         LocalRank.update(positive_payment=LocalRank.positive_payment + trust_mod,
@@ -86,11 +93,12 @@ def increase_positive_payment(node_id, trust_mod):
             .where(LocalRank.node_id == node_id).execute()
 
 
+@write_behind
 def increase_negative_payment(node_id, trust_mod):
     logger.debug('increase_negative_payment. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, negative_payment=trust_mod)
     except IntegrityError:
         LocalRank.update(negative_payment=LocalRank.negative_payment + trust_mod,
@@ -98,11 +106,12 @@ def increase_negative_payment(node_id, trust_mod):
             .where(LocalRank.node_id == node_id).execute()
 
 
+@write_behind
 def increase_positive_resource(node_id, trust_mod):
     logger.debug('increase_positive_resource. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, positive_resource=trust_mod)
     except IntegrityError:
         LocalRank.update(positive_resource=LocalRank.positive_resource + trust_mod,
@@ -110,11 +119,12 @@ def increase_positive_resource(node_id, trust_mod):
             .where(LocalRank.node_id == node_id).execute()
 
 
+@write_behind
 def increase_negative_resource(node_id, trust_mod):
     logger.debug('increase_negative_resource. node_id=%r, trust_mod=%r',
                  node_id, trust_mod)
     try:
-        with db.transaction():
+        with db.atomic():
             LocalRank.create(node_id=node_id, negative_resource=trust_mod)
     except IntegrityError:
         LocalRank.update(negative_resource=LocalRank.negative_resource + trust_mod,
@@ -138,12 +148,12 @@ def _calculate_efficiency(efficiency: float,
 
 
 def get_requestor_efficiency(node_id: str) -> float:
-    with db.transaction():
-        rank, _ = LocalRank.get_or_create(node_id=node_id)
-        efficiency = rank.requestor_efficiency
-        return efficiency or 1.0
+    rank = _get_local_rank_or_default(node_id)
+    efficiency = rank.requestor_efficiency
+    return efficiency or 1.0
 
 
+@write_behind
 def update_requestor_efficiency(node_id: str,
                                 timeout: float,
                                 computation_time: float,
@@ -153,7 +163,7 @@ def update_requestor_efficiency(node_id: str,
     Update efficiency function from both Requestor and Provider perspective as
     proposed in https://docs.golem.network/About/img/Brass_Golem_Marketplace.pdf
     """
-    with db.transaction():
+    with db.atomic():
         rank, _ = LocalRank.get_or_create(node_id=node_id)
         efficiency = rank.requestor_efficiency
 
@@ -169,52 +179,52 @@ def update_requestor_efficiency(node_id: str,
 
 
 def get_requestor_assigned_sum(node_id: str) -> int:
-    with db.transaction():
-        rank, _ = LocalRank.get_or_create(node_id=node_id)
-        return rank.requestor_assigned_sum or 0
+    rank = _get_local_rank_or_default(node_id)
+    return rank.requestor_assigned_sum or 0
 
 
+@write_behind
 def update_requestor_assigned_sum(node_id: str, amount: int) -> None:
     """
     V_assigned from Provider perspective as
     proposed in https://docs.golem.network/About/img/Brass_Golem_Marketplace.pdf
     """
 
-    with db.transaction():
+    with db.atomic():
         rank, _ = LocalRank.get_or_create(node_id=node_id)
         rank.requestor_assigned_sum += amount
         rank.save()
 
 
+@write_behind
 def update_requestor_paid_sum(node_id: str, amount: int) -> None:
     """
     V_paid from Provider perspective as
     proposed in https://docs.golem.network/About/img/Brass_Golem_Marketplace.pdf
     """
 
-    with db.transaction():
+    with db.atomic():
         rank, _ = LocalRank.get_or_create(node_id=node_id)
         rank.requestor_paid_sum += amount
         rank.save()
 
 
 def get_requestor_paid_sum(node_id: str) -> int:
-    with db.transaction():
-        rank, _ = LocalRank.get_or_create(node_id=node_id)
-        return rank.requestor_paid_sum or 0
+    rank = _get_local_rank_or_default(node_id)
+    return rank.requestor_paid_sum or 0
 
 
 def get_provider_efficiency(node_id: str) -> float:
-    with db.transaction():
-        rank, _ = LocalRank.get_or_create(node_id=node_id)
-        return rank.provider_efficiency
+    rank = _get_local_rank_or_default(node_id)
+    return rank.provider_efficiency
 
 
+@write_behind
 def update_provider_efficiency(node_id: str,
                                timeout: float,
                                computation_time: float) -> None:
 
-    with db.transaction():
+    with db.atomic():
         rank, _ = LocalRank.get_or_create(node_id=node_id)
         efficiency = rank.provider_efficiency
 
@@ -224,14 +234,14 @@ def update_provider_efficiency(node_id: str,
 
 
 def get_provider_efficacy(node_id: str) -> ProviderEfficacy:
-    with db.transaction():
-        rank, _ = LocalRank.get_or_create(node_id=node_id)
-        return rank.provider_efficacy
+    rank = _get_local_rank_or_default(node_id)
+    return rank.provider_efficacy
 
 
+@write_behind
 def update_provider_efficacy(node_id: str, op: SubtaskOp) -> None:
 
-    with db.transaction():
+    with db.atomic():
         rank, _ = LocalRank.get_or_create(node_id=node_id)
         rank.provider_efficacy.update(op)
         rank.save()
@@ -241,9 +251,10 @@ def get_global_rank(node_id):
     return GlobalRank.select().where(GlobalRank.node_id == node_id).first()
 
 
+@write_behind
 def upsert_global_rank(node_id, comp_trust, req_trust, comp_weight, req_weight):
     try:
-        with db.transaction():
+        with db.atomic():
             GlobalRank.create(node_id=node_id, requesting_trust_value=req_trust, computing_trust_value=comp_trust,
                               gossip_weight_computing=comp_weight, gossip_weight_requesting=req_weight)
     except IntegrityError:
@@ -257,6 +268,12 @@ def get_local_rank(node_id):
     return LocalRank.select().where(LocalRank.node_id == node_id).first()
 
 
+def _get_local_rank_or_default(node_id: str) -> LocalRank:
+    """ Reads the node's rank without creating it, the rows are written only
+    by the updates, through the database writer """
+    return get_local_rank(node_id) or LocalRank(node_id=node_id)
+
+
 def get_local_rank_for_all():
     return LocalRank.select()
 
@@ -266,12 +283,13 @@ def get_neighbour_loc_rank(neighbour_id, about_id):
         (NeighbourLocRank.node_id == neighbour_id) & (NeighbourLocRank.about_node_id == about_id)).first()
 
 
+@write_behind
 def upsert_neighbour_loc_rank(neighbour_id, about_id, loc_rank):
     try:
         if neighbour_id == about_id:
             logger.warning("Removing {} self trust".format(about_id))
             return
-        with db.transaction():
+        with db.atomic():
             NeighbourLocRank.create(node_id=neighbour_id, about_node_id=about_id,
                                     requesting_trust_value=loc_rank[1], computing_trust_value=loc_rank[0])
     except IntegrityError:
@@ -0,0 +1,385 @@
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat as stat_mode
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from golem.core.common import is_linux, is_windows
+
+logger = logging.getLogger(__name__)
+
+CONTENT_STORE_DIR = 'ContentStore'
+# ioctl request cloning a file on copy-on-write file systems (btrfs, xfs)
+FICLONE = 0x40049409
+HASH_BLOCK_SIZE = 2 ** 20
+MANIFESTS_FILE = 'manifests.json'
+READ_ONLY = stat_mode.S_IRUSR | stat_mode.S_IRGRP | stat_mode.S_IROTH
+
+# mtime_ns tells whether a stored file has been modified through a hard link
+StoreEntry = NamedTuple('StoreEntry', [('size', int), ('mtime_ns', int),
+                                       ('last_used', float)])
+# (size, mtime in ns, inode, digest) of a file which has already been hashed
+StatDigest = Tuple[int, int, int, str]
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _reflink(src: str, dst: str) -> None:
+    import fcntl
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+
+
+def clone_or_copy(src: str, dst: str) -> None:
+    """ Makes an independent copy of src under dst, sharing the data on disk
+    with a copy-on-write reflink when the file system supports it (Linux
+    only). Unlike a hard link, modifying either file never changes the
+    other. """
+    if is_linux():
+        try:
+            _reflink(src, dst)
+            return
+        except OSError as exc:
+            logger.debug("Cannot reflink %r to %r: %r", src, dst, exc)
+            if os.path.exists(dst):
+                os.remove(dst)
+
+    shutil.copyfile(src, dst)
+
+
+def link_or_copy(src: str, dst: str) -> None:
+    """ Hard-links src under dst, falling back to clone_or_copy where hard
+    links cannot be made, e.g. across file systems. """
+    try:
+        os.link(src, dst)
+        return
+    except OSError as exc:
+        logger.debug("Cannot link %r to %r: %r", src, dst, exc)
+    clone_or_copy(src, dst)
+
+
+def _make_read_only(path: str) -> None:
+    # read-only files could not be removed with the task directories on
+    # Windows, where the store relies on the modification checks alone
+    if not is_windows():
+        os.chmod(path, READ_ONLY)
+
+
+def _remove_read_only(path: str) -> None:
+    try:
+        os.remove(path)
+    except PermissionError:
+        # read-only files cannot be removed on Windows
+        os.chmod(path, stat_mode.S_IWUSR | stat_mode.S_IRUSR)
+        os.remove(path)
+
+
+class ContentStore:
+    """
+    Local store of resource files addressed by the SHA1 of their content.
+    Files added to the store (resource packages and downloaded resources,
+    never the user's originals) are hard-linked into its directory and made
+    read-only, so identical files are hashed, kept on disk and transferred
+    once, then hard-linked into task resource directories as read-only
+    inputs. Copies are made only where hard links are not supported. A stored
+    file whose size or modification time has changed, e.g. written to through
+    one of its links, is dropped instead of being materialized.
+    Each file is referenced by the resource ids it was
+    materialized for; unreferenced files are evicted in the least recently
+    used order when the store exceeds its size budget. Manifests and
+    references are saved in the store directory, so they survive restarts.
+    """
+
+    def __init__(self, root_dir: str,
+                 max_size: Optional[int] = None) -> None:
+        """
+        :param root_dir: directory to keep the files in
+        :param max_size: disk budget in bytes, unlimited if None
+        """
+        self.root_dir = root_dir
+        self.max_size = max_size
+
+        self._lock = Lock()
+        self._entries: 'OrderedDict[str, StoreEntry]' = OrderedDict()
+        self._refs: Dict[str, Set[str]] = dict()
+        self._digests: Dict[str, StatDigest] = dict()
+        # manifest key (e.g. a resource hash) to {relative path: digest}
+        self._manifests: Dict[str, Dict[str, str]] = dict()
+        self._size = 0
+
+        os.makedirs(root_dir, exist_ok=True)
+        self._scan()
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, digest[:2], digest)
+
+    def cached_digest(self, path: str) -> Optional[str]:
+        """ Returns the digest of a previously added file if the file has
+        not changed since, without reading its contents. """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        known = self._digests.get(os.path.abspath(path))
+        if known and known[:3] == (stat.st_size, stat.st_mtime_ns,
+                                   stat.st_ino):
+            return known[3]
+        return None
+
+    def add_file(self, path: str) -> str:
+        """
+        Adds the file to the store, unless it is already there.
+        :return: content digest
+        """
+        digest = self.cached_digest(path)
+        if digest is None:
+            stat = os.stat(path)
+            digest = file_digest(path)
+            self._digests[os.path.abspath(path)] = (
+                stat.st_size, stat.st_mtime_ns, stat.st_ino, digest)
+
+        with self._lock:
+            if digest in self._entries and self._is_intact(digest):
+                self._touch(digest)
+                return digest
+
+        store_path = self.get_path(digest)
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(store_path, uuid.uuid4().hex)
+        link_or_copy(path, tmp_path)
+        _make_read_only(tmp_path)
+        os.replace(tmp_path, store_path)
+        stat = os.stat(store_path)
+
+        with self._lock:
+            previous = self._entries.pop(digest, None)
+            if previous:
+                self._size -= previous.size
+            self._entries[digest] = StoreEntry(stat.st_size, stat.st_mtime_ns,
+                                               time.time())
+            self._size += stat.st_size
+        return digest
+
+    def add_files(self, root_dir: str,
+                  paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Adds files to the store.
+        :return: {path relative to root_dir: digest}
+        """
+        return {os.path.relpath(path, root_dir): self.add_file(path)
+                for path in paths}
+
+    def materialize(self, digest: str, dst_path: str,
+                    res_id: Optional[str] = None) -> bool:
+        """
+        Makes the stored file available under dst_path.
+        :param res_id: resource id to reference the file for
+        :return: False if there is no such file in the store
+        """
+        with self._lock:
+            if digest not in self._entries:
+                return False
+            if not self._is_intact(digest):
+                logger.warning("Content store: %r has been modified",
+                               digest)
+                self._remove(digest)
+                self._save()
+                return False
+            self._touch(digest)
+
+        if res_id is not None:
+            self.acquire([digest], res_id)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        if os.path.lexists(dst_path):
+            _remove_read_only(dst_path)
+        link_or_copy(self.get_path(digest), dst_path)
+        return True
+
+    def materialize_manifest(self, key: str, dst_dir: str,
+                             res_id: Optional[str] = None) -> Optional[list]:
+        """
+        Materializes all files of a manifest in dst_dir.
+        :return: list of materialized paths or None if some file is missing
+        """
+        manifest = self._manifests.get(key)
+        if not manifest or not all(d in self for d in manifest.values()):
+            return None
+        paths = []
+        for relative, digest in manifest.items():
+            path = os.path.join(dst_dir, relative)
+            if not self.materialize(digest, path):
+                return None
+            paths.append(path)
+        if res_id is not None:
+            self.acquire(manifest.values(), res_id)
+        return paths
+
+    def set_manifest(self, key: str, manifest: Dict[str, str],
+                     res_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._manifests[key] = dict(manifest)
+            self._save()
+        if res_id is not None:
+            self.acquire(manifest.values(), res_id)
+
+    def get_manifest(self, key: str) -> Optional[Dict[str, str]]:
+        return self._manifests.get(key)
+
+    def acquire(self, digests: Iterable[str], res_id: str) -> None:
+        with self._lock:
+            for digest in digests:
+                self._refs.setdefault(digest, set()).add(res_id)
+            self._save()
+
+    def release(self, res_id: str) -> None:
+        """ Drops all references held for the resource id. The files stay in
+        the store until evicted. """
+        with self._lock:
+            for digest in list(self._refs):
+                self._refs[digest].discard(res_id)
+                if not self._refs[digest]:
+                    del self._refs[digest]
+            self._save()
+
+    def ref_count(self, digest: str) -> int:
+        return len(self._refs.get(digest, ()))
+
+    def evict(self, max_size: Optional[int] = None,
+              older_than_seconds: int = 0) -> int:
+        """
+        Removes unreferenced files, least recently used first: the ones not
+        used for older_than_seconds (if greater than 0) and as many others as
+        needed to fit within max_size (defaults to the store's budget).
+        :return: number of bytes freed
+        """
+        if max_size is None:
+            max_size = self.max_size
+        min_last_used = time.time() - older_than_seconds
+        freed = 0
+
+        with self._lock:
+            for digest, entry in list(self._entries.items()):
+                too_old = older_than_seconds > 0 \
+                    and entry.last_used < min_last_used
+                too_big = max_size is not None and self._size > max_size
+                if not (too_old or too_big):
+                    # entries are ordered by last use
+                    break
+                if self._refs.get(digest):
+                    continue
+                if self._remove(digest):
+                    freed += entry.size
+            if freed:
+                self._save()
+
+        if freed:
+            logger.info("Content store: evicted %r B, %r B left",
+                        freed, self._size)
+        return freed
+
+    def _touch(self, digest: str) -> None:
+        entry = self._entries[digest]
+        self._entries[digest] = entry._replace(last_used=time.time())
+        self._entries.move_to_end(digest)
+
+    def _is_intact(self, digest: str) -> bool:
+        entry = self._entries[digest]
+        try:
+            stat = os.stat(self.get_path(digest))
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == (entry.size,
+                                                    entry.mtime_ns)
+
+    def _remove(self, digest: str) -> bool:
+        try:
+            _remove_read_only(self.get_path(digest))
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                logger.warning("Content store: cannot remove %r: %r",
+                               digest, exc)
+                return False
+        entry = self._entries.pop(digest)
+        self._size -= entry.size
+        self._refs.pop(digest, None)
+        # manifests are only useful as long as all of their files are stored
+        for key, manifest in list(self._manifests.items()):
+            if digest in manifest.values():
+                del self._manifests[key]
+        return True
+
+    def _scan(self) -> None:
+        """ Rebuilds the index from the store directory, using modification
+        times to restore the least recently used order. """
+        found = []
+        for subdir in os.scandir(self.root_dir):
+            if not subdir.is_dir():
+                continue
+            for item in os.scandir(subdir.path):
+                if item.name.endswith('.tmp'):
+                    _remove_read_only(item.path)
+                    continue
+                stat = item.stat()
+                found.append((stat.st_mtime, item.name, stat.st_size,
+                              stat.st_mtime_ns))
+
+        for mtime, digest, size, mtime_ns in sorted(found):
+            self._entries[digest] = StoreEntry(size, mtime_ns, mtime)
+            self._size += size
+
+    def _load(self) -> None:
+        """ Restores the manifests and references of the stored files """
+        try:
+            with open(os.path.join(self.root_dir, MANIFESTS_FILE)) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("Content store: cannot load manifests: %r", exc)
+            return
+
+        self._manifests = {
+            key: manifest for key, manifest in saved['manifests'].items()
+            if all(digest in self._entries for digest in manifest.values())}
+        self._refs = {digest: set(res_ids)
+                      for digest, res_ids in saved['refs'].items()
+                      if digest in self._entries}
+
+    def _save(self) -> None:
+        """ Writes the manifests and references, under the lock """
+        path = os.path.join(self.root_dir, MANIFESTS_FILE)
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'manifests': self._manifests,
+                    'refs': {digest: sorted(res_ids)
+                             for digest, res_ids in self._refs.items()},
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning("Content store: cannot save manifests: %r", exc)
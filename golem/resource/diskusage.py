@@ -0,0 +1,280 @@
+import logging
+import os
+import time
+from collections import deque
+from threading import Lock
+from typing import (Callable, Deque, Dict, Generator, List, NamedTuple,
+                    Optional, Set)
+
+logger = logging.getLogger(__name__)
+
+# Directory entries visited (measured or removed) in a single step
+STEP_BUDGET = 1000
+
+EntryUsage = NamedTuple('EntryUsage', [('size', int), ('last_used', float)])
+# Yields once per visited directory entry, returns (size, newest mtime)
+Walk = Generator[None, None, EntryUsage]
+
+
+def _measure(path: str) -> Walk:
+    """ Sums up the sizes of all files under path, using the newest
+    modification time found as the time of last use. """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return EntryUsage(0, 0.)
+    if not os.path.isdir(path):
+        yield
+        return EntryUsage(stat.st_size, stat.st_mtime)
+
+    size, last_used = 0, stat.st_mtime
+    pending = [path]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as it:
+                items = list(it)
+        except OSError as exc:
+            logger.debug("Cannot scan %r: %r", path, exc)
+            continue
+        for item in items:
+            yield
+            try:
+                if item.is_dir(follow_symlinks=False):
+                    pending.append(item.path)
+                    continue
+                stat = item.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            size += stat.st_size
+            last_used = max(last_used, stat.st_mtime)
+    return EntryUsage(size, last_used)
+
+
+def _remove(path: str) -> Generator[None, None, None]:
+    """ Removes the file or directory tree under path, one entry at
+    a time. """
+    if not os.path.isdir(path) or os.path.islink(path):
+        yield
+        _ignore_missing(os.remove, path)
+        return
+
+    with os.scandir(path) as it:
+        items = list(it)
+    for item in items:
+        if item.is_dir(follow_symlinks=False):
+            yield from _remove(item.path)
+        else:
+            yield
+            _ignore_missing(os.remove, item.path)
+    _ignore_missing(os.rmdir, path)
+
+
+def _ignore_missing(func: Callable[[str], None], path: str) -> None:
+    try:
+        func(path)
+    except FileNotFoundError:
+        pass
+
+
+class DiskUsage:
+    """
+    Index of the disk space used by the entries (task directories) of a root
+    directory, with a cleaner removing them when they get too old or exceed
+    the disk budget, least recently used first.
+
+    No work is done on queries: entries are measured and removed in the
+    background, in bounded steps, so even very large directories do not stall
+    the caller.
+    """
+
+    def __init__(self, root_dir: str,
+                 max_size: Optional[int] = None,
+                 is_protected: Optional[Callable[[str], bool]] = None,
+                 on_removed: Optional[Callable[[str], None]] = None) -> None:
+        """
+        :param root_dir: directory to index
+        :param max_size: disk budget in bytes, unlimited if None
+        :param is_protected: tells whether an entry (e.g. of an active task)
+        must not be removed
+        :param on_removed: called with the name of each removed entry
+        """
+        self.root_dir = root_dir
+        self.max_size = max_size
+        self._is_protected = is_protected or (lambda _: False)
+        self._on_removed = on_removed
+
+        self._lock = Lock()
+        self._entries: Dict[str, EntryUsage] = dict()
+        self._size = 0
+
+        self._to_measure: Deque[str] = deque()
+        self._to_remove: Deque[str] = deque()
+        self._measuring: Optional[str] = None
+        self._measure_walk: Optional[Walk] = None
+        self._removing: Optional[str] = None
+        self._remove_walk: Optional[Generator] = None
+
+        self.rescan()
+
+    @property
+    def size(self) -> int:
+        """ Total size of the indexed entries, in bytes """
+        return self._size
+
+    def get_size(self, name: str) -> int:
+        entry = self._entries.get(name)
+        return entry.size if entry else 0
+
+    @property
+    def pending(self) -> bool:
+        """ Whether there are entries left to measure or remove """
+        return bool(self._measuring or self._to_measure or
+                    self._removing or self._to_remove)
+
+    def lru(self) -> List[str]:
+        """ Names of indexed entries, least recently used first """
+        with self._lock:
+            entries = list(self._entries.items())
+        return [name for name, _ in
+                sorted(entries, key=lambda item: item[1].last_used)]
+
+    def update(self, name: str) -> None:
+        """ Marks an entry as changed, to be measured again """
+        with self._lock:
+            if name not in self._to_measure:
+                self._to_measure.append(name)
+
+    def rescan(self) -> None:
+        """ Lists the root directory, scheduling all entries to be measured
+        and dropping the ones which do not exist anymore """
+        try:
+            with os.scandir(self.root_dir) as it:
+                names: Set[str] = {item.name for item in it}
+        except OSError:
+            names = set()
+
+        with self._lock:
+            for name in set(self._entries) - names:
+                self._size -= self._entries.pop(name).size
+            for name in names:
+                if name not in self._to_measure:
+                    self._to_measure.append(name)
+
+    def remove_older_than(self, older_than_seconds: int = 0) -> None:
+        """ Schedules removal of entries unused for older_than_seconds, or of
+        all entries if 0. Entries which have not been measured yet are
+        checked on a later call. """
+        min_last_used = time.time() - older_than_seconds
+        with self._lock:
+            names = [name for name, entry in self._entries.items()
+                     if older_than_seconds <= 0
+                     or entry.last_used < min_last_used]
+        for name in names:
+            self._schedule_removal(name)
+
+    def step(self, budget: int = STEP_BUDGET) -> None:
+        """ Measures and removes entries, visiting at most budget directory
+        entries """
+        while budget > 0 and self._next_removal():
+            budget -= self._advance_removal(budget)
+        while budget > 0 and self._next_measurement():
+            budget -= self._advance_measurement(budget)
+        self._enforce_budget()
+
+    def _schedule_removal(self, name: str) -> None:
+        if self._is_protected(name):
+            return
+        with self._lock:
+            if name != self._removing and name not in self._to_remove:
+                self._to_remove.append(name)
+
+    def _enforce_budget(self) -> None:
+        if self.max_size is None:
+            return
+        with self._lock:
+            scheduled = set(self._to_remove)
+            if self._removing:
+                scheduled.add(self._removing)
+            excess = self._size - self.max_size - sum(
+                self.get_size(name) for name in scheduled)
+        for name in self.lru():
+            if excess <= 0:
+                break
+            if name in scheduled or self._is_protected(name):
+                continue
+            logger.debug("Disk usage: over budget, removing %r", name)
+            excess -= self.get_size(name)
+            self._schedule_removal(name)
+
+    def _next_removal(self) -> bool:
+        if self._remove_walk is not None:
+            return True
+        with self._lock:
+            if not self._to_remove:
+                return False
+            self._removing = self._to_remove.popleft()
+        self._remove_walk = _remove(os.path.join(self.root_dir,
+                                                 self._removing))
+        return True
+
+    def _advance_removal(self, budget: int) -> int:
+        visited = 0
+        try:
+            while visited < budget:
+                next(self._remove_walk)
+                visited += 1
+            return visited
+        except StopIteration:
+            pass
+        except OSError as exc:
+            name = self._removing
+            logger.warning("Disk usage: cannot remove %r: %r", name, exc)
+            with self._lock:
+                self._removing, self._remove_walk = None, None
+            # the entry stays, with the size of what is left of it
+            self.update(name)
+            return max(visited, 1)
+
+        name = self._removing
+        logger.debug("Disk usage: removed %r", name)
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry:
+                self._size -= entry.size
+            self._removing, self._remove_walk = None, None
+        if self._on_removed:
+            self._on_removed(name)
+        return max(visited, 1)
+
+    def _next_measurement(self) -> bool:
+        if self._measure_walk is not None:
+            return True
+        with self._lock:
+            if not self._to_measure:
+                return False
+            self._measuring = self._to_measure.popleft()
+        self._measure_walk = _measure(os.path.join(self.root_dir,
+                                                   self._measuring))
+        return True
+
+    def _advance_measurement(self, budget: int) -> int:
+        visited = 0
+        try:
+            while visited < budget:
+                next(self._measure_walk)
+                visited += 1
+            return visited
+        except StopIteration as stop:
+            usage = stop.value
+
+        name = self._measuring
+        path = os.path.join(self.root_dir, name)
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous:
+                self._size -= previous.size
+            if os.path.lexists(path):
+                self._entries[name] = usage
+                self._size += usage.size
+            self._measuring, self._measure_walk = None, None
+        return max(visited, 1)
@@ -4,11 +4,13 @@ import os
 import typing
 from collections import Iterable, Sized
 from functools import partial
-from twisted.internet.defer import Deferred
+from twisted.internet.defer import Deferred, succeed
 
+from golem.core import golem_async
 from golem.core.fileshelper import common_dir
 from golem.network.hyperdrive.client import HyperdriveAsyncClient
 from golem.resource.client import ClientHandler, DummyClient
+from golem.resource.contentstore import ContentStore
 from golem.resource.hyperdrive.resource import Resource, ResourceStorage, \
     ResourceError
 
@@ -79,6 +81,7 @@ class HyperdriveResourceManager(ClientHandler):
             self, dir_manager, daemon_address=None, config=None,  # noqa pylint: disable=unused-argument
             resource_dir_method=None,
             client_kwargs: typing.Optional[dict] = None,
+            content_store: typing.Optional[ContentStore] = None,
     ) -> None:
         super().__init__(config)
 
@@ -90,6 +93,13 @@ class HyperdriveResourceManager(ClientHandler):
         self.storage = ResourceStorage(dir_manager, resource_dir_method or
                                        dir_manager.get_task_resource_dir)
 
+        # Files shared between tasks
+        self.content_store = content_store
+        # resource hash to ids using it
+        self._hash_res_ids: typing.Dict[str, typing.Set[str]] = dict()
+        # names and digests of files (see _manifest_key) to resource hash
+        self._shared_hashes: typing.Dict[str, str] = dict()
+
     @staticmethod
     def build_client_options(peers=None, **kwargs):
         return HyperdriveAsyncClient.build_options(peers=peers, **kwargs)
@@ -116,12 +126,20 @@ class HyperdriveResourceManager(ClientHandler):
 
     def remove_resources(self, res_id):
         resources = self.storage.cache.remove(res_id)
+        if self.content_store is not None:
+            self.content_store.release(res_id)
         if not resources:
             raise ResourceError("Resource manager: no resources to remove with "
                                 "id '{}'".format(res_id))
 
         on_error = partial(log_error, "Error removing resources for id: %r")
         for resource in resources:
+            res_ids = self._hash_res_ids.get(resource.hash, set())
+            res_ids.discard(res_id)
+            if res_ids:
+                # Still shared by other resource ids
+                continue
+            self._hash_res_ids.pop(resource.hash, None)
             self.client.cancel_async(resource.hash) \
                 .addErrback(on_error)
 
@@ -194,12 +212,69 @@ class HyperdriveResourceManager(ClientHandler):
                                 "(resources id: '{}'):\n{}".format(
                                     res_id, missing))
 
+        shared_hash = None if resource_hash else self._shared_hash(files)
+        if shared_hash:
+            logger.info("Resource manager: reusing resource %r for id %r",
+                        shared_hash, res_id)
+            resource_files = list(files.values())
+            self._cache_files(shared_hash, resource_files, res_id)
+            if async_:
+                return succeed((shared_hash, resource_files))
+            return shared_hash, resource_files
+
         if async_:
             return self._add_files_async(resource_hash, files, res_id,
                                          client_options=client_options)
         return self._add_files_sync(resource_hash, files, res_id,
                                     client_options=client_options)
 
+    def _shared_hash(self, files: dict) -> typing.Optional[str]:
+        """
+        Finds a resource hash already shared for the same file contents
+        under the same names. Only the digests known to the content store
+        are used, so no file is read here.
+        :param files: Dictionary of {full_path: relative_path} of files
+        """
+        if self.content_store is None:
+            return None
+        manifest = dict()
+        for path, relative in files.items():
+            digest = self.content_store.cached_digest(path)
+            if digest is None:
+                return None
+            manifest[relative] = digest
+        resource_hash = self._shared_hashes.get(self._manifest_key(manifest))
+        if resource_hash and self._hash_res_ids.get(resource_hash):
+            return resource_hash
+        return None
+
+    @staticmethod
+    def _manifest_key(manifest: typing.Dict[str, str]) -> str:
+        return ';'.join('{}={}'.format(relative, digest)
+                        for relative, digest in sorted(manifest.items()))
+
+    def _store_files(self, resource_hash: str, files: dict,
+                     res_id: str) -> None:
+        """
+        Adds shared files to the content store and remembers them under the
+        resource hash and under their names and contents.
+        :param files: Dictionary of {full_path: relative_path} of files
+        """
+        store = self.content_store
+        manifest = {relative: store.add_file(path)
+                    for path, relative in files.items()}
+        store.set_manifest(resource_hash, manifest, res_id)
+        self._shared_hashes[self._manifest_key(manifest)] = resource_hash
+
+    def _store_files_async(self, resource_hash: str, files: dict,
+                           res_id: str) -> None:
+        if self.content_store is None:
+            return
+        request = golem_async.AsyncRequest(self._store_files,
+                                           resource_hash, files, res_id)
+        golem_async.async_run(request, error=partial(
+            log_error, "Error storing shared files: %r"))
+
     def _add_files_async(self, resource_hash: str, files: dict, res_id: str,
                          client_options=None):
         """
@@ -216,6 +291,7 @@ class HyperdriveResourceManager(ClientHandler):
 
         def success(hyperdrive_hash):
             self._cache_files(hyperdrive_hash, resource_files, res_id)
+            self._store_files_async(hyperdrive_hash, files, res_id)
             result.callback((hyperdrive_hash, resource_files))
 
         if resource_hash:
@@ -252,6 +328,8 @@ class HyperdriveResourceManager(ClientHandler):
                                 .format(exc))
 
         self._cache_files(resource_hash, resource_files, res_id)
+        if self.content_store is not None:
+            self._store_files(resource_hash, files, res_id)
         return resource_hash, resource_files
 
     def _cache_files(self, resource_hash: str, files: Iterable, res_id: str):
@@ -273,6 +351,8 @@ class HyperdriveResourceManager(ClientHandler):
         """
         if os.path.exists(resource.path):
             self.storage.cache.add_resource(resource)
+            self._hash_res_ids.setdefault(resource.hash, set()) \
+                .add(resource.res_id)
             logger.debug("Resource manager: Resource cached: %r", resource)
         else:
             if os.path.isabs(resource.path):
@@ -303,6 +383,17 @@ class HyperdriveResourceManager(ClientHandler):
             files = self._parse_pull_response(response, res_id)
             success(entry, files, res_id)
 
+        def download_success(response, **_):
+            if self.content_store is not None \
+                    and response and len(response[0]) >= 3:
+                res_dir = self.storage.get_dir(res_id)
+                self._store_files_async(
+                    resource.hash,
+                    {path: os.path.relpath(path, res_dir)
+                     for path in response[0][2]},
+                    res_id)
+            success_wrapper(response)
+
         def error_wrapper(exception, **_):
             logger.warning("Error downloading resource."
                            "path=%s, hash=%s, error=%s",
@@ -318,7 +409,12 @@ class HyperdriveResourceManager(ClientHandler):
         logger.debug("Pulling resource. local=%r, hash=%s",
                      local, resource.hash)
 
-        if local:
+        stored = self._materialize_stored(resource.hash, res_id)
+        if stored:
+            logger.debug("Resource found in content store. hash=%s",
+                         resource.hash)
+            success_wrapper([(resource.path, resource.hash, stored)])
+        elif local:
             try:
                 self.storage.copy(local.path, resource.path, res_id)
                 success_wrapper(entry)
@@ -326,12 +422,24 @@ class HyperdriveResourceManager(ClientHandler):
                 error_wrapper(exc)
         else:
             self._pull(resource, res_id,
-                       success=success_wrapper,
+                       success=download_success,
                        error=error_wrapper,
                        client=client,
                        client_options=client_options,
                        async_=async_)
 
+    def _materialize_stored(self, resource_hash: str,
+                            res_id: str) -> typing.Optional[list]:
+        if self.content_store is None:
+            return None
+        try:
+            return self.content_store.materialize_manifest(
+                resource_hash, self.storage.get_dir(res_id), res_id)
+        except OSError as exc:
+            logger.warning("Cannot materialize resource %r from the content "
+                           "store: %r", resource_hash, exc)
+            return None
+
     # pylint: disable=too-many-arguments
     def _pull(self, resource: Resource, res_id: str,
               success, error,
@@ -0,0 +1,88 @@
+"""
+Benchmark results of past hardware configurations, so that switching back to
+a configuration measured before does not require running the benchmarks
+again.
+
+A configuration is identified by a fingerprint of the CPU model, the number of
+cores, the memory limit, the benchmark mode (e.g. the single core or parallel
+default benchmark) and the digests of the environment's Docker images.
+"""
+from functools import lru_cache
+import hashlib
+import logging
+from typing import Iterable, List, Optional
+
+from cpuinfo import get_cpu_info
+
+from golem.clientconfigdescriptor import ClientConfigDescriptor
+from golem.docker.environment import DockerEnvironment
+from golem.environments.environment import Environment
+from golem.model import CachedPerformance, Performance
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def cpu_model() -> str:
+    try:
+        return str(get_cpu_info().get('brand', ''))
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Cannot read CPU model: %r", e)
+        return ''
+
+
+def image_digests(env: Optional[Environment]) -> Optional[List[str]]:
+    """ Digests of the available Docker images of env, sorted. None if env
+    needs Docker images but none of them is available. """
+    if not isinstance(env, DockerEnvironment):
+        return []
+    digests = {image.get_digest() for image in env.docker_images}
+    digests.discard(None)
+    return sorted(digests) or None
+
+
+def fingerprint(env_id: str, config_desc: ClientConfigDescriptor,
+                digests: Iterable[str], mode: str = '') -> str:
+    parts = [env_id, cpu_model(), config_desc.num_cores,
+             config_desc.max_memory_size, mode] + list(digests)
+    return hashlib.sha1(
+        '\n'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def env_fingerprint(env_id: str, env: Optional[Environment],
+                    config_desc: ClientConfigDescriptor,
+                    mode: str = '') -> Optional[str]:
+    """ Fingerprint of the hardware configuration for env, benchmarked in the
+    given mode. None if it cannot be determined. """
+    digests = image_digests(env)
+    if digests is None:
+        return None
+    return fingerprint(env_id, config_desc, digests, mode)
+
+
+def restore(env_fp: str) -> bool:
+    """ Restores the cached result as the current performance of the
+    environment. Returns False if nothing was cached. """
+    try:
+        cached = CachedPerformance.get(CachedPerformance.fingerprint == env_fp)
+    except CachedPerformance.DoesNotExist:
+        return False
+    logger.info('Using cached %s performance: %.2f', cached.environment_id,
+                cached.value)
+    Performance.update_or_create(cached.environment_id, cached.value,
+                                 cached.aggregate_value)
+    return True
+
+
+def store(env_fp: str, env_id: str) -> None:
+    """ Caches the current performance of the environment """
+    try:
+        perf = Performance.get(Performance.environment_id == env_id)
+    except Performance.DoesNotExist:
+        return
+    CachedPerformance.insert(
+        fingerprint=env_fp,
+        environment_id=env_id,
+        value=perf.value,
+        aggregate_value=perf.aggregate_value,
+    ).upsert().execute()
@@ -2,7 +2,7 @@ from copy import copy
 import logging
 import os
 from threading import Thread
-from typing import Union
+from typing import Optional, Union
 
 from apps.core.benchmark.benchmarkrunner import BenchmarkRunner
 from apps.core.task.coretaskstate import TaskDesc
@@ -11,17 +11,24 @@ from golem.environments.environment import Environment as DefaultEnvironment
 
 from golem.model import Performance
 from golem.resource.dirmanager import DirManager
+from golem.task import benchmarkcache
 from golem.task.taskstate import TaskStatus
 
 logger = logging.getLogger(__name__)
 
+# Modes of the default benchmark, cached separately as their scores differ
+DEFAULT_BENCHMARK_SINGLE = 'single'
+DEFAULT_BENCHMARK_PARALLEL = 'parallel-vectorized'
+
 
 class BenchmarkManager(object):
-    def __init__(self, node_name, task_server, root_path, benchmarks=None):
+    def __init__(self, node_name, task_server, root_path, benchmarks=None,
+                 parallel_default_benchmark=False):
         self.node_name = node_name
         self.task_server = task_server
         self.dir_manager = DirManager(root_path)
         self.benchmarks = benchmarks
+        self.parallel_default_benchmark = parallel_default_benchmark
 
     @staticmethod
     def get_saved_benchmarks_ids():
@@ -38,6 +45,8 @@ class BenchmarkManager(object):
 
     def run_benchmark(self, benchmark, task_builder, env_id, success=None,
                       error=None):
+        """ Runs the benchmark of env_id; the result is cached for the current
+        hardware configuration """
         logger.info('Running benchmark for %s', env_id)
 
         from golem_messages.datastructures.p2p import Node
@@ -45,6 +54,7 @@ class BenchmarkManager(object):
         def success_callback(performance):
             logger.info('%s performance is %.2f', env_id, performance)
             Performance.update_or_create(env_id, performance)
+            self._cache_performance(env_id)
             if success:
                 success(performance)
 
@@ -73,14 +83,27 @@ class BenchmarkManager(object):
         br.run()
 
     def run_all_benchmarks(self, success=None, error=None):
-        logger.info('Running all benchmarks with num_cores=%r',
-                    self.task_server.client.config_desc.num_cores)
+        num_cores = self.task_server.client.config_desc.num_cores
+        logger.info('Running all benchmarks with num_cores=%r', num_cores)
 
-        def run_non_default_benchmarks(_performance=None):
-            self.run_benchmarks(copy(self.benchmarks), success, error)
+        def run_non_default_benchmarks(performance=None):
+            benchmarks = {env_id: benchmark_data for env_id, benchmark_data
+                          in copy(self.benchmarks).items()
+                          if not self._restore_cached_performance(env_id)}
+            if benchmarks:
+                # one at a time, as the scores of benchmarks competing for
+                # the cores would be lower and get cached
+                self.run_benchmarks(benchmarks, success, error)
+            elif success:
+                success(performance)
 
-        if DefaultEnvironment.get_id() not in self.get_saved_benchmarks_ids():
-            # run once in lifetime, since it's for single CPU core
+        default_id = DefaultEnvironment.get_id()
+        if self._restore_cached_performance(default_id):
+            run_non_default_benchmarks()
+        elif self.parallel_default_benchmark or \
+                default_id not in self.get_saved_benchmarks_ids():
+            # the single core one is run once in lifetime; the aggregate
+            # score of the parallel one depends on num_cores
             self.run_default_benchmark(run_non_default_benchmarks, error)
         else:
             run_non_default_benchmarks()
@@ -111,10 +134,36 @@ class BenchmarkManager(object):
             else:
                 raise Exception("Unknown environment: {}".format(env_id))
 
-    @staticmethod
-    def run_default_benchmark(callback, errback):
+    def run_default_benchmark(self, callback, errback):
+        def on_success(performance):
+            self._cache_performance(DefaultEnvironment.get_id())
+            callback(performance)
+
         kwargs = {'func': DefaultEnvironment.run_default_benchmark,
-                  'callback': callback,
+                  'callback': on_success,
                   'errback': errback,
                   'save': True}
+        if self.parallel_default_benchmark:
+            kwargs['num_cores'] = self.task_server.client.config_desc.num_cores
         Thread(target=callback_wrapper, kwargs=kwargs).start()
+
+    def _fingerprint(self, env_id) -> Optional[str]:
+        mode = ''
+        if env_id == DefaultEnvironment.get_id():
+            env = None
+            mode = DEFAULT_BENCHMARK_PARALLEL \
+                if self.parallel_default_benchmark \
+                else DEFAULT_BENCHMARK_SINGLE
+        else:
+            env = self.task_server.get_environment_by_id(env_id)
+        return benchmarkcache.env_fingerprint(
+            env_id, env, self.task_server.client.config_desc, mode)
+
+    def _restore_cached_performance(self, env_id) -> bool:
+        env_fp = self._fingerprint(env_id)
+        return env_fp is not None and benchmarkcache.restore(env_fp)
+
+    def _cache_performance(self, env_id) -> None:
+        env_fp = self._fingerprint(env_id)
+        if env_fp is not None:
+            benchmarkcache.store(env_fp, env_id)
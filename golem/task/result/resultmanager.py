@@ -1,15 +1,28 @@
 import logging
+import time
 
 import abc
 import os
 
-from golem.core import golem_async
+from twisted.internet.defer import DeferredSemaphore
+
+from golem.core import golem_async, metrics
 from golem.core.fileencrypt import FileEncryptor
 from .resultpackage import (
     EncryptingTaskResultPackager, ExtractedPackage, ZipTaskResultPackager)
 
 logger = logging.getLogger(__name__)
 
+EXTRACTED_BYTES = metrics.REGISTRY.counter(
+    'golem_result_extracted_bytes_total',
+    'Size of the result packages decrypted and extracted')
+EXTRACTION_DURATION = metrics.REGISTRY.histogram(
+    'golem_result_extraction_seconds',
+    'Duration of decrypting and extracting a result package')
+EXTRACTIONS_WAITING = metrics.REGISTRY.gauge(
+    'golem_result_extractions_waiting',
+    'Downloaded result packages waiting for an extraction worker')
+
 
 class TaskResultPackageManager(object, metaclass=abc.ABCMeta):
 
@@ -31,9 +44,12 @@ class EncryptedResultPackageManager(TaskResultPackageManager):
     max_secret_len = 32
     package_class = EncryptingTaskResultPackager
     zip_package_class = ZipTaskResultPackager
+    # packages extracted at once, in the reactor's thread pool
+    extract_workers = 4
 
     def __init__(self, resource_manager):
         super(EncryptedResultPackageManager, self).__init__(resource_manager)
+        self._extract_workers = DeferredSemaphore(self.extract_workers)
 
     def gen_secret(self):
         return FileEncryptor.gen_secret(
@@ -59,13 +75,18 @@ class EncryptedResultPackageManager(TaskResultPackageManager):
             os.remove(file_path)
 
         def package_downloaded(*args, **kwargs):
+            EXTRACTIONS_WAITING.labels().inc()
+            self._extract_workers.run(extract_package)
+
+        def extract_package():
+            EXTRACTIONS_WAITING.labels().dec()
             request = golem_async.AsyncRequest(
                 self.extract,
                 file_path,
                 output_dir=output_dir,
                 key_or_secret=key_or_secret,
             )
-            golem_async.async_run(request, package_extracted, error)
+            return golem_async.async_run(request, package_extracted, error)
 
         def package_extracted(extracted_pkg, *args, **kwargs):
             success(extracted_pkg, content_hash, task_id, subtask_id)
@@ -121,7 +142,12 @@ class EncryptedResultPackageManager(TaskResultPackageManager):
             raise ValueError("Empty key / secret")
 
         packager = self.package_class(key_or_secret)
-        return packager.extract(path, output_dir=output_dir)
+        size = os.path.getsize(path)
+        started = time.monotonic()
+        extracted = packager.extract(path, output_dir=output_dir)
+        EXTRACTION_DURATION.labels().observe(time.monotonic() - started)
+        EXTRACTED_BYTES.labels().inc(size)
+        return extracted
 
     def extract_zip(self, path, output_dir=None) -> ExtractedPackage:
         packager = self.zip_package_class()
@@ -1,8 +1,10 @@
 import binascii
 import logging
+import struct
 import uuid
 import zipfile
-from typing import Dict
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import abc
 import os
@@ -167,11 +169,21 @@ class EncryptingPackager(Packager):
         tmp_file_path = self.package_name(input_path)
         backup_rename(tmp_file_path)
 
-        self.encryptor_class.decrypt(input_path, tmp_file_path,
-                                     secret=self._secret)
+        if not output_dir:
+            output_dir = os.path.dirname(tmp_file_path)
+        os.makedirs(output_dir, exist_ok=True)
+
+        # the files are extracted while the package is decrypted; the archive
+        # is still written, results are copied from it when a task restarts
+        chunks = self.encryptor_class.decrypt_chunks(input_path,
+                                                     secret=self._secret)
+        with open(tmp_file_path, 'wb') as archive:
+            files = StreamingZipExtractor(output_dir, archive).extract(chunks)
         os.remove(input_path)
 
-        return self._packager.extract(tmp_file_path, output_dir=output_dir)
+        if files is None:
+            return self._packager.extract(tmp_file_path, output_dir=output_dir)
+        return files, output_dir
 
     def generator(self, output_path):
         return self._packager.generator(output_path)
@@ -183,6 +195,128 @@ class EncryptingPackager(Packager):
         self._packager.write_disk_file(package_file, src_path, target_path)
 
 
+class StreamingZipExtractor:
+    """
+    Extracts the files of a zip archive from its chunks, as they are read
+    or decrypted, instead of from a complete file. Entries must be stored,
+    with their sizes in the local headers, the way ZipPackager writes them;
+    other archives are left to ZipFile. The chunks are also written to
+    `archive`, if given.
+    """
+
+    # encrypted entries, sizes in data descriptors
+    UNSUPPORTED_FLAGS = 0x01 | 0x08
+    UTF8_FLAG = 0x800
+    ZIP64_SIZE = 0xFFFFFFFF
+
+    def __init__(self, output_dir: str, archive=None) -> None:
+        self.output_dir = output_dir
+        self.archive = archive
+        self._chunks: Iterator[bytes] = iter(())
+        self._buffer = b''
+
+    def extract(self, chunks: Iterable[bytes]) -> Optional[List[str]]:
+        """ Returns the names of the extracted entries, or None if the
+        archive can't be extracted while it's read """
+        self._chunks = iter(chunks)
+        self._buffer = b''
+        names = []
+        while True:
+            header = self._read(zipfile.sizeFileHeader)
+            if header[:4] != zipfile.stringFileHeader:
+                # central directory or end of the archive
+                break
+            if len(header) < zipfile.sizeFileHeader:
+                raise zipfile.BadZipFile('Truncated archive')
+
+            (_, _, _, flags, compression, _, _, crc, compressed_size, size,
+             name_length, extra_length) = struct.unpack(
+                 zipfile.structFileHeader, header)
+            name = self._read_exact(name_length)
+            self._read_exact(extra_length)
+
+            if flags & self.UNSUPPORTED_FLAGS \
+                    or compression != zipfile.ZIP_STORED \
+                    or compressed_size != size or size == self.ZIP64_SIZE:
+                self._drain()
+                return None
+
+            name = name.decode('utf-8' if flags & self.UTF8_FLAG else 'cp437')
+            self._extract_entry(name, size, crc)
+            names.append(name)
+
+        self._drain()
+        return names
+
+    def _extract_entry(self, name: str, size: int, crc: int) -> None:
+        path = self._target_path(name)
+        if name.endswith('/'):
+            os.makedirs(path, exist_ok=True)
+            self._copy(None, size)
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            checksum = self._copy(f, size)
+        if checksum != crc:
+            raise zipfile.BadZipFile('Bad CRC-32 for file {!r}'.format(name))
+
+    def _target_path(self, name: str) -> str:
+        """ Keeps the entry inside output_dir, like ZipFile.extract """
+        name = name.replace('/', os.path.sep)
+        if os.path.altsep:
+            name = name.replace(os.path.altsep, os.path.sep)
+        name = os.path.splitdrive(name)[1]
+        invalid_parts = ('', os.path.curdir, os.path.pardir)
+        name = os.path.sep.join(part for part in name.split(os.path.sep)
+                                if part not in invalid_parts)
+        return os.path.join(self.output_dir, name)
+
+    def _copy(self, dst, size: int) -> int:
+        checksum = 0
+        while size:
+            if not self._buffer:
+                self._buffer = self._next_chunk()
+                if not self._buffer:
+                    raise zipfile.BadZipFile('Truncated archive')
+            data = self._buffer[:size]
+            self._buffer = self._buffer[size:]
+            if dst is not None:
+                dst.write(data)
+            checksum = zlib.crc32(data, checksum)
+            size -= len(data)
+        return checksum
+
+    def _read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            self._buffer += chunk
+        data = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return data
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self._read(size)
+        if len(data) < size:
+            raise zipfile.BadZipFile('Truncated archive')
+        return data
+
+    def _next_chunk(self) -> bytes:
+        for chunk in self._chunks:
+            if chunk:
+                if self.archive:
+                    self.archive.write(chunk)
+                return chunk
+        return b''
+
+    def _drain(self) -> None:
+        while self._next_chunk():
+            pass
+        self._buffer = b''
+
+
 class TaskResultPackager:
     def extract(self, input_path, output_dir=None):
         files, files_dir = super().extract(input_path, output_dir=output_dir)  # noqa pylint:disable=no-member
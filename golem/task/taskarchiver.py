@@ -1,4 +1,7 @@
 import datetime
+import heapq
+import itertools
+import json
 import threading
 import logging
 import pickle
@@ -8,15 +11,31 @@ from golem.core.common import get_timestamp_utc
 from golem.environments.environment import UnsupportReason
 from golem.core import golem_async
 from golem.appconfig import TASKARCHIVE_FILENAME, TASKARCHIVE_NUM_INTERVALS, \
-    TASKARCHIVE_MAX_TASKS
+    TASKARCHIVE_MAX_TASKS, TASKARCHIVE_JOURNAL_FILENAME
 import pytz
 
 log = logging.getLogger('golem.task.taskarchiver')
 
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=pytz.utc)
+# The journal is rewritten when it holds more records than this many
+# times the number of records needed to describe its state
+JOURNAL_COMPACT_RATIO = 4
+JOURNAL_COMPACT_MIN_RECORDS = 10000
+
+
+def day_number(date):
+    """Number of the (UTC) day of a given date since epoch"""
+    return (date - EPOCH).days
+
 
 class TaskArchiver(object):
     """Utility that archives information on unsupported task reasons and
     other related task statistics. See get_unsupport_reasons() function.
+
+    Statistics of all tasks are aggregated per day as soon as tasks are
+    added, so reports and maintenance don't depend on the number of tasks.
+    Changes are appended to a journal file, which is compacted to one
+    record per day and per non-expired task when it grows too large.
     :param datadir: Directory to save the archive to
     :param max_tasks: Maximum number of non-expired tasks stored in task
                       archive at any moment
@@ -27,22 +46,24 @@ class TaskArchiver(object):
         self._input_statuses = []
         self._archive_lock = threading.Lock()
         self._file_lock = threading.Lock()
-        self._archive = Archive()
-        self._dump_file = None
+        self._stats = DailyStats()
+        # non-expired tasks by uuid and a heap of their deadlines
+        self._tasks = {}
+        self._deadlines = []
+        self._order = itertools.count()
+        self._journal = []
+        self._journal_file = None
+        self._journal_records = 0
+        self._compact = False
         self._max_tasks = max_tasks
         log.debug('Starting taskarchiver in dir: %r', datadir)
         if datadir:
-            try:
-                self._dump_file = os.path.join(datadir, TASKARCHIVE_FILENAME)
-                with open(self._dump_file, 'rb') as f:
-                    archive = pickle.load(f)
-                if archive.class_version == Archive.CLASS_VERSION:
-                    self._archive = archive
-                else:
-                    log.info("Task archive not loaded: unsupported version: "
-                             "%s", archive.class_version)
-            except (EOFError, IOError, pickle.UnpicklingError) as e:
-                log.info("Task archive not loaded: %s", str(e))
+            self._journal_file = os.path.join(datadir,
+                                              TASKARCHIVE_JOURNAL_FILENAME)
+            if os.path.exists(self._journal_file):
+                self._load_journal()
+            else:
+                self._load_archive(os.path.join(datadir, TASKARCHIVE_FILENAME))
 
     def add_task(self, task_header):
         """Schedule a task to be archived.
@@ -61,60 +82,141 @@ class TaskArchiver(object):
         """Updates information on unsupported task reasons and
         other related task statistics by consuming tasks and support statuses
         scheduled for processing by add_task() and add_support_status()
-        functions. Optimizes internal structures and, if needed, writes the
-        entire structure to a file.
+        functions. Forgets expired tasks and, if needed, appends the changes
+        to the journal file.
         """
         input_tasks, self._input_tasks = self._input_tasks, []
         input_statuses, self._input_statuses = self._input_statuses, []
         with self._archive_lock:
-            ntasks_to_take = self._max_tasks - len(self._archive.tasks)
+            ntasks_to_take = self._max_tasks - len(self._tasks)
             if ntasks_to_take < len(input_tasks):
                 log.warning("Maximum number of current tasks exceeded.")
-            input_tasks = input_tasks[:ntasks_to_take]
+            input_tasks = input_tasks[:max(ntasks_to_take, 0)]
             for tsk in input_tasks:
-                self._archive.tasks[tsk.uuid] = tsk
+                self._add_task(tsk)
+                self._journal.append(tsk.to_record())
             for (uuid, status) in input_statuses:
-                if uuid in self._archive.tasks:
-                    if UnsupportReason.REQUESTOR_TRUST in status.desc:
-                        self._archive.tasks[uuid].requesting_trust = \
-                            status.desc[UnsupportReason.REQUESTOR_TRUST]
-                    self._archive.tasks[uuid].unsupport_reasons = \
-                        list(status.desc.keys())
-            cur_time = get_timestamp_utc()
-            for tsk in list(self._archive.tasks.values()):
-                if cur_time > tsk.deadline:
-                    self._merge_to_interval(tsk)
-                    del self._archive.tasks[tsk.uuid]
-            self._purge_old_intervals()
-            if self._dump_file:
-                request = golem_async.AsyncRequest(self._dump_archive)
-                golem_async.async_run(
-                    request,
-                    None,
-                    lambda e: log.info("Dumping archive failed: %s", e),
-                )
-
-    def _dump_archive(self):
-        with self._archive_lock:
-            data = pickle.dumps(self._archive)
+                if uuid in self._tasks:
+                    requesting_trust = \
+                        status.desc.get(UnsupportReason.REQUESTOR_TRUST)
+                    reasons = list(status.desc.keys())
+                    self._set_status(uuid, reasons, requesting_trust)
+                    self._journal.append(['s', uuid,
+                                          [r.value for r in reasons],
+                                          requesting_trust])
+            self._expire_tasks(get_timestamp_utc())
+            write = self._journal_file and (self._journal or self._compact)
+        if write:
+            request = golem_async.AsyncRequest(self._write_journal)
+            golem_async.async_run(
+                request,
+                None,
+                lambda e: log.info("Writing task archive failed: %s", e),
+            )
+
+    def _add_task(self, tsk):
+        previous = self._tasks.get(tsk.uuid)
+        if previous is not None:
+            self._stats.merge_task(previous, -1)
+        self._tasks[tsk.uuid] = tsk
+        self._stats.merge_task(tsk)
+        heapq.heappush(self._deadlines, (tsk.deadline, next(self._order), tsk))
+
+    def _set_status(self, uuid, reasons, requesting_trust):
+        tsk = self._tasks[uuid]
+        self._stats.merge_task(tsk, -1)
+        if requesting_trust is not None:
+            tsk.requesting_trust = requesting_trust
+        tsk.unsupport_reasons = reasons
+        self._stats.merge_task(tsk)
+
+    def _expire_tasks(self, cur_time):
+        # expired tasks stay in the statistics, only their support status
+        # can't change anymore
+        while self._deadlines and cur_time > self._deadlines[0][0]:
+            _, _, tsk = heapq.heappop(self._deadlines)
+            if self._tasks.get(tsk.uuid) is tsk:
+                del self._tasks[tsk.uuid]
+
+    def _write_journal(self):
         with self._file_lock:
-            with open(self._dump_file, 'wb') as f:
-                f.write(data)
-
-    def _merge_to_interval(self, tsk):
-        day = tsk.interval_start_date
-        if day not in self._archive.intervals:
-            self._archive.intervals[day] = TimeInterval(day)
-        interval = self._archive.intervals[day]
-        interval.merge_task(tsk)
-
-    def _purge_old_intervals(self):
-        today = datetime.datetime.now(pytz.utc) \
-            .replace(hour=0, minute=0, second=0, microsecond=0)
-        old = today - datetime.timedelta(days=TASKARCHIVE_NUM_INTERVALS)
-        for interval in list(self._archive.intervals.values()):
-            if interval.start_date <= old:
-                del self._archive.intervals[interval.start_date]
+            with self._archive_lock:
+                records, self._journal = self._journal, []
+                self._journal_records += len(records)
+                state_records = len(self._tasks) + self._stats.num_days
+                compact = self._compact or self._journal_records > max(
+                    JOURNAL_COMPACT_MIN_RECORDS,
+                    JOURNAL_COMPACT_RATIO * state_records)
+                if compact:
+                    records = self._snapshot()
+                    self._journal_records = len(records)
+                    self._compact = False
+            data = ''.join(json.dumps(r) + '\n' for r in records)
+            if compact:
+                tmp_file = self._journal_file + '.tmp'
+                with open(tmp_file, 'w') as f:
+                    f.write(data)
+                os.replace(tmp_file, self._journal_file)
+            else:
+                with open(self._journal_file, 'a') as f:
+                    f.write(data)
+
+    def _snapshot(self):
+        """Records describing the current state: statistics of expired tasks
+        per day followed by the non-expired tasks"""
+        stats = self._stats.copy()
+        for tsk in self._tasks.values():
+            stats.merge_task(tsk, -1)
+        return stats.to_records() + \
+            [tsk.to_record() for tsk in self._tasks.values()]
+
+    def _load_journal(self):
+        invalid = 0
+        try:
+            with open(self._journal_file) as f:
+                for line in f:
+                    self._journal_records += 1
+                    try:
+                        self._replay(json.loads(line))
+                    except (ValueError, TypeError, IndexError):
+                        # e.g. a record partially written before a crash
+                        invalid += 1
+        except IOError as e:
+            log.info("Task archive not loaded: %s", str(e))
+        if invalid:
+            log.info("Task archive: skipped %d invalid records", invalid)
+            # don't append to the invalid records
+            self._compact = True
+        self._expire_tasks(get_timestamp_utc())
+
+    def _replay(self, record):
+        kind = record[0]
+        if kind == 'd':
+            self._stats.merge_record(record)
+        elif kind == 't':
+            self._add_task(ArchTask.from_record(record))
+        elif kind == 's' and record[1] in self._tasks:
+            self._set_status(record[1],
+                             [UnsupportReason(r) for r in record[2]],
+                             record[3])
+
+    def _load_archive(self, path):
+        """Converts a task archive pickled by previous versions"""
+        try:
+            with open(path, 'rb') as f:
+                archive = pickle.load(f)
+        except (EOFError, IOError, pickle.UnpicklingError) as e:
+            log.info("Task archive not loaded: %s", str(e))
+            return
+        if archive.class_version != Archive.CLASS_VERSION:
+            log.info("Task archive not loaded: unsupported version: "
+                     "%s", archive.class_version)
+            return
+        for interval in archive.intervals.values():
+            self._stats.merge_interval(interval)
+        for tsk in archive.tasks.values():
+            self._add_task(tsk)
+        self._journal = self._snapshot()
 
     def get_unsupport_reasons(self, last_n_days, today=None):
         """
@@ -141,14 +243,8 @@ class TaskArchiver(object):
             today = datetime.datetime.now(pytz.utc)
         today = today.replace(hour=0, minute=0, second=0, microsecond=0)
         start_date = today - datetime.timedelta(days=last_n_days-1)
-        result = TimeInterval(start_date)
-        result.cnt_unsupport_reasons = Counter({r: 0 for r in UnsupportReason})
-        for interval in self._archive.intervals.values():
-            if interval.start_date >= start_date:
-                result.merge_interval(interval)
-        for tsk in self._archive.tasks.values():
-            if tsk.interval_start_date >= start_date:
-                result.merge_task(tsk)
+        with self._archive_lock:
+            result = self._stats.get_interval(start_date)
         ret = []
         for (reason, count) in result.cnt_unsupport_reasons.most_common():
             if reason == UnsupportReason.MAX_PRICE and result.num_tasks:
@@ -165,7 +261,125 @@ class TaskArchiver(object):
         return ret
 
 
+class DailyStats(object):
+    """Aggregate information on tasks per day, stored column-wise in ring
+    buffers of the last `num_days` days."""
+
+    def __init__(self, num_days=TASKARCHIVE_NUM_INTERVALS):
+        self.num_days = num_days
+        self.day = [None] * num_days
+        self.sum_max_price = [0] * num_days
+        self.cnt_min_version = [Counter() for _ in range(num_days)]
+        self.num_tasks = [0] * num_days
+        self.sum_requesting_trust = [0.0] * num_days
+        self.num_requesting_trust = [0] * num_days
+        self.cnt_unsupport_reasons = {
+            reason: [0] * num_days for reason in UnsupportReason}
+
+    def copy(self):
+        stats = DailyStats(self.num_days)
+        stats.day = list(self.day)
+        stats.sum_max_price = list(self.sum_max_price)
+        stats.cnt_min_version = [Counter(c) for c in self.cnt_min_version]
+        stats.num_tasks = list(self.num_tasks)
+        stats.sum_requesting_trust = list(self.sum_requesting_trust)
+        stats.num_requesting_trust = list(self.num_requesting_trust)
+        stats.cnt_unsupport_reasons = {
+            reason: list(counts)
+            for reason, counts in self.cnt_unsupport_reasons.items()}
+        return stats
+
+    def _slot(self, day):
+        """Index of the given day in the buffers, None if the day is older
+        than the ones stored"""
+        slot = day % self.num_days
+        stored = self.day[slot]
+        if stored is None or stored < day:
+            self.day[slot] = day
+            self.sum_max_price[slot] = 0
+            self.cnt_min_version[slot] = Counter()
+            self.num_tasks[slot] = 0
+            self.sum_requesting_trust[slot] = 0.0
+            self.num_requesting_trust[slot] = 0
+            for counts in self.cnt_unsupport_reasons.values():
+                counts[slot] = 0
+        elif stored > day:
+            return None
+        return slot
+
+    def merge_task(self, tsk, sign=1):
+        """Adds (or, with sign=-1, subtracts) a task to its day"""
+        slot = self._slot(day_number(tsk.interval_start_date))
+        if slot is None:
+            return
+        self.sum_max_price[slot] += sign * tsk.max_price
+        versions = self.cnt_min_version[slot]
+        versions[tsk.min_version] += sign
+        if not versions[tsk.min_version]:
+            del versions[tsk.min_version]
+        self.num_tasks[slot] += sign
+        for reason in tsk.unsupport_reasons or ():
+            self.cnt_unsupport_reasons[reason][slot] += sign
+        if tsk.requesting_trust:
+            self.sum_requesting_trust[slot] += sign * tsk.requesting_trust
+            self.num_requesting_trust[slot] += sign
+
+    def merge_interval(self, interval):
+        slot = self._slot(day_number(interval.start_date))
+        if slot is None:
+            return
+        self.sum_max_price[slot] += interval.sum_max_price
+        self.cnt_min_version[slot].update(interval.cnt_min_version)
+        self.num_tasks[slot] += interval.num_tasks
+        self.sum_requesting_trust[slot] += interval.sum_requesting_trust
+        self.num_requesting_trust[slot] += interval.num_requesting_trust
+        for reason, count in interval.cnt_unsupport_reasons.items():
+            self.cnt_unsupport_reasons[reason][slot] += count
+
+    def get_interval(self, start_date):
+        """Aggregates the days since start_date into a TimeInterval"""
+        start = day_number(start_date)
+        result = TimeInterval(start_date)
+        result.cnt_unsupport_reasons = Counter({r: 0 for r in UnsupportReason})
+        for slot, day in enumerate(self.day):
+            if day is None or day < start:
+                continue
+            result.sum_max_price += self.sum_max_price[slot]
+            result.cnt_min_version.update(self.cnt_min_version[slot])
+            result.num_tasks += self.num_tasks[slot]
+            result.sum_requesting_trust += self.sum_requesting_trust[slot]
+            result.num_requesting_trust += self.num_requesting_trust[slot]
+            for reason, counts in self.cnt_unsupport_reasons.items():
+                result.cnt_unsupport_reasons[reason] += counts[slot]
+        return result
+
+    def to_records(self):
+        return [
+            ['d', day, self.sum_max_price[slot],
+             dict(self.cnt_min_version[slot]), self.num_tasks[slot],
+             self.sum_requesting_trust[slot], self.num_requesting_trust[slot],
+             {reason.value: counts[slot] for reason, counts
+              in self.cnt_unsupport_reasons.items() if counts[slot]}]
+            for slot, day in enumerate(self.day) if day is not None
+        ]
+
+    def merge_record(self, record):
+        _, day, sum_max_price, cnt_min_version, num_tasks, \
+            sum_requesting_trust, num_requesting_trust, reasons = record
+        interval = TimeInterval(EPOCH + datetime.timedelta(days=day))
+        interval.sum_max_price = sum_max_price
+        interval.cnt_min_version = Counter(cnt_min_version)
+        interval.num_tasks = num_tasks
+        interval.sum_requesting_trust = sum_requesting_trust
+        interval.num_requesting_trust = num_requesting_trust
+        interval.cnt_unsupport_reasons = Counter(
+            {UnsupportReason(r): count for r, count in reasons.items()})
+        self.merge_interval(interval)
+
+
 class Archive(object):
+    """Task archive pickled by previous versions, see
+    TaskArchiver._load_archive()"""
     CLASS_VERSION = 1
 
     def __init__(self):
@@ -175,7 +389,7 @@ class Archive(object):
 
 
 class ArchTask(object):
-    """All known tasks that have not been aggregated yet."""
+    """Task whose support status may still change."""
     def __init__(self, task_header):
         self.uuid = task_header.task_id
         self.interval_start_date = datetime.datetime.now(pytz.utc)\
@@ -186,6 +400,21 @@ class ArchTask(object):
         self.requesting_trust = None
         self.unsupport_reasons = None
 
+    def to_record(self):
+        return ['t', self.uuid, day_number(self.interval_start_date),
+                self.deadline, self.min_version, self.max_price,
+                self.requesting_trust,
+                [r.value for r in self.unsupport_reasons or ()]]
+
+    @classmethod
+    def from_record(cls, record):
+        tsk = cls.__new__(cls)
+        _, tsk.uuid, day, tsk.deadline, tsk.min_version, tsk.max_price, \
+            tsk.requesting_trust, reasons = record
+        tsk.interval_start_date = EPOCH + datetime.timedelta(days=day)
+        tsk.unsupport_reasons = [UnsupportReason(r) for r in reasons]
+        return tsk
+
 
 class TimeInterval(object):
     """Aggregate information on tasks belonging to a time interval."""
@@ -198,15 +427,6 @@ class TimeInterval(object):
         self.num_requesting_trust = 0
         self.cnt_unsupport_reasons = Counter()
 
-    def merge_task(self, tsk):
-        self.sum_max_price += tsk.max_price
-        self.cnt_min_version[tsk.min_version] += 1
-        self.num_tasks += 1
-        self.cnt_unsupport_reasons.update(tsk.unsupport_reasons)
-        if tsk.requesting_trust:
-            self.sum_requesting_trust += tsk.requesting_trust
-            self.num_requesting_trust += 1
-
     def merge_interval(self, interval):
         self.sum_max_price += interval.sum_max_price
         self.cnt_min_version.update(interval.cnt_min_version)
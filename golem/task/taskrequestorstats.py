@@ -1,6 +1,6 @@
 import logging
 import time
-from collections import defaultdict
+from collections import Counter, defaultdict
 from threading import Lock
 from typing import NamedTuple, Optional
 
@@ -17,10 +17,41 @@ logger = logging.getLogger(__name__)
 TaskMsg = NamedTuple("TaskMsg", [("ts", float), ("op", Operation)])
 
 
+# Subtask operations counted by TaskInfo
+COUNTED_SUBTASK_OPS = (SubtaskOp.NOT_ACCEPTED, SubtaskOp.TIMEOUT,
+                       SubtaskOp.FAILED)
+# Subtask operations ending its computation
+SUBTASK_END_OPS = (SubtaskOp.TIMEOUT, SubtaskOp.FINISHED, SubtaskOp.FAILED,
+                   SubtaskOp.NOT_ACCEPTED)
+
+
 class SubtaskInfo:
     def __init__(self):
         self.latest_status = SubtaskStatus.starting
         self.messages = []
+        # Was ASSIGNED not followed by any of SUBTASK_END_OPS
+        self.assigned = False
+        # Was RESULT_DOWNLOADING not followed by FINISHED nor NOT_ACCEPTED
+        self.downloading = False
+
+    def is_verified(self) -> bool:
+        return self.latest_status == SubtaskStatus.finished
+
+    def is_in_progress(self) -> bool:
+        return self.assigned and self.latest_status not in [
+            SubtaskStatus.finished, SubtaskStatus.failure]
+
+    def got_message(self, msg: 'TaskMsg', latest_status: SubtaskStatus):
+        self.latest_status = latest_status
+        self.messages.append(msg)
+        if msg.op == SubtaskOp.ASSIGNED:
+            self.assigned = True
+        elif msg.op in SUBTASK_END_OPS:
+            self.assigned = False
+        if msg.op == SubtaskOp.RESULT_DOWNLOADING:
+            self.downloading = True
+        elif msg.op in [SubtaskOp.FINISHED, SubtaskOp.NOT_ACCEPTED]:
+            self.downloading = False
 
 
 class TaskInfo:
@@ -30,6 +61,9 @@ class TaskInfo:
     processes those information to get statistical information. It is probably
     only useful for :py:class:`RequestorTaskStats` objects which fill instances
     of this class with information.
+
+    Counts are kept up to date on every message, so that none of the
+    statistics requires going through the subtasks.
     """
 
     def __init__(self):
@@ -39,6 +73,14 @@ class TaskInfo:
         self.subtasks = defaultdict(
             SubtaskInfo)  # type: DefaultDict[str, SubtaskInfo]
 
+        self._start_time = 0.0
+        self._finish_time = 0.0
+        self._task_failures = False
+        self._subtask_op_counts = Counter()  # type: Counter
+        self._verified_count = 0
+        self._in_progress_count = 0
+        self._downloading_count = 0
+
     def got_want_to_compute(self):
         """Makes note of a received work offer"""
         self._want_to_compute_count += 1
@@ -48,16 +90,31 @@ class TaskInfo:
         """Stores information from task level message"""
         self.messages.append(msg)
         self.latest_status = latest_status
+        if msg.op in [TaskOp.CREATED, TaskOp.RESTORED]:
+            self._start_time = msg.ts
+        elif msg.op.is_completed():
+            self._finish_time = msg.ts
+        if msg.op in [TaskOp.NOT_ACCEPTED, TaskOp.TIMEOUT]:
+            self._task_failures = True
 
     def got_subtask_message(self, subtask_id: str, msg: TaskMsg,
                             latest_status: SubtaskStatus):
         """Stores information from subtask level message"""
-        self.subtasks[subtask_id].latest_status = latest_status
-        self.subtasks[subtask_id].messages.append(msg)
+        st = self.subtasks[subtask_id]
+        self._count_subtask(st, -1)
+        st.got_message(msg, latest_status)
+        self._count_subtask(st, 1)
+        if msg.op in COUNTED_SUBTASK_OPS:
+            self._subtask_op_counts[msg.op] += 1
+
+    def _count_subtask(self, st: SubtaskInfo, sign: int):
+        self._verified_count += sign * st.is_verified()
+        self._in_progress_count += sign * st.is_in_progress()
+        self._downloading_count += sign * st.downloading
 
     def subtask_count(self) -> int:
         """Number of subtasks of this task"""
-        return len(self.subtasks.keys())
+        return len(self.subtasks)
 
     def collected_results_count(self) -> int:
         """Returns number of successfully received results
@@ -75,34 +132,19 @@ class TaskInfo:
         This is equal to the number of subtasks with the latest state
         ``SubtaskStatus.finished``.
         """
-        cnt = 0
-        for st in self.subtasks.values():
-            if st.latest_status == SubtaskStatus.finished:
-                cnt += 1
-        return cnt
-
-    def _subtasks_count_specific_ops(self, op: Operation):
-        cnt = 0
-        for st in self.subtasks.values():
-            for msg in st.messages:
-                if msg.op == op:
-                    cnt += 1
-        return cnt
+        return self._verified_count
 
     def not_accepted_results_count(self) -> int:
         """Number of times a subtask failed verification"""
-        return self._subtasks_count_specific_ops(
-            SubtaskOp.NOT_ACCEPTED)
+        return self._subtask_op_counts[SubtaskOp.NOT_ACCEPTED]
 
     def timeout_count(self) -> int:
         """Number of times a subtask has not beed finished in time"""
-        return self._subtasks_count_specific_ops(
-            SubtaskOp.TIMEOUT)
+        return self._subtask_op_counts[SubtaskOp.TIMEOUT]
 
     def failed_count(self) -> int:
         """Number of subtasks that failed on computing side"""
-        return self._subtasks_count_specific_ops(
-            SubtaskOp.FAILED)
+        return self._subtask_op_counts[SubtaskOp.FAILED]
 
     def not_downloaded_count(self) -> int:
         """Returns # of subtasks that were reported as computed but their
@@ -116,18 +158,7 @@ class TaskInfo:
         also include subtasks that are actively sending results at the moment
         of a call.
         """
-        cnt = 0
-        for st in self.subtasks.values():
-            download_in_progress = False
-            for msg in st.messages:
-                if msg.op == SubtaskOp.RESULT_DOWNLOADING:
-                    download_in_progress = True
-                elif msg.op in [SubtaskOp.FINISHED,
-                                SubtaskOp.NOT_ACCEPTED]:
-                    download_in_progress = False
-            if download_in_progress:
-                cnt += 1
-        return cnt
+        return self._downloading_count
 
     def total_time(self) -> float:
         """Returns total time in seconds spent on the task
@@ -139,18 +170,11 @@ class TaskInfo:
         latter. Note that the time spent paused is also included in
         the total time.
         """
-        start_time = 0.0
-        finish_time = 0.0
-
+        start_time = self._start_time
         if not self.is_completed():
             finish_time = time.time()
-
-        for msg in reversed(self.messages):
-            if (msg.op in [TaskOp.CREATED, TaskOp.RESTORED]
-                    and not start_time):
-                start_time = msg.ts
-            elif msg.op.is_completed() and not finish_time:
-                finish_time = msg.ts
+        else:
+            finish_time = self._finish_time
 
         assert finish_time >= start_time
         return finish_time - start_time
@@ -161,17 +185,7 @@ class TaskInfo:
         Both failure to calculate (SUBTASK_FAILED) and failure to verify
         (SUBTASK_NOT_ACCEPTED) are considered failures in this method.
         """
-        for msg in self.messages:
-            if msg.op in [TaskOp.NOT_ACCEPTED,
-                          TaskOp.TIMEOUT]:
-                return True
-        for st in self.subtasks.values():
-            for msg in st.messages:
-                if msg.op in [SubtaskOp.FAILED,
-                              SubtaskOp.NOT_ACCEPTED,
-                              SubtaskOp.TIMEOUT]:
-                    return True
-        return False
+        return self._task_failures or any(self._subtask_op_counts.values())
 
     def is_completed(self) -> bool:
         """Has the task already been completed
@@ -202,24 +216,7 @@ class TaskInfo:
         """
         if self.is_completed():
             return 0
-
-        cnt = 0
-        for st in self.subtasks.values():
-            if st.latest_status in [SubtaskStatus.finished,
-                                    SubtaskStatus.failure]:
-                continue
-            in_progress = False
-            for msg in st.messages:
-                if msg.op == SubtaskOp.ASSIGNED:
-                    in_progress = True
-                elif msg.op in [SubtaskOp.TIMEOUT,
-                                SubtaskOp.FINISHED,
-                                SubtaskOp.FAILED,
-                                SubtaskOp.NOT_ACCEPTED]:
-                    in_progress = False
-            if in_progress:
-                cnt += 1
-        return cnt
+        return self._in_progress_count
 
 
 TaskStats = NamedTuple("TaskStats", [("finished", bool),
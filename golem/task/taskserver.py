@@ -124,7 +124,9 @@ class TaskServer(
             node_name=config_desc.node_name,
             task_server=self,
             root_path=self.get_task_computer_root(),
-            benchmarks=benchmarks
+            benchmarks=benchmarks,
+            parallel_default_benchmark=bool(
+                config_desc.parallel_default_benchmark),
         )
         self.task_computer = TaskComputer(
             task_server=self,
@@ -136,6 +138,7 @@ class TaskServer(
         self.task_sessions_incoming: weakref.WeakSet = weakref.WeakSet()
 
         OfferPool.change_interval(self.config_desc.offer_pooling_interval)
+        self._configure_verification_queue()
 
         self.max_trust = 1.0
         self.min_trust = 0.0
@@ -224,6 +227,11 @@ class TaskServer(
         super().resume()
         CoreTask.VERIFICATION_QUEUE.resume()
 
+    def _configure_verification_queue(self):
+        CoreTask.VERIFICATION_QUEUE.configure(
+            num_cores=self.config_desc.num_cores,
+            max_memory_size=self.config_desc.max_memory_size)
+
     def get_environment_by_id(self, env_id):
         return self.task_keeper.environments_manager.get_environment_by_id(
             env_id)
@@ -434,6 +442,8 @@ class TaskServer(
         return self.task_keeper.get_all_tasks()
 
     def add_task_header(self, task_header: dt_tasks.TaskHeader) -> bool:
+        if self._is_known_header(task_header):
+            return True  # Nothing changed, no need to verify it again
         if not self.verify_header_sig(task_header):
             logger.info(
                 'Invalid signature task_header:%r, signature: %r',
@@ -457,6 +467,13 @@ class TaskServer(
             logger.exception("Task header validation failed")
             return False
 
+    def _is_known_header(self, header: dt_tasks.TaskHeader) -> bool:
+        known = self.task_keeper.task_headers.get(header.task_id)
+        return known is not None \
+            and known.signature == header.signature \
+            and known.task_owner.key == header.task_owner.key \
+            and header.deadline >= time.time()
+
     @classmethod
     def verify_header_sig(cls, header: dt_tasks.TaskHeader):
         try:
@@ -508,6 +525,7 @@ class TaskServer(
         PendingConnectionsServer.change_config(self, config_desc)
         self.config_desc = config_desc
         self.task_keeper.change_config(config_desc)
+        self._configure_verification_queue()
         return self.task_computer.change_config(
             config_desc, run_benchmarks=run_benchmarks)
 
@@ -3,8 +3,15 @@ import math
 import time
 from typing import ClassVar, Optional, Dict
 
+from golem.core import metrics
+
 logger = logging.getLogger(__name__)
 
+ACTION_DURATION = metrics.REGISTRY.histogram(
+    'golem_subtask_action_seconds',
+    'Duration of subtask lifecycle actions, see ActionTimers',
+    ['action'])
+
 
 class ActionTimer:
     """ Keeps track of computation timestamps per Golem session """
@@ -78,10 +85,13 @@ class ThirstTimer(ActionTimer):
 
 
 class ActionTimers:
-    """ Keeps track of started / finished timestamps of multiple actions """
+    """ Keeps track of started / finished timestamps of multiple actions.
+    If named, durations of finished actions are recorded in the
+    golem_subtask_action_seconds metric. """
 
-    def __init__(self):
+    def __init__(self, name: Optional[str] = None) -> None:
         self._history: Dict[str, ActionTimer] = dict()
+        self._duration = ACTION_DURATION.labels(name) if name else None
 
     def time(self, identifier: str) -> Optional[float]:
         """ Returns time spent on an action; None if action hasn't
@@ -110,6 +120,8 @@ class ActionTimers:
             logger.debug("ActionTimers.finish(%s) at %r",
                          identifier, time.time())
             timer.finish()
+            if self._duration and timer.time is not None:
+                self._duration.observe(timer.time)
 
     def remove(self, identifier: str) -> Optional[float]:
         """ Removes the identifier from history. Returns None if the identifier
@@ -122,5 +134,5 @@ class ActionTimers:
 
 
 ProviderTimer = ThirstTimer()  # noqa
-ProviderComputeTimers = ActionTimers()  # noqa
-ProviderTTCDelayTimers = ActionTimers()  # noqa
+ProviderComputeTimers = ActionTimers('provider_compute')  # noqa
+ProviderTTCDelayTimers = ActionTimers('provider_ttc_delay')  # noqa
@@ -0,0 +1,163 @@
+"""
+Import time report.
+
+Runs `python -X importtime -c "import <module>"` and summarizes the output:
+the slowest modules by cumulative and by self time, and the total time per
+top level package. Interpreters older than 3.7 don't support
+`-X importtime`; there the same output is produced by timing the loaders
+of the imported modules.
+
+Usage: python -m golem.tools.importtime golemcli [--top 20]
+"""
+import argparse
+import importlib.abc
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Iterable, List, NamedTuple
+
+ImportRecord = NamedTuple('ImportRecord', [
+    ('self_us', int),
+    ('cumulative_us', int),
+    ('depth', int),
+    ('name', str),
+])
+
+LINE_RE = re.compile(
+    r'^import time:\s+(?P<self>\d+)\s+\|\s+(?P<cumulative>\d+)\s+\|'
+    r'(?P<indent>\s+)(?P<name>\S+)\s*$')
+
+
+def parse(lines: Iterable[str]) -> List[ImportRecord]:
+    """ Parses `-X importtime` output, skipping any other lines """
+    records = []
+    for line in lines:
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        records.append(ImportRecord(
+            self_us=int(match.group('self')),
+            cumulative_us=int(match.group('cumulative')),
+            # one space after the separator, two more per nesting level
+            depth=(len(match.group('indent')) - 1) // 2,
+            name=match.group('name'),
+        ))
+    return records
+
+
+def measure(module: str, python: str = sys.executable) -> List[ImportRecord]:
+    """ Imports module in a new interpreter and returns its import times """
+    output = subprocess.run(
+        [python, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.PIPE, universal_newlines=True, check=False,
+    ).stderr
+    records = parse(output.splitlines())
+    if not records:
+        # run as a script, not to import the golem package before the module
+        output = subprocess.run(
+            [python, os.path.abspath(__file__), '--trace', module],
+            stderr=subprocess.PIPE, universal_newlines=True, check=False,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        ).stderr
+        records = parse(output.splitlines())
+    return records
+
+
+def report(records: List[ImportRecord], top: int = 20) -> str:
+    total = sum(record.self_us for record in records)
+    packages: Counter = Counter()
+    for record in records:
+        packages[record.name.split('.')[0]] += record.self_us
+
+    lines = ['{} modules imported in {:.1f} ms'.format(
+        len(records), total / 1000)]
+
+    def section(title, rows):
+        lines.extend(['', title])
+        lines.extend('{:>10.1f} ms  {}'.format(us / 1000, name)
+                     for name, us in rows)
+
+    section('Slowest modules, cumulative:', [
+        (r.name, r.cumulative_us) for r in
+        sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]])
+    section('Slowest modules, self:', [
+        (r.name, r.self_us) for r in
+        sorted(records, key=lambda r: r.self_us, reverse=True)[:top]])
+    section('Top level packages:', packages.most_common(top))
+    return '\n'.join(lines)
+
+
+class _ImportTracer(importlib.abc.MetaPathFinder):
+    """ Writes `-X importtime` compatible lines to stderr, timing the
+    execution of each module imported through a loader with exec_module """
+
+    def __init__(self) -> None:
+        # [start time, time spent in nested imports] per executing module
+        self._stack: List[List[float]] = []
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def enter(self) -> None:
+        self._stack.append([time.perf_counter(), 0.])
+
+    def leave(self, name: str) -> None:
+        started, nested = self._stack.pop()
+        cumulative = time.perf_counter() - started
+        if self._stack:
+            self._stack[-1][1] += cumulative
+        sys.stderr.write('import time: {:>9} | {:>10} | {}{}\n'.format(
+            int((cumulative - nested) * 1e6), int(cumulative * 1e6),
+            '  ' * len(self._stack), name))
+
+
+class _TimedLoader(importlib.abc.Loader):
+
+    def __init__(self, loader, tracer: _ImportTracer) -> None:
+        self._loader = loader
+        self._tracer = tracer
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._tracer.enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._tracer.leave(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Import time report')
+    parser.add_argument('module', help='module to import, e.g. golemcli')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--trace', action='store_true',
+                        help='only import the module, printing import times')
+    parsed = parser.parse_args(args)
+
+    if parsed.trace:
+        sys.meta_path.insert(0, _ImportTracer())
+        __import__(parsed.module)
+        return
+    print(report(measure(parsed.module), parsed.top))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Batch transfer simulator.
+
+Replays a queue of requestor payments against a fake SCI, sending batches
+the way PaymentProcessor.sendout does, and reports the gas spent per GNTB
+paid with the batch planner and with the greedy planner used before it.
+
+The queue is read from the payment table of a node's database or from
+a CSV file with `processed_ts,payee,value` rows (value in wei). Gas prices
+(`timestamp,gas_price` rows) may be given to replay their changes; the
+price is constant otherwise.
+
+Usage: python -m golem.tools.paymentsimulator --db <datadir>/golem.db
+"""
+import argparse
+import csv
+import sqlite3
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from ethereum.utils import denoms
+from golem_sci import SmartContractsInterface
+from sortedcontainers import SortedListWithKey
+
+from golem.ethereum.batchplanner import BatchBudget, GasPriceTrend, \
+    batch_gas, plan_batch, plan_greedy
+from golem.ethereum.paymentprocessor import PAYMENT_MAX_DELAY, \
+    PaymentProcessor
+
+QueuedPayment = NamedTuple('QueuedPayment', [
+    ('subtask', str),
+    ('payee', str),
+    ('value', int),
+    ('processed_ts', int),
+])
+
+Report = NamedTuple('Report', [
+    ('batches', int),
+    ('payments', int),
+    ('gas', int),
+    ('fee', int),
+    ('paid', int),
+    ('mean_delay', float),
+])
+
+
+def load_db(path: str) -> List[QueuedPayment]:
+    """ Payments from the payment table of a node's database """
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute(
+            'SELECT subtask, payee, value, processed_ts FROM payment'
+            ' WHERE processed_ts IS NOT NULL'
+        ).fetchall()
+    return [QueuedPayment(subtask, payee, int(value, 16), processed_ts)
+            for subtask, payee, value, processed_ts in rows]
+
+
+def load_csv(path: str) -> List[QueuedPayment]:
+    with open(path, newline='') as f:
+        return [QueuedPayment('{}-{}'.format(path, i), payee, int(value),
+                              int(processed_ts))
+                for i, (processed_ts, payee, value) in enumerate(csv.reader(f))]
+
+
+def load_gas_prices(path: str) -> List[Tuple[int, int]]:
+    with open(path, newline='') as f:
+        return sorted((int(ts), int(price)) for ts, price in csv.reader(f))
+
+
+class FakeSCI:
+    """ The part of the SCI PaymentProcessor plans batches with; batch
+    transfers are confirmed right away """
+
+    GAS_PER_PAYMENT = SmartContractsInterface.GAS_PER_PAYMENT
+    GAS_BATCH_PAYMENT_BASE = SmartContractsInterface.GAS_BATCH_PAYMENT_BASE
+    GAS_PRICE = SmartContractsInterface.GAS_PRICE
+    BLOCK_GAS_LIMIT = 8000000
+
+    def __init__(self,
+                 gntb_balance: int,
+                 eth_balance: int,
+                 gas_prices: Iterable[Tuple[int, int]] = ()) -> None:
+        self.gntb_balance = gntb_balance
+        self.eth_balance = eth_balance
+        self.now = 0
+        self._gas_prices = list(gas_prices)
+        self.gas = 0
+        self.fee = 0
+        self.transfers = 0
+
+    def get_current_gas_price(self) -> int:
+        price = self.GAS_PRICE
+        for ts, ts_price in self._gas_prices:
+            if ts > self.now:
+                break
+            price = ts_price
+        return price
+
+    def batch_transfer(self, payments: List[QueuedPayment],
+                       _closure_time: int) -> None:
+        gas = batch_gas(len({p.payee for p in payments}), self.budget())
+        fee = gas * self.get_current_gas_price()
+        self.gntb_balance -= sum(p.value for p in payments)
+        self.eth_balance -= fee
+        self.gas += gas
+        self.fee += fee
+        self.transfers += 1
+
+    def budget(self) -> BatchBudget:
+        return BatchBudget(
+            gntb_balance=self.gntb_balance,
+            eth_balance=self.eth_balance,
+            gas_price=self.get_current_gas_price(),
+            gas_limit=int(self.BLOCK_GAS_LIMIT *
+                          PaymentProcessor.BLOCK_GAS_LIMIT_RATIO),
+            gas_per_payment=self.GAS_PER_PAYMENT,
+            gas_batch_base=self.GAS_BATCH_PAYMENT_BASE,
+        )
+
+
+Planner = Callable[[List, int, int, BatchBudget, Optional[int]], int]
+
+
+def greedy_planner(payments, closure_time, _due_time, budget,
+                   _reference_gas_price):
+    return plan_greedy(payments, closure_time, budget)
+
+
+def simulate(queue: List[QueuedPayment],
+             sci: FakeSCI,
+             planner: Planner = plan_batch,
+             step: int = 60,
+             acceptable_delay: int = PAYMENT_MAX_DELAY,
+             closure_delay: int = PaymentProcessor.CLOSURE_TIME_DELAY) \
+        -> Report:
+    """ Calls sendout every `step` seconds while payments from the queue
+    are processed and awaiting """
+    queue = sorted(queue, key=lambda p: p.processed_ts)
+    awaiting = SortedListWithKey(key=lambda p: p.processed_ts)
+    trend = GasPriceTrend()
+    delays = 0
+    paid = 0
+    sent = 0
+    index = 0
+    sci.now = queue[0].processed_ts if queue else 0
+    while index < len(queue) or awaiting:
+        while index < len(queue) and queue[index].processed_ts <= sci.now:
+            awaiting.add(queue[index])
+            index += 1
+        if awaiting and trend.sample_due(sci.now):
+            trend.observe(sci.get_current_gas_price(), sci.now)
+        if awaiting and awaiting[0].processed_ts + acceptable_delay <= sci.now:
+            count = planner(awaiting, sci.now - closure_delay,
+                            sci.now - acceptable_delay, sci.budget(),
+                            trend.reference())
+            if count:
+                payments = awaiting[:count]
+                del awaiting[:count]
+                sci.batch_transfer(payments, payments[-1].processed_ts)
+                sent += count
+                paid += sum(p.value for p in payments)
+                delays += sum(sci.now - p.processed_ts for p in payments)
+            elif index == len(queue):
+                # the balances won't change any more
+                break
+        sci.now += step
+    return Report(
+        batches=sci.transfers,
+        payments=sent,
+        gas=sci.gas,
+        fee=sci.fee,
+        paid=paid,
+        mean_delay=delays / sent if sent else 0.,
+    )
+
+
+def format_report(name: str, report: Report) -> str:
+    paid = report.paid / denoms.ether
+    return (
+        '{name}: {r.batches} batches, {r.payments} payments, '
+        '{paid:.3f} GNTB paid, {r.gas} gas ({gas_per_gntb:.0f}/GNTB), '
+        '{fee:.6f} ETH fees ({fee_per_gntb:.8f}/GNTB), '
+        'mean delay {delay:.1f} h'.format(
+            name=name,
+            r=report,
+            paid=paid,
+            gas_per_gntb=report.gas / paid if paid else 0.,
+            fee=report.fee / denoms.ether,
+            fee_per_gntb=report.fee / denoms.ether / paid if paid else 0.,
+            delay=report.mean_delay / 3600,
+        ))
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Batch transfer simulator')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--db', help="node's database, e.g. golem.db")
+    source.add_argument('--csv', help='processed_ts,payee,value rows')
+    parser.add_argument('--gas-prices', help='timestamp,gas_price rows')
+    parser.add_argument('--gntb', type=float, default=10 ** 6,
+                        help='GNTB balance')
+    parser.add_argument('--eth', type=float, default=10, help='ETH balance')
+    parser.add_argument('--step', type=int, default=60,
+                        help='seconds between sendouts')
+    parser.add_argument('--delay', type=int, default=PAYMENT_MAX_DELAY,
+                        help='acceptable payment delay in seconds')
+    parsed = parser.parse_args(args)
+
+    queue = load_db(parsed.db) if parsed.db else load_csv(parsed.csv)
+    gas_prices = load_gas_prices(parsed.gas_prices) \
+        if parsed.gas_prices else []
+    for name, planner in [('greedy', greedy_planner), ('planner', plan_batch)]:
+        sci = FakeSCI(int(parsed.gntb * denoms.ether),
+                      int(parsed.eth * denoms.ether), gas_prices)
+        report = simulate(queue, sci, planner, parsed.step, parsed.delay)
+        print(format_report(name, report))
+
+
+if __name__ == '__main__':
+    main()
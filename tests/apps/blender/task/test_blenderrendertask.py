@@ -232,7 +232,8 @@ class TestBlenderFrameTask(TempDirFixture):
 
 class TestBlenderTask(TempDirFixture, LogTestCase):
 
-    def build_bt(self, res_x, res_y, total_tasks, frames=None):
+    def build_bt(self, res_x, res_y, total_tasks, frames=None,
+                 adaptive=False):
         output_file = self.temp_file_name('output')
         if frames is None:
             use_frames = False
@@ -244,6 +245,8 @@ class TestBlenderTask(TempDirFixture, LogTestCase):
         task_definition.options = BlenderRendererOptions()
         task_definition.options.use_frames = use_frames
         task_definition.options.frames = frames
+        task_definition.options.adaptive = adaptive
+        task_definition.options.target_subtask_time = 10
         task_definition.output_file = output_file
         task_definition.output_format = "PNG"
         task_definition.resolution = [res_x, res_y]
@@ -555,6 +558,79 @@ class TestBlenderTask(TempDirFixture, LogTestCase):
                                               node_name='node')
         assert extra_data.ctd
 
+    def test_adaptive_equal_strips(self):
+        bt = self.build_bt(2, 300, 7, adaptive=True)
+        assert bt.adaptive
+        cur_max_y = 1.0
+        for i in range(1, 8):
+            extra_data = bt.query_extra_data(1000, "ABC", "abc")
+            min_y, max_y = extra_data.ctd['extra_data']['crops'][0][
+                'borders_y']
+            assert max_y == cur_max_y
+            assert round((max_y - min_y) * 300) in (42, 43, 44)
+            cur_max_y = min_y
+        assert cur_max_y == 0.0
+
+    @mock.patch('apps.blender.task.blenderrendertask.time.time')
+    def test_adaptive_strips(self, time_mock):
+        bt = self.build_bt(2, 1000, 10, adaptive=True)
+        time_mock.return_value = 100.
+        first = bt.query_extra_data(1000, "ABC", "abc").ctd
+        assert bt.strips[1] == (0, 100)
+        subtask = bt.subtasks_given[first['subtask_id']]
+        subtask['time_finished'] = 120.
+        bt._measure_strip(subtask)
+        # 100 rows took 20 s at perf 1000 - a faster provider gets
+        # the rows it renders in 10 s
+        bt.query_extra_data(3000, "DEF", "def")
+        assert bt.strips[2] == (100, 250)
+        # no more than 4 times an equal share of the rows left
+        bt.query_extra_data(1000000, "FGH", "fgh")
+        assert bt.strips[3] == (250, 250 + 375)
+        # and no less than a quarter
+        bt.query_extra_data(1, "IJK", "ijk")
+        assert bt.strips[4] == (625, 638)
+        for _ in range(3):
+            bt.query_extra_data(1000000, "IJK", "ijk")
+        # at least a row for each of the other strips
+        assert bt.strips[7] == (976, 997)
+        bt.query_extra_data(1000000, "IJK", "ijk")
+        bt.query_extra_data(1000000, "IJK", "ijk")
+        extra_data = bt.query_extra_data(0, "LMN", "lmn")
+        assert bt.strips[10] == (999, 1000)
+        assert extra_data.ctd['extra_data']['crops'][0]['borders_y'] == \
+            [0.0, 0.001]
+
+        offsets = bt.preview_updater.expected_offsets
+        preview_y = bt.preview_updater.preview_res_y
+        assert offsets[2] == int(100 * preview_y / 1000)
+        assert offsets[11] == preview_y
+
+        # resent subtasks keep their strips
+        bt.computation_failed(first['subtask_id'])
+        resent = bt.query_extra_data(1, "OPQ", "opq").ctd
+        assert resent['extra_data']['start_task'] == 1
+        assert resent['extra_data']['crops'][0]['borders_y'] == [0.9, 1.0]
+
+    def test_adaptive_accept_results(self):
+        bt = self.build_bt(2, 300, 7, adaptive=True)
+        extra_data = bt.query_extra_data(1000, "ABC", "abc")
+        subtask_id = extra_data.ctd['subtask_id']
+        bt.subtasks_given[subtask_id]['time_started'] -= 5
+        bt.subtasks_given[subtask_id]['time_finished'] = \
+            bt.subtasks_given[subtask_id]['time_started'] + 5
+        with mock.patch('apps.rendering.task.framerenderingtask.'
+                        'FrameRenderingTask.accept_results'):
+            bt.accept_results(subtask_id, [])
+        assert bt.measured_rows == 43
+        assert bt.measured_cost == 5000
+
+    def test_adaptive_not_for_frames(self):
+        bt = self.build_bt(2, 300, 7, frames=[1, 2], adaptive=True)
+        assert not bt.adaptive
+        bt = self.build_bt(2, 6, 7, adaptive=True)
+        assert not bt.adaptive
+
     def test_update_preview(self):
         bt = self.build_bt(300, 200, 10)
         dm = DirManager(self.tempdir)
@@ -665,6 +741,22 @@ class TestBlenderRenderTaskBuilder(TempDirFixture):
         result = BlenderRenderTaskBuilder.build_dictionary(dictionary)
         self.assertEqual(result['options']['samples'], samples)
 
+    def test_build_adaptive(self):
+        task_type = BlenderTaskTypeInfo()
+        task_dict = self._task_dictionary
+        definition = BlenderRenderTaskBuilder.build_full_definition(
+            task_type, task_dict)
+        assert not definition.options.adaptive
+        assert definition.options.target_subtask_time is None
+
+        task_dict['options']['adaptive'] = True
+        task_dict['options']['target_subtask_time'] = 60
+        definition = BlenderRenderTaskBuilder.build_full_definition(
+            task_type, task_dict)
+        result = BlenderRenderTaskBuilder.build_dictionary(definition)
+        assert result['options']['adaptive']
+        assert result['options']['target_subtask_time'] == 60
+
     def test_build_correct_format(self):
         task_type = BlenderTaskTypeInfo()
         task_dict = self._task_dictionary
@@ -739,6 +831,28 @@ class TestHelpers(unittest.TestCase):
     def test_get_task_border_path(self):
         self._get_task_border(as_path=True)
 
+    def test_get_task_border_adaptive(self):
+        definition = RenderingTaskDefinition()
+        definition.options = BlenderRendererOptions()
+        definition.options.use_frames = False
+        definition.options.adaptive = True
+        definition.resolution = [800, 600]
+        scale = BlenderTaskTypeInfo.scale_factor(800, 600)
+        extra_data = {'start_task': 2,
+                      'crops': [{'borders_y': [0.25, 0.75]}]}
+
+        border = BlenderTaskTypeInfo.get_task_border(extra_data, definition,
+                                                     30, as_path=True)
+        x = int(800 * scale)
+        upper = int(150 * scale)
+        lower = int(450 * scale) - 1
+        assert border == [(0, upper), (x, upper), (x, lower), (0, lower)]
+
+        border = BlenderTaskTypeInfo.get_task_border(extra_data, definition,
+                                                     30)
+        assert min(border) == (0, upper)
+        assert max(border) == (x, lower)
+
 
 def _get_empty_rgb_image(width, height):
     img = numpy.zeros((height, width, 3), numpy.uint8)
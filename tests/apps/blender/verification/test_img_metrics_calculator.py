@@ -0,0 +1,113 @@
+import itertools
+import unittest
+from unittest import mock
+
+from apps.blender.resources.images.entrypoints.scripts.verifier_tools import \
+    img_metrics_calculator as calculator
+
+SUCCESS = calculator.VERIFICATION_SUCCESS
+FAIL = calculator.VERIFICATION_FAIL
+
+
+def _metrics(label):
+    # None stands for an offset crop which could not be evaluated
+    return None if label is None else {'Label': label}
+
+
+class TestFirstSuccess(unittest.TestCase):
+    CASES = [
+        [SUCCESS, SUCCESS, FAIL],
+        [FAIL, SUCCESS, SUCCESS],
+        [FAIL, FAIL, SUCCESS],
+        [FAIL, None, SUCCESS],
+        [FAIL, FAIL, FAIL],
+        [FAIL, None, None],
+        [SUCCESS],
+        [FAIL],
+    ]
+
+    def _evaluate_serially(self, labels):
+        def evaluate(_cropped_img, crop, *_args):
+            return _metrics(labels[crop])
+
+        with mock.patch.object(calculator, 'evaluate_crop',
+                               side_effect=evaluate), \
+                mock.patch.object(calculator, '_evaluate_offset_crop',
+                                  side_effect=evaluate):
+            best_index, _ = calculator._evaluate_crops_serially(
+                None, list(range(len(labels))), None, None, None, None)
+        return best_index
+
+    def test_same_as_serial(self):
+        for labels in self.CASES:
+            crops_metrics = {index: _metrics(label)
+                             for index, label in enumerate(labels)}
+            self.assertEqual(
+                calculator._first_success(crops_metrics, len(labels)),
+                self._evaluate_serially(labels),
+                labels)
+
+    def test_same_as_serial_in_any_order(self):
+        """ Feeds the metrics in every order they may arrive in from the
+        pool; the first decision made is the serial path's outcome """
+        for labels in self.CASES:
+            expected = self._evaluate_serially(labels)
+            for order in itertools.permutations(range(len(labels))):
+                crops_metrics = dict()
+                best_index = None
+                for index in order:
+                    crops_metrics[index] = _metrics(labels[index])
+                    best_index = calculator._first_success(crops_metrics,
+                                                           len(labels))
+                    if best_index is not None:
+                        break
+                self.assertEqual(best_index, expected, (labels, order))
+
+    def test_waits_for_preceding_crops(self):
+        crops_metrics = {1: _metrics(SUCCESS)}
+        assert calculator._first_success(crops_metrics, 3) is None
+        crops_metrics[0] = _metrics(FAIL)
+        assert calculator._first_success(crops_metrics, 3) == 1
+
+    def test_all_fail(self):
+        crops_metrics = {0: _metrics(FAIL), 1: None, 2: _metrics(FAIL)}
+        assert calculator._first_success(crops_metrics, 3) is None
+
+
+@mock.patch.object(calculator, 'Pool')
+class TestEvaluateCropsInParallel(unittest.TestCase):
+
+    @staticmethod
+    def _evaluate(pool_mock, results):
+        pool_mock.return_value.imap_unordered.return_value = iter(results)
+        return calculator._evaluate_crops_in_parallel(
+            None, [None] * 3, None, processes=2)
+
+    def test_success(self, pool_mock):
+        best_index, crops_metrics = self._evaluate(pool_mock, [
+            (1, _metrics(SUCCESS)),
+            (0, _metrics(FAIL)),
+            (2, _metrics(SUCCESS)),
+        ])
+
+        assert best_index == 1
+        assert 2 not in crops_metrics
+        pool_mock.return_value.terminate.assert_called_once_with()
+
+    def test_all_fail(self, pool_mock):
+        best_index, crops_metrics = self._evaluate(pool_mock, [
+            (index, _metrics(FAIL)) for index in range(3)])
+
+        assert best_index is None
+        assert len(crops_metrics) == 3
+        pool_mock.return_value.terminate.assert_called_once_with()
+
+    def test_terminated_on_error(self, pool_mock):
+        def results():
+            yield 0, _metrics(FAIL)
+            raise RuntimeError('worker failed')
+
+        with self.assertRaises(RuntimeError):
+            self._evaluate(pool_mock, results())
+
+        pool_mock.return_value.terminate.assert_called_once_with()
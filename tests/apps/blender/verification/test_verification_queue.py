@@ -1,5 +1,6 @@
 from unittest import mock
 import functools
+import unittest
 from twisted.internet.defer import Deferred
 
 from golem.verificator.blender_verifier import BlenderVerifier
@@ -7,7 +8,8 @@ from golem.core.common import timeout_to_deadline
 from golem.core.deferred import sync_wait
 from golem.docker.task_thread import DockerTaskThread
 from golem.tools.testwithreactor import TestWithReactor
-from apps.core.verification_queue import VerificationQueue
+from apps.core.verification_queue import VerificationQueue, \
+    default_concurrency, verifier_name
 
 
 class TestVerificationQueue(TestWithReactor):
@@ -52,3 +54,90 @@ class TestVerificationQueue(TestWithReactor):
 
         sync_wait(d, 60)
         _verification_timed_out.assert_called_once()
+
+
+class TestVerificationQueueScheduling(unittest.TestCase):
+
+    class VerifierA:
+        pass
+
+    class VerifierB:
+        pass
+
+    def setUp(self):
+        self.started = []
+        self.queue = VerificationQueue(concurrency=2)
+        self.queue._run = self._run
+
+    def _run(self, entry, verifier_cls):
+        self.started.append(entry.subtask_id)
+        self.queue._jobs[entry.subtask_id] = Deferred()
+        self.queue._running[verifier_name(verifier_cls)] += 1
+
+    def _finish(self, subtask_id, verifier_cls):
+        del self.queue._jobs[subtask_id]
+        self.queue._running[verifier_name(verifier_cls)] -= 1
+        self.queue._process_queue()
+
+    def _submit(self, subtask_id, deadline, verifier_cls=VerifierA):
+        self.queue.submit(verifier_cls, subtask_id, deadline, cb=mock.Mock())
+
+    def test_deadline_order(self):
+        self.queue.pause()
+        self._submit('late', 300)
+        self._submit('early', 100)
+        self._submit('middle', 200)
+        self._submit('middle2', 200)
+        assert len(self.queue) == 4
+
+        self.queue.resume()
+        assert self.started == ['early', 'middle']
+        self._finish('early', self.VerifierA)
+        self._finish('middle', self.VerifierA)
+        assert self.started == ['early', 'middle', 'middle2', 'late']
+        assert len(self.queue) == 0
+        assert self.queue.wait_time.count == 4
+
+    def test_verifier_limits(self):
+        self.queue._limits = {verifier_name(self.VerifierA): 1}
+        self.queue.pause()
+        self._submit('a1', 100)
+        self._submit('a2', 200)
+        self._submit('b1', 300, self.VerifierB)
+
+        self.queue.resume()
+        assert self.started == ['a1', 'b1']
+        self._finish('a1', self.VerifierA)
+        assert self.started == ['a1', 'b1', 'a2']
+
+    def test_verifier_name(self):
+        assert verifier_name(self.VerifierA) == 'VerifierA'
+        assert verifier_name(functools.partial(BlenderVerifier)) == \
+            'BlenderVerifier'
+
+    def test_default_concurrency(self):
+        memory = VerificationQueue.VERIFICATION_MEMORY
+        assert default_concurrency(8, 3 * memory) == 3
+        assert default_concurrency(8, 0) == 1
+        assert default_concurrency(8, 100 * memory) == 8
+
+    def test_configure(self):
+        queue = VerificationQueue()
+        assert queue._concurrency == 1
+
+        queue.configure(num_cores=4,
+                        max_memory_size=8 * queue.VERIFICATION_MEMORY)
+
+        assert queue._concurrency == 4
+        assert queue._limits == {'BlenderVerifier': 2}
+
+    def test_configure_runs_queued(self):
+        self.queue.configure(num_cores=1, max_memory_size=0)
+        self._submit('first', 100)
+        self._submit('second', 200)
+        assert self.started == ['first']
+
+        self.queue.configure(num_cores=2,
+                             max_memory_size=2 * self.queue.VERIFICATION_MEMORY,
+                             limits=dict())
+        assert self.started == ['first', 'second']
@@ -0,0 +1,103 @@
+from os import path
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from apps.rendering.benchmark.minilight.src.minilight import load_model, \
+    make_parallel_perf_test, make_perf_test, render_taskable
+from apps.rendering.benchmark.minilight.src.randommini import Random
+from apps.rendering.benchmark.minilight.src.vector3f import Vector3f
+from apps.rendering.benchmark.minilight.src.vectorized import SceneArrays, \
+    render_vectorized
+from golem.core.common import get_golem_path
+
+CORNELL_BOX = path.join(get_golem_path(), 'apps', 'rendering', 'benchmark',
+                        'minilight', 'cornellbox.ml.txt')
+
+
+class TestSceneArrays(TestCase):
+
+    def test_intersect(self):
+        _, _, camera, scene = load_model(CORNELL_BOX)
+        arrays = SceneArrays(scene)
+        random = Random()
+        origins, directions, expected = [], [], []
+        for _ in range(100):
+            direction = Vector3f(*(random.real64() - 0.5 for _ in range(3))) \
+                .unitize()
+            hit, _ = scene.get_intersection(camera.view_position, direction,
+                                            None)
+            origins.append(list(camera.view_position))
+            directions.append(list(direction))
+            expected.append(scene.triangles.index(hit) if hit else -1)
+
+        hit, _ = arrays.intersect(np.array(origins), np.array(directions),
+                                  np.full(len(origins), -1))
+
+        assert hit.tolist() == expected
+
+    def test_intersect_skips_last_hit(self):
+        _, _, camera, scene = load_model(CORNELL_BOX)
+        arrays = SceneArrays(scene)
+        origins = np.array([list(camera.view_position)])
+        directions = np.array([list(camera.view_direction)])
+
+        first, _ = arrays.intersect(origins, directions, np.array([-1]))
+        second, _ = arrays.intersect(origins, directions, first)
+
+        assert first[0] >= 0
+        assert second[0] != first[0]
+
+
+class TestRenderVectorized(TestCase):
+
+    @pytest.mark.slow
+    def test_same_as_render_taskable(self):
+        _, image, camera, scene = load_model(CORNELL_BOX)
+        render_taskable(image, camera, scene, 20)
+        # the median, as pixels seeing the light directly are very noisy
+        expected = np.median(np.array(image.pixels).reshape(-1, 3), axis=0)
+
+        pixels, _ = render_vectorized(image, camera, scene, 200, seed=0)
+
+        assert pixels.shape == (image.height, image.width, 3)
+        np.testing.assert_allclose(
+            np.median(pixels.reshape(-1, 3), axis=0) / 200, expected / 20,
+            rtol=0.1)
+
+
+class TestMakeParallelPerfTest(TestCase):
+
+    def test_single_core(self):
+        per_core, aggregate = make_parallel_perf_test(CORNELL_BOX, 1,
+                                                      duration=0)
+        assert len(per_core) == 1
+        assert per_core[0] > 0
+        assert aggregate == per_core[0]
+
+    def test_pool(self):
+        per_core, aggregate = make_parallel_perf_test(CORNELL_BOX, 2,
+                                                      duration=0)
+        assert len(per_core) == 2
+        assert aggregate == pytest.approx(sum(per_core))
+
+    @patch('apps.rendering.benchmark.minilight.src.minilight'
+           '._vectorized_perf_test', return_value=(3000, 1.))
+    @patch('apps.rendering.benchmark.minilight.src.minilight'
+           '._scalar_perf_test', return_value=(200, 2.))
+    def test_normalized_by_measured_speedup(self, *_):
+        per_core, _ = make_parallel_perf_test(CORNELL_BOX, 1, duration=0)
+        # 3000 rays/s of the vectorized renderer, 30 times faster than
+        # the scalar one
+        assert per_core == [pytest.approx(100.)]
+
+    @pytest.mark.slow
+    def test_comparable_with_make_perf_test(self):
+        # medians, as single measurements are noisy on shared machines
+        scalar = np.median([make_perf_test(CORNELL_BOX) for _ in range(3)])
+        parallel = np.median([
+            make_parallel_perf_test(CORNELL_BOX, 1, duration=1)[0][0]
+            for _ in range(3)])
+        assert parallel == pytest.approx(scalar, rel=0.3)
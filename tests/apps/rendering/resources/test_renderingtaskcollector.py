@@ -1,5 +1,6 @@
 import os
 import random
+from unittest.mock import patch
 
 import numpy
 import cv2
@@ -7,8 +8,10 @@ import pytest
 
 from golem.tools.testdirfixture import TestDirFixture
 
-from apps.rendering.resources.renderingtaskcollector import RenderingTaskCollector
-from apps.rendering.resources.imgrepr import OpenCVImgRepr, OpenCVError
+from apps.rendering.resources.renderingtaskcollector import \
+    RenderingTaskCollector, StreamingRenderingTaskCollector
+from apps.rendering.resources.imgrepr import OpenCVImgRepr, OpenCVError, \
+    read_img_header
 
 
 def make_test_img(img_path, size=(10, 10), color=(255, 0, 0)):
@@ -140,3 +143,99 @@ class TestRenderingTaskCollector(TestDirFixture):
         for img_path in images:
             os.remove(img_path)
             assert os.path.exists(img_path) is False
+
+
+class TestStreamingRenderingTaskCollector(TestDirFixture):
+    def _make_parts(self, count, w=20, h=15):
+        paths = []
+        for i in range(count):
+            path = self.temp_file_name("part{}.png".format(i))
+            make_test_img_16bits(path, width=w, height=h,
+                                 color=(i + 1, 2 * (i + 1), 3 * (i + 1)))
+            paths.append(path)
+        return paths
+
+    def _compare_with_regular(self, collector, paths):
+        regular = RenderingTaskCollector()
+        for path in paths:
+            regular.add_img_file(path)
+            collector.add_img_file(path)
+        expected = regular.finalize()
+        final_img = collector.finalize()
+        assert isinstance(final_img, OpenCVImgRepr)
+        assert final_img.img.dtype == expected.img.dtype
+        assert numpy.array_equal(final_img.img, expected.img)
+        assert (collector.width, collector.height) == \
+            (regular.width, regular.height)
+        return final_img
+
+    def test_finalize_empty(self):
+        assert StreamingRenderingTaskCollector().finalize() is None
+
+    def test_finalize_same_as_regular(self):
+        paths = self._make_parts(5)
+        collector = StreamingRenderingTaskCollector(max_workers=3)
+        final_img = self._compare_with_regular(collector, paths)
+        assert final_img.img.shape == (5 * 15, 20, 3)
+
+    def test_finalize_memory_mapped(self):
+        paths = self._make_parts(4)
+        collector = StreamingRenderingTaskCollector(mmap_dir=self.tempdir)
+        final_img = self._compare_with_regular(collector, paths)
+        assert isinstance(final_img.img, numpy.memmap)
+
+        final_path = self.temp_file_name("final.png")
+        final_img.save(final_path)
+        f_img = cv2.imread(final_path, cv2.IMREAD_UNCHANGED)
+        assert numpy.array_equal(f_img, final_img.img)
+
+    def test_finalize_exr(self):
+        collector = StreamingRenderingTaskCollector()
+        self._compare_with_regular(collector,
+                                   [_get_test_exr(), _get_test_exr(alt=True)])
+
+    def test_finalize_exr_with_alpha_memory_mapped(self):
+        # The test EXR files have A, B, G and R channels, OpenCV loads
+        # them as BGR
+        path = _get_test_exr()
+        assert read_img_header(path).channels == 3
+        collector = StreamingRenderingTaskCollector(mmap_dir=self.tempdir)
+        final_img = self._compare_with_regular(collector, [path, path])
+        assert final_img.img.shape == (20, 10, 3)
+
+    def test_finalize_converts_channels(self):
+        paths = self._make_parts(2)
+        collector = StreamingRenderingTaskCollector()
+        for path in paths:
+            collector.add_img_file(path)
+        bgra = read_img_header(paths[0])._replace(channels=4)
+        with patch.object(StreamingRenderingTaskCollector, '_read_header',
+                          return_value=bgra):
+            final_img = collector.finalize()
+        assert final_img.img.shape == (2 * 15, 20, 4)
+        assert final_img.img[0, 0].tolist() == [1, 2, 3, 65535]
+
+    def test_finalize_decodes_unknown_formats(self):
+        path = self.temp_file_name("img.bmp")
+        make_test_img(path)
+        assert read_img_header(path) is None
+        collector = StreamingRenderingTaskCollector()
+        self._compare_with_regular(collector, [path, path])
+
+    def test_finalize_nonexisting_img(self):
+        collector = StreamingRenderingTaskCollector()
+        collector.add_img_file(self.temp_file_name("img.png"))
+        with pytest.raises(OpenCVError):
+            collector.finalize()
+
+    def test_read_img_header(self):
+        path = self.temp_file_name("img.png")
+        make_test_img_16bits(path, width=20, height=15)
+        header = read_img_header(path)
+        assert (header.width, header.height, header.channels) == (20, 15, 3)
+        assert header.dtype == numpy.uint16
+
+        make_test_img(path, size=(10, 12))
+        header = read_img_header(path)
+        assert (header.width, header.height, header.channels) == (12, 10, 3)
+        assert header.dtype == numpy.uint8
@@ -1,6 +1,6 @@
 from unittest import mock, TestCase
 
-from apps.appsmanager import AppsManager
+from apps.appsmanager import App, AppsManager
 from apps.core.benchmark.benchmarkrunner import CoreBenchmark
 from apps.core.task.coretask import TaskBuilder
 from apps.blender.blenderenvironment import BlenderEnvironment
@@ -37,3 +37,12 @@ class TestAppsManager(TestCase):
             benchmark, builder_class = benchmark
             assert isinstance(benchmark, CoreBenchmark)
             assert issubclass(builder_class, TaskBuilder)
+
+    def test_app_loaded_lazily(self):
+        app = App(env='apps.blender.blenderenvironment.BlenderEnvironment')
+        assert 'env' not in vars(app)
+        assert app.env is BlenderEnvironment
+        assert vars(app)['env'] is BlenderEnvironment
+        assert app.builder is None
+        with self.assertRaises(AttributeError):
+            app.other  # pylint: disable=pointless-statement
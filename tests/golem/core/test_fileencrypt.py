@@ -2,6 +2,7 @@ import os
 import random
 
 from io import IOBase
+from unittest import mock
 
 from golem.core.fileencrypt import FileHelper, FileEncryptor, AESFileEncryptor
 from golem.resource.dirmanager import DirManager
@@ -98,6 +99,20 @@ class TestAESFileEncryptor(TestDirFixture):
 
         self.assertFalse(decrypted)
 
+    def test_decrypt_chunks(self):
+        secret = FileEncryptor.gen_secret(10, 20)
+        AESFileEncryptor.encrypt(self.test_file_path,
+                                 self.enc_file_path,
+                                 secret)
+
+        with mock.patch.object(AESFileEncryptor, 'chunk_size', 4):
+            chunks = list(AESFileEncryptor.decrypt_chunks(self.enc_file_path,
+                                                          secret))
+
+        self.assertEqual(len(chunks), 50)
+        with open(self.test_file_path, 'rb') as f:
+            self.assertEqual(b''.join(chunks), f.read())
+
     def test_get_key_and_iv(self):
         """ Test helper methods: gen_salt and get_key_and_iv """
         salt = AESFileEncryptor.gen_salt(AESFileEncryptor.block_size)
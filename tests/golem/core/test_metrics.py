@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import Mock
+
+from golem.core.metrics import Histogram, Metric, MetricsResource, Registry
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_empty(self):
+        histogram = Histogram(buckets=[1, 2])
+        assert histogram.count == 0
+        assert histogram.snapshot() == {
+            'buckets': {'1.0': 0, '2.0': 0, '+Inf': 0},
+            'count': 0,
+            'sum': 0.,
+        }
+
+    def test_observe(self):
+        histogram = Histogram(buckets=[2, 1])
+        for value in (0.5, 1, 1.5, 3):
+            histogram.observe(value)
+        assert histogram.count == 4
+        assert histogram.sum == 6.
+        assert histogram.snapshot()['buckets'] == \
+            {'1.0': 2, '2.0': 3, '+Inf': 4}
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_expose(self):
+        self.registry.counter('messages_total', 'Messages', ['type']) \
+            .labels('Hello').inc(2)
+        self.registry.gauge('queue_size', 'Queue "size"').labels() \
+            .set_function(lambda: 3)
+        histogram = self.registry.histogram('wait_seconds', 'Wait',
+                                            buckets=[1])
+        histogram.labels().observe(0.5)
+
+        assert self.registry.expose() == (
+            '# HELP messages_total Messages\n'
+            '# TYPE messages_total counter\n'
+            'messages_total{type="Hello"} 2.0\n'
+            '# HELP queue_size Queue "size"\n'
+            '# TYPE queue_size gauge\n'
+            'queue_size 3\n'
+            '# HELP wait_seconds Wait\n'
+            '# TYPE wait_seconds histogram\n'
+            'wait_seconds_bucket{le="1.0"} 1\n'
+            'wait_seconds_bucket{le="+Inf"} 1\n'
+            'wait_seconds_sum 0.5\n'
+            'wait_seconds_count 1\n'
+        )
+
+    def test_get_existing(self):
+        counter = self.registry.counter('total', 'Total', ['type'])
+        assert self.registry.counter('total', 'Total', ['type']) is counter
+        with self.assertRaises(ValueError):
+            self.registry.gauge('total', 'Total', ['type'])
+        with self.assertRaises(ValueError):
+            counter.labels()
+
+    def test_label_cardinality(self):
+        counter = self.registry.counter('total', 'Total', ['type'])
+        for i in range(Metric.MAX_LABEL_SETS + 10):
+            counter.labels(str(i)).inc()
+
+        exposed = self.registry.expose().splitlines()
+        assert len(exposed) == 2 + Metric.MAX_LABEL_SETS + 1
+        assert 'total{type="_other"} 10.0' in exposed
+
+    def test_escape_labels(self):
+        self.registry.gauge('value', 'Value', ['name']) \
+            .labels('a "b"\n').set(1)
+        assert 'value{name="a \\"b\\"\\n"} 1' in \
+            self.registry.expose().splitlines()
+
+    def test_register(self):
+        histogram = Histogram(buckets=[1])
+        self.registry.histogram('wait_seconds', 'Wait', ['queue']) \
+            .register(histogram, 'verification')
+        histogram.observe(2)
+        assert 'wait_seconds_count{queue="verification"} 1' in \
+            self.registry.expose().splitlines()
+
+    def test_children(self):
+        counter = self.registry.counter('total', 'Total', ['type'])
+        counter.labels('a').inc(2)
+        counter.labels('b').inc()
+        assert {key: child.value for key, child in counter.children().items()} \
+            == {('a',): 2., ('b',): 1.}
+
+    def test_failing_gauge(self):
+        self.registry.gauge('broken', 'Broken').labels() \
+            .set_function(lambda: 1 / 0)
+        self.registry.gauge('working', 'Working').labels().set(1)
+        assert self.registry.expose().splitlines()[-1] == 'working 1'
+
+
+class TestMetricsResource(unittest.TestCase):
+
+    def test_render(self):
+        registry = Registry()
+        registry.counter('total', 'Total').labels().inc()
+        request = Mock()
+
+        body = MetricsResource(registry).render_GET(request)
+
+        request.setHeader.assert_called_once_with(
+            b'Content-Type', MetricsResource.CONTENT_TYPE)
+        assert body == registry.expose().encode()
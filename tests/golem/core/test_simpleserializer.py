@@ -1,6 +1,13 @@
+import collections
+import copy
 import random
+import time
 import unittest
 
+import pytest
+
+from apps.core.task.coretaskstate import TaskDefinition
+from apps.rendering.task.renderingtaskstate import RenderingTaskDefinition
 from golem.core.simpleserializer import \
     DictCoder, DictSerializer
 
@@ -157,3 +164,112 @@ class TestDictSerializer(unittest.TestCase):
         self.assertFalse(
             DictCoder.cls_key in DictSerializer.dump(obj, typed=False)
         )
+
+
+class UncachedDictCoder(DictCoder):
+    """ Selects the (de)serializer of every value by reflection """
+
+    @classmethod
+    def _encoder(cls, obj):
+        return isinstance(obj, collections.Callable), cls._to_dict_reflect
+
+    @classmethod
+    def _from_dict_traverse_obj(cls, obj):
+        return cls._from_dict_reflect(obj)
+
+
+def task_definition():
+    definition = RenderingTaskDefinition()
+    definition.task_id = 'task_id'
+    definition.resources = ['/path/to/scene.blend', '/path/to/texture.png']
+    definition.resolution = [800, 600]
+    definition.options = MockSerializationInnerSubject()
+    definition.docker_images = [('golemfactory/blender', '1.4')]
+    return definition
+
+
+class TestDictCoderCache(unittest.TestCase):
+
+    def assert_same_as_uncached(self, obj, typed=True):
+        result = DictCoder.to_dict(obj, typed)
+        expected = UncachedDictCoder.to_dict(obj, typed)
+        self.assertEqual(result, expected)
+        self.assertEqual(repr(result), repr(expected))
+        # deserialize copies, from_dict pops class paths
+        result = DictCoder.from_dict(copy.deepcopy(result))
+        expected = UncachedDictCoder.from_dict(copy.deepcopy(expected))
+        self.assertEqual(type(result), type(expected))
+        self.assertEqual(UncachedDictCoder.to_dict(result),
+                         UncachedDictCoder.to_dict(expected))
+
+    def test_same_as_uncached(self):
+        for _ in range(2):
+            for obj in [
+                    MockSerializationSubject(),
+                    task_definition(),
+                    [b'bytes', bytearray(b'array'), 'str', 1, 1.5, None],
+                    {1: frozenset([1]), '_private': 2, 'method': len},
+                    len,
+            ]:
+                self.assert_same_as_uncached(obj)
+                self.assert_same_as_uncached(obj, typed=False)
+
+    def test_round_trip(self):
+        definition = task_definition()
+        result = DictCoder.from_dict(DictCoder.to_dict(definition))
+        assert isinstance(result, RenderingTaskDefinition)
+        assert vars(result) == vars(definition)
+
+    def test_redefined_class(self):
+        dict_repr = DictCoder.to_dict(MockSerializationSubject())
+        DictCoder.from_dict(dict(dict_repr))
+
+        module = globals()
+        original = MockSerializationSubject
+
+        class Redefined(MockSerializationSubject):
+            pass
+
+        module['MockSerializationSubject'] = Redefined
+        try:
+            assert isinstance(DictCoder.from_dict(dict(dict_repr)), Redefined)
+        finally:
+            module['MockSerializationSubject'] = original
+
+    def test_abc_register(self):
+        class Record:
+            def __init__(self):
+                self.value = 'value'
+
+        class Base(TaskDefinition):
+            pass
+
+        assert DictCoder.to_dict({'record': Record()}, typed=False) == \
+            {'record': {'value': 'value'}}
+        # Record instances become callables, skipped in dictionaries
+        collections.Callable.register(Record)
+        assert DictCoder.to_dict({'record': Record()}, typed=False) == {}
+
+        DictCoder.invalidate()
+        assert DictCoder.to_dict(Base())[DictCoder.cls_key].endswith('.Base')
+
+
+@pytest.mark.slow
+class TestDictCoderBenchmark(unittest.TestCase):
+    ROUND_TRIPS = 5000
+
+    def _run(self, coder):
+        definition = task_definition()
+        started = time.time()
+        for _ in range(self.ROUND_TRIPS):
+            coder.from_dict(coder.to_dict(definition))
+        return time.time() - started
+
+    def test_benchmark(self):
+        uncached = self._run(UncachedDictCoder)
+        cached = self._run(DictCoder)
+        print('\n{} TaskDefinition round trips: {:.0f}/s uncached,'
+              ' {:.0f}/s cached'.format(
+                  self.ROUND_TRIPS, self.ROUND_TRIPS / uncached,
+                  self.ROUND_TRIPS / cached))
+        assert cached < uncached
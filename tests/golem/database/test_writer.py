@@ -0,0 +1,243 @@
+import threading
+import time
+import uuid
+from unittest.mock import Mock, patch
+
+import pytest
+from golem_messages.factories import tasks as tasks_factories
+from peewee import IntegrityError, OperationalError
+
+from golem import model
+from golem.database import writer
+from golem.database.writer import DatabaseWriter
+from golem.network.history import MessageHistoryService
+from golem.network.transport import msg_queue
+from golem.ranking.manager import database_manager as dm
+from golem.testutils import DatabaseFixture
+
+
+def put_value(key, value='value'):
+    model.GenericKeyValue.create(key=key, value=value)
+    return key
+
+
+class TestDatabaseWriter(DatabaseFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.writer = DatabaseWriter(self.database.db, max_batch_delay=0.05,
+                                     retry_delay=0.001)
+        self.writer.start()
+
+    def tearDown(self):
+        self.writer.stop()
+        super().tearDown()
+
+    def test_group_commit(self):
+        with patch.object(self.writer, '_commit',
+                          wraps=self.writer._commit) as commit:
+            futures = [self.writer.submit(put_value, str(i))
+                       for i in range(100)]
+            assert [f.result(5) for f in futures] == \
+                [str(i) for i in range(100)]
+
+        assert commit.call_count < 10
+        assert model.GenericKeyValue.select().count() == 100
+
+    def test_max_batch_size(self):
+        self.writer.max_batch_size = 10
+        with patch.object(self.writer, '_commit',
+                          wraps=self.writer._commit) as commit:
+            futures = [self.writer.submit(put_value, str(i))
+                       for i in range(100)]
+            for future in futures:
+                future.result(5)
+
+        assert commit.call_count >= 10
+        assert all(len(c[0][0]) <= 10 for c in commit.call_args_list)
+
+    def test_failed_write(self):
+        futures = [
+            self.writer.submit(put_value, 'key'),
+            self.writer.submit(put_value, 'key'),
+            self.writer.submit(put_value, 'other'),
+        ]
+
+        assert futures[0].result(5) == 'key'
+        with pytest.raises(IntegrityError):
+            futures[1].result(5)
+        assert futures[2].result(5) == 'other'
+        assert model.GenericKeyValue.select().count() == 2
+
+    def test_nested_atomic(self):
+        futures = [dm.increase_positive_computed('node', 1.) for _ in range(3)]
+        for future in futures:
+            future.result(5)
+        assert dm.get_local_rank('node').positive_computed == 3.
+
+    def test_write_from_writer_thread(self):
+        def put_both():
+            return self.writer.call(put_value, 'inner'), put_value('outer')
+
+        assert self.writer.call(put_both) == ('inner', 'outer')
+
+    def test_locked_batch_retried(self):
+        commit = self.writer.db.commit
+        failures = [OperationalError('database is locked')] * 3
+
+        def fail_locked():
+            if failures:
+                raise failures.pop()
+            return commit()
+
+        with patch.object(self.writer.db, 'commit', side_effect=fail_locked), \
+                patch.object(self.writer, '_commit',
+                             wraps=self.writer._commit) as batch_commit:
+            futures = [self.writer.submit(put_value, str(i))
+                       for i in range(3)]
+            assert [f.result(5) for f in futures] == ['0', '1', '2']
+
+        assert not failures
+        assert batch_commit.call_count == 1
+        assert model.GenericKeyValue.select().count() == 3
+
+    def test_locked_write_retries_batch(self):
+        failures = [OperationalError('database is locked')]
+
+        def put_locked_once(key):
+            put_value(key)
+            if failures:
+                raise failures.pop()
+            return key
+
+        futures = [
+            self.writer.submit(put_value, 'first'),
+            self.writer.submit(put_locked_once, 'locked'),
+            self.writer.submit(put_value, 'last'),
+        ]
+
+        assert [f.result(5) for f in futures] == ['first', 'locked', 'last']
+        assert model.GenericKeyValue.select().count() == 3
+
+    def test_msg_queue_put_does_not_wait(self):
+        release = threading.Event()
+        db_model = Mock()
+        db_model.save.side_effect = lambda: release.wait(5)
+
+        with patch.object(model.QueuedMessage, 'from_message',
+                          return_value=db_model):
+            msg_queue.put('node', tasks_factories.WantToComputeTaskFactory())
+
+        assert not release.is_set()
+        release.set()
+        self.writer.stop()
+        db_model.save.assert_called_once_with()
+
+    def test_batch_retried_one_by_one(self):
+        commit = self.writer.db.commit
+        failures = [OperationalError('disk I/O error')]
+
+        def fail_once():
+            if failures:
+                raise failures.pop()
+            return commit()
+
+        with patch.object(self.writer.db, 'commit', side_effect=fail_once):
+            futures = [self.writer.submit(put_value, str(i))
+                       for i in range(3)]
+            assert [f.result(5) for f in futures] == ['0', '1', '2']
+
+        assert not failures
+        assert model.GenericKeyValue.select().count() == 3
+
+    def test_stop_commits_queued_writes(self):
+        futures = [self.writer.submit(put_value, str(i)) for i in range(10)]
+        self.writer.stop()
+
+        assert all(f.done() for f in futures)
+        assert model.GenericKeyValue.select().count() == 10
+
+    def test_write_deferred(self):
+        with patch('twisted.internet.reactor.callFromThread',
+                   side_effect=lambda f, *args: f(*args)):
+            deferred = writer.write_deferred(put_value, 'key')
+            deadline = time.time() + 5
+            while not deferred.called and time.time() < deadline:
+                time.sleep(0.01)
+
+        assert deferred.called
+        assert deferred.result == 'key'
+
+    def test_write_behind_failure(self):
+        failing = writer.write_behind(put_value)
+        failing('key').result(5)
+        with patch('golem.database.writer.logger') as logger:
+            future = failing('key')
+            with pytest.raises(IntegrityError):
+                future.result(5)
+        logger.error.assert_called_once()
+
+
+class TestWithoutWriter(DatabaseFixture):
+
+    def test_shortcuts_run_inline(self):
+        assert writer.submit(put_value, 'key').result(0) == 'key'
+        assert writer.call(put_value, 'other') == 'other'
+        assert model.GenericKeyValue.select().count() == 2
+
+
+@pytest.mark.slow
+class TestDatabaseWriterBenchmark(DatabaseFixture):
+    """ Mixes message history, message queue and ranking writes from several
+    threads, with and without the writer """
+    THREADS = 8
+    WRITES = 200
+
+    def _run(self):
+        history = MessageHistoryService()
+        history.start()
+        msg = tasks_factories.WantToComputeTaskFactory()
+        msg_dict = {
+            'task': 'task', 'subtask': 'subtask', 'node': 'node',
+            'msg_date': None, 'msg_cls': 'WantToComputeTask',
+            'msg_data': b'data', 'local_role': model.Actor.Provider,
+            'remote_role': model.Actor.Requestor,
+        }
+
+        def work(thread):
+            node_id = str(uuid.uuid4())
+            for i in range(self.WRITES):
+                kind = i % 3
+                if kind == 0:
+                    history.add(dict(msg_dict, msg_date=model.datetime
+                                     .datetime.now()))
+                elif kind == 1:
+                    msg_queue.put(node_id, msg)
+                else:
+                    dm.increase_positive_computed('node_{}'.format(thread),
+                                                  1.)
+
+        threads = [threading.Thread(target=work, args=(i,))
+                   for i in range(self.THREADS)]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        history.stop()
+        if DatabaseWriter.instance:
+            DatabaseWriter.instance.stop()
+        return time.time() - started
+
+    def test_benchmark(self):
+        without_writer = self._run()
+        DatabaseWriter(self.database.db).start()
+        with_writer = self._run()
+
+        writes = self.THREADS * self.WRITES
+        print('\n{} writes from {} threads: {:.2f} writes/s direct,'
+              ' {:.2f} writes/s with writer'.format(
+                  writes, self.THREADS, writes / without_writer,
+                  writes / with_writer))
+        assert model.QueuedMessage.select().count() == \
+            2 * self.THREADS * len(range(1, self.WRITES, 3))
@@ -0,0 +1,100 @@
+import json
+import os
+import time
+from unittest import TestCase
+
+from twisted.internet.task import Clock
+
+from golem.diag.profiler import SamplingProfiler
+from golem.diag.reactor import ReactorDiagnosticsProvider, timed
+from golem.diag.service import DiagnosticsOutputFormat
+from golem.testutils import TempDirFixture
+
+
+class TestReactorDiagnosticsProvider(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.provider = ReactorDiagnosticsProvider(interval=0.01,
+                                                   clock=self.clock)
+        self.provider.start()
+
+    def tearDown(self):
+        self.provider.stop()
+
+    def test_lag(self):
+        self.clock.advance(0.01)
+        self.clock.advance(0.01)
+        # the reactor was blocked for 0.5s before the timer could fire
+        self.clock.advance(0.51)
+
+        diag = self.provider.get_diagnostics(DiagnosticsOutputFormat.data)
+        assert diag['lag']['count'] == 3
+        assert diag['lag']['max'] == diag['lag']['p99']
+        self.assertAlmostEqual(diag['lag']['max'], 0.5)
+        assert diag['lag']['p50'] < 0.001
+
+    def test_stop(self):
+        assert ReactorDiagnosticsProvider.instance is self.provider
+        self.provider.stop()
+        assert ReactorDiagnosticsProvider.instance is None
+        assert not self.clock.getDelayedCalls()
+
+    def test_timed(self):
+        for _ in range(2):
+            with timed('sync_network', 'p2pservice'):
+                pass
+        with self.assertRaises(ValueError):
+            with timed('interpret', 'Hello'):
+                raise ValueError()
+
+        diag = self.provider.get_diagnostics(DiagnosticsOutputFormat.data)
+        assert diag['sync_network']['p2pservice']['count'] == 2
+        assert diag['interpret']['Hello']['count'] == 1
+        json.dumps(self.provider.get_diagnostics(
+            DiagnosticsOutputFormat.json))
+
+    def test_timed_not_running(self):
+        self.provider.stop()
+        with timed('sync_network', 'p2pservice'):
+            pass
+        assert not self.provider.timings
+
+
+def busy_wait(duration):
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        pass
+
+
+class TestSamplingProfiler(TempDirFixture):
+
+    def test_folded(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        busy_wait(0.2)
+        profiler.stop()
+        assert not profiler.running
+
+        path = os.path.join(self.tempdir, 'profile.folded')
+        profiler.dump(path)
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+        assert lines
+        assert any('busy_wait' in line for line in lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
+            assert stack.split(';')[-1]
+
+    def test_provider_profiler(self):
+        provider = ReactorDiagnosticsProvider(clock=Clock())
+        path = os.path.join(self.tempdir, 'profile.folded')
+        assert provider.stop_profiler(path) is None
+
+        assert provider.start_profiler(0.001)
+        assert not provider.start_profiler()
+        busy_wait(0.05)
+        assert provider.stop_profiler(path) > 0
+        assert os.path.exists(path)
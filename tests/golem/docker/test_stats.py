@@ -0,0 +1,123 @@
+from threading import Event
+from unittest import TestCase
+
+from golem.docker.stats import ContainerStatsCollector, ContainerUsage, \
+    EMPTY_USAGE, parse_stats
+
+
+def make_stats(cpu_ns=0, memory=0, max_memory=None, read=0, write=0):
+    memory_stats = {'usage': memory}
+    if max_memory is not None:
+        memory_stats['max_usage'] = max_memory
+    return {
+        'cpu_stats': {'cpu_usage': {'total_usage': cpu_ns}},
+        'memory_stats': memory_stats,
+        'blkio_stats': {'io_service_bytes_recursive': [
+            {'major': 8, 'minor': 0, 'op': 'Read', 'value': read},
+            {'major': 8, 'minor': 0, 'op': 'Write', 'value': write},
+            {'major': 8, 'minor': 0, 'op': 'Total', 'value': read + write},
+        ]},
+    }
+
+
+class FakeStatsSource:
+
+    def __init__(self, entries, error=None):
+        self.entries = entries
+        self.error = error
+        self.container_ids = []
+
+    def __call__(self, container_id):
+        self.container_ids.append(container_id)
+        yield from self.entries
+        if self.error:
+            raise self.error
+
+
+class TestParseStats(TestCase):
+
+    def test_cgroup_v1(self):
+        stats = make_stats(cpu_ns=10 ** 9, memory=100, max_memory=300,
+                           read=10, write=20)
+        assert parse_stats(stats) == ContainerUsage(
+            cpu_time_ns=10 ** 9,
+            memory_bytes=100,
+            max_memory_bytes=300,
+            io_read_bytes=10,
+            io_write_bytes=20)
+
+    def test_no_max_usage(self):
+        usage = parse_stats(make_stats(memory=100))
+        assert usage.max_memory_bytes == 100
+
+    def test_stopped_container(self):
+        # Docker reports empty sections for a stopped container
+        stats = {'cpu_stats': {}, 'memory_stats': {},
+                 'blkio_stats': {'io_service_bytes_recursive': None}}
+        assert parse_stats(stats) == EMPTY_USAGE
+
+
+class TestContainerStatsCollector(TestCase):
+
+    def _collect(self, source):
+        collector = ContainerStatsCollector('container_id', source=source)
+        with collector:
+            collector.join(timeout=5)
+        return collector
+
+    def test_usage(self):
+        source = FakeStatsSource([
+            make_stats(cpu_ns=1, memory=100, read=1, write=2),
+            make_stats(cpu_ns=5, memory=400, read=3, write=4),
+            make_stats(cpu_ns=9, memory=200, read=5, write=6),
+        ])
+
+        collector = self._collect(source)
+
+        assert source.container_ids == ['container_id']
+        assert collector.usage == ContainerUsage(
+            cpu_time_ns=9,
+            memory_bytes=200,
+            max_memory_bytes=400,
+            io_read_bytes=5,
+            io_write_bytes=6)
+        assert collector.peak_memory == 400
+
+    def test_counters_kept_after_container_stops(self):
+        source = FakeStatsSource([
+            make_stats(cpu_ns=5, memory=400, max_memory=500, read=3),
+            {'cpu_stats': {}, 'memory_stats': {}, 'blkio_stats': {}},
+        ])
+
+        collector = self._collect(source)
+
+        assert collector.usage == ContainerUsage(
+            cpu_time_ns=5,
+            memory_bytes=0,
+            max_memory_bytes=500,
+            io_read_bytes=3,
+            io_write_bytes=0)
+
+    def test_source_error(self):
+        source = FakeStatsSource([make_stats(memory=100)],
+                                 error=RuntimeError('test'))
+
+        collector = self._collect(source)
+
+        assert collector.peak_memory == 100
+
+    def test_stop(self):
+        released = Event()
+
+        def source(_):
+            yield make_stats(memory=100)
+            released.wait(5)
+            yield make_stats(memory=200)
+
+        collector = ContainerStatsCollector('container_id', source=source)
+        collector.start()
+        collector.stop()
+        released.set()
+        collector.join(timeout=5)
+
+        assert collector.peak_memory <= 100
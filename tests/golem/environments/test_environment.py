@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from golem.environments.minperformancemultiplier import MinPerformanceMultiplier
 from golem.testutils import DatabaseFixture
 
@@ -42,3 +44,14 @@ class EnvTest(DatabaseFixture, PEP8MixIn):
         # then
         self.assertEqual(MinPerformanceMultiplier.get(), 3.141)
         self.assertEqual(self.env.get_min_accepted_performance(), 314.1)
+
+    @patch('golem.environments.environment.make_parallel_perf_test',
+           return_value=([90., 110.], 200.))
+    def test_run_parallel_default_benchmark(self, mppt_mock):
+        assert Environment.run_default_benchmark(save=True, num_cores=2) \
+            == 100.
+        assert mppt_mock.call_args[0][1] == 2
+        perf = Performance.get(
+            Performance.environment_id == Environment.get_id())
+        assert perf.value == 100.
+        assert perf.aggregate_value == 200.
@@ -7,8 +7,9 @@ from twisted.trial.unittest import TestCase
 
 from golem.envs import RuntimeStatus
 from golem.envs.docker import DockerPayload
+from golem.docker.stats import ContainerUsage
 from golem.envs.docker.cpu import DockerCPURuntime, DockerOutput, DockerInput, \
-    InputSocket
+    InputSocket, USAGE_COUNTERS
 
 
 def patch(name: str, *args, **kwargs):
@@ -414,6 +415,7 @@ class TestStart(TestDockerCPURuntime):
         super().setUp()
         self.update_status_loop = \
             self._patch_runtime_async('_update_status_loop')
+        self.stats_collector = self._patch_async('ContainerStatsCollector')
 
     def test_invalid_status(self):
         self._generic_test_invalid_status(
@@ -461,11 +463,39 @@ class TestStart(TestDockerCPURuntime):
             self.runtime._status_update_thread.join(0.1)
             self.update_status_loop.assert_called_once()
 
+            self.stats_collector.assert_called_once_with("Id")
+            self.stats_collector().start.assert_called_once()
+
         deferred.addCallback(_check)
 
         return deferred
 
 
+class TestUsageCounters(TestDockerCPURuntime):
+
+    def test_not_started(self):
+        counters = self.runtime.usage_counters()
+        self.assertEqual(counters, {counter: 0 for counter in USAGE_COUNTERS})
+
+    def test_collected(self):
+        self.runtime._stats_collector = Mock(usage=ContainerUsage(
+            cpu_time_ns=1500000000,
+            memory_bytes=100,
+            max_memory_bytes=300,
+            io_read_bytes=10,
+            io_write_bytes=20))
+
+        counters = self.runtime.usage_counters()
+
+        self.assertEqual(set(counters), set(USAGE_COUNTERS))
+        self.assertEqual(counters, {
+            'cpu_time': 1.5,
+            'memory_peak': 300,
+            'io_read': 10,
+            'io_write': 20,
+        })
+
+
 class TestStop(TestDockerCPURuntime):
 
     def test_invalid_status(self):
@@ -0,0 +1,120 @@
+from collections import Counter
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+from golem.ethereum.balancecache import BalanceCache
+
+
+class CountingSCI:
+    """ Answers the balance queries with fixed values and counts them """
+
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+        self.eth = 1
+        self.gnt = 2
+        self.gntb = 3
+        self.deposit = 4
+        self.fail = False
+
+    def _call(self, name, value):
+        self.calls[name] += 1
+        if self.fail:
+            raise ConnectionError('node unavailable')
+        return value
+
+    def get_eth_address(self):
+        return '0x' + 40 * 'a'
+
+    def get_eth_balance(self, _address):
+        return self._call('get_eth_balance', self.eth)
+
+    def get_gnt_balance(self, _address):
+        return self._call('get_gnt_balance', self.gnt)
+
+    def get_gntb_balance(self, _address):
+        return self._call('get_gntb_balance', self.gntb)
+
+    def get_deposit_value(self, account_address):
+        return self._call('get_deposit_value', self.deposit)
+
+    def get_latest_confirmed_block_number(self):
+        return self._call('get_latest_confirmed_block_number', 5)
+
+    def get_latest_confirmed_block(self):
+        return self._call('get_latest_confirmed_block',
+                          SimpleNamespace(gas_limit=6))
+
+    def get_current_gas_price(self):
+        return self._call('get_current_gas_price', 7)
+
+
+@mock.patch('golem.ethereum.balancecache.time.time', return_value=1000.)
+class TestBalanceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.sci = CountingSCI()
+        self.balances = BalanceCache(self.sci, deposit=True, ttl=60)
+
+    def test_refresh(self, _time):
+        self.balances.refresh()
+        b = self.balances
+        assert (b.eth, b.gnt, b.gntb, b.deposit) == (1, 2, 3, 4)
+        assert (b.block_number, b.block_gas_limit, b.gas_price) == (5, 6, 7)
+        assert b.eth_update_time == b.gnt_update_time == 1000.
+
+    def test_no_deposit(self, _time):
+        balances = BalanceCache(self.sci)
+        balances.refresh()
+        assert balances.deposit == 0
+        assert not self.sci.calls['get_deposit_value']
+
+    def test_cached_until_expired(self, time_mock):
+        self.balances.refresh()
+        time_mock.return_value = 1059.
+        self.balances.refresh()
+        assert set(self.sci.calls.values()) == {1}
+
+        time_mock.return_value = 1060.
+        self.sci.gntb = 30
+        self.balances.refresh()
+        assert set(self.sci.calls.values()) == {2}
+        assert self.balances.gntb == 30
+
+    def test_force(self, _time):
+        self.balances.refresh()
+        self.balances.refresh(force=True)
+        assert set(self.sci.calls.values()) == {2}
+
+    def test_invalidate(self, _time):
+        self.balances.refresh()
+        self.balances.invalidate()
+        assert self.balances.expired()
+        self.balances.refresh()
+        assert set(self.sci.calls.values()) == {2}
+
+    def test_received_gntb(self, _time):
+        self.balances.refresh()
+        self.balances.received_gntb(10)
+        assert self.balances.gntb == 13
+        assert self.sci.calls['get_gntb_balance'] == 1
+
+        # reconciled with the chain on the next refresh
+        self.sci.gntb = 13
+        self.balances.refresh()
+        assert self.balances.gntb == 13
+        assert self.sci.calls['get_gntb_balance'] == 2
+
+    def test_failed_refresh(self, time_mock):
+        self.balances.refresh()
+        self.sci.fail = True
+        time_mock.return_value = 2000.
+        self.balances.refresh()
+        assert self.balances.gntb == 3
+        assert self.balances.eth_update_time == 1000.
+        assert self.balances.expired()
+
+        self.sci.fail = False
+        self.balances.refresh()
+        assert self.balances.eth_update_time == 2000.
+        assert not self.balances.expired()
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+import unittest
+
+from golem.ethereum.batchplanner import (
+    BatchBudget,
+    GasPriceTrend,
+    batch_gas,
+    plan_batch,
+    plan_greedy,
+)
+
+
+def payment(processed_ts, payee, value=10):
+    return SimpleNamespace(
+        subtask='{}-{}'.format(payee, processed_ts),
+        processed_ts=processed_ts,
+        payee=payee,
+        value=value,
+    )
+
+
+def budget(**kwargs):
+    values = dict(
+        gntb_balance=10 ** 6,
+        eth_balance=10 ** 9,
+        gas_price=1,
+        gas_limit=10 ** 6,
+        gas_per_payment=100,
+        gas_batch_base=1000,
+    )
+    values.update(kwargs)
+    return BatchBudget(**values)
+
+
+class TestPlanGreedy(unittest.TestCase):
+
+    def test_all(self):
+        payments = [payment(1, 'a'), payment(2, 'b'), payment(3, 'c')]
+        assert plan_greedy(payments, 3, budget()) == 3
+
+    def test_closure_time(self):
+        payments = [payment(1, 'a'), payment(2, 'b'), payment(3, 'c')]
+        assert plan_greedy(payments, 2, budget()) == 2
+
+    def test_gntb_balance(self):
+        payments = [payment(1, 'a'), payment(2, 'b'), payment(3, 'c')]
+        assert plan_greedy(payments, 3, budget(gntb_balance=25)) == 2
+
+    def test_gas_limit(self):
+        payments = [payment(1, 'a'), payment(2, 'b'), payment(3, 'a')]
+        assert plan_greedy(payments, 3, budget(gas_limit=1200)) == 3
+        assert plan_greedy(payments, 3, budget(gas_limit=1199)) == 1
+
+    def test_eth_balance(self):
+        payments = [payment(1, 'a'), payment(2, 'b')]
+        assert plan_greedy(payments, 2, budget(eth_balance=1100)) == 1
+        assert plan_greedy(payments, 2, budget(eth_balance=1099)) == 0
+
+    def test_same_processed_ts(self):
+        payments = [payment(1, 'a'), payment(2, 'b'), payment(2, 'c')]
+        assert plan_greedy(payments, 2, budget(gntb_balance=25)) == 1
+
+
+class TestPlanBatch(unittest.TestCase):
+
+    def test_nothing_due(self):
+        payments = [payment(5, 'a')]
+        assert plan_batch(payments, 5, 4, budget()) == 0
+
+    def test_due_limited_by_budget(self):
+        payments = [payment(1, 'a'), payment(2, 'b'), payment(3, 'a')]
+        assert plan_batch(payments, 3, 2, budget(gntb_balance=15)) == 1
+
+    def test_same_as_greedy(self):
+        payments = [payment(1, 'a', 100), payment(2, 'b', 1),
+                    payment(2, 'c', 1), payment(3, 'd', 1)]
+        for kwargs in [{}, {'gntb_balance': 101}, {'gas_limit': 1250}]:
+            for due_time in [1, 3]:
+                assert plan_batch(payments, 3, due_time, budget(**kwargs)) \
+                    == plan_greedy(payments, 3, budget(**kwargs))
+
+    def test_gas_not_cheaper_later(self):
+        payments = [payment(1, 'a'), payment(2, 'b'), payment(3, 'c')]
+        assert plan_batch(payments, 3, 1, budget(gas_price=10), 10) == 3
+        assert plan_batch(payments, 3, 1, budget(gas_price=10), 20) == 3
+
+    def test_new_payees_left_for_cheaper_gas(self):
+        payments = [payment(1, 'a'), payment(2, 'a'), payment(3, 'b'),
+                    payment(4, 'c')]
+        # now: 1200 gas at 10, later: 1200 gas at 1
+        assert plan_batch(payments, 4, 1, budget(gas_price=10), 1) == 2
+
+    def test_payees_paid_now_and_later(self):
+        payments = [payment(1, 'a'), payment(2, 'b'), payment(3, 'a')]
+        # all now: 1200 gas at 12, the first one now: 1100 gas at 12 and
+        # 1200 gas at 1 later
+        assert plan_batch(payments, 3, 1, budget(gas_price=12), 1) == 3
+        assert plan_batch(payments, 3, 1, budget(gas_price=13), 1) == 1
+
+
+class TestBatchGas(unittest.TestCase):
+
+    def test_batch_gas(self):
+        assert batch_gas(0, budget()) == 1000
+        assert batch_gas(3, budget()) == 1300
+
+
+class TestGasPriceTrend(unittest.TestCase):
+
+    def test_no_samples(self):
+        trend = GasPriceTrend()
+        assert trend.reference() is None
+        assert trend.sample_due(0)
+
+    def test_sample_due(self):
+        trend = GasPriceTrend(interval=10)
+        trend.observe(5, 100)
+        assert not trend.sample_due(109)
+        assert trend.sample_due(110)
+
+    def test_median(self):
+        trend = GasPriceTrend(size=3)
+        for ts, price in enumerate([10, 30, 20]):
+            trend.observe(price, ts)
+        assert trend.reference() == 20
+
+        trend.observe(40, 3)
+        trend.observe(50, 4)
+        assert trend.reference() == 40
@@ -3,6 +3,7 @@ import time
 import unittest.mock as mock
 
 from freezegun import freeze_time
+import pytest
 
 from golem.core.variables import PAYMENT_DEADLINE
 from golem.ethereum.incomeskeeper import IncomesKeeper
@@ -189,6 +190,38 @@ class TestIncomesKeeper(TestWithDatabase):
         income2 = Income.get(sender_node=sender_node2, subtask=subtask_id2)
         assert transaction_id2[2:] == income2.transaction
 
+    @mock.patch('golem.ethereum.incomeskeeper.dispatcher')
+    def test_received_batch_transfer_partial(self, dispatcher):
+        payer_address = '0x' + 40 * '1'
+        paid = self._create_income(
+            payer_address=payer_address, value=MAX_INT + 10,
+            value_received=10, accepted_ts=1)
+        partially_paid = self._create_income(
+            payer_address=payer_address, value=MAX_INT + 100,
+            accepted_ts=2)
+        unpaid = self._create_income(
+            payer_address=payer_address, value=MAX_INT + 1000,
+            accepted_ts=3)
+
+        self.incomes_keeper.received_batch_transfer(
+            '0x' + 64 * 'b', payer_address, MAX_INT + MAX_INT // 2, 3)
+
+        paid = paid.refresh()
+        assert paid.value_received == paid.value
+        assert paid.transaction == 64 * 'b'
+        partially_paid = partially_paid.refresh()
+        assert partially_paid.value_received == MAX_INT // 2
+        assert partially_paid.transaction == 64 * 'b'
+        unpaid = unpaid.refresh()
+        assert unpaid.value_received == 0
+        assert unpaid.transaction == 64 * 'b'
+        dispatcher.send.assert_called_once_with(
+            signal='golem.income',
+            event='confirmed',
+            node_id=paid.sender_node,
+            amount=paid.value,
+        )
+
     @staticmethod
     def _create_income(**kwargs):
         income = model_factories.Income(**kwargs)
@@ -253,3 +286,43 @@ class TestIncomesKeeper(TestWithDatabase):
             overdue=True)
         self.incomes_keeper.update_overdue_incomes()
         self.assertTrue(income.refresh().overdue)
+
+
+@pytest.mark.slow
+class TestIncomesKeeperBenchmark(TestWithDatabase):
+    INCOMES = 5000
+
+    def _expect_incomes(self, payer_address):
+        with db.atomic():
+            for i in range(self.INCOMES):
+                Income.create(
+                    sender_node=64 * 'a',
+                    subtask='%s-%d' % (payer_address, i),
+                    payer_address=payer_address,
+                    value=MAX_INT + i,
+                    accepted_ts=1,
+                )
+        return sum(MAX_INT + i for i in range(self.INCOMES))
+
+    def test_benchmark(self):
+        amount = self._expect_incomes('0x' + 40 * '1')
+        started = time.time()
+        # how the incomes were saved before, one by one
+        for income in Income.select().where(
+                Income.payer_address == '0x' + 40 * '1'):
+            income.value_received += income.value_expected
+            income.transaction = 64 * 'b'
+            income.save()
+        one_by_one = time.time() - started
+
+        amount = self._expect_incomes('0x' + 40 * '2')
+        started = time.time()
+        IncomesKeeper.received_batch_transfer(
+            '0x' + 64 * 'c', '0x' + 40 * '2', amount, 1)
+        bulk = time.time() - started
+
+        print('\n{} incomes in a batch: {:.3f}s one by one, {:.3f}s bulk'
+              .format(self.INCOMES, one_by_one, bulk))
+        assert Income.select().where(
+            Income.transaction == 64 * 'c').count() == self.INCOMES
+        assert bulk < one_by_one
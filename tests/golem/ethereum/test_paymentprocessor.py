@@ -12,6 +12,7 @@ from eth_utils import encode_hex
 from ethereum.utils import denoms, privtoaddr
 from freezegun import freeze_time
 from hexbytes import HexBytes
+import pytest
 
 from golem.core import variables
 from golem.core.common import timestamp_to_datetime
@@ -210,6 +211,14 @@ class PaymentProcessorInternalTest(PaymentProcessorBase):
         assert self.pp.reserved_gntb == gnt_value
         assert len(self.pp._awaiting) == 1
 
+    def test_gas_price_sampled(self):
+        _add_payment(self.pp)
+        self.sci.get_current_gas_price.reset_mock()
+        assert not self.pp.sendout()
+        assert not self.pp.sendout()
+        self.sci.get_current_gas_price.assert_called_once_with()
+        assert self.pp._gas_price_trend.reference() == self.sci.GAS_PRICE
+
     def test_payment_timestamp(self):
         self.sci.get_eth_balance.return_value = denoms.ether
 
@@ -490,3 +499,41 @@ class UpdateOverdueTest(PaymentProcessorBase):
         payment_overdue.save()
         self.pp.update_overdue()
         self.assertIs(payment_overdue.refresh().status, PaymentStatus.overdue)
+
+
+@pytest.mark.slow
+class BatchBenchmarkTest(PaymentProcessorBase):
+    PAYMENTS = 5000
+
+    def _add_payments(self) -> None:
+        payee = encode_hex(urandom(20))
+        with freeze_time(timestamp_to_datetime(1000000)), \
+                Payment._meta.database.atomic():
+            for i in range(self.PAYMENTS):
+                self.pp.add('subtask-%d' % i, payee, 1)
+
+    def test_benchmark(self):
+        self.pp.CLOSURE_TIME_DELAY = 0
+        self.sci.get_eth_balance.return_value = denoms.ether
+        self.sci.get_gntb_balance.return_value = denoms.ether
+
+        self._add_payments()
+        started = time.time()
+        # how the payments were saved before, one by one
+        for payment in self.pp._awaiting:
+            payment.status = PaymentStatus.sent
+            payment.details.tx = 'beef'
+            payment.save()
+        one_by_one = time.time() - started
+
+        started = time.time()
+        assert self.pp.sendout(0)
+        bulk = time.time() - started
+
+        print('\n{} payments in a batch: {:.3f}s one by one, {:.3f}s bulk'
+              .format(self.PAYMENTS, one_by_one, bulk))
+        assert Payment.select().where(
+            Payment.status == PaymentStatus.sent).count() == self.PAYMENTS
+        assert not self.pp._awaiting
+        assert Payment.select().first().details.tx == 'dead'
+        assert bulk < one_by_one
@@ -39,6 +39,7 @@ class TransactionSystemBase(testutils.DatabaseFixture):
         self.sci.get_gntb_balance.return_value = 0
         self.sci.GAS_PER_PAYMENT = 20000
         self.sci.get_deposit_locked_until.return_value = 0
+        self.sci.get_deposit_value.return_value = 0
         self.ets = self._make_ets()
 
     def _make_ets(
@@ -236,6 +237,35 @@ class TestTransactionSystem(TransactionSystemBase):
         self.sci.transfer_gnt.assert_not_called()
         self.sci.transfer_from_gate.assert_not_called()
 
+    @patch('golem.ethereum.transactionsystem.tETH_faucet_donate')
+    def test_faucet_balances_refreshed(self, donate):
+        self.ets._config.FAUCET_ENABLED = True
+        self.ets._refresh_balances()
+
+        self.ets._get_funds_from_faucet()
+        donate.assert_called_once_with(self.sci.get_eth_address())
+        assert self.ets._balances.expired()
+
+        self.sci.get_eth_balance.return_value = denoms.ether
+        self.ets._balances.refresh()
+        self.ets._get_funds_from_faucet()
+        self.sci.request_gnt_from_faucet.assert_called_once_with()
+        assert self.ets._balances.expired()
+
+    def test_convert_gnt_balances_refreshed(self):
+        gate_addr = '0x' + 40 * '2'
+        self.sci.get_gate_address.return_value = gate_addr
+        self.sci.get_gnt_balance.return_value = 1000 * denoms.ether
+        self.sci.get_eth_balance.return_value = denoms.ether
+        self.sci.get_current_gas_price.return_value = 0
+        self.sci.GAS_GNT_TRANSFER = 2
+        self.sci.GAS_TRANSFER_FROM_GATE = 5
+        self.ets._refresh_balances()
+
+        self.ets._try_convert_gnt()
+        self.sci.transfer_from_gate.assert_called_once_with()
+        assert self.ets._balances.expired()
+
     def test_topup_while_convert(self):
         amount1 = 1000 * denoms.ether
         amount2 = 2000 * denoms.ether
@@ -337,6 +367,44 @@ class TestTransactionSystem(TransactionSystemBase):
         self._make_ets(datadir=self.new_path / 'other', password=password)
 
 
+class BalanceCacheTest(TransactionSystemBase):
+    def test_run_within_ttl(self):
+        self.sci.reset_mock()
+        self.ets._run()
+        self.ets._run()
+        self.sci.get_eth_balance.assert_not_called()
+        self.sci.get_gntb_balance.assert_not_called()
+
+        self.ets._balances.invalidate()
+        self.ets._run()
+        self.sci.get_eth_balance.assert_called_once()
+        self.sci.get_gntb_balance.assert_called_once()
+
+    def test_get_balance(self):
+        self.sci.get_latest_confirmed_block_number.return_value = 1223
+        self.ets._refresh_balances()
+        self.sci.reset_mock()
+        assert self.ets.get_balance()['block_number'] == 1223
+        assert not self.sci.method_calls
+
+    def test_batch_transfer_event(self):
+        on_batch_transfer = self.sci.subscribe_to_batch_transfers \
+            .call_args[0][3]
+        self.sci.reset_mock()
+        on_batch_transfer(Mock(
+            tx_hash='0x' + 64 * 'f',
+            sender='0x' + 40 * 'b',
+            amount=10,
+            closure_time=0,
+        ))
+        assert self.ets.get_available_gnt() == 10
+        self.sci.get_gntb_balance.assert_not_called()
+        assert self.ets._balances.expired()
+
+    def test_shared_with_payment_processor(self):
+        assert self.ets._payment_processor._balances is self.ets._balances
+
+
 class WithdrawTest(TransactionSystemBase):
     def setUp(self):
         super().setUp()
@@ -520,7 +588,7 @@ class ConcentDepositTest(TransactionSystemBase):
     def test_not_enough(self):
         self.sci.GAS_TRANSFER_AND_CALL = 9999
         self.sci.get_deposit_value.return_value = 0
-        self.ets._gntb_balance = 0
+        self.ets._balances.gntb = 0
         with self.assertRaises(exceptions.NotEnoughFunds):
             self.ets.validate_concent_deposit_possibility(
                 required=10,
@@ -536,8 +604,8 @@ class ConcentDepositTest(TransactionSystemBase):
     ):
         self.sci.get_deposit_value.return_value = 0
         self.sci.get_transaction_gas_price.return_value = 2
-        self.ets._gntb_balance = gntb_balance
-        self.ets._eth_balance = denoms.ether
+        self.ets._balances.gntb = gntb_balance
+        self.ets._balances.eth = denoms.ether
         self.ets.lock_funds_for_payments(subtask_price, subtask_count)
         tx_hash = \
             '0x5e9880b3e9349b609917014690c7a0afcdec6dbbfbef3812b27b60d246ca10ae'
@@ -718,6 +786,7 @@ class ConcentUnlockTest(TransactionSystemBase):
     @patch('golem.ethereum.transactionsystem.call_later')
     def test_full(self, call_later):
         self.sci.get_deposit_value.return_value = abs(fake.pyint()) + 1
+        self.ets._refresh_balances()
         self.ets.concent_unlock()
         self.sci.unlock_deposit.assert_called_once_with()
         self.sci.on_transaction_confirmed.assert_called_once()
@@ -1,6 +1,7 @@
 # pylint: disable=protected-access
 from os import urandom
 import random
+import socket
 import time
 import unittest.mock as mock
 from unittest.mock import MagicMock, patch
@@ -11,9 +12,11 @@ import faker
 from golem_messages.datastructures import p2p as dt_p2p
 from golem_messages.factories.datastructures import p2p as dt_p2p_factory
 from golem_messages.message import Disconnect
+from twisted.internet.defer import Deferred, fail, succeed
 from twisted.internet.tcp import EISCONN
 
 from golem.clientconfigdescriptor import ClientConfigDescriptor
+from golem.config.active import P2P_SEEDS
 from golem.core.keysauth import KeysAuth
 from golem.diag.service import DiagnosticsOutputFormat
 from golem.model import KnownHosts
@@ -21,6 +24,7 @@ from golem.network.p2p import peersession
 from golem.network.p2p.p2pservice import HISTORY_LEN, P2PService, \
     RANDOM_DISCONNECT_FRACTION, MAX_STORED_HOSTS
 from golem.network.p2p.peersession import PeerSession
+from golem.network.transport import resolver
 from golem.network.transport.tcpnetwork import SocketAddress
 from golem.task.taskconnectionshelper import TaskConnectionsHelper
 from golem.tools.testwithreactor import TestDatabaseWithReactor
@@ -32,6 +36,13 @@ fake = faker.Faker()
 class TestSyncSeeds(TestDatabaseWithReactor):
     def setUp(self):
         super().setUp()
+        # resolve the seed host names right away, without DNS
+        resolver.RESOLVER.clear()
+        self.addCleanup(resolver.RESOLVER.clear)
+        patcher = mock.patch.object(resolver.threads, 'deferToThreadPool',
+                                    side_effect=self._lookup)
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.keys_auth = KeysAuth(self.path, 'priv_key', 'password')
         self.service = P2PService(
             node=None,
@@ -41,6 +52,12 @@ class TestSyncSeeds(TestDatabaseWithReactor):
         )
         self.service.seeds = set()
 
+    @staticmethod
+    def _lookup(_reactor, _pool, _func, host):
+        if host in {seed_host for seed_host, _ in P2P_SEEDS}:
+            return succeed(['127.0.0.1'])
+        return fail(socket.gaierror('Name or service not known'))
+
     def test_P2P_SEEDS(self):
         self.service._sync_seeds()
         self.assertGreater(len(self.service.bootstrap_seeds), 0)
@@ -70,6 +87,46 @@ class TestSyncSeeds(TestDatabaseWithReactor):
         self.service._sync_seeds()
         self.assertEqual(self.service.seeds, set())
 
+    def test_sync_seeds_deferred(self):
+        deferred = self.service._sync_seeds()
+        self.assertTrue(deferred.called)
+        self.assertGreater(len(self.service.seeds), 0)
+
+    @mock.patch('golem.network.p2p.p2pservice.P2P_SEEDS',
+                [('seeds.golem.network', 40102),
+                 ('0.seeds.golem.network', 40102)])
+    @mock.patch('golem.network.p2p.p2pservice.P2PService.connect')
+    def test_connect_to_seeds_resolved_on_start(self, m_connect):
+        resolver.RESOLVER.clear()
+        lookups = []
+
+        def lookup(_reactor, _pool, _func, host):
+            lookups.append(Deferred())
+            return lookups[-1]
+
+        with mock.patch.object(resolver.threads, 'deferToThreadPool',
+                               side_effect=lookup):
+            service = P2PService(
+                node=None,
+                config_desc=ClientConfigDescriptor(),
+                keys_auth=self.keys_auth,
+            )
+            service.connect_to_network()
+
+        # the seed host names are not resolved yet
+        assert lookups
+        self.assertEqual(service.seeds, set())
+        m_connect.assert_not_called()
+
+        lookups[0].callback(['127.0.0.1'])
+
+        m_connect.assert_called_once()
+        address = m_connect.call_args[0][0]
+        self.assertEqual(address.address, '127.0.0.1')
+        for deferred in lookups[1:]:
+            deferred.callback(['127.0.0.2'])
+        m_connect.assert_called_once()
+
 
 class TestP2PService(TestDatabaseWithReactor):
 
@@ -317,6 +374,7 @@ class TestP2PService(TestDatabaseWithReactor):
 
     @mock.patch('golem.network.p2p.p2pservice.P2PService.connect')
     def test_seeds_round_robin(self, m_connect):
+        self.service.seeds = {('127.0.0.1', 40102), ('127.0.0.1', 40104)}
         self.assertGreater(len(self.service.seeds), 0)
         self.service.connect_to_known_hosts = True
         self.service.connect_to_seeds()
@@ -4,6 +4,7 @@ import copy
 import ipaddress
 import random
 import sys
+import time
 import uuid
 from unittest import TestCase
 from unittest.mock import patch, Mock, MagicMock, ANY
@@ -18,13 +19,18 @@ from golem import clientconfigdescriptor
 from golem import testutils
 from golem.core.keysauth import KeysAuth
 from golem.core.variables import PROTOCOL_CONST
-from golem.core.variables import TASK_HEADERS_LIMIT
+from golem.core.variables import TASK_HEADERS_LIMIT, \
+    TASK_HEADERS_RESEND_INTERVAL
 from golem.network.p2p.p2pservice import P2PService
 from golem.network.p2p.peersession import (logger, PeerSession, PeerSessionInfo)
 from golem.tools.assertlogs import LogTestCase
 from tests.factories import taskserver as task_server_factory
 
 
+def task_headers(ids, timestamp=0):
+    return [Mock(task_id=str(i), timestamp=timestamp) for i in ids]
+
+
 def fill_slots(msg):
     for slot in msg.__slots__:
         if hasattr(msg, slot):
@@ -387,8 +393,8 @@ class TestPeerSession(testutils.DatabaseFixture, LogTestCase,
         peer_session._react_to_get_tasks(Mock())
         assert not peer_session.send.called
 
-        peer_session.p2p_service.get_own_tasks_headers.return_value = list(
-            range(0, 100))
+        peer_session.p2p_service.get_own_tasks_headers.return_value = \
+            task_headers(range(0, 100))
         peer_session.p2p_service.get_others_tasks_headers.return_value = list()
         peer_session._react_to_get_tasks(Mock())
 
@@ -396,10 +402,10 @@ class TestPeerSession(testutils.DatabaseFixture, LogTestCase,
         assert len(sent_tasks) <= TASK_HEADERS_LIMIT
         assert len(sent_tasks) == len(set(sent_tasks))
 
-        peer_session.p2p_service.get_own_tasks_headers.return_value = list(
-            range(0, TASK_HEADERS_LIMIT - 1))
-        peer_session.p2p_service.get_others_tasks_headers.return_value = list(
-            range(0, TASK_HEADERS_LIMIT - 1))
+        peer_session.p2p_service.get_own_tasks_headers.return_value = \
+            task_headers(range(100, 100 + TASK_HEADERS_LIMIT - 1))
+        peer_session.p2p_service.get_others_tasks_headers.return_value = \
+            task_headers(range(200, 200 + TASK_HEADERS_LIMIT - 1))
         peer_session._react_to_get_tasks(Mock())
         sent_tasks = peer_session.send.call_args_list[0][0][0].tasks
         assert len(sent_tasks) <= TASK_HEADERS_LIMIT
@@ -413,15 +419,15 @@ class TestPeerSession(testutils.DatabaseFixture, LogTestCase,
         peer_session.send = MagicMock()
 
         peer_session.p2p_service.get_own_tasks_headers.return_value = None
-        peer_session.p2p_service.get_others_tasks_headers.return_value = list(
-            range(0, 10))
+        peer_session.p2p_service.get_others_tasks_headers.return_value = \
+            task_headers(range(0, 10))
         peer_session._react_to_get_tasks(Mock())
         sent_tasks = peer_session.send.call_args_list[0][0][0].tasks
         assert len(sent_tasks) <= TASK_HEADERS_LIMIT
         assert len(sent_tasks) == len(set(sent_tasks))
 
-        peer_session.p2p_service.get_own_tasks_headers.return_value = list(
-            range(0, 10))
+        peer_session.p2p_service.get_own_tasks_headers.return_value = \
+            task_headers(range(10, 20))
         peer_session.p2p_service.get_others_tasks_headers.return_value = None
         peer_session._react_to_get_tasks(Mock())
         sent_tasks = peer_session.send.call_args_list[0][0][0].tasks
@@ -435,21 +441,68 @@ class TestPeerSession(testutils.DatabaseFixture, LogTestCase,
         peer_session.p2p_service.get_others_tasks_headers = Mock()
         peer_session.send = MagicMock()
 
-        peer_session.p2p_service.get_own_tasks_headers.return_value = list(
-            range(0, 50))
-        peer_session.p2p_service.get_others_tasks_headers.return_value = list(
-            range(51, 100))
+        peer_session.p2p_service.get_own_tasks_headers.return_value = \
+            task_headers(range(0, 50))
+        peer_session.p2p_service.get_others_tasks_headers.return_value = \
+            task_headers(range(51, 100))
         peer_session._react_to_get_tasks(Mock())
         sent_tasks = peer_session.send.call_args_list[0][0][0].tasks
 
-        my_tasks = list(filter(lambda x: x in (0, 50), sent_tasks))
-        other_tasks = list(filter(lambda x: x in (50, 100), sent_tasks))
+        my_tasks = [t for t in sent_tasks if int(t.task_id) < 50]
+        other_tasks = [t for t in sent_tasks if int(t.task_id) > 50]
 
         assert len(my_tasks) <= int(TASK_HEADERS_LIMIT / 2)
         assert len(other_tasks) <= int(TASK_HEADERS_LIMIT / 2)
         assert len(sent_tasks) <= TASK_HEADERS_LIMIT
         assert len(sent_tasks) == len(set(sent_tasks))
 
+    def test_react_to_get_tasks_known(self):
+        peer_session = PeerSession(MagicMock())
+        peer_session.send = MagicMock()
+        received = task_headers(range(0, 5))
+        own = task_headers(range(5, 10))
+        peer_session.p2p_service.add_task_header = Mock(return_value=True)
+        peer_session.p2p_service.get_own_tasks_headers = Mock(
+            return_value=own)
+        peer_session.p2p_service.get_others_tasks_headers = Mock(
+            return_value=received)
+
+        def sent_ids():
+            peer_session.send.reset_mock()
+            peer_session._react_to_get_tasks(Mock())
+            if not peer_session.send.called:
+                return set()
+            return {t.task_id for t in peer_session.send.call_args[0][0].tasks}
+
+        # headers received from the peer are not sent back
+        peer_session._react_to_tasks(Mock(tasks=received))
+        assert sent_ids() == {t.task_id for t in own}
+        # nor the ones already sent
+        assert sent_ids() == set()
+
+        # unless they were updated
+        updated = task_headers(['5'], timestamp=1)
+        peer_session.p2p_service.get_own_tasks_headers.return_value = \
+            updated + own[1:]
+        assert sent_ids() == {'5'}
+        assert sent_ids() == set()
+
+        # or sent long ago
+        with patch('time.time', return_value=time.time() +
+                   TASK_HEADERS_RESEND_INTERVAL + 1):
+            assert len(sent_ids()) == 10
+
+    def test_react_to_tasks_invalid(self):
+        peer_session = PeerSession(MagicMock())
+        peer_session.disconnect = Mock()
+        headers = task_headers(range(0, 2))
+        peer_session.p2p_service.add_task_header = Mock(
+            side_effect=[False, True])
+        peer_session._react_to_tasks(Mock(tasks=headers))
+        peer_session.disconnect.assert_called_once_with(
+            message.base.Disconnect.REASON.BadProtocol)
+        assert list(peer_session.known_task_headers) == ['1']
+
     @patch('golem.network.p2p.peersession.PeerSession._send_peers')
     def test_react_to_get_peers(self, send_mock):
         msg = message.p2p.GetPeers()
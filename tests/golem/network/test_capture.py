@@ -0,0 +1,254 @@
+import os
+from unittest import mock, TestCase
+
+from golem_messages import message
+from twisted.internet.task import Clock
+
+from golem.network import capture
+from golem.network.capture import Replay, TrafficCapture
+from golem.testutils import TempDirFixture
+
+
+class Session:
+    """ Records the messages it interprets """
+
+    instances: list = []
+
+    def __init__(self, conn, address='10.0.0.1', port=40102):
+        self.instances.append(self)
+        self.conn = conn
+        self.address = address
+        self.port = port
+        self.key_id = None
+        self.rand_val = 0.5
+        self.interpreted = []
+        self.dropped = mock.Mock()
+
+    def interpret(self, msg):
+        self.interpreted.append(msg)
+        if isinstance(msg, message.p2p.Ping):
+            self.conn.send_message(message.p2p.Pong())
+
+
+class OtherSession(Session):
+    pass
+
+
+def ping(encrypted=True):
+    msg = message.p2p.Ping()
+    msg.encrypted = encrypted
+    return msg
+
+
+@mock.patch('golem.network.capture.time.time', return_value=100.)
+class TestTrafficCapture(TempDirFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tempdir, 'traffic.gcap')
+        self.capture = TrafficCapture(self.path)
+        self.capture.start()
+
+    def tearDown(self):
+        self.capture.stop()
+        super().tearDown()
+
+    def _read(self):
+        self.capture.stop()
+        return list(capture.read(self.path))
+
+    def test_capture(self, time_mock):
+        assert TrafficCapture.instance is self.capture
+        session = Session(None)
+        self.capture.received(session, ping())
+        time_mock.return_value = 101.
+        self.capture.sent(session, message.p2p.Pong())
+        self.capture.closed(session)
+
+        records = self._read()
+        assert TrafficCapture.instance is None
+        assert [r.kind for r in records] == [
+            capture.OPENED, capture.RECEIVED, capture.SENT, capture.CLOSED]
+        assert {r.session for r in records} == {0}
+        assert [r.timestamp for r in records] == [100., 100., 101., 101.]
+        assert b'"cls": "Session"' in records[0].data
+
+        received = capture.load_message(records[1])
+        assert isinstance(received, message.p2p.Ping)
+        assert received.encrypted
+        sent = capture.load_message(records[2])
+        assert isinstance(sent, message.p2p.Pong)
+        assert not sent.encrypted
+
+    def test_sessions(self, _time):
+        first, second = Session(None), Session(None)
+        self.capture.received(first, ping())
+        self.capture.received(second, ping())
+        self.capture.received(first, ping())
+        self.capture.received(None, ping())
+
+        records = self._read()
+        assert [(r.kind, r.session) for r in records] == [
+            (capture.OPENED, 0), (capture.RECEIVED, 0),
+            (capture.OPENED, 1), (capture.RECEIVED, 1),
+            (capture.RECEIVED, 0),
+        ]
+
+    def test_append(self, _time):
+        self.capture.received(Session(None), ping())
+        self.capture.stop()
+        self.capture.start()
+        self.capture.received(Session(None), ping())
+        assert len(self._read()) == 4
+
+    def test_append_to_existing(self, _time):
+        self.capture.received(Session(None), ping())
+        self.capture.received(Session(None), ping())
+        self.capture.stop()
+
+        second = TrafficCapture(self.path)
+        second.start()
+        second.received(Session(None), ping())
+        second.stop()
+
+        records = self._read()
+        assert [(r.kind, r.session) for r in records] == [
+            (capture.OPENED, 0), (capture.RECEIVED, 0),
+            (capture.OPENED, 1), (capture.RECEIVED, 1),
+            (capture.OPENED, 2), (capture.RECEIVED, 2),
+        ]
+
+    def test_append_after_truncated(self, _time):
+        self.capture.received(Session(None), ping())
+        self.capture.received(Session(None), ping())
+        self.capture.stop()
+        with open(self.path, 'rb+') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        second = TrafficCapture(self.path)
+        second.start()
+        second.received(Session(None), ping())
+        second.stop()
+
+        records = self._read()
+        assert [(r.kind, r.session) for r in records] == [
+            (capture.OPENED, 0), (capture.RECEIVED, 0),
+            (capture.OPENED, 1),
+            (capture.OPENED, 2), (capture.RECEIVED, 2),
+        ]
+
+    def test_truncated(self, _time):
+        self.capture.received(Session(None), ping())
+        self.capture.stop()
+        with open(self.path, 'rb+') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        assert len(self._read()) == 1
+
+    def test_not_a_capture(self, _time):
+        with open(self.path, 'wb') as f:
+            f.write(b'data')
+        with self.assertRaises(ValueError):
+            self._read()
+
+    def test_summarize(self, time_mock):
+        session = Session(None)
+        self.capture.received(session, ping())
+        self.capture.received(session, ping())
+        time_mock.return_value = 105.
+        self.capture.sent(session, message.p2p.Pong())
+        assert capture.summarize(self._read()) == {
+            'sessions': {'Session': 1},
+            'duration': 5.,
+            'received': {'Ping': 2},
+            'sent': {'Pong': 1},
+        }
+
+
+class TestReplay(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.server = mock.Mock()
+        self.sessions = Session.instances = []
+
+    def _records(self, *records):
+        result = []
+        for timestamp, kind, session, msg in records:
+            if kind == capture.OPENED:
+                data = ('{"cls": "%s", "host": "10.0.0.2", "port": 1, '
+                        '"key_id": null}' % msg).encode()
+                flags = 0
+            elif msg is None:
+                data, flags = b'', 0
+            else:
+                data = capture.golem_messages.dump(msg, None, None)
+                flags = capture.FLAG_ENCRYPTED if msg.encrypted else 0
+            result.append(capture.Record(timestamp, kind, flags, session,
+                                         data))
+        return result
+
+    def _replay(self, records, speed=1.):
+        return Replay(records, {Session: self.server}, speed=speed,
+                      reactor=self.clock)
+
+    def test_speed(self):
+        replay = self._replay(self._records(
+            (100., capture.OPENED, 0, 'Session'),
+            (100., capture.RECEIVED, 0, ping()),
+            (104., capture.RECEIVED, 0, ping()),
+        ), speed=2.)
+        done = replay.run()
+
+        self.clock.advance(0)
+        self.clock.advance(0)
+        session = self.sessions[0]
+        assert len(session.interpreted) == 1
+        assert session.interpreted[0].encrypted
+        assert session.conn.server is self.server
+        assert session.conn.transport.getPeer().host == '10.0.0.2'
+
+        self.clock.advance(1.9)
+        assert len(session.interpreted) == 1
+        self.clock.advance(0.1)
+        assert len(session.interpreted) == 2
+        assert done.called
+        assert session.conn.sent == {'Pong': 2}
+        assert replay.timings['Ping'].count == 2
+
+    def test_no_wait(self):
+        replay = self._replay(self._records(
+            (100., capture.OPENED, 0, 'Session'),
+            (200., capture.RECEIVED, 0, ping()),
+        ), speed=None)
+        done = replay.run()
+        for _ in range(3):
+            self.clock.advance(0)
+        assert done.called
+        assert len(self.sessions[0].interpreted) == 1
+
+    def test_skipped(self):
+        replay = self._replay(self._records(
+            (100., capture.OPENED, 0, 'OtherSession'),
+            (100., capture.RECEIVED, 0, ping()),
+            (100., capture.OPENED, 1, 'Session'),
+            (100., capture.SENT, 1, message.p2p.Pong()),
+            (100., capture.CLOSED, 1, None),
+        ), speed=None)
+        replay.run()
+        for _ in range(6):
+            self.clock.advance(0)
+        assert replay.skipped == 1
+        assert not self.sessions[0].interpreted
+        assert len(self.sessions) == 1
+        self.sessions[0].dropped.assert_called_once_with()
+        assert not replay.connections
+
+    def test_rand_val(self):
+        replay = self._replay(self._records(
+            (100., capture.OPENED, 0, 'Session'),
+            (100., capture.RECEIVED, 0, message.base.RandVal(rand_val=0.25)),
+        ), speed=None)
+        replay.run()
+        for _ in range(3):
+            self.clock.advance(0)
+        assert self.sessions[0].rand_val == 0.25
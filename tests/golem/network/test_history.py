@@ -1,6 +1,7 @@
 # pylint: disable=protected-access
 import datetime
 import queue
+from concurrent.futures import Future
 import uuid
 import unittest
 import unittest.mock as mock
@@ -11,6 +12,8 @@ from peewee import DataError, PeeweeException, IntegrityError
 
 from golem_messages import factories as msg_factories
 
+from golem.core import metrics
+from golem.database.writer import DatabaseWriter
 from golem.model import NetworkMessage, Actor
 from golem.network import history
 from golem.testutils import DatabaseFixture
@@ -61,6 +64,24 @@ class TestMessageHistoryService(DatabaseFixture):
         with self.assertRaises(queue.Empty):
             self.service._save_queue.get(block=False)
 
+    def test_queue_size_metric(self):
+        queue_size = metrics.REGISTRY.gauge(
+            'golem_history_queue_size', 'Messages waiting to be saved',
+            ['queue'])
+        self.service.add(self._build_dict())
+        assert queue_size.labels('service').value == 1
+        assert queue_size.labels('writer').value == 0
+
+        future = Future()
+        writer = mock.Mock(running=True, **{'submit.return_value': future})
+        with mock.patch.object(DatabaseWriter, 'instance', writer):
+            self.service.add(self._build_dict())
+        assert queue_size.labels('service').value == 1
+        assert queue_size.labels('writer').value == 1
+
+        future.set_result(None)
+        assert queue_size.labels('writer').value == 0
+
     @mock.patch('golem.model.NetworkMessage.save')
     def test_add_sync_fail(self, save):
         self.service._save_queue = mock.Mock()
@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+from twisted.internet.task import Clock
+
+from golem.network.transport.inbound import InboundDispatcher, InboundQueue
+
+
+class Protocol:
+    def __init__(self, name, interpreted):
+        self.name = name
+        self.interpreted = interpreted
+        self.transport = mock.Mock()
+        self.inbound = InboundQueue(self)
+        self.close = mock.Mock()
+
+    def interpret_frame(self, frame):
+        self.interpreted.append((self.name, frame))
+
+
+class TestInboundDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.dispatcher = InboundDispatcher(messages_per_tick=4,
+                                            queue_limit=10,
+                                            reactor=self.clock)
+        self.interpreted = []
+
+    def _tick(self):
+        """ Runs the calls scheduled so far, like a reactor iteration;
+        Clock.advance would run the calls they schedule too """
+        calls = self.clock.getDelayedCalls()
+        self.clock.calls = []
+        for call in calls:
+            call.func(*call.args, **call.kw)
+
+    def _protocol(self, name):
+        return Protocol(name, self.interpreted)
+
+    def _put(self, protocol, *frames):
+        for frame in frames:
+            self.dispatcher.put(protocol.inbound, frame)
+
+    def test_interpreted_on_next_tick(self):
+        a = self._protocol('a')
+        self._put(a, b'1', b'2')
+        assert not self.interpreted
+        self._tick()
+        assert self.interpreted == [('a', b'1'), ('a', b'2')]
+        assert not self.clock.getDelayedCalls()
+
+    def test_round_robin(self):
+        a = self._protocol('a')
+        b = self._protocol('b')
+        self._put(a, b'1', b'2', b'3')
+        self._put(b, b'4')
+        self._tick()
+        assert self.interpreted == [
+            ('a', b'1'), ('b', b'4'), ('a', b'2'), ('a', b'3')]
+
+    def test_budget_per_tick(self):
+        a = self._protocol('a')
+        b = self._protocol('b')
+        self._put(a, b'1', b'2', b'3', b'4', b'5')
+        self._put(b, b'6')
+        self._tick()
+        assert len(self.interpreted) == 4
+        self._put(b, b'7')
+        self._tick()
+        assert self.interpreted[4:] == [('a', b'4'), ('b', b'7'), ('a', b'5')]
+
+    def test_pause_and_resume(self):
+        a = self._protocol('a')
+        self._put(a, b'1234', b'5678')
+        a.transport.pauseProducing.assert_not_called()
+        self._put(a, b'9ab', b'c')
+        a.transport.pauseProducing.assert_called_once_with()
+        assert a.inbound.paused
+        self._put(a, b'd')
+        a.transport.pauseProducing.assert_called_once_with()
+
+        # 13 bytes queued, resumed with no more than 5 left
+        self.dispatcher.messages_per_tick = 1
+        self._tick()
+        a.transport.resumeProducing.assert_not_called()
+        self._tick()
+        a.transport.resumeProducing.assert_called_once_with()
+        assert not a.inbound.paused
+
+    def test_discard(self):
+        a = self._protocol('a')
+        b = self._protocol('b')
+        self._put(a, b'1', b'2')
+        self._put(b, b'3')
+        self.dispatcher.discard(a.inbound)
+        self.dispatcher.discard(a.inbound)
+        self._tick()
+        assert self.interpreted == [('b', b'3')]
+        assert a.inbound.size == 0
+
+    def test_interpret_failed(self):
+        a = self._protocol('a')
+        b = self._protocol('b')
+        a.interpret_frame = mock.Mock(side_effect=ValueError)
+        self._put(a, b'1', b'2')
+        self._put(b, b'3')
+        self._tick()
+        a.interpret_frame.assert_called_once_with(b'1')
+        a.close.assert_called_once_with()
+        assert self.interpreted == [('b', b'3')]
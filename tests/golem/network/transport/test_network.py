@@ -3,13 +3,16 @@ import logging
 import os
 import time
 import unittest
+from unittest import mock
 
 from golem_messages import message
 import golem_messages.cryptography
+from twisted.internet.task import Clock
 
 from golem.network.transport.network import ProtocolFactory, SessionFactory, \
     SessionProtocol
-from golem.network.transport import session
+from golem.network.transport import session, tcpnetwork
+from golem.network.transport.inbound import InboundDispatcher
 from golem.network.transport.tcpnetwork import TCPNetwork, TCPListenInfo, \
     TCPListeningInfo, TCPConnectInfo, \
     SocketAddress, BasicProtocol, ServerProtocol, SafeProtocol
@@ -328,7 +331,17 @@ class TestProtocols(unittest.TestCase):
             self.assertNotIn('session', p.__dict__)
 
 
-class TestBasicProtocol(unittest.TestCase):
+class DispatcherMixin:
+    def setUp(self):
+        super().setUp()
+        self.clock = Clock()
+        patcher = mock.patch.object(tcpnetwork, 'DISPATCHER',
+                                    InboundDispatcher(reactor=self.clock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestBasicProtocol(DispatcherMixin, unittest.TestCase):
     def test_send_and_receive_message(self):
         p = BasicProtocol()
         p.transport = Transport()
@@ -341,6 +354,7 @@ class TestBasicProtocol(unittest.TestCase):
         self.assertTrue(p.send_message(msg))
         self.assertEqual(len(p.transport.buff), 1)
         p.dataReceived(p.transport.buff[0])
+        self.clock.advance(0)
         self.assertIsInstance(p.session.msgs[0], message.base.Hello)
         self.assertEqual(msg.timestamp, p.session.msgs[0].timestamp)
         time.sleep(1)
@@ -350,7 +364,7 @@ class TestBasicProtocol(unittest.TestCase):
         self.assertEqual(len(p.transport.buff), 2)
         db = p.db
         db.append_bytes(p.transport.buff[1])
-        m = p._data_to_messages()[0]
+        m = p._frame_to_message(next(db.get_len_prefixed_bytes()))
         self.assertEqual(m.timestamp, msg.timestamp)
         p.connectionLost()
         self.assertNotIn('session', p.__dict__)
@@ -367,7 +381,7 @@ class TestServerProtocol(unittest.TestCase):
         self.assertNotIn('session', p.__dict__)
 
 
-class TestSaferProtocol(unittest.TestCase):
+class TestSaferProtocol(DispatcherMixin, unittest.TestCase):
     def test_send_and_receive_message(self):
         p = SafeProtocol(Server())
         p.transport = Transport()
@@ -381,6 +395,7 @@ class TestSaferProtocol(unittest.TestCase):
         self.assertTrue(p.send_message(msg))
         self.assertEqual(len(p.transport.buff), 1)
         p.dataReceived(p.transport.buff[0])
+        self.clock.advance(0)
         self.assertIsInstance(p.session.msgs[0], message.base.Hello)
         p.connectionLost()
         self.assertNotIn('session', p.__dict__)
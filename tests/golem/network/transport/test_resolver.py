@@ -0,0 +1,130 @@
+import socket
+import unittest
+from unittest import mock
+
+from twisted.internet.defer import Deferred
+
+from golem.network.transport import resolver
+from golem.network.transport.resolver import HostResolver
+
+
+def results(deferred: Deferred) -> list:
+    output = []
+    deferred.addCallback(output.append)
+    return output
+
+
+class TestHostResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = HostResolver(ttl=10, negative_ttl=5,
+                                     reactor=mock.Mock())
+        self.lookups = []
+        patcher = mock.patch.object(resolver.threads, 'deferToThreadPool',
+                                    side_effect=self._defer_to_thread_pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _defer_to_thread_pool(self, _reactor, _pool, func, host):
+        assert func is resolver._getaddrinfo
+        deferred = Deferred()
+        self.lookups.append((host, deferred))
+        return deferred
+
+    def test_ip_address(self):
+        assert results(self.resolver.resolve('10.0.0.1', 40102)) == \
+            [[('10.0.0.1', 40102)]]
+        assert results(self.resolver.resolve('::1', 40102)) == \
+            [[('::1', 40102)]]
+        assert not self.lookups
+
+    def test_resolve(self):
+        output = results(self.resolver.resolve('example.com', 40102))
+        assert not output
+        assert [host for host, _ in self.lookups] == ['example.com']
+
+        self.lookups[0][1].callback(['10.0.0.1', '10.0.0.2'])
+        assert output == [[('10.0.0.1', 40102), ('10.0.0.2', 40102)]]
+
+    def test_cached(self):
+        self.resolver.resolve('example.com', 40102)
+        self.lookups[0][1].callback(['10.0.0.1'])
+
+        assert results(self.resolver.resolve('example.com', 40104)) == \
+            [[('10.0.0.1', 40104)]]
+        assert len(self.lookups) == 1
+
+    def test_pending_lookup_is_shared(self):
+        first = results(self.resolver.resolve('example.com', 40102))
+        second = results(self.resolver.resolve('example.com', 40104))
+        assert len(self.lookups) == 1
+
+        self.lookups[0][1].callback(['10.0.0.1'])
+        assert first == [[('10.0.0.1', 40102)]]
+        assert second == [[('10.0.0.1', 40104)]]
+
+    @mock.patch('golem.network.transport.resolver.time.time')
+    def test_expired_refreshed_in_background(self, time_mock):
+        time_mock.return_value = 100
+        self.resolver.resolve('example.com', 40102)
+        self.lookups[0][1].callback(['10.0.0.1'])
+
+        time_mock.return_value = 111
+        assert results(self.resolver.resolve('example.com', 40102)) == \
+            [[('10.0.0.1', 40102)]]
+        assert len(self.lookups) == 2
+        # a single refresh at a time
+        self.resolver.resolve('example.com', 40102)
+        assert len(self.lookups) == 2
+
+        self.lookups[1][1].callback(['10.0.0.2'])
+        assert results(self.resolver.resolve('example.com', 40102)) == \
+            [[('10.0.0.2', 40102)]]
+
+    @mock.patch('golem.network.transport.resolver.time.time')
+    def test_negative_cache(self, time_mock):
+        time_mock.return_value = 100
+        output = results(self.resolver.resolve('nosuchaddress', 40102))
+        self.lookups[0][1].errback(socket.gaierror('Name not known'))
+        assert output == [[]]
+
+        time_mock.return_value = 104
+        assert results(self.resolver.resolve('nosuchaddress', 40102)) == [[]]
+        assert len(self.lookups) == 1
+
+        time_mock.return_value = 106
+        output = results(self.resolver.resolve('nosuchaddress', 40102))
+        assert not output
+        assert len(self.lookups) == 2
+
+    @mock.patch('golem.network.transport.resolver.time.time')
+    def test_failed_refresh_keeps_addresses(self, time_mock):
+        time_mock.return_value = 100
+        self.resolver.resolve('example.com', 40102)
+        self.lookups[0][1].callback(['10.0.0.1'])
+
+        time_mock.return_value = 111
+        self.resolver.resolve('example.com', 40102)
+        self.lookups[1][1].errback(socket.gaierror('Temporary failure'))
+        assert results(self.resolver.resolve('example.com', 40102)) == \
+            [[('10.0.0.1', 40102)]]
+
+    def test_clear(self):
+        self.resolver.resolve('example.com', 40102)
+        self.lookups[0][1].callback(['10.0.0.1'])
+        self.resolver.clear()
+
+        self.resolver.resolve('example.com', 40102)
+        assert len(self.lookups) == 2
+
+
+class TestGetaddrinfo(unittest.TestCase):
+
+    @mock.patch('golem.network.transport.resolver.socket.getaddrinfo')
+    def test_distinct_addresses(self, getaddrinfo):
+        getaddrinfo.return_value = [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 0)),
+            (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('::1', 0, 0, 0)),
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 0)),
+        ]
+        assert resolver._getaddrinfo('example.com') == ['10.0.0.1', '::1']
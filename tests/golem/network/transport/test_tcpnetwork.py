@@ -10,9 +10,12 @@ from golem_messages import exceptions as msg_exceptions
 from golem_messages import message
 from golem_messages import factories as msg_factories
 from golem_messages.factories.datastructures import p2p as dt_p2p_factory
+from twisted.internet.defer import succeed
+from twisted.internet.task import Clock
 
 from golem import testutils
 from golem.network.transport import tcpnetwork
+from golem.network.transport.inbound import InboundDispatcher
 from golem.network.transport.tcpnetwork import (SafeProtocol, SocketAddress,
                                                 MAX_MESSAGE_SIZE, TCPNetwork)
 from golem.network.transport.tcpnetwork_helpers import TCPConnectInfo
@@ -29,9 +32,21 @@ class TestConformance(unittest.TestCase, testutils.PEP8MixIn):
     ]
 
 
+def patch_dispatcher(test_case) -> Clock:
+    """ Messages received by the protocols are interpreted when the returned
+    clock is advanced """
+    clock = Clock()
+    patcher = mock.patch.object(tcpnetwork, 'DISPATCHER',
+                                InboundDispatcher(reactor=clock))
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+    return clock
+
+
 class TestBasicProtocol(LogTestCase):
 
     def setUp(self):
+        self.clock = patch_dispatcher(self)
         self.protocol = tcpnetwork.BasicProtocol()
         self.protocol.session = mock.MagicMock()
         self.protocol.session.my_private_key = None
@@ -55,6 +70,8 @@ class TestBasicProtocol(LogTestCase):
         packed_data = struct.pack("!L", len(data)) + data
         load_mock.return_value = m
         self.protocol.dataReceived(packed_data)
+        self.protocol.session.interpret.assert_not_called()
+        self.clock.advance(0)
         self.assertEqual(self.protocol.session.interpret.call_args[0][0], m)
 
     @mock.patch(
@@ -66,12 +83,30 @@ class TestBasicProtocol(LogTestCase):
         self.assertIsNone(self.protocol.dataReceived(data))
         self.assertEqual(load_mock.call_count, 0)
 
+    @mock.patch('golem_messages.load')
+    @mock.patch('golem.network.capture.TrafficCapture.instance')
+    def test_capture(self, capture_mock, load_mock):
+        self.protocol.opened = True
+        msg = message.base.Disconnect(reason=None)
+        load_mock.return_value = msg
+        data = msg.serialize()
+        self.protocol.dataReceived(struct.pack("!L", len(data)) + data)
+        self.clock.advance(0)
+        capture_mock.received.assert_called_once_with(
+            self.protocol.session, msg)
+
+        self.protocol.send_message(msg)
+        capture_mock.sent.assert_called_once_with(self.protocol.session, msg)
+
+        session = self.protocol.session
+        self.protocol.connectionLost()
+        capture_mock.closed.assert_called_once_with(session)
+
     def hello(self, version=str(gm_version)):
         msg = msg_factories.base.HelloFactory()
         msg._version = version
         serialized = golem_messages.dump(msg, None, None)
-        self.protocol.db.append_len_prefixed_bytes(serialized)
-        self.protocol._data_to_messages()
+        self.protocol._frame_to_message(serialized)
 
     @mock.patch('golem.network.transport.tcpnetwork.BasicProtocol.send_message')
     @mock.patch('golem.network.transport.tcpnetwork.BasicProtocol.close')
@@ -101,6 +136,7 @@ class TestBasicProtocol(LogTestCase):
 
 class SafeProtocolTestCase(unittest.TestCase):
     def setUp(self):
+        self.clock = patch_dispatcher(self)
         self.protocol = SafeProtocol(MagicMock())
         self.protocol.opened = True
         self.protocol.session = mock.MagicMock()
@@ -122,10 +158,12 @@ class SafeProtocolTestCase(unittest.TestCase):
             load_mock.return_value = msg
             for _ in range(0, 100):
                 self.protocol.dataReceived(packed_data)
+            self.clock.advance(0)
             self.protocol.session.interpret.assert_called_once_with(msg)
             frozen_datetime.move_to("2017-01-14 10:30:45")
             self.protocol.session.interpret.reset_mock()
             self.protocol.dataReceived(packed_data)
+            self.clock.advance(0)
             self.protocol.session.interpret.assert_called_once_with(msg)
 
 
@@ -194,3 +232,34 @@ class TestTCPNetworkConnections(unittest.TestCase):
         connect_all(TCPConnectInfo(self.addresses, mock.Mock(), mock.Mock()))
         assert not connect.called
         assert call.called
+
+    @mock.patch('golem.network.transport.tcpnetwork.RESOLVER')
+    def test_hostname_resolved(self, resolver):
+        resolver.resolve.return_value = succeed([('10.0.0.1', 40102),
+                                                 ('10.0.0.2', 40102)])
+        network = TCPNetwork(mock.Mock())
+        connect_all = mock.Mock()
+        network._TCPNetwork__try_to_connect_to_addresses = connect_all
+        connect_info = TCPConnectInfo([SocketAddress('example.com', 40102)]
+                                      + self.addresses,
+                                      mock.Mock(), mock.Mock())
+
+        network._TCPNetwork__try_to_connect_to_address(connect_info)
+        resolver.resolve.assert_called_once_with('example.com', 40102)
+        connect_all.assert_called_once_with(connect_info)
+        assert connect_info.socket_addresses == [
+            SocketAddress('10.0.0.1', 40102),
+            SocketAddress('10.0.0.2', 40102),
+        ] + self.addresses
+
+    @mock.patch('golem.network.transport.tcpnetwork.RESOLVER')
+    def test_hostname_not_resolved(self, resolver):
+        resolver.resolve.return_value = succeed([])
+        network = TCPNetwork(mock.Mock())
+        failure = mock.Mock()
+        network._TCPNetwork__connection_to_address_failure = failure
+        connect_info = TCPConnectInfo([SocketAddress('example.com', 40102)],
+                                      mock.Mock(), mock.Mock())
+
+        network._TCPNetwork__try_to_connect_to_address(connect_info)
+        failure.assert_called_once_with(connect_info)
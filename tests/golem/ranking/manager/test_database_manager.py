@@ -251,3 +251,14 @@ class TestDatabaseManager(DatabaseFixture):
         """Should throw exception for WRONG_COMPUTED increase."""
         with self.assertRaises(KeyError):
             Trust.WRONG_COMPUTED.increase('alpha', 0.3)
+
+    def test_getters_do_not_create_rank(self):
+        assert dm.get_requestor_efficiency('alpha') == 1.0
+        assert dm.get_requestor_assigned_sum('alpha') == 0
+        assert dm.get_requestor_paid_sum('alpha') == 0
+        assert dm.get_provider_efficiency('alpha') == 1.0
+        assert dm.get_provider_efficacy('alpha').vector == (0., 0., 0., 0.)
+        assert dm.get_local_rank('alpha') is None
+
+        dm.update_requestor_assigned_sum('alpha', 5)
+        assert dm.get_requestor_assigned_sum('alpha') == 5
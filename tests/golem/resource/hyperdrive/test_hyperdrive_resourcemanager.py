@@ -10,6 +10,7 @@ from twisted.internet.defer import Deferred
 from twisted.python.failure import Failure
 
 from golem.network.hyperdrive.client import HyperdriveClient
+from golem.resource.contentstore import ContentStore
 from golem.resource.dirmanager import DirManager
 from golem.resource.hyperdrive.resource import Resource, ResourceError
 from golem.resource.hyperdrive.resourcesmanager import \
@@ -232,6 +233,79 @@ class TestHyperdriveResourceManager(TempDirFixture):
         assert isinstance(deferred.result, Failure)
 
 
+@patch('golem.network.hyperdrive.client.HyperdriveClient.add',
+       return_value='resource_hash')
+class TestHyperdriveResourceManagerContentStore(TempDirFixture):
+
+    def setUp(self):
+        super().setUp()
+
+        self.dir_manager = DirManager(self.tempdir)
+        self.content_store = ContentStore(
+            os.path.join(self.tempdir, 'store'))
+        self.resource_manager = HyperdriveResourceManager(  # noqa pylint: disable=unexpected-keyword-arg
+            self.dir_manager,
+            content_store=self.content_store,
+            **hyperdrive_client_kwargs()
+        )
+
+    def _create_files(self, task_id):
+        res_dir = self.dir_manager.get_task_resource_dir(task_id)
+        file_path = os.path.join(res_dir, 'test_file')
+        with open(file_path, 'w') as f:
+            f.write('test content')
+        return {file_path: 'test_file'}
+
+    def test_add_files_stores_files(self, _add):
+        resource_hash, _ = self.resource_manager.add_files(
+            self._create_files('task_1'), 'task_1')
+
+        manifest = self.content_store.get_manifest(resource_hash)
+        assert list(manifest) == ['test_file']
+        assert self.content_store.ref_count(manifest['test_file']) == 1
+
+    def test_add_files_reuses_shared_hash(self, add):
+        self.resource_manager.add_files(self._create_files('task_1'), 'task_1')
+        files = self._create_files('task_2')
+        # digests are known for the files added before
+        self.content_store.add_file(next(iter(files)))
+
+        resource_hash, _ = self.resource_manager.add_files(files, 'task_2')
+
+        assert resource_hash == 'resource_hash'
+        assert add.call_count == 1
+
+    def test_remove_resources_shared_hash(self, _add):
+        self.resource_manager.add_files(self._create_files('task_1'), 'task_1')
+        files = self._create_files('task_2')
+        self.content_store.add_file(next(iter(files)))
+        self.resource_manager.add_files(files, 'task_2')
+
+        with patch.object(self.resource_manager.client,
+                          'cancel_async') as cancel:
+            self.resource_manager.remove_resources('task_1')
+            assert not cancel.called
+            self.resource_manager.remove_resources('task_2')
+            assert cancel.called
+
+    def test_pull_resource_from_store(self, _add):
+        resource_hash, _ = self.resource_manager.add_files(
+            self._create_files('task_1'), 'task_1')
+        success, error = Mock(), Mock()
+
+        with patch.object(self.resource_manager, '_pull') as pull:
+            self.resource_manager.pull_resource(
+                (resource_hash, ['test_file']), 'task_2',
+                success=success, error=error)
+
+        path = self.resource_manager.storage.get_path('test_file', 'task_2')
+        assert not pull.called
+        assert not error.called
+        success.assert_called_once_with(
+            (resource_hash, ['test_file']), [path], 'task_2')
+        assert os.path.isfile(path)
+
+
 class TestHandleAsync(TestCase):
 
     @staticmethod
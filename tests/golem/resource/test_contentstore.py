@@ -0,0 +1,244 @@
+from unittest.mock import patch
+import os
+import stat
+
+from golem.resource.contentstore import ContentStore, file_digest, \
+    clone_or_copy, link_or_copy
+from golem.testutils import TempDirFixture
+
+
+class ContentStoreTestBase(TempDirFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.store_dir = os.path.join(self.path, 'store')
+        self.src_dir = os.path.join(self.path, 'src')
+        os.makedirs(self.src_dir)
+
+    def _create_file(self, name, content):
+        path = os.path.join(self.src_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+
+class TestCloneOrCopy(ContentStoreTestBase):
+
+    def test_independent_copy(self):
+        src = self._create_file('src', 'content')
+        dst = os.path.join(self.path, 'dst')
+
+        clone_or_copy(src, dst)
+
+        assert not os.path.samefile(src, dst)
+        with open(dst, 'w') as f:
+            f.write('modified')
+        with open(src) as f:
+            assert f.read() == 'content'
+
+    def test_copy(self):
+        src = self._create_file('src', 'content')
+        dst = os.path.join(self.path, 'dst')
+
+        with patch('golem.resource.contentstore._reflink',
+                   side_effect=OSError):
+            clone_or_copy(src, dst)
+
+        assert not os.path.samefile(src, dst)
+        with open(dst) as f:
+            assert f.read() == 'content'
+
+
+class TestLinkOrCopy(ContentStoreTestBase):
+
+    def test_link(self):
+        src = self._create_file('src', 'content')
+        dst = os.path.join(self.path, 'dst')
+
+        link_or_copy(src, dst)
+
+        assert os.path.samefile(src, dst)
+
+    def test_copy(self):
+        src = self._create_file('src', 'content')
+        dst = os.path.join(self.path, 'dst')
+
+        with patch('os.link', side_effect=OSError):
+            link_or_copy(src, dst)
+
+        assert not os.path.samefile(src, dst)
+        with open(dst) as f:
+            assert f.read() == 'content'
+
+
+class TestContentStore(ContentStoreTestBase):
+
+    def test_add_file_deduplicates(self):
+        store = ContentStore(self.store_dir)
+        first = self._create_file('a', 'content')
+        second = self._create_file('dir/b', 'content')
+
+        digest = store.add_file(first)
+
+        assert digest == file_digest(first)
+        assert store.add_file(second) == digest
+        assert len(store) == 1
+        assert store.size == len('content')
+        assert os.path.isfile(store.get_path(digest))
+
+    def test_add_file_links(self):
+        store = ContentStore(self.store_dir)
+        path = self._create_file('a', 'content')
+
+        digest = store.add_file(path)
+        store_path = store.get_path(digest)
+
+        assert os.path.samefile(path, store_path)
+        assert not os.stat(store_path).st_mode & stat.S_IWUSR
+
+    def test_cached_digest(self):
+        store = ContentStore(self.store_dir)
+        path = self._create_file('a', 'content')
+        assert store.cached_digest(path) is None
+
+        digest = store.add_file(path)
+        assert store.cached_digest(path) == digest
+
+        os.remove(path)
+        self._create_file('a', 'changed content')
+        assert store.cached_digest(path) is None
+
+    def test_materialize(self):
+        store = ContentStore(self.store_dir)
+        digest = store.add_file(self._create_file('a', 'content'))
+        dst = os.path.join(self.path, 'task', 'res', 'a')
+
+        assert not store.materialize('0' * 40, dst, 'res_id')
+        assert store.materialize(digest, dst, 'res_id')
+        assert os.path.samefile(dst, store.get_path(digest))
+        assert store.ref_count(digest) == 1
+        # materializing again replaces the link
+        assert store.materialize(digest, dst, 'res_id')
+        assert file_digest(dst) == digest
+
+    def test_materialized_file_modification(self):
+        store = ContentStore(self.store_dir)
+        digest = store.add_file(self._create_file('a', 'content'))
+        dst = os.path.join(self.path, 'task', 'res', 'a')
+        store.materialize(digest, dst, 'res_id')
+
+        os.chmod(dst, stat.S_IWUSR | stat.S_IRUSR)
+        with open(dst, 'w') as f:
+            f.write('computed in place')
+
+        other_dst = os.path.join(self.path, 'other', 'res', 'a')
+        assert not store.materialize(digest, other_dst, 'res_id')
+        assert digest not in store
+        assert store.size == 0
+
+    def test_materialize_manifest(self):
+        store = ContentStore(self.store_dir)
+        manifest = store.add_files(self.src_dir, [
+            self._create_file('a', 'a'),
+            self._create_file(os.path.join('dir', 'b'), 'b'),
+        ])
+        store.set_manifest('hash', manifest)
+        dst_dir = os.path.join(self.path, 'task')
+
+        assert store.materialize_manifest('other', dst_dir) is None
+        paths = store.materialize_manifest('hash', dst_dir, 'res_id')
+
+        assert sorted(paths) == sorted([
+            os.path.join(dst_dir, 'a'),
+            os.path.join(dst_dir, 'dir', 'b'),
+        ])
+        assert all(store.ref_count(d) == 1 for d in manifest.values())
+
+    def test_manifests_restored(self):
+        store = ContentStore(self.store_dir)
+        manifest = store.add_files(self.src_dir, [
+            self._create_file('a', 'a'),
+            self._create_file('b', 'b'),
+        ])
+        store.set_manifest('hash', manifest, 'res_id')
+        store.set_manifest('evicted', {'c': '0' * 40})
+
+        restored = ContentStore(self.store_dir)
+
+        assert restored.get_manifest('hash') == manifest
+        assert restored.get_manifest('evicted') is None
+        assert all(restored.ref_count(d) == 1 for d in manifest.values())
+        assert restored.evict(max_size=0) == 0
+
+    def test_evict_drops_manifests(self):
+        store = ContentStore(self.store_dir)
+        digest = store.add_file(self._create_file('a', 'content'))
+        store.set_manifest('hash', {'a': digest})
+
+        store.evict(max_size=0)
+
+        assert store.get_manifest('hash') is None
+        assert ContentStore(self.store_dir).get_manifest('hash') is None
+
+    def test_release(self):
+        store = ContentStore(self.store_dir)
+        digest = store.add_file(self._create_file('a', 'content'))
+        store.acquire([digest], 'res_1')
+        store.acquire([digest], 'res_2')
+
+        store.release('res_1')
+        assert store.ref_count(digest) == 1
+        store.release('res_2')
+        assert store.ref_count(digest) == 0
+
+    def test_evict_budget_lru(self):
+        store = ContentStore(self.store_dir, max_size=8)
+        first = store.add_file(self._create_file('a', 'aaaa'))
+        second = store.add_file(self._create_file('b', 'bbbb'))
+        third = store.add_file(self._create_file('c', 'cccc'))
+        # use the oldest one again
+        store.materialize(first, os.path.join(self.path, 'a'))
+
+        assert store.evict() == 4
+        assert second not in store
+        assert first in store
+        assert third in store
+        assert not os.path.exists(store.get_path(second))
+        assert store.size == 8
+
+    def test_evict_skips_referenced(self):
+        store = ContentStore(self.store_dir)
+        first = store.add_file(self._create_file('a', 'aaaa'))
+        second = store.add_file(self._create_file('b', 'bbbb'))
+        store.acquire([first], 'res_id')
+
+        assert store.evict(max_size=0) == 4
+        assert first in store
+        assert second not in store
+
+    def test_evict_older_than(self):
+        store = ContentStore(self.store_dir)
+        with patch('time.time', return_value=1000.):
+            old = store.add_file(self._create_file('a', 'aaaa'))
+        with patch('time.time', return_value=2000.):
+            new = store.add_file(self._create_file('b', 'bbbb'))
+
+        with patch('time.time', return_value=2100.):
+            assert store.evict(older_than_seconds=500) == 4
+
+        assert old not in store
+        assert new in store
+
+    def test_scan(self):
+        store = ContentStore(self.store_dir)
+        digest = store.add_file(self._create_file('a', 'content'))
+        tmp_path = store.get_path(digest) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write('partial')
+
+        restored = ContentStore(self.store_dir)
+
+        assert digest in restored
+        assert restored.size == store.size
+        assert not os.path.exists(tmp_path)
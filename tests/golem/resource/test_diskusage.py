@@ -0,0 +1,161 @@
+import os
+import time
+from unittest.mock import patch
+
+from golem.resource.diskusage import DiskUsage
+from golem.testutils import TempDirFixture
+
+
+class TestDiskUsage(TempDirFixture):
+
+    def _create_task_dir(self, name, sizes, mtime=None):
+        task_dir = os.path.join(self.path, name)
+        for i, size in enumerate(sizes):
+            path = os.path.join(task_dir, 'output', 'file_{}'.format(i))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'0' * size)
+        if mtime is not None:
+            for dirpath, _, filenames in os.walk(task_dir):
+                for name in filenames + ['.']:
+                    os.utime(os.path.join(dirpath, name), (mtime, mtime))
+        return task_dir
+
+    @staticmethod
+    def _complete(disk_usage, budget=1000):
+        while disk_usage.pending:
+            disk_usage.step(budget)
+
+    def test_measure(self):
+        self._create_task_dir('task_1', [10, 20])
+        self._create_task_dir('task_2', [5])
+        disk_usage = DiskUsage(self.path)
+        assert disk_usage.size == 0
+
+        self._complete(disk_usage)
+
+        assert disk_usage.get_size('task_1') == 30
+        assert disk_usage.get_size('task_2') == 5
+        assert disk_usage.size == 35
+
+    def test_step_budget(self):
+        self._create_task_dir('task_1', [1] * 10)
+        disk_usage = DiskUsage(self.path)
+
+        disk_usage.step(budget=5)
+        assert disk_usage.pending
+        assert disk_usage.size == 0
+
+        self._complete(disk_usage, budget=5)
+        assert disk_usage.size == 10
+
+    def test_update(self):
+        task_dir = self._create_task_dir('task_1', [10])
+        disk_usage = DiskUsage(self.path)
+        self._complete(disk_usage)
+
+        with open(os.path.join(task_dir, 'result'), 'wb') as f:
+            f.write(b'0' * 5)
+        # not measured until marked as changed
+        disk_usage.step()
+        assert disk_usage.size == 10
+
+        disk_usage.update('task_1')
+        self._complete(disk_usage)
+        assert disk_usage.size == 15
+
+    def test_rescan_removed(self):
+        self._create_task_dir('task_1', [10])
+        self._create_task_dir('task_2', [5])
+        disk_usage = DiskUsage(self.path)
+        self._complete(disk_usage)
+
+        self._remove_tree(os.path.join(self.path, 'task_2'))
+        disk_usage.rescan()
+
+        assert disk_usage.size == 10
+
+    def test_remove_older_than(self):
+        now = time.time()
+        self._create_task_dir('old', [10], mtime=now - 3600)
+        self._create_task_dir('new', [5])
+        disk_usage = DiskUsage(self.path)
+        self._complete(disk_usage)
+
+        disk_usage.remove_older_than(60)
+        self._complete(disk_usage, budget=1)
+
+        assert os.listdir(self.path) == ['new']
+        assert disk_usage.size == 5
+
+    def test_remove_all(self):
+        self._create_task_dir('task_1', [10])
+        self._create_task_dir('task_2', [5])
+        disk_usage = DiskUsage(self.path)
+        self._complete(disk_usage)
+
+        disk_usage.remove_older_than(0)
+        self._complete(disk_usage)
+
+        assert os.listdir(self.path) == []
+        assert disk_usage.size == 0
+
+    def test_on_removed(self):
+        self._create_task_dir('task_1', [10])
+        self._create_task_dir('task_2', [5])
+        removed = []
+        disk_usage = DiskUsage(self.path, on_removed=removed.append)
+        self._complete(disk_usage)
+
+        disk_usage.remove_older_than(0)
+        self._complete(disk_usage, budget=1)
+
+        assert sorted(removed) == ['task_1', 'task_2']
+
+    def test_remove_error(self):
+        self._create_task_dir('task_1', [10])
+        self._create_task_dir('task_2', [5, 5])
+        removed = []
+        disk_usage = DiskUsage(self.path, on_removed=removed.append)
+        self._complete(disk_usage)
+        remove = os.remove
+
+        def remove_task_1(path):
+            if 'task_2' in path:
+                raise PermissionError(path)
+            remove(path)
+
+        disk_usage.remove_older_than(0)
+        with patch('os.remove', side_effect=remove_task_1):
+            self._complete(disk_usage, budget=1)
+
+        assert removed == ['task_1']
+        assert os.listdir(self.path) == ['task_2']
+        assert disk_usage.size == 10
+
+    def test_budget_lru(self):
+        now = time.time()
+        self._create_task_dir('oldest', [10], mtime=now - 300)
+        self._create_task_dir('older', [10], mtime=now - 200)
+        self._create_task_dir('newest', [10], mtime=now - 100)
+        disk_usage = DiskUsage(self.path, max_size=15)
+        self._complete(disk_usage)
+
+        assert sorted(os.listdir(self.path)) == ['newest']
+        assert disk_usage.size == 10
+
+    def test_budget_protected(self):
+        now = time.time()
+        self._create_task_dir('active', [10], mtime=now - 300)
+        self._create_task_dir('inactive', [10], mtime=now - 100)
+        disk_usage = DiskUsage(self.path, max_size=15,
+                               is_protected=lambda name: name == 'active')
+        self._complete(disk_usage)
+
+        assert os.listdir(self.path) == ['active']
+
+    def _remove_tree(self, path):
+        for dirpath, _, filenames in os.walk(path, topdown=False):
+            for name in filenames:
+                os.remove(os.path.join(dirpath, name))
+            os.rmdir(dirpath)
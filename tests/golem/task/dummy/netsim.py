@@ -0,0 +1,304 @@
+"""In-process network simulator and requestor throughput benchmark.
+
+Starts a requesting node and a number of computing nodes as Clients
+sharing a single reactor, listening on loopback ports. Resources and
+results are exchanged with DummyResourceManager instead of Hyperdrive,
+payments go to a mock transaction system and the subtasks of a dummy task
+are computed directly in the providers' threads, without Docker. The dummy
+task stands in for a WASM one, as WASM tasks (apps.wasm) are computed in
+their Docker image, which these Docker-free providers cannot run.
+
+When the task is computed (or the timeout elapses) a report is printed:
+the rate subtasks were assigned at, the rates of the messages sent and
+received by all the nodes, the percentiles of the subtask latency (from
+the assignment to the accepted result) and the lag of the reactor.
+
+Usage: python -m tests.golem.task.dummy.netsim --providers 4 --subtasks 2000
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from unittest import mock
+
+from pydispatch import dispatcher
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+
+from golem.core.metrics import Metric
+from golem.database import Database
+from golem.model import db, DB_FIELDS, DB_MODELS
+from golem.network.transport.tcpnetwork import MESSAGES_RECEIVED, \
+    MESSAGES_SENT, SocketAddress
+from golem.resource.dirmanager import DirManager
+from golem.resource.hyperdrive.resourcesmanager import DummyResourceManager
+from golem.task import rpc as task_rpc
+from golem.task.taskstate import SubtaskOp
+from tests.golem.task.dummy.runner import create_client, DummyEnvironment
+from tests.golem.task.dummy.task import DummyTask, DummyTaskParameters
+
+logger = logging.getLogger(__name__)
+
+# Cheap subtasks, the benchmark measures the task pipeline, not hashing
+DEFAULT_PARAMS = DummyTaskParameters(1024, 2048, 256, 0x00ffffff)
+
+Report = NamedTuple('Report', [
+    ('providers', int),
+    ('subtasks', int),
+    ('finished', int),
+    ('duration', float),
+    ('assignment_rate', float),
+    ('messages_sent', Dict[str, int]),
+    ('messages_received', Dict[str, int]),
+    ('latency', Dict[str, float]),
+    ('lag', Dict[str, float]),
+])
+
+
+def percentiles(values: Sequence[float],
+                fractions: Sequence[float] = (0.5, 0.9, 0.99)) \
+        -> Dict[str, float]:
+    values = sorted(values)
+    if not values:
+        values = [0.]
+    result = {'p{:g}'.format(fraction * 100):
+              values[min(len(values) - 1, int(len(values) * fraction))]
+              for fraction in fractions}
+    result['max'] = values[-1]
+    return result
+
+
+def message_counts(metric: Metric) -> Dict[str, int]:
+    return {key[0]: int(child.value)
+            for key, child in metric.children().items()}
+
+
+def counts_since(before: Dict[str, int], after: Dict[str, int]) \
+        -> Dict[str, int]:
+    counts = {type_: count - before.get(type_, 0)
+              for type_, count in after.items()}
+    return {type_: count for type_, count in counts.items() if count}
+
+
+class SubtaskTimes:
+    """ Times of the subtasks' assignment and completion, from the
+    requestor's TaskManager """
+
+    def __init__(self, task_id: str) -> None:
+        self.task_id = task_id
+        self.assigned: Dict[str, float] = dict()
+        self.finished: Dict[str, float] = dict()
+        dispatcher.connect(self._task_updated, signal='golem.taskmanager')
+
+    def close(self) -> None:
+        dispatcher.disconnect(self._task_updated, signal='golem.taskmanager')
+
+    def _task_updated(self, task_id=None, subtask_id=None, op=None, **_):
+        if task_id != self.task_id or subtask_id is None:
+            return
+        if op == SubtaskOp.ASSIGNED:
+            self.assigned.setdefault(subtask_id, time.time())
+        elif op == SubtaskOp.FINISHED:
+            self.finished.setdefault(subtask_id, time.time())
+
+    def latencies(self) -> List[float]:
+        return [finished - self.assigned[subtask_id]
+                for subtask_id, finished in self.finished.items()
+                if subtask_id in self.assigned]
+
+
+class NetworkSimulation:
+    """ A requesting node and `providers` computing nodes in this process.
+    The reactor can't be restarted, so a simulation runs once per process.
+    """
+
+    def __init__(self,
+                 providers: int = 2,
+                 subtasks: int = 1000,
+                 params: DummyTaskParameters = DEFAULT_PARAMS,
+                 timeout: float = 600.,
+                 datadir: Optional[str] = None) -> None:
+        self.providers = providers
+        self.subtasks = subtasks
+        self.params = params
+        self.timeout = timeout
+        self.datadir = datadir or tempfile.mkdtemp(prefix='golem_netsim_')
+        self.database: Optional[Database] = None
+        self.requestor = None
+        self.clients: list = []
+        self.task: Optional[DummyTask] = None
+        self.times: Optional[SubtaskTimes] = None
+        self.report: Optional[Report] = None
+        self._started = 0.
+        self._messages_sent: Dict[str, int] = dict()
+        self._messages_received: Dict[str, int] = dict()
+
+    def run(self) -> Report:
+        with ExitStack() as stack:
+            for patch in self._patches():
+                stack.enter_context(patch)
+            try:
+                self._start()
+                monitor = LoopingCall(self._check)
+                monitor.start(1., now=False)
+                reactor.run()
+            finally:
+                self._stop()
+        return self.report
+
+    @staticmethod
+    def _patches():
+        daemon_manager = mock.Mock()
+        daemon_manager.public_addresses.return_value = dict()
+        daemon_manager.ports.return_value = {3282}
+        return [
+            mock.patch('golem.client.HyperdriveDaemonManager',
+                       return_value=daemon_manager),
+            mock.patch('golem.client.HyperdriveResourceManager',
+                       DummyResourceManager),
+            mock.patch('golem.task.taskmanager.HyperdriveResourceManager',
+                       DummyResourceManager),
+        ]
+
+    def _start(self) -> None:
+        self.database = Database(db, fields=DB_FIELDS, models=DB_MODELS,
+                                 db_dir=self.datadir)
+
+        self.requestor = self._start_client('requestor', '[Requestor] SIM')
+        self.requestor.environments_manager.add_environment(
+            DummyEnvironment())
+        address = SocketAddress('127.0.0.1', self.requestor.p2pservice.cur_port)
+
+        for n in range(self.providers):
+            client = self._start_client('provider{}'.format(n),
+                                        '[Provider{}] SIM'.format(n))
+            client.task_server.task_computer.support_direct_computation = True
+            dummy_env = DummyEnvironment()
+            dummy_env.accept_tasks = True
+            client.environments_manager.add_environment(dummy_env)
+            client.connect(address)
+
+        task_dir = os.path.join(self.datadir, 'requestor')
+        self.task = DummyTask(self.requestor.get_node_name(), self.params,
+                              self.subtasks,
+                              self.requestor.keys_auth.public_key)
+        self.task.initialize(DirManager(task_dir))
+        self.times = SubtaskTimes(self.task.header.task_id)
+
+        self._messages_sent = message_counts(MESSAGES_SENT)
+        self._messages_received = message_counts(MESSAGES_RECEIVED)
+        self._started = time.time()
+        task_rpc.enqueue_new_task(self.requestor, self.task)
+
+    def _start_client(self, name: str, node_name: str):
+        datadir = os.path.join(self.datadir, name)
+        os.makedirs(os.path.join(datadir, 'logs'), exist_ok=True)
+        client = create_client(datadir, node_name, database=self.database)
+        client.are_terms_accepted = lambda: True
+        client.start()
+        self.clients.append(client)
+        return client
+
+    def _check(self) -> None:
+        finished = self.task.finished_computation()
+        if not finished and time.time() - self._started < self.timeout:
+            return
+        self.report = self._make_report()
+        reactor.stop()
+
+    def _make_report(self) -> Report:
+        duration = time.time() - self._started
+        assigned = self.times.assigned.values()
+        assigning = max(assigned) - self._started if assigned else 0.
+        diagnostics = self.requestor.reactor_diagnostics
+        lag = percentiles(diagnostics.recent_lag)
+        lag['mean'] = diagnostics.lag.to_dict()['mean']
+        return Report(
+            providers=self.providers,
+            subtasks=self.subtasks,
+            finished=len(self.times.finished),
+            duration=duration,
+            assignment_rate=len(assigned) / assigning if assigning else 0.,
+            messages_sent=counts_since(self._messages_sent,
+                                       message_counts(MESSAGES_SENT)),
+            messages_received=counts_since(self._messages_received,
+                                           message_counts(MESSAGES_RECEIVED)),
+            latency=percentiles(self.times.latencies()),
+            lag=lag,
+        )
+
+    def _stop(self) -> None:
+        if self.times:
+            self.times.close()
+        for client in self.clients:
+            try:
+                client.stop()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Failed to stop %r', client.get_node_name())
+        if self.database:
+            self.database.close()
+        shutil.rmtree(self.datadir, ignore_errors=True)
+
+
+def format_report(report: Report, top: int = 5) -> str:
+    def rate(counts):
+        return sum(counts.values()) / report.duration \
+            if report.duration else 0.
+
+    def seconds(stats):
+        return ', '.join('{} {:.3f} s'.format(key, value)
+                         for key, value in stats.items())
+
+    busiest = sorted(report.messages_received.items(),
+                     key=lambda item: item[1], reverse=True)[:top]
+    return '\n'.join([
+        '{r.finished}/{r.subtasks} subtasks computed by {r.providers} '
+        'providers in {r.duration:.1f} s'.format(r=report),
+        'assigned {:.1f} subtasks/s'.format(report.assignment_rate),
+        'messages: {} sent ({:.1f}/s), {} received ({:.1f}/s)'.format(
+            sum(report.messages_sent.values()), rate(report.messages_sent),
+            sum(report.messages_received.values()),
+            rate(report.messages_received)),
+        'most received: ' + ', '.join('{} {}'.format(type_, count)
+                                      for type_, count in busiest),
+        'subtask latency: ' + seconds(report.latency),
+        'reactor lag: ' + seconds(report.lag),
+    ])
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='In-process network simulator and throughput benchmark')
+    parser.add_argument('--providers', type=int, default=2,
+                        help='number of computing nodes')
+    parser.add_argument('--subtasks', type=int, default=1000,
+                        help='number of subtasks of the dummy task')
+    parser.add_argument('--difficulty', type=lambda x: int(x, 0),
+                        default=DEFAULT_PARAMS.difficulty,
+                        help='difficulty of a subtask, e.g. 0x00ffffff')
+    parser.add_argument('--timeout', type=float, default=600.,
+                        help='seconds to wait for the task to be computed')
+    parsed = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.WARNING)
+    params = DummyTaskParameters(DEFAULT_PARAMS.shared_data_size,
+                                 DEFAULT_PARAMS.subtask_data_size,
+                                 DEFAULT_PARAMS.result_size,
+                                 parsed.difficulty)
+    simulation = NetworkSimulation(parsed.providers, parsed.subtasks, params,
+                                   parsed.timeout)
+    report = simulation.run()
+    if report is None:
+        print('Simulation failed to start')
+        return 1
+    print(format_report(report))
+    return 0 if report.finished == report.subtasks else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -59,8 +59,9 @@ def override_ip_info(*_, **__):
     return '1.2.3.4', 40102
 
 
-def create_client(datadir, node_name):
-    # executed in a subprocess
+def create_client(datadir, node_name, database=None):
+    # executed in a subprocess, or in-process by netsim with a database
+    # shared by all the nodes
     from golem.network.stun import pystun
     pystun.get_ip_info = override_ip_info
 
@@ -81,8 +82,9 @@ def create_client(datadir, node_name):
             difficulty=config_desc.key_difficulty,
         )
 
-    database = Database(
-        db, fields=DB_FIELDS, models=DB_MODELS, db_dir=datadir)
+    if database is None:
+        database = Database(
+            db, fields=DB_FIELDS, models=DB_MODELS, db_dir=datadir)
 
     from golem.hardware.presets import HardwarePresets
     HardwarePresets.initialize(datadir)
@@ -0,0 +1,78 @@
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from pydispatch import dispatcher
+import pytest
+
+from golem.task.taskstate import SubtaskOp
+from tests.golem.task.dummy import netsim
+
+
+class TestReport(unittest.TestCase):
+
+    def test_percentiles(self):
+        assert netsim.percentiles(range(100, 0, -1)) == \
+            {'p50': 51, 'p90': 91, 'p99': 100, 'max': 100}
+        assert netsim.percentiles([]) == \
+            {'p50': 0., 'p90': 0., 'p99': 0., 'max': 0.}
+
+    def test_counts_since(self):
+        before = {'Hello': 2, 'Ping': 1}
+        after = {'Hello': 2, 'Ping': 4, 'WantToCompute': 1}
+        assert netsim.counts_since(before, after) == \
+            {'Ping': 3, 'WantToCompute': 1}
+
+    def test_format_report(self):
+        report = netsim.Report(
+            providers=2, subtasks=10, finished=10, duration=2.,
+            assignment_rate=5., messages_sent={'Hello': 4},
+            messages_received={'Hello': 2, 'Ping': 6},
+            latency=netsim.percentiles([0.5]), lag=netsim.percentiles([]))
+        lines = netsim.format_report(report, top=1).splitlines()
+        assert lines[0] == '10/10 subtasks computed by 2 providers in 2.0 s'
+        assert lines[2] == \
+            'messages: 4 sent (2.0/s), 8 received (4.0/s)'
+        assert lines[3] == 'most received: Ping 6'
+
+
+@mock.patch('tests.golem.task.dummy.netsim.time.time')
+class TestSubtaskTimes(unittest.TestCase):
+
+    def setUp(self):
+        self.times = netsim.SubtaskTimes('task')
+
+    def tearDown(self):
+        self.times.close()
+
+    @staticmethod
+    def _send(task_id, subtask_id, op):
+        dispatcher.send(signal='golem.taskmanager',
+                        event='task_status_updated', task_id=task_id,
+                        task_state=None, subtask_id=subtask_id, op=op)
+
+    def test_latencies(self, time_mock):
+        time_mock.return_value = 10.
+        self._send('task', 's1', SubtaskOp.ASSIGNED)
+        self._send('task', 's2', SubtaskOp.ASSIGNED)
+        self._send('other', 's3', SubtaskOp.ASSIGNED)
+        time_mock.return_value = 12.
+        self._send('task', 's1', SubtaskOp.VERIFYING)
+        self._send('task', 's1', SubtaskOp.FINISHED)
+        self._send('task', None, None)
+
+        assert self.times.assigned == {'s1': 10., 's2': 10.}
+        assert self.times.latencies() == [2.]
+
+
+@pytest.mark.slow
+class TestNetworkSimulation(unittest.TestCase):
+
+    def test_simulation(self):
+        # the reactor can't be restarted in the test process
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'tests.golem.task.dummy.netsim',
+             '--providers', '2', '--subtasks', '20', '--timeout', '120'])
+        assert output.decode().startswith(
+            '20/20 subtasks computed by 2 providers')
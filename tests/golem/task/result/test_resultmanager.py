@@ -3,8 +3,11 @@ import os
 
 from unittest.mock import Mock, patch
 
+from twisted.internet.defer import Deferred
+
 from golem.resource.dirmanager import DirManager
 from golem.resource.hyperdrive.resourcesmanager import DummyResourceManager
+from golem.task.result import resultmanager
 from golem.task.result.resultmanager import EncryptedResultPackageManager
 from golem.task.result.resultpackage import ExtractedPackage
 from golem.tools.testdirfixture import TestDirFixture
@@ -122,6 +125,52 @@ class TestEncryptedResultPackageManager(TestDirFixture):
         for f in extracted.files:
             assert os.path.exists(os.path.join(extracted.files_dir, f))
 
+    def testExtractMetrics(self):
+        manager = EncryptedResultPackageManager(self.resource_manager)
+        data, secret = create_package(manager, self.node_name, self.task_id)
+        path = data[1]
+        size = os.path.getsize(path)
+        extracted_bytes = resultmanager.EXTRACTED_BYTES.labels()
+        duration = resultmanager.EXTRACTION_DURATION.labels()
+        bytes_before, count_before = extracted_bytes.value, duration.count
+
+        manager.extract(path, key_or_secret=secret)
+
+        assert extracted_bytes.value == bytes_before + size
+        assert duration.count == count_before + 1
+
+    @patch('golem.task.result.resultmanager.golem_async.async_run')
+    def testPullPackageWorkers(self, async_run):
+        extractions = []
+
+        def run(*_):
+            extractions.append(Deferred())
+            return extractions[-1]
+
+        async_run.side_effect = run
+        resource_manager = Mock()
+        resource_manager.storage.get_path.side_effect = \
+            lambda name, _: os.path.join(self.path, name)
+        resource_manager.pull_resource.side_effect = \
+            lambda *_, success, **__: success()
+        waiting = resultmanager.EXTRACTIONS_WAITING.labels()
+        waiting_before = waiting.value
+
+        with patch.object(EncryptedResultPackageManager, 'extract_workers', 2):
+            manager = EncryptedResultPackageManager(resource_manager)
+        for subtask_id in ('a', 'b', 'c'):
+            manager.pull_package('hash', self.task_id, subtask_id, b'secret',
+                                 success=Mock(), error=Mock())
+
+        assert async_run.call_count == 2
+        assert waiting.value == waiting_before + 1
+
+        extractions[0].callback(None)
+        assert async_run.call_count == 3
+        assert async_run.call_args[0][0].kwargs['output_dir'] == \
+            os.path.join(self.path, 'c')
+        assert waiting.value == waiting_before
+
     def testPullPackage(self):
         manager = EncryptedResultPackageManager(self.resource_manager)
         data, secret = create_package(manager, self.node_name, self.task_id)
@@ -1,4 +1,5 @@
 import uuid
+import zipfile
 from os import makedirs, listdir
 from os.path import basename, exists, join, relpath
 from pathlib import Path
@@ -6,7 +7,8 @@ from pathlib import Path
 from golem.core.fileencrypt import FileEncryptor
 from golem.resource.dirmanager import DirManager
 from golem.task.result.resultpackage import EncryptingPackager, \
-    EncryptingTaskResultPackager, ExtractedPackage, ZipPackager, backup_rename
+    EncryptingTaskResultPackager, ExtractedPackage, StreamingZipExtractor, \
+    ZipPackager, backup_rename
 from golem.testutils import TempDirFixture
 
 
@@ -148,6 +150,91 @@ class TestEncryptingPackager(PackageDirContentsFixture):
 
         self.assertTrue(len(files) == len(self.all_files))
 
+    def testExtractKeepsArchive(self):
+        ep = EncryptingPackager(self.secret)
+        ep.create(self.out_path, self.disk_files)
+        backup_rename(ep.package_name(self.out_path))
+        files, out_dir = ep.extract(self.out_path, self.res_dir)
+
+        self.assertFalse(exists(self.out_path))
+        self.assertEqual(out_dir, self.res_dir)
+        with zipfile.ZipFile(ep.package_name(self.out_path)) as zf:
+            self.assertEqual(zf.namelist(), files)
+
+
+def _chunks(path, size=7):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class TestStreamingZipExtractor(TempDirFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.zip_path = join(self.path, 'package.zip')
+        self.copy_path = join(self.path, 'copy.zip')
+        self.out_dir = join(self.path, 'out')
+
+    def _create(self, entries, compression=zipfile.ZIP_STORED):
+        with zipfile.ZipFile(self.zip_path, 'w', compression) as zf:
+            for name, data in entries:
+                zf.writestr(name, data)
+
+    def _extract(self, chunks=None):
+        with open(self.copy_path, 'wb') as archive:
+            extractor = StreamingZipExtractor(self.out_dir, archive)
+            return extractor.extract(chunks or _chunks(self.zip_path))
+
+    def _assert_copied(self):
+        with open(self.zip_path, 'rb') as f1, open(self.copy_path, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_extract(self):
+        self._create([('dir/', b''), ('dir/file', b'contents' * 100),
+                      ('empty', b'')])
+
+        names = self._extract()
+
+        with zipfile.ZipFile(self.zip_path) as zf:
+            self.assertEqual(names, zf.namelist())
+        with open(join(self.out_dir, 'dir', 'file'), 'rb') as f:
+            self.assertEqual(f.read(), b'contents' * 100)
+        self.assertTrue(exists(join(self.out_dir, 'empty')))
+        self._assert_copied()
+
+    def test_outside_output_dir(self):
+        self._create([('../../evil', b'x'), ('/abs', b'y')])
+
+        self._extract()
+
+        self.assertEqual(sorted(listdir(self.out_dir)), ['abs', 'evil'])
+
+    def test_compressed(self):
+        self._create([('file', b'contents' * 100)], zipfile.ZIP_DEFLATED)
+
+        self.assertIsNone(self._extract())
+        self._assert_copied()
+
+    def test_bad_crc(self):
+        self._create([('file', b'contents')])
+        with open(self.zip_path, 'rb') as f:
+            data = f.read().replace(b'contents', b'Contents')
+
+        with self.assertRaises(zipfile.BadZipFile):
+            self._extract([data])
+
+    def test_truncated(self):
+        self._create([('file', b'contents')])
+        with open(self.zip_path, 'rb') as f:
+            data = f.read()
+
+        with self.assertRaises(zipfile.BadZipFile):
+            self._extract([data[:40]])
+
 
 class TestEncryptingTaskResultPackager(PackageDirContentsFixture):
 
@@ -0,0 +1,77 @@
+from unittest.mock import Mock, patch
+
+from golem.clientconfigdescriptor import ClientConfigDescriptor
+from golem.docker.environment import DockerEnvironment
+from golem.docker.image import DockerImage
+from golem.model import CachedPerformance, Performance
+from golem.task import benchmarkcache
+from golem.testutils import DatabaseFixture
+
+
+def docker_env(*digests):
+    env = Mock(spec=DockerEnvironment)
+    env.docker_images = [Mock(spec=DockerImage, **{
+        'get_digest.return_value': digest}) for digest in digests]
+    return env
+
+
+@patch('golem.task.benchmarkcache.cpu_model', return_value='CPU')
+class TestFingerprint(DatabaseFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.config_desc = ClientConfigDescriptor()
+        self.config_desc.num_cores = 4
+        self.config_desc.max_memory_size = 1024 * 1024
+
+    def test_image_digests(self, _):
+        assert benchmarkcache.image_digests(None) == []
+        assert benchmarkcache.image_digests(docker_env('b', None, 'a')) == \
+            ['a', 'b']
+        assert benchmarkcache.image_digests(docker_env(None)) is None
+
+    def test_no_images(self, _):
+        assert benchmarkcache.env_fingerprint(
+            'env', docker_env(None), self.config_desc) is None
+
+    def test_fingerprint_changes(self, cpu_model):
+        def fingerprint():
+            return benchmarkcache.env_fingerprint(
+                'env', docker_env(digest), self.config_desc)
+
+        digest = 'a'
+        fingerprints = {fingerprint()}
+        assert fingerprint() in fingerprints
+
+        self.config_desc.num_cores = 2
+        fingerprints.add(fingerprint())
+        self.config_desc.max_memory_size = 512 * 1024
+        fingerprints.add(fingerprint())
+        digest = 'b'
+        fingerprints.add(fingerprint())
+        cpu_model.return_value = 'Other CPU'
+        fingerprints.add(fingerprint())
+
+        assert len(fingerprints) == 5
+
+    def test_fingerprint_mode(self, _):
+        fingerprints = {
+            benchmarkcache.env_fingerprint('env', None, self.config_desc, mode)
+            for mode in ('', 'single', 'parallel-vectorized')}
+        assert len(fingerprints) == 3
+
+    def test_store_and_restore(self, _):
+        env_fp = benchmarkcache.env_fingerprint('env', None, self.config_desc)
+        assert not benchmarkcache.restore(env_fp)
+
+        Performance.update_or_create('env', 100., 400.)
+        benchmarkcache.store(env_fp, 'env')
+        Performance.update_or_create('env', 50.)
+        benchmarkcache.store(env_fp, 'env')
+        assert CachedPerformance.select().count() == 1
+
+        Performance.update_or_create('env', 0.)
+        assert benchmarkcache.restore(env_fp)
+        perf = Performance.get(Performance.environment_id == 'env')
+        assert perf.value == 50.
+        assert perf.aggregate_value is None
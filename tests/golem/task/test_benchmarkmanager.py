@@ -2,8 +2,9 @@ import types
 from unittest.mock import Mock, patch
 
 from apps.appsmanager import AppsManager
+from golem.clientconfigdescriptor import ClientConfigDescriptor
 from golem.environments.environment import Environment as DefaultEnvironment
-from golem.model import Performance
+from golem.model import CachedPerformance, Performance
 from golem.task.benchmarkmanager import BenchmarkManager
 from golem.testutils import DatabaseFixture, PEP8MixIn
 
@@ -33,7 +34,9 @@ class TestBenchmarkManager(DatabaseFixture, PEP8MixIn):
         am = AppsManager()
         am.load_all_apps()
         am._benchmark_enabled = Mock(return_value=True)
-        self.b = BenchmarkManager("NODE1", Mock(), self.path,
+        task_server = Mock()
+        task_server.client.config_desc = ClientConfigDescriptor()
+        self.b = BenchmarkManager("NODE1", task_server, self.path,
                                   am.get_benchmarks())
 
     def test_benchmarks_not_needed_wo_apps(self):
@@ -104,3 +107,118 @@ class TestBenchmarkManager(DatabaseFixture, PEP8MixIn):
         for idx, env_id in enumerate(reversed(list(self.b.benchmarks))):
             assert (1 + idx) * 100 == \
                    Performance.get(Performance.environment_id == env_id).value
+
+    @patch("golem.task.benchmarkmanager.Thread", MockThread)
+    @patch("golem.environments.environment.make_perf_test")
+    @patch("golem.environments.environment.make_parallel_perf_test")
+    @patch("golem.task.benchmarkmanager.BenchmarkRunner")
+    def test_run_parallel_default_benchmark(self, br_mock, mppt_mock,
+                                            mpt_mock):
+        # given
+        Performance.update_or_create(DefaultEnvironment.get_id(), -7)
+        self.b.parallel_default_benchmark = True
+        self.b.task_server.client.config_desc.num_cores = 4
+        mppt_mock.return_value = ([100., 110., 90., 100.], 400.)
+        callback = Mock()
+
+        # when
+        self.b.run_benchmark_for_env_id(
+            DefaultEnvironment.get_id(), callback, Mock())
+
+        # then
+        assert mpt_mock.call_count == 0
+        assert mppt_mock.call_args[0][1] == 4
+        callback.assert_called_once_with(100.)
+        perf = Performance.get(
+            Performance.environment_id == DefaultEnvironment.get_id())
+        assert perf.value == 100.
+        assert perf.aggregate_value == 400.
+
+    def _mock_benchmarks(self):
+        self.b.benchmarks = {
+            'env_{}'.format(i): (Mock(), Mock()) for i in range(3)}
+
+    def _run_all_benchmarks(self, br_mock):
+        def _run():
+            success_callback = br_mock.call_args[1].get('success_callback')
+            return success_callback(br_mock.call_count * 100)
+        br_mock.return_value.run.side_effect = _run
+        self.b.run_all_benchmarks()
+
+    @patch("golem.task.benchmarkmanager.Thread", MockThread)
+    @patch("golem.environments.environment.make_perf_test",
+           return_value=314.15)
+    @patch("golem.task.benchmarkmanager.BenchmarkRunner")
+    def test_run_all_benchmarks_cached(self, br_mock, mpt_mock):
+        self._mock_benchmarks()
+        self._run_all_benchmarks(br_mock)
+        assert CachedPerformance.select().count() == len(self.b.benchmarks) + 1
+        values = {p.environment_id: p.value for p in Performance.select()}
+        Performance.update(value=0.).execute()
+
+        self._run_all_benchmarks(br_mock)
+
+        assert mpt_mock.call_count == 1
+        assert br_mock.call_count == len(self.b.benchmarks)
+        assert values == \
+            {p.environment_id: p.value for p in Performance.select()}
+
+    @patch("golem.task.benchmarkmanager.Thread", MockThread)
+    @patch("golem.environments.environment.make_perf_test",
+           return_value=314.15)
+    @patch("golem.task.benchmarkmanager.BenchmarkRunner")
+    def test_run_all_benchmarks_config_changed(self, br_mock, mpt_mock):
+        self._mock_benchmarks()
+        self._run_all_benchmarks(br_mock)
+        self.b.task_server.client.config_desc.max_memory_size = 1024 * 1024
+
+        self._run_all_benchmarks(br_mock)
+
+        # the default benchmark is run once in lifetime
+        assert mpt_mock.call_count == 1
+        assert br_mock.call_count == 2 * len(self.b.benchmarks)
+
+    @patch("golem.task.benchmarkmanager.Thread", MockThread)
+    @patch("golem.environments.environment.make_perf_test",
+           return_value=314.15)
+    @patch("golem.environments.environment.make_parallel_perf_test",
+           return_value=([200.], 200.))
+    @patch("golem.task.benchmarkmanager.BenchmarkRunner")
+    def test_run_all_benchmarks_mode_changed(self, br_mock, mppt_mock,
+                                             mpt_mock):
+        self._mock_benchmarks()
+        self._run_all_benchmarks(br_mock)
+        self.b.parallel_default_benchmark = True
+        self.b.task_server.client.config_desc.num_cores = 1
+
+        self._run_all_benchmarks(br_mock)
+
+        assert mpt_mock.call_count == 1
+        assert mppt_mock.call_count == 1
+        # the other benchmarks do not depend on the default benchmark's mode
+        assert br_mock.call_count == 2 * len(self.b.benchmarks)
+
+    @patch("golem.task.benchmarkmanager.BenchmarkRunner")
+    def test_run_all_benchmarks_sequentially(self, br_mock):
+        self._mock_benchmarks()
+        Performance.update_or_create(DefaultEnvironment.get_id(), 100.)
+        self.b.task_server.client.config_desc.num_cores = 16
+
+        self.b.run_all_benchmarks()
+
+        assert br_mock.call_count == 1
+        br_mock.call_args[1]['success_callback'](1.)
+        assert br_mock.call_count == 2
+        assert CachedPerformance.select().count() == 1
+
+    @patch("golem.task.benchmarkmanager.BenchmarkRunner")
+    def test_run_benchmarks_error(self, br_mock):
+        benchmarks = {'env_{}'.format(i): (Mock(), Mock()) for i in range(3)}
+        success, error = Mock(), Mock()
+
+        self.b.run_benchmarks(benchmarks, success, error)
+        br_mock.call_args[1]['error_callback']('failed')
+
+        assert br_mock.call_count == 1
+        assert error.call_count == 1
+        success.assert_not_called()
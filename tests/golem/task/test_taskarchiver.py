@@ -1,5 +1,8 @@
+import os
+import pickle
 from datetime import datetime, timedelta
 from unittest import TestCase
+from unittest.mock import patch
 from uuid import uuid4
 
 from freezegun import freeze_time
@@ -7,9 +10,13 @@ from golem_messages.factories.datastructures import p2p as dt_p2p_factory
 from golem_messages.factories.datastructures import tasks as dt_tasks_factory
 import pytz
 
+from golem.appconfig import TASKARCHIVE_FILENAME, \
+    TASKARCHIVE_JOURNAL_FILENAME
+from golem.task import taskarchiver
 from golem.task.taskarchiver import TaskArchiver
 from golem.environments.environment import SupportStatus, UnsupportReason
 from golem.core.common import timeout_to_deadline
+from golem.testutils import TempDirFixture
 
 
 class TestTaskArchiver(TestCase):
@@ -191,3 +198,97 @@ class TestTaskArchiver(TestCase):
         ta.do_maintenance()
         rep = ta.get_unsupport_reasons(5)
         self.assertEqual(self.get_row(rep, UnsupportReason.MAX_PRICE), (2, 4))
+
+
+def run_request(request, *_):
+    request.method(*request.args, **request.kwargs)
+
+
+@patch('golem.task.taskarchiver.golem_async.async_run', run_request)
+class TestTaskArchiverJournal(TempDirFixture):
+
+    header = TestTaskArchiver.header
+    get_row = TestTaskArchiver.get_row
+
+    def setUp(self):
+        super().setUp()
+        self.ssmp = SupportStatus.err({UnsupportReason.MAX_PRICE: "0"})
+        self.ssrt = SupportStatus.err({UnsupportReason.REQUESTOR_TRUST: 0.5})
+        self.journal = os.path.join(self.tempdir,
+                                    TASKARCHIVE_JOURNAL_FILENAME)
+
+    def archiver(self):
+        return TaskArchiver(self.tempdir)
+
+    def add(self, ta, header, status):
+        ta.add_task(header)
+        ta.add_support_status(header.task_id, status)
+        ta.do_maintenance()
+
+    def test_restart(self):
+        ta = self.archiver()
+        past_deadline = timeout_to_deadline(-36000)
+        th1 = self.header(3)
+        th2 = self.header(5, deadline=past_deadline)
+        self.add(ta, th1, self.ssmp)
+        with freeze_time(datetime.now(pytz.utc) - timedelta(days=1)):
+            self.add(ta, th2, self.ssrt)
+        rep = ta.get_unsupport_reasons(5)
+
+        ta = self.archiver()
+        assert ta.get_unsupport_reasons(5) == rep
+        # status of the non-expired task can still change
+        self.add(ta, th1, self.ssrt)
+        rep = ta.get_unsupport_reasons(5)
+        assert self.get_row(rep, UnsupportReason.MAX_PRICE) == (0, 4)
+        assert self.get_row(rep, UnsupportReason.REQUESTOR_TRUST) == (2, 0.5)
+        assert self.archiver().get_unsupport_reasons(5) == rep
+
+    @patch('golem.task.taskarchiver.JOURNAL_COMPACT_MIN_RECORDS', 0)
+    def test_compaction(self):
+        ta = self.archiver()
+        th1 = self.header(3)
+        for _ in range(200):
+            self.add(ta, th1, self.ssmp)
+        rep = ta.get_unsupport_reasons(5)
+
+        with open(self.journal) as f:
+            records = f.readlines()
+        # one day and one non-expired task
+        assert len(records) < 4 * (ta._stats.num_days + 1)
+        assert self.archiver().get_unsupport_reasons(5) == rep
+
+    def test_invalid_records(self):
+        ta = self.archiver()
+        self.add(ta, self.header(3), self.ssmp)
+        with open(self.journal, 'a') as f:
+            f.write('["t", "task_')
+        ta = self.archiver()
+        self.add(ta, self.header(5), self.ssmp)
+        rep = self.archiver().get_unsupport_reasons(5)
+        assert self.get_row(rep, UnsupportReason.MAX_PRICE) == (2, 4)
+
+    def test_legacy_archive(self):
+        with patch('golem.task.taskarchiver.TASKARCHIVE_JOURNAL_FILENAME',
+                   'none'):
+            ta = TaskArchiver()
+        ta.add_task(self.header(3))
+        interval = taskarchiver.TimeInterval(
+            datetime.now(pytz.utc).replace(hour=0, minute=0, second=0,
+                                           microsecond=0))
+        interval.sum_max_price = 5
+        interval.num_tasks = 1
+        interval.cnt_min_version['4.0.0'] = 1
+        interval.cnt_unsupport_reasons[UnsupportReason.MAX_PRICE] = 1
+        archive = taskarchiver.Archive()
+        archive.intervals[interval.start_date] = interval
+        archive.tasks = {tsk.uuid: tsk for tsk in ta._input_tasks}
+        with open(os.path.join(self.tempdir, TASKARCHIVE_FILENAME),
+                  'wb') as f:
+            pickle.dump(archive, f)
+
+        ta = self.archiver()
+        rep = ta.get_unsupport_reasons(5)
+        assert self.get_row(rep, UnsupportReason.MAX_PRICE) == (1, 4)
+        ta.do_maintenance()
+        assert self.archiver().get_unsupport_reasons(5) == rep
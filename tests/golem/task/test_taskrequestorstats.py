@@ -1,7 +1,10 @@
 # pylint: disable=protected-access
+import random
+import time
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
+import pytest
 from pydispatch import dispatcher
 
 from golem import testutils
@@ -264,6 +267,119 @@ class TestTaskInfo(TestCase, testutils.PEP8MixIn):
                         "One subtask should have failed")
 
 
+def count_from_messages(ti: TaskInfo):
+    """Recomputes TaskInfo counts by going through all of the messages"""
+    ops = [msg.op for st in ti.subtasks.values() for msg in st.messages]
+    in_progress = 0
+    not_downloaded = 0
+    for st in ti.subtasks.values():
+        assigned = downloading = False
+        for msg in st.messages:
+            if msg.op == SubtaskOp.ASSIGNED:
+                assigned = True
+            elif msg.op in [SubtaskOp.TIMEOUT, SubtaskOp.FINISHED,
+                            SubtaskOp.FAILED, SubtaskOp.NOT_ACCEPTED]:
+                assigned = False
+            if msg.op == SubtaskOp.RESULT_DOWNLOADING:
+                downloading = True
+            elif msg.op in [SubtaskOp.FINISHED, SubtaskOp.NOT_ACCEPTED]:
+                downloading = False
+        in_progress += assigned and st.latest_status not in [
+            SubtaskStatus.finished, SubtaskStatus.failure]
+        not_downloaded += downloading
+    return dict(
+        verified=sum(st.latest_status == SubtaskStatus.finished
+                     for st in ti.subtasks.values()),
+        not_accepted=ops.count(SubtaskOp.NOT_ACCEPTED),
+        timeout=ops.count(SubtaskOp.TIMEOUT),
+        failed=ops.count(SubtaskOp.FAILED),
+        in_progress=in_progress,
+        not_downloaded=not_downloaded,
+    )
+
+
+class TestTaskInfoCounters(TestCase):
+    OPS_STATUSES = [
+        (SubtaskOp.ASSIGNED, SubtaskStatus.starting),
+        (SubtaskOp.RESULT_DOWNLOADING, SubtaskStatus.downloading),
+        (SubtaskOp.FINISHED, SubtaskStatus.finished),
+        (SubtaskOp.NOT_ACCEPTED, SubtaskStatus.failure),
+        (SubtaskOp.FAILED, SubtaskStatus.failure),
+        (SubtaskOp.TIMEOUT, SubtaskStatus.failure),
+        (SubtaskOp.RESTARTED, SubtaskStatus.restarted),
+        (SubtaskOp.VERIFYING, SubtaskStatus.verifying),
+    ]
+
+    def test_counters_match_messages(self):
+        rand = random.Random(__name__)
+        ti = TaskInfo()
+        ti.got_task_message(TaskMsg(ts=1.0, op=TaskOp.CREATED),
+                            TaskStatus.waiting)
+
+        for i in range(2000):
+            op, status = rand.choice(self.OPS_STATUSES)
+            ti.got_subtask_message('st{}'.format(rand.randrange(50)),
+                                   TaskMsg(ts=1.0 + i, op=op), status)
+
+            expected = count_from_messages(ti)
+            assert ti.verified_results_count() == expected['verified']
+            assert ti.not_accepted_results_count() == \
+                expected['not_accepted']
+            assert ti.timeout_count() == expected['timeout']
+            assert ti.failed_count() == expected['failed']
+            assert ti.in_progress_subtasks_count() == expected['in_progress']
+            assert ti.not_downloaded_count() == expected['not_downloaded']
+
+
+@pytest.mark.slow
+class TestRequestorTaskStatsBenchmark(TestCase):
+    SUBTASKS = 10000
+
+    def test_replay_large_task(self):
+        rs = RequestorTaskStats()
+        tstate = TaskState()
+        tstate.status = TaskStatus.waiting
+        tstate.time_started = 0.0
+        rs.on_message("task1", tstate, op=TaskOp.CREATED)
+
+        started = time.perf_counter()
+        for i in range(self.SUBTASKS):
+            subtask_id = 'st{}'.format(i)
+            tstate.subtask_states[subtask_id] = \
+                taskstate_factory.SubtaskState()
+            sst = tstate.subtask_states[subtask_id]
+            rs.on_message("task1", tstate, subtask_id, SubtaskOp.ASSIGNED)
+            sst.status = SubtaskStatus.downloading
+            rs.on_message("task1", tstate, subtask_id,
+                          SubtaskOp.RESULT_DOWNLOADING)
+            if i % 10:
+                sst.status = SubtaskStatus.finished
+                rs.on_message("task1", tstate, subtask_id,
+                              SubtaskOp.FINISHED)
+            else:
+                sst.status = SubtaskStatus.failure
+                rs.on_message("task1", tstate, subtask_id,
+                              SubtaskOp.NOT_ACCEPTED)
+        tstate.status = TaskStatus.finished
+        rs.on_message("task1", tstate, op=TaskOp.FINISHED)
+        elapsed = time.perf_counter() - started
+        print("Replayed {} subtasks in {:.3f} s".format(
+            self.SUBTASKS, elapsed))
+
+        failed = self.SUBTASKS // 10
+        assert rs.get_current_stats() == CurrentStats(
+            tasks_cnt=1,
+            finished_task_cnt=1,
+            requested_subtasks_cnt=self.SUBTASKS,
+            collected_results_cnt=self.SUBTASKS,
+            verified_results_cnt=self.SUBTASKS - failed,
+            timed_out_subtasks_cnt=0,
+            not_downloadable_subtasks_cnt=0,
+            failed_subtasks_cnt=0,
+            work_offers_cnt=0)
+        assert rs.get_finished_stats().finished_with_failures.tasks_cnt == 1
+
+
 class TestRequestorTaskStats(LogTestCase):
     def compare_task_stats(self, ts1, ts2):
         self.assertGreaterEqual(ts1.total_time, ts2.total_time)
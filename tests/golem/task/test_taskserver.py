@@ -267,6 +267,15 @@ class TestTaskServer(TaskServerTestBase):  # noqa pylint: disable=too-many-publi
         self.assertEqual(ts.task_computer.task_request_frequency, 31)
         # self.assertEqual(ts.task_computer.use_waiting_ttl, False)
 
+    @patch('apps.core.task.coretask.CoreTask.VERIFICATION_QUEUE')
+    def test_change_config_verification_queue(self, queue, *_):
+        ccd2 = ClientConfigDescriptor()
+        ccd2.num_cores = 3
+        ccd2.max_memory_size = 4 * 1024 * 1024
+        self.ts.change_config(ccd2)
+        queue.configure.assert_called_once_with(
+            num_cores=3, max_memory_size=4 * 1024 * 1024)
+
     @patch("golem.task.taskserver.TaskServer._sync_pending")
     def test_sync(self, mock_sync_pending, *_):
         self.ts.sync_network()
@@ -809,6 +818,24 @@ class TaskServerTaskHeaderTest(TaskServerTestBase):
         self.assertTrue(ts.add_task_header(task_header))
         self.assertEqual(len(ts.get_others_tasks_headers()), 2)
 
+    def test_add_known_task_header(self, *_):
+        keys_auth_2 = KeysAuth(
+            os.path.join(self.path, "2"),
+            'priv_key',
+            'password',
+        )
+
+        ts = self.ts
+
+        task_header = get_example_task_header(keys_auth_2.public_key)
+        task_header.sign(private_key=keys_auth_2._private_key)  # noqa pylint:disable=no-value-for-parameter
+
+        with patch.object(ts, 'verify_header_sig',
+                          wraps=ts.verify_header_sig) as verify:
+            self.assertTrue(ts.add_task_header(task_header))
+            self.assertTrue(ts.add_task_header(task_header))
+        verify.assert_called_once_with(task_header)
+
     def test_add_task_header_past_deadline(self):
         keys_auth_2 = KeysAuth(
             os.path.join(self.path, "2"),
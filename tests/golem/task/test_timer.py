@@ -4,7 +4,8 @@ from datetime import timedelta
 
 from freezegun import freeze_time
 
-from golem.task.timer import ActionTimer, ActionTimers, ThirstTimer
+from golem.task.timer import ActionTimer, ActionTimers, ThirstTimer, \
+    ACTION_DURATION
 
 
 class TestActionTimer(unittest.TestCase):
@@ -122,3 +123,18 @@ class TestActionTimers(unittest.TestCase):
         timer.finish(identifier)
 
         assert timer.remove(identifier) == 5
+
+    @freeze_time("2018-01-01 00:00:00", as_arg=True)
+    def test_duration_metric(frozen_time, self):
+        timer = ActionTimers('test_action')
+        duration = ACTION_DURATION.labels('test_action')
+        count = duration.count
+        identifier = str(uuid.uuid4())
+
+        timer.start(identifier)
+        frozen_time.tick(timedelta(seconds=5))
+        timer.finish(identifier)
+        timer.finish(identifier)
+
+        assert duration.count == count + 1
+        assert duration.sum >= 5
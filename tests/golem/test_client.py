@@ -27,7 +27,7 @@ from golem.client import Client, ClientTaskComputerEventListener, \
     DoWorkService, MonitoringPublisherService, \
     NetworkConnectionPublisherService, \
     ResourceCleanerService, TaskArchiverService, \
-    TaskCleanerService
+    TaskCleanerService, DiskUsageService
 from golem.clientconfigdescriptor import ClientConfigDescriptor
 from golem.config.active import EthereumConfig
 from golem.core.common import timeout_to_string
@@ -37,7 +37,7 @@ from golem.hardware.presets import HardwarePresets
 from golem.manager.nodestatesnapshot import ComputingSubtaskStateSnapshot
 from golem.network.p2p.peersession import PeerSessionInfo
 from golem.report import StatusPublisher
-from golem.resource.dirmanager import DirManager
+from golem.resource.dirmanager import DirManager, DirectoryType
 from golem.rpc.mapping.rpceventnames import UI, Environment, Golem
 from golem.task import taskstate
 from golem.task.acl import Acl
@@ -179,6 +179,8 @@ class TestClient(TestClientBase):
         self.additional_dir_content([3], d)
         c.remove_distributed_files()
         self.assertEqual(os.listdir(d), [])
+        store = c.resource_server.resource_manager.content_store
+        self.assertEqual(store.release.call_count, 3)
 
         d = c.get_received_files_dir()
         self.assertIn(self.path, d)
@@ -186,6 +188,23 @@ class TestClient(TestClientBase):
         c.remove_received_files()
         self.assertEqual(os.listdir(d), [])
 
+    def test_remove_resources_in_background(self, *_):
+        c = self.client
+        c.task_server = Mock()
+        c.resource_server = Mock()
+        c.disk_usage = {
+            DirectoryType.DISTRIBUTED: Mock(),
+            DirectoryType.RECEIVED: Mock(),
+        }
+
+        c.remove_distributed_files(10)
+        c.remove_received_files(20)
+
+        c.disk_usage[DirectoryType.DISTRIBUTED].remove_older_than \
+            .assert_called_once_with(10)
+        c.disk_usage[DirectoryType.RECEIVED].remove_older_than \
+            .assert_called_once_with(20)
+
     def test_quit(self, *_):
         self.client.db = None
         self.client.quit()
@@ -554,12 +573,39 @@ class TestResourceCleanerService(testwithreactor.TestWithReactor):
     def test_run(self):
         self.service._run()
 
+        self.client.evict_stored_resources.assert_called_with(
+            self.older_than_seconds,
+        )
         self.client.remove_distributed_files.assert_called_with(
             self.older_than_seconds,
         )
         self.client.remove_received_files.assert_called_with(
             self.older_than_seconds,
         )
+        # the store is evicted after task directories release their files
+        self.assertEqual(
+            [name for name, _, _ in self.client.method_calls],
+            ['remove_distributed_files', 'remove_received_files',
+             'evict_stored_resources'])
+
+
+class TestDiskUsageService(testwithreactor.TestWithReactor):
+
+    def setUp(self):
+        self.client = Mock()
+        self.service = DiskUsageService(
+            self.client,
+            interval_seconds=1,
+            rescan_every=2,
+        )
+
+    def test_run(self):
+        self.service._run()
+        self.client.update_disk_usage.assert_called_with(rescan=True)
+        self.service._run()
+        self.client.update_disk_usage.assert_called_with(rescan=False)
+        self.service._run()
+        self.client.update_disk_usage.assert_called_with(rescan=True)
 
 
 class TestTaskCleanerService(testwithreactor.TestWithReactor):
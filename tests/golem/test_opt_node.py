@@ -78,7 +78,7 @@ class TestNode(TestWithDatabase):
             node_address,
         )
 
-    @patch('golem.node.Client')
+    @patch('golem.client.Client')
     def test_cfg_and_keys_should_be_passed_to_client(self, mock_client, *_):
         # when
         keys_auth = object()
@@ -215,7 +215,7 @@ class TestNode(TestWithDatabase):
                                      use_talkback=None,
                                      password=None)
 
-    @patch('golem.node.Client')
+    @patch('golem.client.Client')
     def test_mainnet_should_be_passed_to_client(self, mock_client, *_):
         # when
         with mock_config():
@@ -567,7 +567,7 @@ class TestOptNode(TempDirFixture):
         assert reactor.addSystemEventTrigger.call_args[0] == (
             'before', 'shutdown', self.node.rpc_router.stop)
 
-    @patch('golem.node.DockerManager')
+    @patch('golem.docker.manager.DockerManager')
     def test_start_docker_mgr(self, *_):
         # when
         self.node_kwargs['use_docker_manager'] = True
@@ -580,7 +580,7 @@ class TestOptNode(TempDirFixture):
         assert self.node._docker_manager.check_environment.called  # noqa # pylint: disable=no-member
         assert self.node._docker_manager.apply_config.called  # noqa # pylint: disable=no-member
 
-    @patch('golem.node.DockerManager')
+    @patch('golem.docker.manager.DockerManager')
     def test_not_start_docker_mgr(self, *_):
         # when
         self.node_kwargs['use_docker_manager'] = False
@@ -591,7 +591,7 @@ class TestOptNode(TempDirFixture):
         # then
         assert not self.node._docker_manager
 
-    @patch('golem.node.DockerManager')
+    @patch('golem.docker.manager.DockerManager')
     def test_start_docker_unavailable(self, mock_dm, *_):
         self.node_kwargs['use_docker_manager'] = True
         self.node = Node(**self.node_kwargs)
@@ -602,14 +602,15 @@ class TestOptNode(TempDirFixture):
         mock_dm.check_environment.side_effect = FirstError(
             Failure(EnvironmentError()), 0)
 
-        with patch('golem.node.DockerManager.install', return_value=mock_dm):
+        with patch('golem.docker.manager.DockerManager.install',
+                   return_value=mock_dm):
             self.node.start()
 
         setup_client_mock.assert_not_called()
         self.node._docker_manager.apply_config.assert_not_called() # noqa # pylint: disable=no-member
         self.node._docker_manager.check_environment.assert_called() # noqa # pylint: disable=no-member
 
-    @patch('golem.node.DockerManager')
+    @patch('golem.docker.manager.DockerManager')
     def test_start_docker_other_error(self, mock_dm, *_):
         self.node_kwargs['use_docker_manager'] = True
         self.node = Node(**self.node_kwargs)
@@ -617,7 +618,8 @@ class TestOptNode(TempDirFixture):
         mock_dm.check_environment.side_effect = FirstError(
             Failure(Exception(error_msg)), 0)
 
-        with patch('golem.node.DockerManager.install', return_value=mock_dm), \
+        with patch('golem.docker.manager.DockerManager.install',
+                   return_value=mock_dm), \
              self.assertLogs('golem.node', level='INFO') as logs:
             self.node.start()
             output = "\n".join(logs.output)
@@ -633,7 +635,7 @@ class TestOptNode(TempDirFixture):
 
         # when
         self.node = Node(**self.node_kwargs)
-        with patch('golem.task.taskarchiver.TaskArchiver._dump_archive'):
+        with patch('golem.task.taskarchiver.TaskArchiver._write_journal'):
             self.node.start()
 
         # then
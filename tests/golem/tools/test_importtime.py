@@ -0,0 +1,48 @@
+import sys
+from unittest import TestCase
+
+from golem.tools import importtime
+from golem.tools.importtime import ImportRecord
+
+OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       487 |        487 |     numbers
+import time:      1813 |       2300 |   decimal
+import time:      2051 |       4351 | fractions
+Some other output
+"""
+
+
+class TestImportTime(TestCase):
+
+    def test_parse(self):
+        assert importtime.parse(OUTPUT.splitlines()) == [
+            ImportRecord(487, 487, 2, 'numbers'),
+            ImportRecord(1813, 2300, 1, 'decimal'),
+            ImportRecord(2051, 4351, 0, 'fractions'),
+        ]
+
+    def test_report(self):
+        report = importtime.report(importtime.parse(OUTPUT.splitlines()),
+                                   top=1)
+        assert report.splitlines() == [
+            '3 modules imported in 4.4 ms',
+            '',
+            'Slowest modules, cumulative:',
+            '       4.4 ms  fractions',
+            '',
+            'Slowest modules, self:',
+            '       2.1 ms  fractions',
+            '',
+            'Top level packages:',
+            '       2.1 ms  fractions',
+        ]
+
+    def test_measure(self):
+        # not imported by the interpreter on startup
+        records = importtime.measure('fractions', python=sys.executable)
+        names = [record.name for record in records]
+        assert 'fractions' in names
+        fractions = records[names.index('fractions')]
+        assert fractions.depth == 0
+        assert fractions.cumulative_us >= fractions.self_us
@@ -0,0 +1,90 @@
+import os
+from unittest import TestCase
+
+from eth_utils import decode_hex
+from ethereum.utils import denoms
+
+from golem.ethereum.batchplanner import plan_batch
+from golem.model import Payment
+from golem.testutils import DatabaseFixture, TempDirFixture
+from golem.tools import paymentsimulator
+from golem.tools.paymentsimulator import FakeSCI, QueuedPayment
+
+HOUR = 60 * 60
+GWEI = 10 ** 9
+
+
+def hourly_queue(hours: int):
+    """ A payment to one of 3 payees every hour """
+    return [QueuedPayment('subtask-%d' % i, 'payee-%d' % (i % 3),
+                          denoms.ether, i * HOUR)
+            for i in range(hours)]
+
+
+class TestSimulate(TestCase):
+
+    def _simulate(self, planner, gas_prices=()):
+        sci = FakeSCI(10 ** 6 * denoms.ether, 10 * denoms.ether, gas_prices)
+        return paymentsimulator.simulate(hourly_queue(72), sci, planner,
+                                         step=HOUR // 4)
+
+    def test_all_paid(self):
+        for planner in [paymentsimulator.greedy_planner, plan_batch]:
+            report = self._simulate(planner)
+            assert report.payments == 72
+            assert report.paid == 72 * denoms.ether
+            assert report.batches > 1
+            assert report.gas > 0
+
+    def test_constant_gas_price(self):
+        assert self._simulate(plan_batch) == \
+            self._simulate(paymentsimulator.greedy_planner)
+
+    def test_gas_price_peaks(self):
+        # expensive gas for an hour a day, when the payments get due
+        gas_prices = [(hour * HOUR, 100 * GWEI if hour % 24 == 23 else GWEI)
+                      for hour in range(100)]
+        greedy = self._simulate(paymentsimulator.greedy_planner, gas_prices)
+        planned = self._simulate(plan_batch, gas_prices)
+        assert planned.payments == greedy.payments
+        assert planned.fee < greedy.fee
+
+    def test_unpaid(self):
+        sci = FakeSCI(3 * denoms.ether, 10 * denoms.ether)
+        report = paymentsimulator.simulate(hourly_queue(5), sci)
+        assert report.payments == 3
+        assert report.paid == 3 * denoms.ether
+
+    def test_format_report(self):
+        report = paymentsimulator.simulate(
+            hourly_queue(2), FakeSCI(10 * denoms.ether, denoms.ether))
+        assert paymentsimulator.format_report('planner', report) \
+            .startswith('planner: 1 batches, 2 payments, 2.000 GNTB paid')
+
+
+class TestLoad(TempDirFixture):
+
+    def test_load_csv(self):
+        path = os.path.join(self.tempdir, 'payments.csv')
+        with open(path, 'w') as f:
+            f.write('100,0xaa,5\n200,0xbb,7\n')
+        payments = paymentsimulator.load_csv(path)
+        assert [(p.processed_ts, p.payee, p.value) for p in payments] == [
+            (100, '0xaa', 5), (200, '0xbb', 7)]
+
+    def test_load_gas_prices(self):
+        path = os.path.join(self.tempdir, 'prices.csv')
+        with open(path, 'w') as f:
+            f.write('200,3\n100,5\n')
+        assert paymentsimulator.load_gas_prices(path) == [(100, 5), (200, 3)]
+
+
+class TestLoadDb(DatabaseFixture):
+
+    def test_load_db(self):
+        Payment.create(subtask='s1', payee=decode_hex('0xaa'),
+                       value=2 ** 70, processed_ts=100)
+        Payment.create(subtask='s2', payee=decode_hex('0xbb'), value=1)
+        payments = paymentsimulator.load_db(
+            os.path.join(self.tempdir, 'golem.db'))
+        assert payments == [QueuedPayment('s1', 'aa', 2 ** 70, 100)]